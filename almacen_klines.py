@@ -0,0 +1,236 @@
+"""
+Almacén local de velas (klines) por símbolo e intervalo.
+
+Cada serie se guarda como una carpeta con un archivo binario de ancho fijo
+por columna (tiempo de apertura, OHLC, volumen y nº de trades). Las descargas
+continúan desde la última vela cerrada guardada y solo añaden al final; los
+lectores abren las columnas con np.memmap y reciben vistas sin copia de
+cualquier rango de tiempo, sin cargar los archivos en memoria.
+
+Uso: python almacen_klines.py [intervalo] [días] [SIMBOLO ...]
+(sin símbolos descarga los pares de bot_telegram.py y bot_telegram2.py, definidos en config.py)
+"""
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+import numpy as np
+from binance.helpers import date_to_milliseconds
+
+from backtesting import Velas
+
+RUTA_POR_DEFECTO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "datos", "klines")
+DIAS_POR_DEFECTO = 30
+LIMITE_PETICION = 1000        # velas por llamada a get_klines (máximo de Binance)
+
+# Columna -> (tipo en disco, índice en la respuesta de get_klines)
+COLUMNAS = {
+    "tiempo": ("<i8", 0),
+    "apertura": ("<f8", 1),
+    "maximo": ("<f8", 2),
+    "minimo": ("<f8", 3),
+    "cierre": ("<f8", 4),
+    "volumen": ("<f8", 5),
+    "trades": ("<i8", 8),
+}
+
+# `tiempo` al final: una vela existe para los lectores cuando su tiempo está escrito
+ORDEN_ESCRITURA = [c for c in COLUMNAS if c != "tiempo"] + ["tiempo"]
+
+INTERVALOS_MS = {
+    "1s": 1_000, "1m": 60_000, "3m": 180_000, "5m": 300_000, "15m": 900_000, "30m": 1_800_000,
+    "1h": 3_600_000, "2h": 7_200_000, "4h": 14_400_000, "6h": 21_600_000, "8h": 28_800_000,
+    "12h": 43_200_000, "1d": 86_400_000, "3d": 259_200_000, "1w": 604_800_000,
+}
+
+
+class Klines(NamedTuple):
+    """Vistas (np.memmap) de las columnas de un rango de velas"""
+    tiempo: np.ndarray
+    apertura: np.ndarray
+    maximo: np.ndarray
+    minimo: np.ndarray
+    cierre: np.ndarray
+    volumen: np.ndarray
+    trades: np.ndarray
+
+    def __len__(self):
+        return len(self.tiempo)
+
+    def velas(self):
+        """Las mismas vistas como backtesting.Velas, sin copiar"""
+        return Velas(self.tiempo, self.apertura, self.maximo, self.minimo, self.cierre, self.volumen)
+
+
+def _a_ms(momento):
+    """ms desde epoch a partir de int, float o texto de fecha ("30 days ago UTC", "2024-01-01")"""
+    if momento is None or isinstance(momento, (int, np.integer)):
+        return momento
+    if isinstance(momento, float):
+        return int(momento)
+    return date_to_milliseconds(momento)
+
+
+class AlmacenKlines:
+    def __init__(self, ruta=RUTA_POR_DEFECTO):
+        self.ruta = ruta
+        self._locks = {}
+        self._lock_locks = threading.Lock()
+        self._reparadas = set()
+        self._mapas = {}           # ruta de columna -> (filas, memmap)
+
+    # --- Rutas y tamaño ---
+
+    def _directorio(self, simbolo, intervalo):
+        return os.path.join(self.ruta, intervalo, simbolo.upper())
+
+    def _archivo(self, simbolo, intervalo, columna):
+        return os.path.join(self._directorio(simbolo, intervalo), f"{columna}.bin")
+
+    def _lock(self, simbolo, intervalo):
+        with self._lock_locks:
+            return self._locks.setdefault((simbolo.upper(), intervalo), threading.Lock())
+
+    def filas(self, simbolo, intervalo):
+        """Velas completas guardadas; `tiempo` se escribe la última, así que su tamaño manda"""
+        try:
+            return os.path.getsize(self._archivo(simbolo, intervalo, "tiempo")) // 8
+        except FileNotFoundError:
+            return 0
+
+    def ultimo_tiempo(self, simbolo, intervalo):
+        """Tiempo de apertura (ms) de la última vela guardada, o None"""
+        n = self.filas(simbolo, intervalo)
+        return int(self._columna(simbolo, intervalo, "tiempo", n)[n - 1]) if n else None
+
+    def simbolos(self, intervalo):
+        carpeta = os.path.join(self.ruta, intervalo)
+        return sorted(os.listdir(carpeta)) if os.path.isdir(carpeta) else []
+
+    # --- Escritura ---
+
+    def anexar(self, simbolo, intervalo, klines):
+        """Añade velas de get_klines posteriores a la última guardada; devuelve cuántas se escribieron"""
+        with self._lock(simbolo, intervalo):
+            self._reparar(simbolo, intervalo)
+            ultimo = self.ultimo_tiempo(simbolo, intervalo)
+            datos = np.asarray(klines)
+            if len(datos) == 0:
+                return 0
+            tiempos = datos[:, 0].astype(np.int64)
+            nuevas = tiempos > ultimo if ultimo is not None else np.ones(len(tiempos), dtype=bool)
+            if not nuevas.any():
+                return 0
+            datos = datos[nuevas]
+            os.makedirs(self._directorio(simbolo, intervalo), exist_ok=True)
+            for columna in ORDEN_ESCRITURA:
+                tipo, indice = COLUMNAS[columna]
+                valores = datos[:, indice].astype(np.float64 if tipo == "<f8" else np.int64).astype(tipo)
+                with open(self._archivo(simbolo, intervalo, columna), "ab") as f:
+                    f.write(valores.tobytes())
+            return int(len(datos))
+
+    def _reparar(self, simbolo, intervalo):
+        # Recorta las columnas que quedaron más largas tras una escritura interrumpida
+        clave = (simbolo.upper(), intervalo)
+        if clave in self._reparadas:
+            return
+        n = self.filas(simbolo, intervalo)
+        for columna, (tipo, _) in COLUMNAS.items():
+            ruta = self._archivo(simbolo, intervalo, columna)
+            if os.path.exists(ruta) and os.path.getsize(ruta) > n * np.dtype(tipo).itemsize:
+                with open(ruta, "r+b") as f:
+                    f.truncate(n * np.dtype(tipo).itemsize)
+        self._reparadas.add(clave)
+
+    def actualizar(self, client, simbolo, intervalo="1m", desde=None, hasta=None):
+        """
+        Descarga las velas cerradas que faltan desde la última guardada (o desde
+        `desde`, por defecto hace DIAS_POR_DEFECTO días) hasta `hasta` o ahora.
+        Devuelve el número de velas nuevas.
+        """
+        paso = INTERVALOS_MS[intervalo]
+        ultimo = self.ultimo_tiempo(simbolo, intervalo)
+        if ultimo is not None:
+            inicio = ultimo + paso
+        else:
+            inicio = _a_ms(desde) or int(time.time() * 1000) - DIAS_POR_DEFECTO * 86_400_000
+        fin = _a_ms(hasta)
+
+        nuevas = 0
+        while True:
+            ahora = int(time.time() * 1000)
+            lote = client.get_klines(symbol=simbolo, interval=intervalo, startTime=inicio,
+                                     endTime=fin, limit=LIMITE_PETICION)
+            # Solo velas cerradas: la vela en curso cambiaría y rompería la reanudación
+            cerradas = [k for k in lote if k[6] < ahora]
+            if cerradas:
+                nuevas += self.anexar(simbolo, intervalo, cerradas)
+                inicio = int(cerradas[-1][0]) + paso
+            if len(lote) < LIMITE_PETICION or len(cerradas) < len(lote):
+                return nuevas
+
+    def actualizar_universo(self, client, simbolos, intervalo="1m", desde=None, hasta=None, hilos=4):
+        """Actualiza varios símbolos en paralelo; devuelve {simbolo: velas nuevas o excepción}"""
+        def tarea(simbolo):
+            try:
+                return self.actualizar(client, simbolo, intervalo, desde, hasta)
+            except Exception as e:
+                return e
+        with ThreadPoolExecutor(max_workers=hilos) as ejecutor:
+            return dict(zip(simbolos, ejecutor.map(tarea, simbolos)))
+
+    # --- Lectura ---
+
+    def _columna(self, simbolo, intervalo, columna, filas):
+        ruta = self._archivo(simbolo, intervalo, columna)
+        guardado = self._mapas.get(ruta)
+        if guardado is not None and guardado[0] == filas:
+            return guardado[1]
+        tipo = COLUMNAS[columna][0]
+        mapa = np.memmap(ruta, dtype=tipo, mode="r", shape=(filas,)) if filas else np.empty(0, dtype=tipo)
+        self._mapas[ruta] = (filas, mapa)
+        return mapa
+
+    def leer(self, simbolo, intervalo="1m", desde=None, hasta=None):
+        """Vistas sin copia de las velas con apertura en [desde, hasta] (ms o texto de fecha)"""
+        n = self.filas(simbolo, intervalo)
+        columnas = {c: self._columna(simbolo, intervalo, c, n) for c in COLUMNAS}
+        tiempo = columnas["tiempo"]
+        i = int(np.searchsorted(tiempo, _a_ms(desde), "left")) if desde is not None else 0
+        j = int(np.searchsorted(tiempo, _a_ms(hasta), "right")) if hasta is not None else n
+        return Klines(**{c: v[i:j] for c, v in columnas.items()})
+
+    def velas(self, simbolo, intervalo="1m", desde=None, hasta=None):
+        """Atajo para el backtesting: leer(...).velas()"""
+        return self.leer(simbolo, intervalo, desde, hasta).velas()
+
+
+def pares_de_los_bots():
+    """Unión de los pares de bot_telegram.py y bot_telegram2.py, en orden (de config, sin importar los bots)"""
+    from config import PARES_BOT_TELEGRAM, PARES_BOT_TELEGRAM2
+    return list(dict.fromkeys(PARES_BOT_TELEGRAM + PARES_BOT_TELEGRAM2))
+
+
+def main():
+    from config import get_binance_client
+
+    intervalo = sys.argv[1] if len(sys.argv) > 1 else "1m"
+    dias = int(sys.argv[2]) if len(sys.argv) > 2 else DIAS_POR_DEFECTO
+    simbolos = sys.argv[3:] or pares_de_los_bots()
+
+    almacen = AlmacenKlines()
+    client = get_binance_client()
+    desde = int(time.time() * 1000) - dias * 86_400_000
+    for simbolo, resultado in almacen.actualizar_universo(client, simbolos, intervalo, desde).items():
+        if isinstance(resultado, Exception):
+            print(f"❌ {simbolo}: {resultado}")
+        else:
+            print(f"✅ {simbolo}: {resultado} velas nuevas, {almacen.filas(simbolo, intervalo)} guardadas")
+
+
+if __name__ == "__main__":
+    main()
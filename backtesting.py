@@ -0,0 +1,287 @@
+"""
+Backtesting vectorizado de las estrategias del proyecto sobre velas guardadas.
+
+- backtest_scalp: el bucle compra→venta de bot.py
+- backtest_compra_unica: la compra de main.ejecutar_estrategia, mantenida hasta el final
+- backtest_stop_loss: la compra con stop-loss/take-profit de
+  binance_api.colocar_orden_compra_con_stop_loss, reentrando al cerrar cada operación
+
+Las señales, los fills y la curva de capital se calculan con NumPy sobre la
+serie completa. Para el stop-loss/take-profit, la salida de cada operación se
+busca con comparaciones vectorizadas sobre ventanas que crecen al doble, de
+modo que cada vela se examina del orden de una vez. Las comisiones salen de
+makerCommission/takerCommission de la cuenta.
+"""
+from dataclasses import dataclass, field
+from typing import NamedTuple
+
+import numpy as np
+
+CAPITAL_INICIAL = 1000.0
+VENTANA_INICIAL = 64      # velas de la primera ventana al buscar la salida de una operación
+VENTANA_MAXIMA = 1 << 16
+
+
+class Velas(NamedTuple):
+    """Serie OHLCV de un símbolo; tiempo en ms de apertura de cada vela"""
+    tiempo: np.ndarray
+    apertura: np.ndarray
+    maximo: np.ndarray
+    minimo: np.ndarray
+    cierre: np.ndarray
+    volumen: np.ndarray
+
+    def __len__(self):
+        return len(self.tiempo)
+
+
+@dataclass(frozen=True)
+class Comisiones:
+    """Comisiones como fracción del nominal (0.001 = 0.1 %)"""
+    maker: float = 0.001
+    taker: float = 0.001
+
+    @classmethod
+    def desde_cuenta(cls, cuenta):
+        """A partir de la respuesta de get_account (o client.saldos.cuenta())"""
+        tasas = cuenta.get('commissionRates')
+        if tasas:
+            return cls(maker=float(tasas['maker']), taker=float(tasas['taker']))
+        # makerCommission/takerCommission vienen en puntos básicos (10 = 0.1 %)
+        return cls(maker=cuenta['makerCommission'] / 10000, taker=cuenta['takerCommission'] / 10000)
+
+
+@dataclass
+class Resultado:
+    simbolo: str
+    estrategia: str
+    capital_inicial: float
+    pnl: float
+    max_drawdown: float
+    max_drawdown_pct: float
+    operaciones: int
+    ganadoras: int
+    comisiones: float
+    capital: np.ndarray = field(repr=False)    # curva de capital por vela, a precio de cierre
+
+    @property
+    def rentabilidad_pct(self):
+        return self.pnl / self.capital_inicial * 100
+
+    @property
+    def tasa_acierto(self):
+        return self.ganadoras / self.operaciones if self.operaciones else 0.0
+
+    def resumen(self):
+        return (f"{self.simbolo} [{self.estrategia}] PnL={self.pnl:.2f} ({self.rentabilidad_pct:+.2f} %)  "
+                f"drawdown={self.max_drawdown:.2f} ({self.max_drawdown_pct:.2f} %)  "
+                f"operaciones={self.operaciones} aciertos={self.tasa_acierto:.0%}  "
+                f"comisiones={self.comisiones:.2f}")
+
+
+# --- Datos ---
+
+def velas_desde_klines(klines):
+    """Convierte la lista de get_klines/get_historical_klines en Velas"""
+    datos = np.asarray(klines, dtype=object)
+    if len(datos) == 0:
+        vacio = np.empty(0)
+        return Velas(vacio.astype(np.int64), vacio, vacio, vacio, vacio, vacio)
+    return Velas(
+        tiempo=datos[:, 0].astype(np.int64),
+        apertura=datos[:, 1].astype(np.float64),
+        maximo=datos[:, 2].astype(np.float64),
+        minimo=datos[:, 3].astype(np.float64),
+        cierre=datos[:, 4].astype(np.float64),
+        volumen=datos[:, 5].astype(np.float64),
+    )
+
+
+def velas_desde_trades(tiempos, precios, cantidades, intervalo_ms=60_000):
+    """Agrega trades (ordenados por tiempo) en velas de `intervalo_ms`; omite intervalos sin trades"""
+    tiempos = np.asarray(tiempos, dtype=np.int64)
+    precios = np.asarray(precios, dtype=np.float64)
+    cantidades = np.asarray(cantidades, dtype=np.float64)
+    cubo = tiempos // intervalo_ms
+    inicios = np.flatnonzero(np.r_[True, cubo[1:] != cubo[:-1]])
+    finales = np.r_[inicios[1:], len(precios)] - 1
+    return Velas(
+        tiempo=cubo[inicios] * intervalo_ms,
+        apertura=precios[inicios],
+        maximo=np.maximum.reduceat(precios, inicios),
+        minimo=np.minimum.reduceat(precios, inicios),
+        cierre=precios[finales],
+        volumen=np.add.reduceat(cantidades, inicios),
+    )
+
+
+def descargar_velas(client, simbolo, intervalo="1m", inicio="1 day ago UTC", fin=None):
+    """Descarga velas históricas con python-binance (pasa por el gobernador de peso del cliente)"""
+    return velas_desde_klines(client.get_historical_klines(simbolo, intervalo, inicio, fin))
+
+
+# --- Métricas ---
+
+def _drawdown(capital):
+    picos = np.maximum.accumulate(capital)
+    caidas = picos - capital
+    i = int(np.argmax(caidas)) if len(caidas) else 0
+    if not len(caidas) or caidas[i] <= 0:
+        return 0.0, 0.0
+    return float(caidas[i]), float(caidas[i] / picos[i] * 100)
+
+
+def _resultado(simbolo, estrategia, capital_inicial, capital, pnl_operaciones, comisiones):
+    max_dd, max_dd_pct = _drawdown(capital)
+    return Resultado(
+        simbolo=simbolo,
+        estrategia=estrategia,
+        capital_inicial=capital_inicial,
+        pnl=float(capital[-1] - capital_inicial) if len(capital) else 0.0,
+        max_drawdown=max_dd,
+        max_drawdown_pct=max_dd_pct,
+        operaciones=int(len(pnl_operaciones)),
+        ganadoras=int(np.count_nonzero(pnl_operaciones > 0)),
+        comisiones=float(comisiones),
+        capital=capital,
+    )
+
+
+# --- Estrategias ---
+
+def backtest_scalp(velas, cantidad=1.0, comisiones=Comisiones(), cada=1, retencion=0,
+                   deslizamiento=0.0, capital_inicial=CAPITAL_INICIAL, simbolo=""):
+    """
+    Bucle de bot.py: compra a mercado y vende enseguida, una vez cada `cada` velas.
+    Compra a la apertura de la vela i y vende a la apertura de i+`retencion`
+    (0 = mismo precio, como el bot real, que vende segundos después).
+    `deslizamiento` es la fracción de precio que se pierde en cada lado (medio spread).
+    """
+    n = len(velas)
+    entradas = np.arange(0, max(n - retencion, 0), cada)
+    compra = velas.apertura[entradas] * (1 + deslizamiento)
+    venta = velas.apertura[entradas + retencion] * (1 - deslizamiento)
+    gastos = comisiones.taker * cantidad * (compra + venta)
+    pnl = cantidad * (venta - compra) - gastos
+
+    # Cada operación se realiza en la vela de su venta
+    delta = np.zeros(n)
+    np.add.at(delta, entradas + retencion, pnl)
+    capital = capital_inicial + np.cumsum(delta)
+    return _resultado(simbolo, "scalp", capital_inicial, capital, pnl, gastos.sum())
+
+
+def backtest_compra_unica(velas, cantidad=0.001, comisiones=Comisiones(), minimo=15.0,
+                          deslizamiento=0.0, capital_inicial=CAPITAL_INICIAL, simbolo=""):
+    """main.ejecutar_estrategia: una compra a mercado en la primera vela si hay `minimo` de saldo"""
+    n = len(velas)
+    if n == 0 or capital_inicial < minimo:
+        return _resultado(simbolo, "compra_unica", capital_inicial,
+                          np.full(n, capital_inicial), np.empty(0), 0.0)
+    compra = velas.apertura[0] * (1 + deslizamiento)
+    gasto = comisiones.taker * cantidad * compra
+    capital = capital_inicial - cantidad * compra - gasto + cantidad * velas.cierre
+    pnl = np.array([capital[-1] - capital_inicial])
+    return _resultado(simbolo, "compra_unica", capital_inicial, capital, pnl, gasto)
+
+
+def backtest_stop_loss(velas, cantidad=1.0, stop_loss_porcentaje=2.0, take_profit_porcentaje=None,
+                       comisiones=Comisiones(), deslizamiento=0.0, capital_inicial=CAPITAL_INICIAL,
+                       simbolo=""):
+    """
+    colocar_orden_compra_con_stop_loss en bucle: compra a la apertura, sale por
+    stop-loss o take-profit (lo que ocurra antes) y vuelve a comprar en la vela
+    siguiente. Si ambos niveles se tocan en la misma vela se asume el stop
+    (supuesto pesimista). Un hueco que salta el nivel se ejecuta a la apertura.
+    La entrada y el stop pagan comisión taker y deslizamiento; el take-profit,
+    comisión maker sin deslizamiento.
+    La operación abierta al final se valora al último cierre.
+    """
+    n = len(velas)
+    if n == 0:
+        return _resultado(simbolo, "stop_loss", capital_inicial, np.empty(0), np.empty(0), 0.0)
+    apertura, maximo, minimo, cierre = velas.apertura, velas.maximo, velas.minimo, velas.cierre
+
+    # Niveles para una entrada hipotética en cada vela
+    entrada = apertura * (1 + deslizamiento)
+    stop = entrada * (1 - stop_loss_porcentaje / 100)
+    if take_profit_porcentaje:
+        objetivo = entrada * (1 + take_profit_porcentaje / 100)
+    else:
+        objetivo = np.full(n, np.inf)
+
+    # Encadena las operaciones: cada una empieza en la vela siguiente a la salida anterior
+    entradas, salidas = [], []
+    i = 0
+    while i < n:
+        salida = _primera_salida(minimo, maximo, stop[i], objetivo[i], i)
+        entradas.append(i)
+        salidas.append(salida)
+        i = salida + 1
+    entradas = np.asarray(entradas)
+    salidas = np.asarray(salidas)
+
+    # Precio de salida: stop (o apertura si abre por debajo), objetivo (o apertura si abre por encima), o último cierre
+    abierta = salidas >= n
+    j = np.minimum(salidas, n - 1)
+    por_stop = ~abierta & (minimo[j] <= stop[entradas])
+    precio_salida = np.where(
+        por_stop,
+        np.minimum(apertura[j], stop[entradas]),
+        np.maximum(apertura[j], objetivo[entradas]),
+    )
+    # El take-profit es una orden límite que ya estaba en el libro: maker y sin deslizamiento.
+    # El stop sale a mercado: taker y con deslizamiento
+    precio_salida = np.where(por_stop, precio_salida * (1 - deslizamiento), precio_salida)
+    precio_salida = np.where(abierta, cierre[-1], precio_salida)
+    precio_entrada = entrada[entradas]
+    comision_salida = np.where(abierta, 0.0, np.where(por_stop, comisiones.taker, comisiones.maker))
+    gastos = cantidad * (comisiones.taker * precio_entrada + comision_salida * precio_salida)
+    pnl = cantidad * (precio_salida - precio_entrada) - gastos
+
+    # Curva de capital: realizado acumulado + valoración de la posición abierta al cierre de cada vela
+    realizado = np.zeros(n)
+    np.add.at(realizado, j, pnl)
+    realizado = np.cumsum(realizado)
+    duraciones = j - entradas
+    operacion = np.repeat(np.arange(len(entradas)), duraciones)
+    velas_en_posicion = np.arange(len(operacion)) - np.repeat(np.cumsum(duraciones) - duraciones, duraciones) \
+        + np.repeat(entradas, duraciones)
+    latente = np.zeros(n)
+    latente[velas_en_posicion] = cantidad * (cierre[velas_en_posicion] - precio_entrada[operacion]) \
+        - comisiones.taker * cantidad * precio_entrada[operacion]
+    capital = capital_inicial + realizado + latente
+    return _resultado(simbolo, "stop_loss", capital_inicial, capital, pnl, gastos.sum())
+
+
+ESTRATEGIAS = {
+    "scalp": backtest_scalp,
+    "compra_unica": backtest_compra_unica,
+    "stop_loss": backtest_stop_loss,
+}
+
+
+def backtest_simbolos(velas_por_simbolo, estrategia="scalp", **parametros):
+    """Ejecuta la estrategia sobre cada símbolo; devuelve {simbolo: Resultado}"""
+    funcion = ESTRATEGIAS[estrategia] if isinstance(estrategia, str) else estrategia
+    return {
+        simbolo: funcion(velas, simbolo=simbolo, **parametros)
+        for simbolo, velas in velas_por_simbolo.items()
+    }
+
+
+# --- Búsqueda de salidas ---
+
+def _primera_salida(minimo, maximo, stop, objetivo, desde):
+    """Primera vela j >= desde que toca el stop o el objetivo; len(minimo) si ninguna"""
+    n = len(minimo)
+    inicio, ventana = desde, VENTANA_INICIAL
+    while inicio < n:
+        fin = min(n, inicio + ventana)
+        toca = (minimo[inicio:fin] <= stop) | (maximo[inicio:fin] >= objetivo)
+        k = int(np.argmax(toca))
+        if toca[k]:
+            return inicio + k
+        inicio, ventana = fin, min(ventana * 2, VENTANA_MAXIMA)
+    return n
+
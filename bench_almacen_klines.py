@@ -0,0 +1,70 @@
+"""
+Almacén de klines contra el exchange local: descarga inicial, reanudación
+(solo se piden las velas nuevas) y lecturas de rangos con vistas memmap
+frente a cargar el archivo completo en cada lectura.
+
+Uso: python bench_almacen_klines.py [n_simbolos] [días]
+"""
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from almacen_klines import AlmacenKlines
+from mock_exchange import ExchangeLocal
+
+DIA_MS = 86_400_000
+
+
+def main():
+    n_simbolos = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    dias = int(sys.argv[2]) if len(sys.argv) > 2 else 60
+
+    with ExchangeLocal(n_simbolos=50) as exchange, tempfile.TemporaryDirectory() as carpeta:
+        client = exchange.cliente()
+        almacen = AlmacenKlines(carpeta)
+        simbolos = [s["symbol"] for s in exchange.simbolos[:n_simbolos]]
+        desde = int(time.time() * 1000) - dias * DIA_MS
+
+        inicio = time.perf_counter()
+        nuevas = almacen.actualizar_universo(client, simbolos, "1m", desde)
+        t_inicial = time.perf_counter() - inicio
+        peticiones_iniciales = exchange.peticiones["klines"]
+        print(f"🕯️  {n_simbolos} símbolos × {dias} días de 1m: {sum(nuevas.values()):,} velas en "
+              f"{t_inicial:.1f} s con {peticiones_iniciales} peticiones")
+
+        exchange.reiniciar_contadores()
+        inicio = time.perf_counter()
+        nuevas = almacen.actualizar_universo(client, simbolos, "1m", desde)
+        print(f"   reanudación: {sum(nuevas.values())} velas nuevas, {exchange.peticiones['klines']} peticiones, "
+              f"{(time.perf_counter() - inicio) * 1000:.0f} ms")
+
+        # Lecturas de un día al azar: vistas memmap frente a leer la columna completa cada vez
+        simbolo = simbolos[0]
+        primera, ultima = almacen.leer(simbolo).tiempo[[0, -1]]
+        rangos = [(t, t + DIA_MS) for t in (random.randint(int(primera), int(ultima) - DIA_MS) for _ in range(500))]
+
+        inicio = time.perf_counter()
+        for a, b in rangos:
+            velas = almacen.leer(simbolo, "1m", a, b)
+            float(velas.cierre.mean())
+        t_memmap = time.perf_counter() - inicio
+
+        ruta = almacen._archivo(simbolo, "1m", "tiempo")
+        inicio = time.perf_counter()
+        for a, b in rangos:
+            tiempo = np.fromfile(ruta, dtype="<i8")
+            cierre = np.fromfile(ruta.replace("tiempo", "cierre"), dtype="<f8")
+            i, j = np.searchsorted(tiempo, [a, b])
+            float(cierre[i:j].mean())
+        t_completo = time.perf_counter() - inicio
+
+        assert isinstance(velas.cierre, np.memmap) and len(velas) in (1440, 1441)
+        print(f"   500 lecturas de 1 día: memmap {t_memmap * 1000:.0f} ms, "
+              f"cargando la columna completa {t_completo * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Ciclo de bot.py (saldos, compra y venta a mercado) contra el exchange local
+con latencia: recorriendo los pares uno detrás de otro frente al planificador
+con un hilo por par. Para cada tamaño de la lista de pares, cuánto tarda cada
+par en volver a operar y cuántos ciclos se completan por segundo.
+
+Uso: python bench_bot_pares.py [segundos] [latencia_ms]
+"""
+import sys
+import time
+
+from libro_saldos import LibroSaldos
+from mock_exchange import ExchangeLocal
+from planificador_pares import PlanificadorPares, ReservaSaldo, SaldoInsuficiente, ampliar_conexiones
+
+
+def crear_ciclo(client):
+    """Ciclo de un par como el de bot.py, con el libro de saldos y la reserva de USDT compartidos"""
+    saldos = LibroSaldos(client)
+    reserva = ReservaSaldo(lambda: saldos.libre("USDT"))
+    simbolos = {s["symbol"]: s for s in client.get_exchange_info()["symbols"]}
+
+    def ciclo(par):
+        base = simbolos[par]["baseAsset"]
+        saldos.libre(base)
+        try:
+            reserva.reservar(1.0)
+        except SaldoInsuficiente:
+            return False
+        try:
+            client.order_market_buy(symbol=par, quantity=1)
+            saldos.invalidar()
+        finally:
+            reserva.liberar(1.0)
+        client.order_market_sell(symbol=par, quantity=1)
+        saldos.invalidar()
+        saldos.libre(base)
+        return True
+
+    return ciclo
+
+
+def secuencial(ciclo, pares, segundos):
+    """(segundos entre dos turnos de un mismo par, ciclos por segundo) del bucle anterior"""
+    vueltas, ciclos = [], 0
+    fin = time.monotonic() + segundos
+    while time.monotonic() < fin:
+        inicio = time.perf_counter()
+        for par in pares:
+            ciclos += ciclo(par) is not False
+        vueltas.append(time.perf_counter() - inicio)
+    return sum(vueltas) / len(vueltas), ciclos / segundos
+
+
+def en_paralelo(ciclo, pares, segundos):
+    planificador = PlanificadorPares(pares, ciclo, duracion=segundos).ejecutar()
+    estados = [e for e in planificador.estados.values() if e.ciclos]
+    ciclos = sum(e.ciclos for e in estados)
+    return sum(e.ciclo_medio for e in estados) / len(estados), ciclos / segundos
+
+
+def main():
+    segundos = float(sys.argv[1]) if len(sys.argv) > 1 else 3
+    latencia = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.05
+    with ExchangeLocal(n_simbolos=300, latencia=latencia) as exchange:
+        client = exchange.cliente()
+        ciclo = crear_ciclo(client)
+        disponibles = [s["symbol"] for s in exchange.simbolos
+                       if s["status"] == "TRADING" and s["quoteAsset"] == "USDT"]
+        print(f"🔁 Ciclo saldos→compra→venta por par, {latencia * 1000:.0f} ms de latencia, {segundos:.0f} s por prueba:")
+        for n in (2, 8, 32):
+            pares = disponibles[:n]
+            ampliar_conexiones(client, n)
+            vuelta, ritmo = secuencial(ciclo, pares, segundos)
+            ciclo_par, ritmo_paralelo = en_paralelo(ciclo, pares, segundos)
+            print(f"   {n:>3} pares: uno a uno {vuelta * 1000:7.0f} ms por par, {ritmo:6.1f} ciclos/s   "
+                  f"un hilo por par {ciclo_par * 1000:5.0f} ms por par, {ritmo_paralelo:6.1f} ciclos/s")
+
+
+if __name__ == "__main__":
+    main()
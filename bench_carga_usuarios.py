@@ -0,0 +1,108 @@
+"""
+Prueba de carga del motor asíncrono de bot_telegram: N usuarios simulados
+ejecutan la sesión de trading real (bot_telegram.ejecutar_trading) contra el
+exchange local, que corre en otro proceso para no mezclar su consumo.
+Informa CPU, memoria y latencia por trade (inicio de la compra → venta confirmada).
+
+Uso: python bench_carga_usuarios.py [n_usuarios] [duracion_s] [latencia_ms]
+"""
+import asyncio
+import multiprocessing
+import resource
+import statistics
+import sys
+import time
+
+from binance import AsyncClient
+
+import bot_telegram
+from libro_saldos import LibroSaldos
+from mock_exchange import ExchangeLocal, StreamLocal
+
+
+def servir_exchange(latencia, urls, parar):
+    with StreamLocal() as stream, \
+            ExchangeLocal(n_simbolos=10, latencia=latencia, stream=stream, latencia_ejecucion=latencia) as exchange:
+        urls.put((exchange.url, stream.url_usuario, exchange.simbolos[0]["symbol"]))
+        parar.wait()
+
+
+class ClienteMedido(AsyncClient):
+    """AsyncClient que mide el tiempo desde el inicio de la compra hasta la respuesta de la venta"""
+
+    def __init__(self, *args, latencias, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._latencias = latencias
+        self._inicio = None
+
+    async def order_market_buy(self, **params):
+        self._inicio = time.perf_counter()
+        return await super().order_market_buy(**params)
+
+    async def order_market_sell(self, **params):
+        respuesta = await super().order_market_sell(**params)
+        if self._inicio is not None:
+            self._latencias.append(time.perf_counter() - self._inicio)
+            self._inicio = None
+        return respuesta
+
+
+async def carga(n_usuarios, url_api, latencias):
+    clientes = []
+    for user_id in range(n_usuarios):
+        client = ClienteMedido(f"usuario-{user_id}", "local", latencias=latencias)
+        client.API_URL = url_api
+        client.saldos = LibroSaldos(client)
+        clientes.append(client)
+        bot_telegram.user_data[user_id] = {"status": "ready", "client": client, "report_history": []}
+        bot_telegram.motor.iniciar_sesion(user_id, bot_telegram.ejecutar_trading, user_id)
+
+    max_tareas = 0
+    while bot_telegram.motor.sesiones_activas():
+        max_tareas = max(max_tareas, len(asyncio.all_tasks()))
+        await asyncio.sleep(0.5)
+
+    await bot_telegram.motor.cerrar()
+    for client in clientes:
+        await client.close_connection()
+    return max_tareas
+
+
+def main():
+    n_usuarios = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    duracion = float(sys.argv[2]) if len(sys.argv) > 2 else 20
+    latencia = float(sys.argv[3]) / 1000 if len(sys.argv) > 3 else 0.01
+
+    urls, parar = multiprocessing.Queue(), multiprocessing.Event()
+    servidor = multiprocessing.Process(target=servir_exchange, args=(latencia, urls, parar), daemon=True)
+    servidor.start()
+    url_api, url_usuario, par = urls.get(timeout=30)
+
+    bot_telegram.PARES = [par]
+    bot_telegram.DURACION_SESION = duracion
+    bot_telegram.URL_USER_STREAM = url_usuario
+
+    latencias = []
+    uso_inicial = resource.getrusage(resource.RUSAGE_SELF)
+    inicio = time.perf_counter()
+    max_tareas = asyncio.run(carga(n_usuarios, url_api, latencias))
+    pared = time.perf_counter() - inicio
+    uso = resource.getrusage(resource.RUSAGE_SELF)
+
+    parar.set()
+    servidor.join(timeout=10)
+
+    cpu = (uso.ru_utime - uso_inicial.ru_utime) + (uso.ru_stime - uso_inicial.ru_stime)
+    latencias.sort()
+    print(f"👥 {n_usuarios} usuarios, {duracion:.0f} s por sesión, latencia simulada {latencia * 1000:.0f} ms")
+    print(f"   trades={len(latencias)}  ({len(latencias) / pared:,.0f} trades/s)  tareas máx={max_tareas}")
+    if latencias:
+        print(f"   latencia por trade: p50={statistics.median(latencias) * 1000:.1f} ms  "
+              f"p95={latencias[int(len(latencias) * 0.95)] * 1000:.1f} ms  "
+              f"p99={latencias[int(len(latencias) * 0.99)] * 1000:.1f} ms")
+    print(f"   CPU={cpu:.1f} s en {pared:.1f} s ({cpu / pared * 100:.0f} %)  "
+          f"memoria máx={uso.ru_maxrss / 1024:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
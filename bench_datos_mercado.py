@@ -0,0 +1,68 @@
+"""
+Prueba de rendimiento del motor de datos de mercado contra el stream local
+(mock_exchange.StreamLocal): mide mensajes por segundo, verifica que el almacén
+refleja el último valor de cada símbolo y que el motor se reconecta solo.
+
+Uso: python bench_datos_mercado.py [n_simbolos] [n_mensajes]
+"""
+import sys
+import time
+
+from datos_mercado import MotorDatosMercado, BID, ASK, ULTIMO
+from mock_exchange import StreamLocal
+
+
+def esperar(condicion, timeout=30):
+    limite = time.time() + timeout
+    while not condicion():
+        if time.time() > limite:
+            raise TimeoutError("Tiempo de espera agotado")
+        time.sleep(0.001)
+
+
+def verificar(almacen, esperados):
+    for symbol, (bid, ask, ultimo) in esperados.items():
+        fila = almacen.datos[almacen.indice[symbol]]
+        assert bid is None or fila[BID] == bid, f"bid incorrecto en {symbol}"
+        assert ask is None or fila[ASK] == ask, f"ask incorrecto en {symbol}"
+        assert ultimo is None or fila[ULTIMO] == ultimo, f"precio incorrecto en {symbol}"
+
+
+def main():
+    n_simbolos = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    n_mensajes = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+    simbolos = [f"TK{i:04d}USDT" for i in range(n_simbolos)]
+
+    with StreamLocal() as stream:
+        motor = MotorDatosMercado(simbolos, url=stream.url).iniciar()
+        stream.esperar_suscripciones(2 * n_simbolos)
+
+        inicio = time.perf_counter()
+        esperados = stream.emitir_sintetico(simbolos, n_mensajes)
+        esperar(lambda: motor.mensajes >= n_mensajes)
+        duracion = time.perf_counter() - inicio
+        verificar(motor.almacen, esperados)
+        print(f"📈 {n_mensajes} mensajes de {n_simbolos} símbolos en {duracion:.2f} s "
+              f"→ {n_mensajes / duracion:,.0f} msg/s")
+
+        # Reconexión automática: cortar la conexión y volver a publicar
+        stream.cortar_conexiones()
+        esperar(lambda: motor.reconexiones >= 1)
+        stream.esperar_suscripciones(2 * n_simbolos)
+        recibidos = motor.mensajes
+        esperados = stream.emitir_sintetico(simbolos, n_simbolos * 2)
+        esperar(lambda: motor.mensajes >= recibidos + n_simbolos * 2)
+        verificar(motor.almacen, esperados)
+        print(f"🔁 Reconexión correcta ({motor.reconexiones} reconexión/es)")
+
+        # Lectura sin red desde el almacén
+        inicio = time.perf_counter()
+        for _ in range(100_000):
+            motor.almacen.precio(simbolos[0])
+        print(f"⚡ Lectura de precio: {(time.perf_counter() - inicio) * 10:.2f} µs")
+
+        motor.detener()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Diario de operaciones: coste de registrar() en el hilo de trading frente a
+abrir operaciones.log y escribir una línea por evento, filas por segundo del
+escritor por lotes con cada política de sincronización y tiempo de las
+consultas de recientes y agregados sobre un diario de millones de filas.
+
+Uso: python bench_diario_operaciones.py [filas]
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from diario_operaciones import DiarioOperaciones
+
+SIMBOLOS = [f"T{i:02d}USDT" for i in range(50)]
+USUARIOS = [str(1000 + i) for i in range(100)]
+UN_ANO = 365 * 86400
+
+
+def por_linea(ruta, n):
+    """Lo que hacía registrar_operacion: abrir el archivo en modo append por cada operación"""
+    latencias = []
+    for i in range(n):
+        inicio = time.perf_counter()
+        with open(ruta, "a", encoding="utf-8") as log:
+            log.write(f"2024-01-01 00:00:00 | COMPRA | BTCUSDT | 0.001 | {60000 + i} | N/A\n")
+        latencias.append(time.perf_counter() - inicio)
+    return latencias
+
+
+def por_diario(diario, n):
+    latencias = []
+    for i in range(n):
+        inicio = time.perf_counter()
+        diario.registrar("COMPRA", "BTCUSDT", 0.001, 60000 + i, usuario="bench")
+        latencias.append(time.perf_counter() - inicio)
+    return latencias
+
+
+def informar(nombre, latencias, segundos_escritura=None):
+    latencias.sort()
+    texto = (f"   {nombre:<22} p50 {statistics.median(latencias) * 1e6:7.1f} µs   "
+             f"p99 {latencias[int(len(latencias) * 0.99)] * 1e6:8.1f} µs")
+    if segundos_escritura:
+        texto += f"   en disco: {len(latencias) / segundos_escritura:>9,.0f} filas/s"
+    print(texto)
+
+
+def cargar(diario, filas, semilla=1):
+    """Un año de operaciones repartidas entre símbolos y usuarios"""
+    rnd = random.Random(semilla)
+    origen = time.time() - UN_ANO
+    for i in range(filas):
+        diario.registrar("COMPRA" if i % 2 == 0 else "VENTA", rnd.choice(SIMBOLOS), rnd.uniform(1, 100),
+                         rnd.uniform(0.5, 2), usuario=rnd.choice(USUARIOS), comision=0.001,
+                         orden_id=i, ts=origen + UN_ANO * i / filas)
+    diario.vaciar(timeout=None)
+
+
+def medir_consulta(nombre, consulta, repeticiones=20):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = consulta()
+        tiempos.append(time.perf_counter() - inicio)
+    print(f"   {nombre:<44} {statistics.median(tiempos) * 1000:7.2f} ms  ({len(resultado)} filas)")
+
+
+def main():
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    with tempfile.TemporaryDirectory() as directorio:
+        print("✍️  Registrar 20.000 operaciones desde el hilo de trading:")
+        informar("append a operaciones.log", por_linea(os.path.join(directorio, "operaciones.log"), 20_000))
+        for sincronizacion in ("lote", "normal"):
+            diario = DiarioOperaciones(os.path.join(directorio, f"{sincronizacion}.db"), sincronizacion)
+            inicio = time.perf_counter()
+            latencias = por_diario(diario, 20_000)
+            diario.vaciar()
+            informar(f"diario ({sincronizacion})", latencias, time.perf_counter() - inicio)
+            diario.cerrar()
+
+        diario = DiarioOperaciones(os.path.join(directorio, "grande.db"), "normal")
+        inicio = time.perf_counter()
+        cargar(diario, filas)
+        segundos = time.perf_counter() - inicio
+        print(f"📥 {filas:,} operaciones escritas en {segundos:.1f} s ({filas / segundos:,.0f} filas/s, "
+              f"{diario.lotes} lotes); {os.path.getsize(diario.ruta) / 1e6:.0f} MB")
+
+        ahora = time.time()
+        print("🔎 Consultas:")
+        medir_consulta("50 recientes", lambda: diario.recientes(50))
+        medir_consulta("50 recientes de un símbolo", lambda: diario.recientes(50, simbolo="T07USDT"))
+        medir_consulta("50 recientes de un usuario en el último mes",
+                       lambda: diario.recientes(50, usuario="1042", desde=ahora - 30 * 86400))
+        medir_consulta("agregado diario del año", lambda: diario.agregados("dia"))
+        medir_consulta("agregado semanal de un símbolo", lambda: diario.agregados("semana", simbolo="T07USDT"))
+        medir_consulta("agregado por hora de un usuario, última semana",
+                       lambda: diario.agregados("hora", usuario="1042", desde=ahora - 7 * 86400))
+
+        # El resumen por hora cuadra con la tabla de operaciones
+        total = sum(fila["operaciones"] for fila in diario.agregados("semana"))
+        assert total == filas, (total, filas)
+        diario.cerrar()
+
+
+if __name__ == "__main__":
+    main()
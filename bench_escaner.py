@@ -0,0 +1,63 @@
+"""
+Benchmark del escáner de pares contra el exchange local (mock_exchange.py).
+Compara el método anterior (dos peticiones por símbolo) con el escáner masivo,
+contando peticiones y tiempo por escaneo.
+
+Uso: python bench_escaner.py [n_simbolos] [latencia_ms]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from cache_simbolos import CacheSimbolos
+from escaner_pares import escanear_pares
+from mock_exchange import ExchangeLocal
+
+
+def escanear_por_simbolo(client, base_asset='USDT', max_pares=5):
+    """Réplica del método anterior: ticker y estadísticas 24h por cada símbolo"""
+    info = client.get_exchange_info()
+    pares = []
+    for s in info['symbols']:
+        if s['quoteAsset'] == base_asset and s['status'] == 'TRADING':
+            precio = float(client.get_symbol_ticker(symbol=s['symbol'])['price'])
+            volumen = float(client.get_ticker(symbol=s['symbol'])['quoteVolume'])
+            if volumen > 100000:
+                pares.append({'symbol': s['symbol'], 'price': precio, 'volume': volumen})
+    pares.sort(key=lambda x: x['price'])
+    return pares[:max_pares]
+
+
+def medir(nombre, exchange, funcion, client):
+    exchange.reiniciar_contadores()
+    inicio = time.perf_counter()
+    resultado = funcion(client)
+    duracion = time.perf_counter() - inicio
+    print(f"{nombre:<14} peticiones={exchange.total_peticiones():>5}  tiempo={duracion * 1000:>9.1f} ms")
+    return resultado
+
+
+def main():
+    n_simbolos = int(sys.argv[1]) if len(sys.argv) > 1 else 1500
+    latencia = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.005
+
+    with ExchangeLocal(n_simbolos=n_simbolos, latencia=latencia) as exchange:
+        client = exchange.cliente()
+        print(f"📊 {n_simbolos} símbolos, latencia simulada {latencia * 1000:.1f} ms")
+        anterior = medir("por símbolo", exchange, escanear_por_simbolo, client)
+        masivo = medir("masivo", exchange, escanear_pares, client)
+
+        # Con caché de símbolos precargada (snapshot en disco), como en config.get_binance_client
+        with tempfile.TemporaryDirectory() as tmp:
+            ruta = os.path.join(tmp, "exchange_info.json")
+            CacheSimbolos(client, ruta, refresco_en_segundo_plano=False).refrescar()
+            client.simbolos = CacheSimbolos(client, ruta, refresco_en_segundo_plano=False)
+            con_cache = medir("masivo+caché", exchange, escanear_pares, client)
+
+        assert anterior == masivo == con_cache, "Los resultados no coinciden"
+        print("✅ Todos los métodos devuelven los mismos pares")
+
+
+if __name__ == "__main__":
+    main()
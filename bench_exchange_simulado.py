@@ -0,0 +1,106 @@
+"""
+Rendimiento del exchange simulado: órdenes a mercado, limit + cancelación,
+varios hilos con cuentas distintas y una estrategia de stop-loss/take-profit
+reproducida sobre velas de 1 minuto, todo en memoria y sin red.
+
+Uso: python bench_exchange_simulado.py [ordenes]
+"""
+import sys
+import threading
+import time
+
+from bench_backtesting import generar_velas
+from exchange_simulado import ExchangeSimulado
+
+HILOS = 4
+
+
+def mercado(client, n):
+    for _ in range(n // 2):
+        compra = client.order_market_buy(symbol="BTCUSDT", quantity=0.001)
+        recibido = float(compra["executedQty"]) - sum(float(f["commission"]) for f in compra["fills"])
+        client.order_market_sell(symbol="BTCUSDT", quantity=recibido)
+
+
+def limites(client, n):
+    for _ in range(n // 2):
+        orden = client.order_limit_buy(symbol="ETHUSDT", quantity=0.01, price=1000)
+        client.cancel_order(symbol="ETHUSDT", orderId=orden["orderId"])
+
+
+def en_hilos(exchange, n):
+    clientes = [exchange.cliente(f"hilo-{i}", {"USDT": 1e9}) for i in range(HILOS)]
+    hilos = [threading.Thread(target=mercado, args=(c, n // HILOS)) for c in clientes]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+
+def medir(nombre, n, funcion, *args):
+    inicio = time.perf_counter()
+    funcion(*args)
+    segundos = time.perf_counter() - inicio
+    print(f"   {nombre:<30} {n:>8,} órdenes en {segundos:5.2f} s → {n / segundos:>8,.0f} órdenes/s")
+
+
+def stop_loss_en_velas(exchange, client, velas, stop=0.02, objetivo=0.03):
+    """
+    Compra 100 USDT, deja un STOP_LOSS_LIMIT y vende a mercado al alcanzar el
+    objetivo; al cerrar cada operación vuelve a entrar. Devuelve (operaciones, órdenes)
+    """
+    operaciones = ordenes = 0
+    abierta = None
+    for i in range(len(velas)):
+        exchange.reproducir_vela("SOLUSDT", velas.apertura[i], velas.maximo[i], velas.minimo[i], velas.cierre[i])
+        if abierta is not None:
+            estado = client.get_order(symbol="SOLUSDT", orderId=abierta["orderId"])["status"]
+            if estado == "FILLED":
+                abierta = None
+            elif float(client.get_symbol_ticker(symbol="SOLUSDT")["price"]) >= entrada * (1 + objetivo):
+                client.cancel_order(symbol="SOLUSDT", orderId=abierta["orderId"])
+                client.order_market_sell(symbol="SOLUSDT", quantity=cantidad)
+                ordenes += 1
+                abierta = None
+        if abierta is None:
+            compra = client.order_market_buy(symbol="SOLUSDT", quoteOrderQty=100)
+            entrada = float(compra["cummulativeQuoteQty"]) / float(compra["executedQty"])
+            cantidad = float(compra["executedQty"]) - sum(float(f["commission"]) for f in compra["fills"])
+            abierta = client.create_order(symbol="SOLUSDT", side="SELL", type="STOP_LOSS_LIMIT",
+                                          timeInForce="GTC", quantity=cantidad,
+                                          price=round(entrada * (1 - stop) * 0.99, 8),
+                                          stopPrice=round(entrada * (1 - stop), 8))
+            operaciones += 1
+            ordenes += 2
+    return operaciones, ordenes
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    exchange = ExchangeSimulado(semilla=1)
+    client = exchange.cliente("bench", {"USDT": 1e9, "ETH": 0.0})
+
+    print("⚡ Exchange simulado en memoria:")
+    medir("mercado compra→venta", n, mercado, client, n)
+    medir("limit + cancelación", n, limites, client, n)
+    medir(f"mercado en {HILOS} hilos", n, en_hilos, exchange, n)
+
+    # Con comisiones del 0.1 % y spread, cada ida y vuelta pierde algo: nunca gana dinero de la nada
+    saldo = client.cuenta.saldos
+    assert saldo["USDT"][0] < 1e9 and saldo["USDT"][1] == 0.0 and abs(saldo["BTC"][0]) < 1e-9, saldo
+    print(f"   saldo tras {n // 2:,} idas y vueltas: {saldo['USDT'][0] - 1e9:+,.2f} USDT (comisiones y spread)")
+
+    velas = generar_velas(30 * 24 * 60, semilla=5)
+    exchange.fijar_precio("SOLUSDT", velas.apertura[0])
+    cuenta = exchange.cliente("estrategia", {"USDT": 100_000})
+    inicio = time.perf_counter()
+    operaciones, ordenes = stop_loss_en_velas(exchange, cuenta, velas)
+    segundos = time.perf_counter() - inicio
+    usdt = cuenta.cuenta.saldos["USDT"]
+    print(f"📈 Stop-loss sobre 30 días de velas de 1m: {operaciones} operaciones, {ordenes} órdenes, "
+          f"{len(velas) * 4:,} movimientos de precio en {segundos:.2f} s; "
+          f"USDT {usdt[0] + usdt[1] - 100_000:+.2f}")
+
+
+if __name__ == "__main__":
+    main()
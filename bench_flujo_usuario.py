@@ -0,0 +1,43 @@
+"""
+Ida y vuelta compra→venta esperando el fill por el user-data stream, contra el
+exchange local (mock_exchange.ExchangeLocal + StreamLocal). Las órdenes responden
+NEW y el fill llega como evento tras la latencia de ejecución simulada.
+
+Uso: python bench_flujo_usuario.py [n_trades] [latencia_ejecucion_ms]
+"""
+import statistics
+import sys
+import time
+
+from flujo_usuario import FlujoUsuario
+from mock_exchange import ExchangeLocal, StreamLocal
+
+
+def main():
+    n_trades = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    latencia_ejecucion = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.02
+
+    with StreamLocal() as stream, \
+            ExchangeLocal(n_simbolos=10, stream=stream, latencia_ejecucion=latencia_ejecucion) as exchange:
+        client = exchange.cliente()
+        par = exchange.simbolos[0]["symbol"]
+        flujo = FlujoUsuario(client, url=stream.url_usuario).iniciar()
+
+        tiempos = []
+        for _ in range(n_trades):
+            inicio = time.perf_counter()
+            compra = flujo.esperar_ejecucion(client.order_market_buy(symbol=par, quantity=1))
+            venta = flujo.esperar_ejecucion(client.order_market_sell(symbol=par, quantity=1))
+            tiempos.append(time.perf_counter() - inicio)
+            assert compra.status == venta.status == "FILLED"
+
+        flujo.detener()
+
+    print(f"🔁 {n_trades} trades compra→venta, fill simulado a {latencia_ejecucion * 1000:.0f} ms")
+    print(f"   media={statistics.mean(tiempos) * 1000:.1f} ms  "
+          f"p95={sorted(tiempos)[int(len(tiempos) * 0.95) - 1] * 1000:.1f} ms  "
+          f"(antes: 4000 ms de esperas fijas + consultas de saldo)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Gráfico de precios: coste de añadir ticks al anillo y de preparar un
+fotograma (serie ordenada + LTTB al ancho en píxeles) con horas de historial,
+frente a pasar todos los puntos al Canvas. También se mide cuánto del rango de
+precio conserva LTTB frente a quedarse con uno de cada k puntos.
+
+Uso: python bench_grafico_precios.py [ancho_px]
+"""
+import sys
+import time
+
+import numpy as np
+
+from grafico_precios import CAPACIDAD, AnilloPrecios, lttb
+
+
+def fotograma(anillo, ancho):
+    t, p = anillo.serie()
+    indices = lttb(t, p, ancho)
+    coordenadas = np.empty(2 * len(indices))
+    coordenadas[0::2], coordenadas[1::2] = t[indices], p[indices]
+    return coordenadas.tolist(), indices
+
+
+def main():
+    ancho = int(sys.argv[1]) if len(sys.argv) > 1 else 800
+    rnd = np.random.default_rng(5)
+    print(f"📈 Fotograma de {ancho} px, un tick por segundo, anillo de {CAPACIDAD:,} puntos:")
+    for horas in (1, 10, 55):
+        n = horas * 3600
+        precios = 100 * np.exp(np.cumsum(rnd.normal(0, 0.0005, n)))
+        precios[rnd.integers(0, n, 20)] *= 1.02          # picos aislados
+        anillo = AnilloPrecios()
+        inicio = time.perf_counter()
+        for ts, precio in enumerate(precios.tolist()):
+            anillo.agregar(precio, ts)
+        agregar = (time.perf_counter() - inicio) / n * 1e6
+
+        repeticiones = 20
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            coordenadas, indices = fotograma(anillo, ancho)
+        reducido = (time.perf_counter() - inicio) / repeticiones * 1000
+
+        t, p = anillo.serie()
+        inicio = time.perf_counter()
+        todos = np.column_stack((t, p)).ravel().tolist()
+        completo = (time.perf_counter() - inicio) * 1000
+
+        rango = p.max() - p.min()
+        cada_k = p[:: max(1, len(p) // ancho)]
+        print(f"   {horas:>3} h ({len(p):>7,} puntos): añadir {agregar:.2f} µs/tick   "
+              f"LTTB {reducido:6.2f} ms → {len(coordenadas) // 2} puntos   "
+              f"sin reducir {len(todos) // 2:>7,} puntos ({completo:5.1f} ms solo la lista)   "
+              f"rango conservado LTTB {(p[indices].max() - p[indices].min()) / rango:.0%} "
+              f"vs 1 de cada k {(cada_k.max() - cada_k.min()) / rango:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Historial de reportes: coste de añadir un reporte con la lista anterior
+(insert(0) + copia recortada) frente al buffer circular, carga perezosa de un
+usuario con un archivo largo y consultas paginadas y filtradas.
+
+Uso: python bench_historial_reportes.py [reportes]
+"""
+import os
+import sys
+import tempfile
+import time
+from collections import deque
+
+from historial_reportes import CAPACIDAD, HistorialReportes
+
+PARES = ["PEPEUSDT", "FLOKIUSDT", "WIFUSDT", "SHIBUSDT"]
+RESULTADOS = ["ok", "ok", "ok", "error", "saldo"]
+
+
+def lista_anterior(n, capacidad):
+    historial = []
+    for i in range(n):
+        historial.insert(0, f"12:00:00 - ✅ Trade completado en {PARES[i % 4]}")
+        historial = historial[:capacidad]
+    return historial
+
+
+def memoria(n, capacidad):
+    historial = deque(maxlen=capacidad)
+    for i in range(n):
+        historial.append(f"12:00:00 - ✅ Trade completado en {PARES[i % 4]}")
+    return historial
+
+
+def medir(nombre, n, funcion):
+    inicio = time.perf_counter()
+    resultado = funcion()
+    segundos = time.perf_counter() - inicio
+    print(f"   {nombre:<40} {segundos / n * 1e6:8.2f} µs por operación")
+    return resultado
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    with tempfile.TemporaryDirectory() as directorio:
+        print(f"➕ Añadir {n:,} reportes (capacidad {CAPACIDAD}):")
+        medir("lista: insert(0) + [:capacidad]", n, lambda: lista_anterior(n, CAPACIDAD))
+        medir("buffer circular (solo memoria)", n, lambda: memoria(n, CAPACIDAD))
+        historial = HistorialReportes(directorio)
+        medir("buffer circular + JSONL en disco", n, lambda: [
+            historial.agregar(7, PARES[i % 4], RESULTADOS[i % 5], f"Reporte {i} en {PARES[i % 4]}")
+            for i in range(n)])
+        historial.cerrar()
+        ruta = os.path.join(directorio, "7.jsonl")
+        print(f"   archivo tras compactaciones: {os.path.getsize(ruta) / 1e3:.0f} KB")
+
+        # Reinicio: el usuario se carga de disco la primera vez que aparece
+        reiniciado = HistorialReportes(directorio)
+        inicio = time.perf_counter()
+        usuario = reiniciado.de(7)
+        print(f"📂 Carga perezosa de {len(usuario)} reportes tras reiniciar: "
+              f"{(time.perf_counter() - inicio) * 1000:.2f} ms")
+        assert usuario.ultimo().texto == f"Reporte {n - 1} en {PARES[(n - 1) % 4]}"
+
+        print("🔎 Consultas:")
+        for nombre, consulta in (
+            ("/report 50", lambda: usuario.ultimos(50)),
+            ("/report page 3", lambda: usuario.pagina(3)),
+            ("/report error page 2", lambda: usuario.pagina(2, resultado="error")),
+            ("/report PEPEUSDT 20", lambda: usuario.ultimos(20, par="PEPEUSDT")),
+        ):
+            medir(nombre, 1000, lambda: [consulta() for _ in range(1000)])
+        reiniciado.cerrar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Indicadores técnicos: comprobación de que la forma por lotes y la incremental
+coinciden, coste por tick de la forma incremental para miles de símbolos
+actualizados a la vez y memoria reservada por tick.
+
+Uso: python bench_indicadores.py [ticks]
+"""
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+import indicadores as ind
+
+SIMBOLOS = (1, 100, 1000, 5000)
+
+
+def generar(simbolos, n, semilla=3):
+    rnd = np.random.default_rng(semilla)
+    cierre = 100 * np.exp(np.cumsum(rnd.normal(0, 0.002, (simbolos, n)), axis=1))
+    maximo = cierre * (1 + np.abs(rnd.normal(0, 0.001, (simbolos, n))))
+    minimo = cierre * (1 - np.abs(rnd.normal(0, 0.001, (simbolos, n))))
+    volumen = rnd.uniform(0, 50, (simbolos, n))
+    return maximo, minimo, cierre, volumen
+
+
+def juego(simbolos):
+    """Los seis indicadores incrementales y cómo alimentarlos con una columna (maximo, minimo, cierre, volumen)"""
+    return [
+        (ind.EMA(20, simbolos), lambda m, n, c, v: (c,)),
+        (ind.SMA(50, simbolos), lambda m, n, c, v: (c,)),
+        (ind.RSI(14, simbolos), lambda m, n, c, v: (c,)),
+        (ind.ATR(14, simbolos), lambda m, n, c, v: (m, n, c)),
+        (ind.Bollinger(20, simbolos), lambda m, n, c, v: (c,)),
+        (ind.VWAP(60, simbolos), lambda m, n, c, v: (c, v)),
+    ]
+
+
+def por_lotes(maximo, minimo, cierre, volumen):
+    return [
+        ind.ema(cierre, 20), ind.sma(cierre, 50), ind.rsi(cierre, 14), ind.atr(maximo, minimo, cierre, 14),
+        ind.bollinger(cierre, 20), ind.vwap(cierre, volumen, 60),
+    ]
+
+
+def comprobar():
+    maximo, minimo, cierre, volumen = generar(50, 5000)
+    lotes = por_lotes(maximo, minimo, cierre, volumen)
+    indicadores = juego(50)
+    salida = [[] for _ in indicadores]
+    for t in range(cierre.shape[1]):
+        columna = (maximo[:, t], minimo[:, t], cierre[:, t], volumen[:, t])
+        for (indicador, entradas), serie in zip(indicadores, salida):
+            serie.append(np.array(indicador.actualizar(*entradas(*columna))))
+    peor = 0.0
+    for (indicador, _), lote, serie in zip(indicadores, lotes, salida):
+        incremental = np.moveaxis(np.stack(serie), 0, -1)
+        lote = np.array(lote)
+        assert np.array_equal(np.isnan(lote), np.isnan(incremental)), type(indicador).__name__
+        validos = ~np.isnan(lote)
+        diferencia = np.abs(lote[validos] - incremental[validos]) / np.maximum(1.0, np.abs(lote[validos]))
+        assert diferencia.max() < 1e-9, (type(indicador).__name__, diferencia.max())
+        peor = max(peor, diferencia.max())
+    print(f"✅ Lotes = incremental en 50 símbolos × 5000 ticks (diferencia relativa máxima {peor:.1e})")
+
+
+def medir_lotes():
+    maximo, minimo, cierre, volumen = generar(1, 1_000_000)
+    for nombre, calculo in (
+        ("ema(20)", lambda: ind.ema(cierre, 20)),
+        ("sma(50)", lambda: ind.sma(cierre, 50)),
+        ("rsi(14)", lambda: ind.rsi(cierre, 14)),
+        ("atr(14)", lambda: ind.atr(maximo, minimo, cierre, 14)),
+        ("bollinger(20)", lambda: ind.bollinger(cierre, 20)),
+        ("vwap(60)", lambda: ind.vwap(cierre, volumen, 60)),
+    ):
+        inicio = time.perf_counter()
+        calculo()
+        print(f"   {nombre:<14} 1M velas en {(time.perf_counter() - inicio) * 1000:6.1f} ms")
+
+
+def medir_incremental(simbolos, ticks):
+    maximo, minimo, cierre, volumen = generar(simbolos, 256, semilla=simbolos)
+    indicadores = juego(simbolos)
+    columnas = [(maximo[:, t], minimo[:, t], cierre[:, t], volumen[:, t]) for t in range(256)]
+    # Calentamiento fuera de la medida
+    for columna in columnas:
+        for indicador, entradas in indicadores:
+            indicador.actualizar(*entradas(*columna))
+
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    for t in range(200):
+        for indicador, entradas in indicadores:
+            indicador.actualizar(*entradas(*columnas[t % 256]))
+    reservado = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+
+    inicio = time.perf_counter()
+    for t in range(ticks):
+        columna = columnas[t % 256]
+        for indicador, entradas in indicadores:
+            indicador.actualizar(*entradas(*columna))
+    por_tick = (time.perf_counter() - inicio) / ticks
+    print(f"   {simbolos:>5} símbolos: {por_tick * 1e6:8.1f} µs por tick (6 indicadores), "
+          f"{por_tick / (6 * simbolos) * 1e9:7.1f} ns por símbolo e indicador, "
+          f"pico de memoria {reservado} B")
+    return por_tick
+
+
+def medir_recalculo(simbolos, ticks, historial=500):
+    """Alternativa ingenua: recalcular por lotes sobre las últimas `historial` velas en cada tick"""
+    maximo, minimo, cierre, volumen = generar(simbolos, historial)
+    inicio = time.perf_counter()
+    for _ in range(ticks):
+        por_lotes(maximo, minimo, cierre, volumen)
+    return (time.perf_counter() - inicio) / ticks
+
+
+def main():
+    ticks = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    comprobar()
+    print("📦 Por lotes (1 símbolo):")
+    medir_lotes()
+    print(f"⚡ Incremental ({ticks} ticks):")
+    resultados = {s: medir_incremental(s, ticks) for s in SIMBOLOS}
+    recalculo = medir_recalculo(1000, 20)
+    print(f"🐢 Recalcular por lotes 500 velas × 1000 símbolos en cada tick: {recalculo * 1000:.1f} ms por tick "
+          f"({recalculo / resultados[1000]:.0f}× el incremental)")
+
+
+if __name__ == "__main__":
+    main()
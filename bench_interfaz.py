@@ -0,0 +1,86 @@
+"""
+Interfaz: cuánto tiempo queda sin atender el bucle de eventos mientras se
+verifica la API contra el exchange local con latencia. Antes, la verificación
+(ping, cuenta, tickers) corría en el hilo de la ventana; ahora va en un
+Trabajador y vuelve por la ColaInterfaz. No hace falta pantalla: un
+bucle con after() hace de root y mide el hueco máximo entre dos vueltas,
+cuando Tk redibujaría y atendería clics.
+
+Uso: python bench_interfaz.py [latencia_ms]
+"""
+import heapq
+import itertools
+import sys
+import time
+
+from interfaz_tk import ColaInterfaz, Trabajador
+from mock_exchange import ExchangeLocal
+
+LATIDO_MS = 16      # el bucle de eventos querría dar una vuelta por fotograma
+
+
+class BucleEventos:
+    """after() y mainloop() mínimos, con el hueco máximo entre vueltas"""
+
+    def __init__(self):
+        self._pendientes = []
+        self._orden = itertools.count()
+        self.hueco_maximo = 0.0
+
+    def after(self, ms, funcion, *args):
+        heapq.heappush(self._pendientes, (time.perf_counter() + ms / 1000, next(self._orden), funcion, args))
+
+    def latir(self):
+        self.after(LATIDO_MS, self.latir)
+
+    def ejecutar(self, segundos):
+        fin = time.perf_counter() + segundos
+        anterior = time.perf_counter()
+        while time.perf_counter() < fin:
+            cuando, _, funcion, args = heapq.heappop(self._pendientes)
+            time.sleep(max(0.0, cuando - time.perf_counter()))
+            ahora = time.perf_counter()
+            self.hueco_maximo = max(self.hueco_maximo, ahora - anterior)
+            anterior = ahora
+            funcion(*args)
+            self.hueco_maximo = max(self.hueco_maximo, time.perf_counter() - anterior)
+
+
+def verificar(client, simbolos):
+    """Como la verificación de main.py antes del libro de saldos: una petición más por activo relevante"""
+    client.ping()
+    client.get_account()
+    client.get_all_tickers()
+    for symbol in simbolos:
+        client.get_symbol_ticker(symbol=symbol)
+
+
+def main():
+    latencia = float(sys.argv[1]) / 1000 if len(sys.argv) > 1 else 0.1
+    with ExchangeLocal(n_simbolos=300, latencia=latencia) as exchange:
+        client = exchange.cliente()
+        simbolos = [s["symbol"] for s in exchange.simbolos[:7]]      # tantos como ACTIVOS_RELEVANTES
+        print(f"🖥  Verificación de la API con {latencia * 1000:.0f} ms de latencia por petición:")
+
+        bucle = BucleEventos()
+        bucle.latir()
+        bucle.after(50, verificar, client, simbolos)                  # antes: en el hilo de la ventana
+        bucle.ejecutar(latencia * 10 + 0.5)
+        print(f"   en el hilo de la ventana: ventana congelada hasta {bucle.hueco_maximo * 1000:7.1f} ms")
+
+        bucle = BucleEventos()
+        bucle.latir()
+        interfaz = ColaInterfaz(bucle).iniciar()
+        trabajador = Trabajador(interfaz)
+        resultado = {}
+        bucle.after(50, trabajador.enviar, verificar, client, simbolos)
+        for i in range(200):                                 # ráfaga de actualizaciones desde el hilo de fondo
+            trabajador.enviar(lambda i=i: i, al_terminar=lambda i: resultado.update(ultimo=i))
+        bucle.ejecutar(latencia * 10 + 0.5)
+        trabajador.detener()
+        print(f"   en el trabajador:         ventana congelada hasta {bucle.hueco_maximo * 1000:7.1f} ms "
+              f"({interfaz.ejecutadas} actualizaciones aplicadas desde Tk, última {resultado.get('ultimo')})")
+
+
+if __name__ == "__main__":
+    main()
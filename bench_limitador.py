@@ -0,0 +1,97 @@
+"""
+Gobernador de peso contra el exchange local con límite de peso activado.
+Varios hilos piden tickers masivos (peso 80) sin parar mientras otro lanza
+órdenes; sin gobernador el exchange responde 429, con gobernador las
+peticiones de mercado esperan su turno y las órdenes pasan primero.
+
+El minuto de Binance se escala a una ventana corta para que el benchmark dure
+unos segundos.
+
+Uso: python bench_limitador.py [segundos] [hilos_mercado]
+"""
+import statistics
+import sys
+import threading
+import time
+
+from binance.exceptions import BinanceAPIException
+
+from limitador import GobernadorPeso
+from mock_exchange import ExchangeLocal
+
+LIMITE_PESO = 1200
+VENTANA = 2.0
+
+
+def ejecutar(exchange, segundos, hilos_mercado, gobernador=None):
+    exchange.reiniciar_contadores()
+    fin = time.monotonic() + segundos
+    resultados = {"mercado": 0, "mercado_fallidas": 0, "ordenes_fallidas": 0}
+    latencias = []
+    lock = threading.Lock()
+
+    def cliente():
+        client = exchange.cliente()
+        return gobernador.aplicar(client) if gobernador else client
+
+    def mercado():
+        client = cliente()
+        while time.monotonic() < fin:
+            try:
+                client.get_ticker()
+                clave = "mercado"
+            except BinanceAPIException:
+                clave = "mercado_fallidas"
+            with lock:
+                resultados[clave] += 1
+
+    def ordenes():
+        client = cliente()
+        par = exchange.simbolos[0]["symbol"]
+        while time.monotonic() < fin:
+            inicio = time.perf_counter()
+            try:
+                client.order_market_buy(symbol=par, quantity=1)
+                latencias.append(time.perf_counter() - inicio)
+            except BinanceAPIException:
+                with lock:
+                    resultados["ordenes_fallidas"] += 1
+            time.sleep(0.15)   # por debajo del límite de 100 órdenes cada 10 s
+
+    hilos = [threading.Thread(target=mercado) for _ in range(hilos_mercado)]
+    hilos.append(threading.Thread(target=ordenes))
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    resultados["429"] = exchange.rechazos_429
+    return resultados, latencias
+
+
+def informar(titulo, resultados, latencias, segundos):
+    latencias = sorted(latencias) or [0.0]
+    print(titulo)
+    print(f"   tickers masivos OK={resultados['mercado']} ({resultados['mercado'] * 80 / segundos:.0f} peso/s)  "
+          f"fallidos={resultados['mercado_fallidas']}  429 en el servidor={resultados['429']}")
+    print(f"   órdenes OK={len(latencias)} fallidas={resultados['ordenes_fallidas']}  "
+          f"p50={statistics.median(latencias) * 1000:.1f} ms  "
+          f"p95={latencias[int(len(latencias) * 0.95) - 1] * 1000:.1f} ms")
+
+
+def main():
+    segundos = float(sys.argv[1]) if len(sys.argv) > 1 else 6
+    hilos_mercado = int(sys.argv[2]) if len(sys.argv) > 2 else 6
+
+    with ExchangeLocal(n_simbolos=300, limite_peso=LIMITE_PESO, ventana_peso=VENTANA) as exchange:
+        print(f"⚖️  Límite {LIMITE_PESO} de peso cada {VENTANA:.0f} s, {hilos_mercado} hilos de mercado + 1 de órdenes, {segundos:.0f} s")
+        informar("Sin gobernador:", *ejecutar(exchange, segundos, hilos_mercado), segundos)
+
+        # Deja pasar la ventana (y el Retry-After) que haya quedado abierta
+        time.sleep(VENTANA)
+        gobernador = GobernadorPeso(peso=LIMITE_PESO, intervalo_peso=VENTANA)
+        informar("Con gobernador:", *ejecutar(exchange, segundos, hilos_mercado, gobernador), segundos)
+        print(f"   presupuesto: {gobernador.presupuesto()}")
+
+
+if __name__ == "__main__":
+    main()
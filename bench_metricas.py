@@ -0,0 +1,96 @@
+"""
+Métricas: coste de incrementar un contador y observar una latencia desde
+varios hilos a la vez, con los dicts por hilo de metricas.py frente a un dict
+protegido por un lock, y scrape de /metrics tras pedir tickers al exchange
+local con un cliente envuelto por el gobernador.
+
+Uso: python bench_metricas.py [operaciones_por_hilo] [hilos]
+"""
+import sys
+import threading
+import time
+import urllib.request
+
+from limitador import GobernadorPeso
+from metricas import Registro, ServidorMetricas, metricas_compartidas
+from mock_exchange import ExchangeLocal
+
+RUTAS = ("ticker/price", "order", "account", "exchangeInfo")
+
+
+class ContadorConLock:
+    """Lo que se haría sin repartir por hilo: un dict y un lock compartidos"""
+
+    def __init__(self):
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *etiquetas, valor=1):
+        with self._lock:
+            self._valores[etiquetas] = self._valores.get(etiquetas, 0) + valor
+
+
+def en_hilos(hilos, operaciones, funcion):
+    """ns por operación con `hilos` hilos llamando a funcion(i) a la vez"""
+    barrera = threading.Barrier(hilos + 1)
+
+    def trabajar():
+        barrera.wait()
+        for i in range(operaciones):
+            funcion(i)
+
+    trabajadores = [threading.Thread(target=trabajar) for _ in range(hilos)]
+    for t in trabajadores:
+        t.start()
+    barrera.wait()
+    inicio = time.perf_counter()
+    for t in trabajadores:
+        t.join()
+    return (time.perf_counter() - inicio) / (hilos * operaciones) * 1e9
+
+
+def main():
+    operaciones = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    hilos = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    registro = Registro()
+    contador = registro.contador("bench_peticiones", "Peticiones", ("ruta",))
+    histograma = registro.histograma("bench_latencia_segundos", "Latencia", ("ruta",))
+    con_lock = ContadorConLock()
+
+    print(f"⏱  {operaciones:,} operaciones por hilo:")
+    for n in (1, hilos):
+        print(f"   {n} hilo(s): contador por hilo "
+              f"{en_hilos(n, operaciones, lambda i: contador.inc(RUTAS[i & 3])):6.0f} ns   "
+              f"contador con lock {en_hilos(n, operaciones, lambda i: con_lock.inc(RUTAS[i & 3])):6.0f} ns   "
+              f"histograma {en_hilos(n, operaciones, lambda i: histograma.observar(i * 1e-7, RUTAS[i & 3])):6.0f} ns")
+    total = sum(contador.valor(ruta) for ruta in RUTAS)
+    assert total == operaciones * (1 + hilos), total     # ningún incremento perdido entre hilos
+
+    inicio = time.perf_counter()
+    texto = registro.exposicion()
+    print(f"   exposición del registro: {(time.perf_counter() - inicio) * 1000:.2f} ms, {len(texto):,} bytes")
+
+    with ExchangeLocal(n_simbolos=300) as exchange:
+        client = GobernadorPeso().aplicar(exchange.cliente())
+        peticiones = 500
+        inicio = time.perf_counter()
+        for _ in range(peticiones):
+            client.get_symbol_ticker(symbol=exchange.simbolos[0]["symbol"])
+        print(f"🌐 {peticiones} tickers con el gobernador instrumentado: "
+              f"{(time.perf_counter() - inicio) / peticiones * 1000:.2f} ms por petición")
+
+    servidor = ServidorMetricas(metricas_compartidas(), puerto=0, host="127.0.0.1").iniciar()
+    try:
+        inicio = time.perf_counter()
+        with urllib.request.urlopen(f"http://127.0.0.1:{servidor.puerto}/metrics") as respuesta:
+            cuerpo = respuesta.read().decode()
+        print(f"📈 GET /metrics en {(time.perf_counter() - inicio) * 1000:.1f} ms; muestras de Binance:")
+        for linea in cuerpo.splitlines():
+            if linea.startswith(("binance_peticion_segundos_count", "binance_peso_total", "proceso_hilos")):
+                print(f"   {linea}")
+    finally:
+        servidor.cerrar()
+
+
+if __name__ == "__main__":
+    main()
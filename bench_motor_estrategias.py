@@ -0,0 +1,89 @@
+"""
+Motor de estrategias: coste de decidir en cada tick para cientos o miles de
+símbolos con la matriz símbolos × rasgos y una llamada vectorizada, frente a
+un bucle Python por par con EMAs escalares (lo que haría cada bot con su lista
+PARES). Paseo aleatorio sintético; las dos versiones deben emitir las mismas
+intenciones.
+
+Uso: python bench_motor_estrategias.py [ticks]
+"""
+import sys
+import time
+
+import numpy as np
+
+from motor_estrategias import CruceEMA, MotorEstrategias
+
+
+class PorPar:
+    """Cruce de EMAs par a par, con floats de Python"""
+
+    def __init__(self, simbolos, rapida=9, lenta=21, nominal=10.0):
+        self.simbolos = simbolos
+        self.periodos = (rapida, lenta)
+        self.alfas = (2 / (rapida + 1), 2 / (lenta + 1))
+        self.nominal = nominal
+        self.estado = {s: {"ticks": 0, "sumas": [0.0, 0.0], "emas": [None, None], "cantidad": 0.0} for s in simbolos}
+
+    def tick(self, precios):
+        intenciones = []
+        for symbol, precio in zip(self.simbolos, precios):
+            e = self.estado[symbol]
+            e["ticks"] += 1
+            for k in (0, 1):
+                if e["ticks"] < self.periodos[k]:
+                    e["sumas"][k] += precio
+                elif e["ticks"] == self.periodos[k]:
+                    e["emas"][k] = (e["sumas"][k] + precio) / self.periodos[k]
+                else:
+                    e["emas"][k] = precio * self.alfas[k] + e["emas"][k] * (1 - self.alfas[k])
+            rapida, lenta = e["emas"]
+            if rapida is None or lenta is None:
+                continue
+            if rapida > lenta and not e["cantidad"]:
+                e["cantidad"] = self.nominal / precio
+                intenciones.append((symbol, "BUY"))
+            elif rapida < lenta and e["cantidad"]:
+                e["cantidad"] = 0.0
+                intenciones.append((symbol, "SELL"))
+        return intenciones
+
+
+def paseo(simbolos, ticks, semilla=3):
+    rnd = np.random.default_rng(semilla)
+    pasos = rnd.normal(0, 0.002, size=(ticks, simbolos))
+    return rnd.uniform(0.01, 100, size=simbolos) * np.exp(np.cumsum(pasos, axis=0))
+
+
+def main():
+    ticks = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    print(f"🧮 Cruce de EMAs 9/21, {ticks} ticks:")
+    for n in (5, 300, 2000):
+        simbolos = [f"SIM{i}USDT" for i in range(n)]
+        precios = paseo(n, ticks)
+
+        motor = MotorEstrategias(simbolos, CruceEMA())
+        vectorizadas, costes = [], []
+        for fila in precios:
+            inicio = time.perf_counter()
+            intenciones = motor.tick(fila)
+            costes.append(time.perf_counter() - inicio)
+            vectorizadas.append(sorted((i.symbol, i.lado) for i in intenciones))
+
+        por_par = PorPar(simbolos)
+        bucle, costes_bucle = [], []
+        for fila in precios.tolist():
+            inicio = time.perf_counter()
+            intenciones = por_par.tick(fila)
+            costes_bucle.append(time.perf_counter() - inicio)
+            bucle.append(sorted(intenciones))
+
+        assert vectorizadas == bucle, "las intenciones no coinciden"
+        print(f"   {n:>5} símbolos: matriz {np.median(costes) * 1e6:7.1f} µs por tick   "
+              f"bucle por par {np.median(costes_bucle) * 1e6:8.1f} µs por tick   "
+              f"{sum(map(len, vectorizadas))} intenciones")
+    print(f"   {motor.resumen()}")
+
+
+if __name__ == "__main__":
+    main()
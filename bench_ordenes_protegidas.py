@@ -0,0 +1,72 @@
+"""
+Tiempo hasta quedar protegida una compra a mercado contra el exchange local
+con latencia de red: la secuencia anterior de binance_api (ticker, compra,
+stop-loss y take-profit uno tras otro) frente a comprar_protegido con OCO y
+con los dos tramos en paralelo. Al final, el caso de saldo justo en el
+exchange simulado, donde el stop-loss tiene prioridad sobre el take-profit.
+
+Uso: python bench_ordenes_protegidas.py [compras] [latencia_ms]
+"""
+import statistics
+import sys
+import time
+
+from exchange_simulado import ExchangeSimulado
+from mock_exchange import ExchangeLocal
+from ordenes_protegidas import comprar_protegido
+
+
+def secuencial(client, par, cantidad, stop_loss_porcentaje, take_profit_porcentaje):
+    """La versión anterior de colocar_orden_compra_con_stop_loss; devuelve los segundos desde el fill"""
+    precio_actual = float(client.get_symbol_ticker(symbol=par)["price"])
+    stop_loss_precio = precio_actual * (1 - stop_loss_porcentaje / 100)
+    client.order_market_buy(symbol=par, quantity=cantidad)
+    fill = time.perf_counter()
+    client.create_order(symbol=par, side="SELL", type="STOP_LOSS_LIMIT", timeInForce="GTC", quantity=cantidad,
+                        price=round(stop_loss_precio * 0.99, 8), stopPrice=round(stop_loss_precio, 8))
+    take_profit_precio = precio_actual * (1 + take_profit_porcentaje / 100)
+    client.create_order(symbol=par, side="SELL", type="TAKE_PROFIT_LIMIT", timeInForce="GTC", quantity=cantidad,
+                        price=round(take_profit_precio * 0.99, 8), stopPrice=round(take_profit_precio, 8))
+    return time.perf_counter() - fill
+
+
+def medir(nombre, compras, funcion):
+    totales, protecciones = [], []
+    for _ in range(compras):
+        inicio = time.perf_counter()
+        protecciones.append(funcion())
+        totales.append(time.perf_counter() - inicio)
+    print(f"   {nombre:<12} total p50 {statistics.median(totales) * 1000:6.1f} ms   "
+          f"fill→protegida p50 {statistics.median(protecciones) * 1000:6.1f} ms   "
+          f"máx {max(protecciones) * 1000:6.1f} ms")
+    return statistics.median(protecciones)
+
+
+def main():
+    compras = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    latencia = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.05
+
+    with ExchangeLocal(n_simbolos=50, latencia=latencia) as exchange:
+        client = exchange.cliente()
+        par = exchange.simbolos[0]["symbol"]
+        print(f"🛡️  Compra + SL 2 % + TP 3 % con {latencia * 1000:.0f} ms de latencia por petición, {compras} compras:")
+        anterior = medir("secuencial", compras, lambda: secuencial(client, par, 1, 2, 3))
+        oco = medir("oco", compras, lambda: comprar_protegido(client, par, 1, 2, 3).tiempo_hasta_protegida)
+        paralelo = medir("paralelo", compras,
+                         lambda: comprar_protegido(client, par, 1, 2, 3, usar_oco=False).tiempo_hasta_protegida)
+        print(f"   fill→protegida: OCO {anterior / oco:.1f}× y paralelo {anterior / paralelo:.1f}× más rápido que secuencial; "
+              f"peticiones: {dict(exchange.peticiones)}")
+
+    # Saldo justo: solo cabe un tramo bloqueado, el take-profit se retira si llegó primero
+    simulado = ExchangeSimulado(semilla=2)
+    cuenta = simulado.cliente("bench", {"USDT": 10_000})
+    resultado = comprar_protegido(cuenta, "BTCUSDT", 0.01, 2, 3, usar_oco=False)
+    assert resultado.protegida, resultado.errores
+    abiertas = [o["type"] for o in cuenta.get_open_orders(symbol="BTCUSDT")]
+    print(f"🔒 Sin OCO y saldo para un solo tramo: {resultado.resumen()}; abiertas {abiertas}")
+    resultado = comprar_protegido(cuenta, "ETHUSDT", 0.1, 2, 3)
+    print(f"🔒 Con OCO en el exchange simulado: {resultado.resumen()}")
+
+
+if __name__ == "__main__":
+    main()
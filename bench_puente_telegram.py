@@ -0,0 +1,71 @@
+"""
+Envíos a Telegram desde un hilo síncrono contra la Bot API local:
+asyncio.run + Bot nuevo por mensaje (lo que obligaba a hacer el patrón
+anterior, un loop y un cliente HTTP por envío) frente al PuenteTelegram,
+con un único loop de fondo y un único Bot.
+
+Uso: python bench_puente_telegram.py [n_mensajes]
+"""
+import asyncio
+import statistics
+import sys
+import time
+
+from telegram import Bot
+
+from mock_exchange import TelegramLocal
+from telegram_utils import PuenteTelegram
+
+
+def loop_por_envio(url, n):
+    async def enviar(i):
+        async with Bot("TOKEN", base_url=url) as bot:
+            await bot.send_message(chat_id=1, text=f"mensaje {i}")
+
+    tiempos = []
+    for i in range(n):
+        inicio = time.perf_counter()
+        asyncio.run(enviar(i))
+        tiempos.append(time.perf_counter() - inicio)
+    return tiempos
+
+
+def con_puente(url, n):
+    puente = PuenteTelegram("TOKEN", base_url=url)
+    tiempos = []
+    for i in range(n):
+        inicio = time.perf_counter()
+        puente.enviar_y_esperar(1, f"mensaje {i}")
+        tiempos.append(time.perf_counter() - inicio)
+
+    # Ráfaga sin esperar: cuánto bloquea programarla y cuánto tarda en vaciarse
+    inicio = time.perf_counter()
+    futuros = [puente.notificar(1, f"ráfaga {i}") for i in range(n)]
+    programado = time.perf_counter() - inicio
+    profundidad = puente.pendientes()
+    for futuro in futuros:
+        futuro.result()
+    vaciado = time.perf_counter() - inicio
+    estadisticas = puente.estadisticas()
+    puente.cerrar()
+    return tiempos, programado, profundidad, vaciado, estadisticas
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    with TelegramLocal(intervalo_chat=0) as telegram:
+        url = telegram.url + "/bot"
+        viejos = loop_por_envio(url, n)
+        nuevos, programado, profundidad, vaciado, estadisticas = con_puente(url, n)
+
+    print(f"📡 {n} envíos síncronos con confirmación")
+    print(f"asyncio.run + Bot por envío   media={statistics.mean(viejos) * 1000:6.2f} ms")
+    print(f"PuenteTelegram                media={statistics.mean(nuevos) * 1000:6.2f} ms")
+    print(f"Ráfaga de {n} sin esperar: programada en {programado * 1000:.1f} ms "
+          f"(profundidad {profundidad}), entregada en {vaciado * 1000:.0f} ms")
+    print(f"   {estadisticas}")
+
+
+if __name__ == "__main__":
+    main()
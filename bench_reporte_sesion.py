@@ -0,0 +1,57 @@
+"""
+Informe de sesión de bot.py: concatenar el texto con += durante toda la
+sesión frente a guardar registros por par y generarlo al final, y cuántos
+mensajes de Telegram salen sin pasar de 4096 caracteres.
+
+Uso: python bench_reporte_sesion.py [pares]
+"""
+import sys
+import time
+
+from reporte_sesion import ReporteSesion
+from telegram_report import MAX_CARACTERES
+
+
+def concatenando(n):
+    reporte_detallado = "*📊 INFORME DETALLADO DE OPERACIONES*\n\n"
+    for i in range(n):
+        reporte_detallado += f"*🔁 P{i}USDT*\n"
+        reporte_detallado += f"- Saldo inicial P{i}: `{1.0:.6f}`\n"
+        reporte_detallado += f"- Saldo inicial USDT: `{100.0:.2f}`\n"
+        reporte_detallado += f"✅ Compra realizada a: `${1.2:.4f}`\n"
+        reporte_detallado += f"✅ Venta realizada a: `${1.3:.4f}`\n"
+        reporte_detallado += f"- Saldo final P{i}: `{1.0:.6f}`\n"
+        reporte_detallado += f"- Saldo final USDT: `{100.1:.2f}`\n\n"
+    return [reporte_detallado]
+
+
+def con_registros(n, cada=500):
+    reporte = ReporteSesion()
+    parciales = []
+    for i in range(n):
+        registro = reporte.par(f"P{i}USDT", f"P{i}", 1.0, 100.0)
+        reporte.compra(registro, 1.2, 1)
+        reporte.venta(registro, 1.3, 1)
+        registro.saldo_base_final, registro.saldo_usdt_final = 1.0, 100.1
+        if i % cada == cada - 1:
+            parciales.extend(reporte.parcial())
+    return parciales, reporte.mensajes()
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    inicio = time.perf_counter()
+    texto = concatenando(n)[0]
+    print(f"➕ += durante la sesión: {(time.perf_counter() - inicio) * 1000:.1f} ms, un solo texto de "
+          f"{len(texto):,} caracteres ({'rechazado' if len(texto) > MAX_CARACTERES else 'aceptado'} por Telegram)")
+
+    inicio = time.perf_counter()
+    parciales, mensajes = con_registros(n)
+    segundos = time.perf_counter() - inicio
+    assert all(len(m) <= MAX_CARACTERES for m in parciales + mensajes)
+    print(f"🧱 Registros + render al final: {segundos * 1000:.1f} ms, {len(mensajes)} mensajes "
+          f"≤ {MAX_CARACTERES} caracteres y {len(parciales)} mensajes parciales durante la sesión")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Healthcheck: coste de lanzar el script anterior (intérprete nuevo + import de
+requests + llamada externa, aquí sin la llamada) frente al sondeo local de
+/health, y detección de un event loop bloqueado y de una sesión atascada.
+
+Uso: python bench_salud.py [repeticiones]
+"""
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+from metricas import Registro, ServidorMetricas
+from salud import MonitorSalud, sondear
+
+
+def lanzar(argumentos, entorno, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        subprocess.run([sys.executable, *argumentos], env=entorno, check=False, capture_output=True)
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos) * 1000
+
+
+def main():
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    monitor = MonitorSalud()
+    servidor = ServidorMetricas(Registro(), puerto=0, host="127.0.0.1",
+                                rutas={"/health": monitor.respuesta}).iniciar()
+    url = f"http://127.0.0.1:{servidor.puerto}/health"
+    entorno = dict(os.environ, METRICAS_PUERTO=str(servidor.puerto))
+
+    print(f"🩺 Healthcheck por ejecución (mediana de {repeticiones}):")
+    anterior = lanzar(["-c", "import requests"], entorno, repeticiones)
+    local = lanzar(["healthcheck_telegram.py"], entorno, repeticiones)
+    print(f"   script anterior sin la llamada externa: {anterior:6.1f} ms")
+    print(f"   healthcheck_telegram.py (sondeo local): {local:6.1f} ms")
+    tiempos = []
+    for _ in range(200):
+        inicio = time.perf_counter()
+        sondear(url)
+        tiempos.append(time.perf_counter() - inicio)
+    print(f"   GET /health dentro del proceso:         {statistics.median(tiempos) * 1000:6.2f} ms")
+
+    # Un loop que late cada 0.1 s y se bloquea con un sleep síncrono
+    latido_loop = monitor.latido("loop", 0.5)
+    sesion = monitor.latido("sesion-1", 1.0)
+
+    async def latir():
+        while True:
+            latido_loop.marcar()
+            await asyncio.sleep(0.1)
+
+    async def escenario():
+        tarea = asyncio.create_task(latir())
+        await asyncio.sleep(0.3)
+        print(f"🫀 Loop latiendo: {json.loads(sondear(url)[1])['sano']}")
+        resultado = {}
+        hilo = threading.Thread(target=lambda: (time.sleep(0.8), resultado.update(sondeo=sondear(url))))
+        hilo.start()
+        time.sleep(1.0)            # bloquea el loop: el servidor de salud sigue respondiendo desde su hilo
+        hilo.join()
+        ok, texto = resultado["sondeo"]
+        print(f"🧊 Loop bloqueado 1 s: sano={ok}, atascados={[n for n, c in json.loads(texto)['componentes'].items() if not c['ok']]}")
+        await asyncio.sleep(0.2)
+        tarea.cancel()
+
+    sesion.marcar()
+    asyncio.run(escenario())
+    ok, _ = sondear(url + "?componente=loop")
+    print(f"🔁 Loop recuperado: sano={ok}; sesión sin latir desde hace >1 s: atascados={monitor.atascados()}")
+    servidor.cerrar()
+
+
+if __name__ == "__main__":
+    main()
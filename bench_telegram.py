@@ -0,0 +1,70 @@
+"""
+Ráfaga de reportes contra una Bot API de Telegram local con límite por chat.
+Compara un requests.post por mensaje (como se hacía antes) con el
+DespachadorTelegram: sesión keep-alive, agrupación por chat, retry_after y
+troceo a 4096 caracteres.
+
+El límite de 1 mensaje/s por chat se escala para que el benchmark dure poco.
+
+Uso: python bench_telegram.py [n_mensajes]
+"""
+import sys
+import time
+
+import requests
+
+from mock_exchange import TelegramLocal
+from telegram_report import DespachadorTelegram
+
+INTERVALO_CHAT = 0.05
+RETRY_AFTER = 0.05
+CHAT_ID = "1"
+
+
+def mensaje(i):
+    return f"✅ Trade completado en PEPEUSDT #{i}\n- Compra `0.00001234`\n- Venta `0.00001240`"
+
+
+def por_mensaje(telegram, n):
+    url = f"{telegram.url}/botTOKEN/sendMessage"
+    inicio = time.perf_counter()
+    for i in range(n):
+        requests.post(url, data={"chat_id": CHAT_ID, "text": mensaje(i)})
+    return time.perf_counter() - inicio
+
+
+def con_despachador(telegram, n):
+    despachador = DespachadorTelegram("TOKEN", CHAT_ID, url_base=telegram.url, ventana=0.2,
+                                      intervalo_chat=INTERVALO_CHAT)
+    inicio = time.perf_counter()
+    for i in range(n):
+        despachador.enviar(mensaje(i))
+    encolado = time.perf_counter() - inicio
+    despachador.cerrar()
+    return encolado, time.perf_counter() - inicio, despachador
+
+
+def entregados(telegram):
+    # Cuenta reportes individuales dentro de los mensajes (agrupados o no)
+    return sum(texto.count("✅ Trade completado") for texto in telegram.mensajes.get(CHAT_ID, []))
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+
+    with TelegramLocal(intervalo_chat=INTERVALO_CHAT, retry_after=RETRY_AFTER) as telegram:
+        tiempo = por_mensaje(telegram, n)
+        print(f"📨 {n} reportes en ráfaga, límite 1 mensaje cada {INTERVALO_CHAT * 1000:.0f} ms por chat")
+        print(f"requests.post por mensaje   bloqueo={tiempo * 1000:8.1f} ms  peticiones={telegram.peticiones:4d}  "
+              f"429={telegram.rechazos_429:4d}  entregados={entregados(telegram)}/{n}")
+
+    with TelegramLocal(intervalo_chat=INTERVALO_CHAT, retry_after=RETRY_AFTER) as telegram:
+        encolado, total, despachador = con_despachador(telegram, n)
+        largos = [len(t) for t in telegram.mensajes.get(CHAT_ID, [])]
+        print(f"DespachadorTelegram         bloqueo={encolado * 1000:8.1f} ms  peticiones={telegram.peticiones:4d}  "
+              f"429={telegram.rechazos_429:4d}  entregados={entregados(telegram)}/{n}  "
+              f"(vaciado en {total * 1000:.0f} ms, mensaje más largo {max(largos)} caracteres)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Validador de órdenes contra el exchange local con filtros activados
+(LOT_SIZE 0.001, NOTIONAL 5). Un lote de órdenes a mercado con cantidades como
+las del bot (demasiados decimales, nominal por debajo del mínimo, correctas)
+se envía tal cual y con el validador: idas y vueltas rechazadas por el
+exchange, rechazadas en local, ajustadas, tiempo total y coste de normalizar.
+
+Uso: python bench_validador_ordenes.py [ordenes] [latencia_ms]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from binance.exceptions import BinanceAPIException
+
+from cache_simbolos import CacheSimbolos
+from mock_exchange import ExchangeLocal
+from validador_ordenes import OrdenInvalida, ValidadorOrdenes
+
+
+def generar_ordenes(exchange, n, semilla=7):
+    """(símbolo, cantidad): 40 % con decimales de más, 20 % por debajo del nominal mínimo, 40 % correctas"""
+    rnd = random.Random(semilla)
+    simbolos = [s for s in exchange.simbolos
+                if s["status"] == "TRADING" and s["quoteAsset"] == "USDT" and 0.01 < s["price"] < 1000]
+    ordenes = []
+    for i in range(n):
+        s = rnd.choice(simbolos)
+        tipo = i % 5
+        if tipo in (0, 1):
+            cantidad = round(rnd.uniform(20, 50) / s["price"], 7) + 0.0000003
+        elif tipo == 2:
+            cantidad = max(0.001, round(rnd.uniform(0.5, 3) / s["price"], 3))
+        else:
+            cantidad = max(0.001, round(rnd.uniform(20, 50) / s["price"], 3))
+        ordenes.append((s["symbol"], cantidad))
+    return ordenes
+
+
+def enviar(client, ordenes):
+    resultado = {"ok": 0, "exchange": 0, "local": 0}
+    inicio = time.perf_counter()
+    for symbol, cantidad in ordenes:
+        try:
+            client.order_market_buy(symbol=symbol, quantity=cantidad)
+            resultado["ok"] += 1
+        except OrdenInvalida:
+            resultado["local"] += 1
+        except BinanceAPIException:
+            resultado["exchange"] += 1
+    resultado["segundos"] = time.perf_counter() - inicio
+    return resultado
+
+
+def informar(nombre, resultado, peticiones):
+    print(f"   {nombre:<14} ejecutadas {resultado['ok']:>4}   rechazadas por el exchange {resultado['exchange']:>4}   "
+          f"en local {resultado['local']:>4}   peticiones de orden {peticiones:>4}   {resultado['segundos']:.2f} s")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    latencia = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.02
+    with ExchangeLocal(n_simbolos=300, latencia=latencia, filtros=True) as exchange, \
+            tempfile.TemporaryDirectory() as directorio:
+        ordenes = generar_ordenes(exchange, n)
+        print(f"🧾 {n} órdenes a mercado, {latencia * 1000:.0f} ms de latencia:")
+
+        exchange.reiniciar_contadores()
+        informar("sin validador", enviar(exchange.cliente(), ordenes), exchange.peticiones["order"])
+
+        client = exchange.cliente()
+        cache = CacheSimbolos(client, os.path.join(directorio, "exchange_info.json"), refresco_en_segundo_plano=False)
+        # Precio de referencia para el nominal a mercado: un snapshot, como el almacén del stream de mercado
+        precios = {t["symbol"]: float(t["price"]) for t in client.get_all_tickers()}
+        validador = ValidadorOrdenes(cache, precio_referencia=precios.get).aplicar(client).validador
+        exchange.reiniciar_contadores()
+        informar("con validador", enviar(client, ordenes), exchange.peticiones["order"])
+        print(f"   {validador.resumen()}")
+
+        inicio = time.perf_counter()
+        repeticiones = 20_000
+        for i in range(repeticiones):
+            symbol, cantidad = ordenes[i % len(ordenes)]
+            try:
+                validador.normalizar({"symbol": symbol, "side": "BUY", "type": "MARKET", "quantity": cantidad})
+            except OrdenInvalida:
+                pass
+        print(f"⏱  normalizar: {(time.perf_counter() - inicio) / repeticiones * 1e6:.1f} µs por orden")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Valoración de la cartera contra el exchange local con latencia: la
+estimación anterior de bot.py (una venta a mercado de 0.000001 por token para
+leer su precio) frente a un snapshot de get_all_tickers y el grafo de
+conversión, con tokens cotizados en USDT, BTC y BNB.
+
+Uso: python bench_valoracion.py [tokens] [latencia_ms]
+"""
+import random
+import sys
+import time
+
+from mock_exchange import ExchangeLocal
+from valoracion import MotorValoracion
+
+# El mercado sintético cotiza en USDT, BTC y BNB: se añaden los puentes entre ellos
+PUENTES = [("BTCUSDT", "BTC", "USDT", 60000.0), ("BNBUSDT", "BNB", "USDT", 600.0), ("BNBBTC", "BNB", "BTC", 0.01)]
+
+
+def agregar_puentes(exchange):
+    for symbol, base, quote, precio in PUENTES:
+        simbolo = {"symbol": symbol, "status": "TRADING", "baseAsset": base, "quoteAsset": quote, "price": precio,
+                   "bid": precio * 0.9999, "ask": precio * 1.0001, "quoteVolume": 1e9}
+        exchange.simbolos.append(simbolo)
+        exchange.por_simbolo[symbol] = simbolo
+
+
+def por_ordenes(client, saldos):
+    """La estimación anterior: vender 0.000001 de cada token contra USDT para leer el precio del fill"""
+    total, sin_precio = saldos.get("USDT", 0.0), 0
+    for token, cantidad in saldos.items():
+        if token == "USDT":
+            continue
+        try:
+            precio = float(client.order_market_sell(symbol=token + "USDT", quantity=0.000001)["fills"][0]["price"])
+            total += cantidad * precio
+        except Exception:
+            sin_precio += 1
+    return total, sin_precio
+
+
+def main():
+    tokens = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    latencia = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.02
+    with ExchangeLocal(n_simbolos=1500, latencia=latencia) as exchange:
+        agregar_puentes(exchange)
+        client = exchange.cliente()
+        rnd = random.Random(4)
+        elegidos = rnd.sample([s for s in exchange.simbolos[:1500] if s["status"] == "TRADING"], tokens)
+        saldos = {s["baseAsset"]: rnd.uniform(1, 1000) for s in elegidos}
+        saldos["USDT"] = 250.0
+        print(f"💼 {tokens} tokens (cotizados en USDT, BTC o BNB) con {latencia * 1000:.0f} ms por petición:")
+
+        exchange.reiniciar_contadores()
+        inicio = time.perf_counter()
+        total, sin_precio = por_ordenes(client, saldos)
+        print(f"   ventas de 0.000001      {(time.perf_counter() - inicio) * 1000:8.1f} ms, "
+              f"{sum(exchange.peticiones.values())} peticiones (órdenes reales), "
+              f"{sin_precio} tokens sin precio, total {total:,.2f} USDT")
+
+        valorador = MotorValoracion(client)
+        for intento in ("primera (con exchangeInfo)", "siguientes"):
+            exchange.reiniciar_contadores()
+            inicio = time.perf_counter()
+            valoracion = valorador.valorar("USDT", saldos)
+            print(f"   snapshot, {intento:<18} {(time.perf_counter() - inicio) * 1000:6.1f} ms, "
+                  f"{dict(exchange.peticiones)}, {len(valoracion.sin_precio)} sin precio, "
+                  f"total {valoracion.total:,.2f} USDT")
+        assert not valoracion.sin_precio
+        rutas = [len(p.ruta) for p in valoracion.posiciones]
+        print(f"   rutas: {rutas.count(1)} directas, {sum(1 for r in rutas if r > 1)} por un par intermedio")
+
+        inicio = time.perf_counter()
+        for destino in ("BTC", "BNB", "ETH"):
+            valorador.grafo().rutas(destino)
+        print(f"🧭 Rutas precalculadas hacia 3 destinos más: {(time.perf_counter() - inicio) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
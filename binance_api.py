@@ -1,101 +1,149 @@
-from config import get_binance_client
-from datetime import datetime
+from config import get_binance_client, get_stream_url, get_user_stream_url
+from datos_mercado import MotorDatosMercado
+from flujo_usuario import EstadoOrden, FlujoUsuario
+from escaner_pares import escanear_pares
+from motor_estrategias import MotorEstrategias
+from ordenes_protegidas import ProteccionFallida, comprar_protegido, retirar_protecciones
+from valoracion import MotorValoracion
+from diario_operaciones import diario_compartido
 
 client = get_binance_client()
+mercado = None  # MotorDatosMercado activo, ver iniciar_datos_mercado()
+flujo = None    # FlujoUsuario activo, ver iniciar_flujo_usuario()
+valorador = MotorValoracion(client)  # grafo de conversión construido en la primera valoración
+
+def _precio_stream(par):
+    # Precio de referencia del validador de órdenes: solo el del stream, nunca una petición REST
+    return mercado.almacen.precio(par, max_edad=5.0) if mercado is not None else None
+
+client.validador.precio_referencia = _precio_stream
+
+def iniciar_datos_mercado(simbolos, esperar=5.0):
+    """
+    Arranca el stream de mercado para los símbolos dados; a partir de ahí
+    obtener_precio() lee del almacén en memoria en lugar de la API REST
+    """
+    global mercado
+    if mercado is not None:
+        mercado.detener()
+    mercado = MotorDatosMercado(simbolos, url=get_stream_url()).iniciar()
+    mercado.esperar_listo(esperar)
+    return mercado
+
+def obtener_precio(par, max_edad=5.0):
+    """Último precio del par: del stream si es reciente, si no por REST"""
+    if mercado is not None:
+        precio = mercado.almacen.precio(par, max_edad=max_edad)
+        if precio is not None:
+            return precio
+    return float(client.get_symbol_ticker(symbol=par)['price'])
+
+def iniciar_flujo_usuario():
+    """
+    Arranca el listener del user-data stream: las órdenes y los saldos
+    se actualizan por eventos en lugar de consultas periódicas
+    """
+    global flujo
+    if flujo is None:
+        flujo = FlujoUsuario(client, url=get_user_stream_url(), saldos=client.saldos).iniciar()
+    return flujo
+
+def detener_flujo_usuario():
+    global flujo
+    if flujo is not None:
+        flujo.detener()
+        flujo = None
+
+def esperar_ejecucion(orden, timeout=10.0):
+    """
+    Devuelve el EstadoOrden final de una orden recién enviada.
+    Con el user-data stream activo espera el evento de fill; si la respuesta
+    REST ya es final no espera nada.
+    """
+    if flujo is None:
+        return EstadoOrden.desde_respuesta(orden)
+    return flujo.esperar_ejecucion(orden, timeout)
 
 def obtener_saldo(token):
-    cuenta = client.get_account()
-    for activo in cuenta['balances']:
-        if activo['asset'] == token:
-            return float(activo['free'])
-    return 0.0
+    return client.saldos.libre(token)
 
 def realizar_orden_compra(par, cantidad):
-    return client.order_market_buy(symbol=par, quantity=cantidad)
+    try:
+        return client.order_market_buy(symbol=par, quantity=cantidad)
+    finally:
+        client.saldos.invalidar()
 
 def realizar_orden_venta(par, cantidad):
-    return client.order_market_sell(symbol=par, quantity=cantidad)
+    try:
+        return client.order_market_sell(symbol=par, quantity=cantidad)
+    finally:
+        client.saldos.invalidar()
 
 def colocar_orden_compra_con_stop_loss(par, cantidad, stop_loss_porcentaje, take_profit_porcentaje=None):
     """
-    Coloca una orden de compra con stop-loss automático
-    """
-    # Obtener precio actual
-    ticker = client.get_symbol_ticker(symbol=par)
-    precio_actual = float(ticker['price'])
-    
-    # Calcular niveles de stop-loss y take-profit
-    stop_loss_precio = precio_actual * (1 - stop_loss_porcentaje/100)
-    
-    # Realizar la compra
-    orden_compra = client.order_market_buy(symbol=par, quantity=cantidad)
-    
-    # Colocar stop-loss
-    client.create_order(
-        symbol=par,
-        side='SELL',
-        type='STOP_LOSS_LIMIT',
-        timeInForce='GTC',
-        quantity=cantidad,
-        price=round(stop_loss_precio * 0.99, 8),  # Precio ligeramente menor para asegurar ejecución
-        stopPrice=round(stop_loss_precio, 8)
-    )
-    
-    # Colocar take-profit si se especifica
-    if take_profit_porcentaje:
-        take_profit_precio = precio_actual * (1 + take_profit_porcentaje/100)
-        client.create_order(
-            symbol=par,
-            side='SELL',
-            type='TAKE_PROFIT_LIMIT',
-            timeInForce='GTC',
-            quantity=cantidad,
-            price=round(take_profit_precio * 0.99, 8),  # Precio ligeramente menor para asegurar ejecución
-            stopPrice=round(take_profit_precio, 8)
-        )
-    
-    return orden_compra
-
-def obtener_pares_baratos(base_asset='USDT', max_pares=5):
+    Coloca una orden de compra con stop-loss automático. Si el stop-loss no
+    queda colocado, cancela el take-profit que hubiera y lanza ProteccionFallida
+    (con la CompraProtegida en `resultado`): la posición está sin proteger
+    """
+    resultado = comprar_con_proteccion(par, cantidad, stop_loss_porcentaje, take_profit_porcentaje)
+    if not resultado.protegida:
+        try:
+            retirar_protecciones(client, resultado)
+        finally:
+            client.saldos.invalidar()
+        raise ProteccionFallida(resultado)
+    return resultado.compra
+
+def comprar_con_proteccion(par, cantidad, stop_loss_porcentaje, take_profit_porcentaje=None, usar_oco=None):
+    """
+    Compra a mercado y coloca stop-loss (y take-profit) sobre el precio del fill,
+    en un OCO si el símbolo lo admite. Devuelve la CompraProtegida con latencias
+    """
+    try:
+        return comprar_protegido(client, par, cantidad, stop_loss_porcentaje, take_profit_porcentaje,
+                                 esperar=esperar_ejecucion, usar_oco=usar_oco)
+    finally:
+        client.saldos.invalidar()
+
+def resumen_validador():
+    """Órdenes ajustadas y rechazadas localmente por los filtros del símbolo"""
+    return client.validador.resumen()
+
+def valorar_cartera(destino="USDT", saldos=None):
+    """
+    Valor de la cartera (o de `saldos`: activo -> cantidad) en `destino` con un
+    único snapshot de precios; no coloca ninguna orden
+    """
+    return valorador.valorar(destino, saldos)
+
+def obtener_pares_baratos(base_asset='USDT', max_pares=5, min_volumen=100000, max_spread=None, estados=('TRADING',)):
     """
     Obtiene los pares más baratos disponibles con la moneda base especificada
     """
-    # Obtener información de todos los símbolos
-    info = client.get_exchange_info()
-    pares_con_base = []
-    
-    # Filtrar pares con la moneda base especificada
-    for s in info['symbols']:
-        if s['quoteAsset'] == base_asset and s['status'] == 'TRADING':
-            try:
-                # Obtener precio actual
-                ticker = client.get_symbol_ticker(symbol=s['symbol'])
-                precio = float(ticker['price'])
-                
-                # Obtener volumen de 24h para verificar liquidez
-                stats = client.get_24hr_ticker(symbol=s['symbol'])
-                volumen_24h = float(stats['quoteVolume'])
-                
-                # Solo considerar pares con suficiente liquidez
-                if volumen_24h > 100000:  # Mínimo 100,000 USDT de volumen diario
-                    pares_con_base.append({
-                        'symbol': s['symbol'],
-                        'price': precio,
-                        'volume': volumen_24h
-                    })
-            except:
-                continue
-    
-    # Ordenar por precio (de menor a mayor)
-    pares_con_base.sort(key=lambda x: x['price'])
-    
-    # Devolver los N pares más baratos
-    return pares_con_base[:max_pares]
-
-def registrar_operacion(tipo, par, cantidad, precio, resultado=None):
-    """
-    Registra una operación en el archivo de log
-    """
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    with open("operaciones.log", "a", encoding="utf-8") as log:
-        log.write(f"{timestamp} | {tipo} | {par} | {cantidad} | {precio} | {resultado or 'N/A'}\n")
+    return escanear_pares(
+        client,
+        base_asset=base_asset,
+        max_pares=max_pares,
+        min_volumen=min_volumen,
+        max_spread=max_spread,
+        estados=estados,
+    )
+
+def iniciar_motor_estrategias(estrategia, simbolos=None, max_simbolos=300, nominal=10.0, esperar=5.0):
+    """
+    Motor de estrategias con su propio stream de mercado (no toca el de
+    obtener_precio): sin símbolos vigila los `max_simbolos` pares USDT del
+    escáner. Devuelve (motor, datos); para el bucle en vivo:
+    motor.ejecutar(datos.almacen, al_emitir, callback_detener) y al terminar datos.detener()
+    """
+    if simbolos is None:
+        simbolos = [p['symbol'] for p in obtener_pares_baratos('USDT', max_pares=max_simbolos)]
+    datos = MotorDatosMercado(simbolos, url=get_stream_url()).iniciar()
+    datos.esperar_listo(esperar)
+    return MotorEstrategias(datos.almacen.simbolos, estrategia, nominal=nominal), datos
+
+def registrar_operacion(tipo, par, cantidad, precio, resultado=None, usuario=""):
+    """
+    Registra una operación en el diario de operaciones (se escribe en segundo plano)
+    """
+    diario_compartido().registrar(tipo, par, cantidad, precio, usuario=usuario, resultado=resultado)
@@ -1,21 +1,27 @@
 import time
-from datetime import datetime
-from binance_api import realizar_orden_compra, realizar_orden_venta, obtener_saldo
+from binance_api import (
+    realizar_orden_compra, realizar_orden_venta, obtener_saldo,
+    iniciar_flujo_usuario, detener_flujo_usuario, esperar_ejecucion, valorar_cartera, resumen_validador,
+    obtener_precio, client, iniciar_motor_estrategias,
+)
 from telegram_report import enviar_reporte_telegram
+from diario_operaciones import diario_compartido
+from reporte_sesion import ReporteSesion
+from planificador_pares import PlanificadorPares, ReservaSaldo, SaldoInsuficiente, ampliar_conexiones
+from motor_estrategias import CruceEMA
 
 pares = ["PEPEUSDT", "USDTPEPE"]
 cantidad_por_orden = 1
+INTERVALO_PARCIAL = 60      # segundos entre informes parciales a Telegram durante la sesión
 
 def extraer_base(par):
     return par.replace("USDT", "")
 
 def ejecutar_bot_durante_5_minutos(callback_detener):
     inicio = time.time()
-    total_compras = 0.0
-    total_ventas = 0.0
+    ultimo_parcial = inicio
     saldos_iniciales = {}
-    saldos_finales = {}
-    reporte_detallado = "*📊 INFORME DETALLADO DE OPERACIONES*\n\n"
+    reporte = ReporteSesion()
 
     tokens = set([extraer_base(par) for par in pares])
     tokens.add("USDT")
@@ -23,85 +29,159 @@ def ejecutar_bot_durante_5_minutos(callback_detener):
     for token in tokens:
         saldos_iniciales[token] = obtener_saldo(token)
 
-    with open("log.txt", "a", encoding="utf-8") as log:
-        log.write("🚀 Iniciando bot de trading por 5 minutos...\n")
-
-        while not callback_detener() and (time.time() - inicio < 300):
-            for par in pares:
-                if callback_detener() or (time.time() - inicio > 300):
-                    break
-
-                base = extraer_base(par)
-                quote = "USDT"
-
-                saldo_base = obtener_saldo(base)
-                saldo_usdt = obtener_saldo(quote)
-
-                log.write(f"💰 Saldo actual {base}: {saldo_base:.6f}, USDT: {saldo_usdt:.2f}\n")
-                print(f"💰 Saldo {base}: {saldo_base:.6f} | USDT: {saldo_usdt:.2f}")
-
-                reporte_detallado += f"*🔁 {par}*\n"
-                reporte_detallado += f"- Saldo inicial {base}: `{saldo_base:.6f}`\n"
-                reporte_detallado += f"- Saldo inicial USDT: `{saldo_usdt:.2f}`\n"
-
-                if saldo_usdt < 1:
-                    log.write("❌ Saldo insuficiente en USDT para comprar\n")
-                    reporte_detallado += "❌ _Saldo insuficiente para comprar_\n\n"
-                    continue
-
-                try:
-                    orden_compra = realizar_orden_compra(par, cantidad_por_orden)
-                    precio_compra = float(orden_compra['fills'][0]['price'])
-                    total_compras += precio_compra * cantidad_por_orden
-                    log.write(f"✔ Compra ejecutada a ${precio_compra:.6f}\n")
-                    reporte_detallado += f"✅ Compra realizada a: `${precio_compra:.4f}`\n"
-                except Exception as e:
-                    log.write(f"❌ Error al comprar {par}: {e}\n")
-                    reporte_detallado += f"❌ Error al comprar: `{e}`\n\n"
-                    continue
-
-                time.sleep(2)
-
-                try:
-                    orden_venta = realizar_orden_venta(par, cantidad_por_orden)
-                    precio_venta = float(orden_venta['fills'][0]['price'])
-                    total_ventas += precio_venta * cantidad_por_orden
-                    log.write(f"✔ Venta ejecutada a ${precio_venta:.6f}\n")
-                    reporte_detallado += f"✅ Venta realizada a: `${precio_venta:.4f}`\n"
-                except Exception as e:
-                    log.write(f"❌ Error al vender {par}: {e}\n")
-                    reporte_detallado += f"❌ Error al vender: `{e}`\n"
-
-                saldo_token_fin = obtener_saldo(base)
-                saldo_usdt_fin = obtener_saldo("USDT")
-                saldos_finales[base] = saldo_token_fin
-                saldos_finales["USDT"] = saldo_usdt_fin
-
-                reporte_detallado += f"- Saldo final {base}: `{saldo_token_fin:.6f}`\n"
-                reporte_detallado += f"- Saldo final USDT: `{saldo_usdt_fin:.2f}`\n\n"
-
-                time.sleep(2)
-
-        ganancia = total_ventas - total_compras
-
-        # Estimación total final en USDT
-        total_final_estimado = saldos_finales.get("USDT", 0.0)
-        for token in tokens:
-            if token != "USDT":
-                try:
-                    par = token + "USDT"
-                    precio_actual = float(realizar_orden_venta(par, 0.000001)['fills'][0]['price'])
-                    total_final_estimado += saldos_finales.get(token, 0.0) * precio_actual
-                except:
-                    pass
-
-        reporte_detallado += "-------------------------\n"
-        reporte_detallado += f"*💸 Total Comprado:* `${total_compras:.2f}`\n"
-        reporte_detallado += f"*💰 Total Vendido:* `${total_ventas:.2f}`\n"
-        reporte_detallado += f"*📈 Ganancia:* `${ganancia:.2f}`\n"
-        reporte_detallado += f"_🕒 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}_\n"
-        reporte_detallado += f"\n💼 *Total estimado final:* `${total_final_estimado:.2f}`"
-
-        print(reporte_detallado)
-        log.write(reporte_detallado + "\n")
-        enviar_reporte_telegram(reporte_detallado)
+    # Fills y saldos llegan como eventos: no hace falta dormir tras cada orden
+    try:
+        iniciar_flujo_usuario()
+    except Exception as e:
+        print(f"⚠️ User-data stream no disponible, se usan las respuestas REST: {e}")
+
+    try:
+        diario = diario_compartido()
+        diario.evento("🚀 Iniciando bot de trading por 5 minutos...")
+
+        # Cada par en su propio hilo: el USDT se reserva antes de comprar para que
+        # dos pares no gasten el mismo saldo a la vez
+        reserva_usdt = ReservaSaldo(lambda: obtener_saldo("USDT"))
+
+        def ciclo_par(par):
+            base = extraer_base(par)
+            quote = "USDT"
+
+            saldo_base = obtener_saldo(base)
+            saldo_usdt = obtener_saldo(quote)
+
+            diario.evento(f"💰 Saldo actual {base}: {saldo_base:.6f}, USDT: {saldo_usdt:.2f}")
+            print(f"💰 Saldo {base}: {saldo_base:.6f} | USDT: {saldo_usdt:.2f}")
+
+            registro = reporte.par(par, base, saldo_base, saldo_usdt)
+
+            try:
+                coste = max(1.0, cantidad_por_orden * obtener_precio(par))
+            except Exception:
+                coste = 1.0
+            try:
+                reserva_usdt.reservar(coste)
+            except SaldoInsuficiente:
+                diario.evento("❌ Saldo insuficiente en USDT para comprar")
+                registro.error = "Saldo insuficiente para comprar"
+                return False
+
+            try:
+                orden_compra = esperar_ejecucion(realizar_orden_compra(par, cantidad_por_orden))
+                if orden_compra is None or orden_compra.status != "FILLED":
+                    raise Exception("la orden de compra no se ejecutó a tiempo")
+                precio_compra = orden_compra.precio_medio
+                reporte.compra(registro, precio_compra, cantidad_por_orden)
+                diario.registrar_ejecucion(orden_compra)
+                diario.evento(f"✔ Compra ejecutada a ${precio_compra:.6f}")
+            except Exception as e:
+                diario.evento(f"❌ Error al comprar {par}: {e}")
+                registro.error = f"Error al comprar: {e}"
+                return False
+            finally:
+                reserva_usdt.liberar(coste)
+
+            vendido = True
+            try:
+                orden_venta = esperar_ejecucion(realizar_orden_venta(par, cantidad_por_orden))
+                if orden_venta is None or orden_venta.status != "FILLED":
+                    raise Exception("la orden de venta no se ejecutó a tiempo")
+                precio_venta = orden_venta.precio_medio
+                reporte.venta(registro, precio_venta, cantidad_por_orden)
+                diario.registrar_ejecucion(orden_venta)
+                diario.evento(f"✔ Venta ejecutada a ${precio_venta:.6f}")
+            except Exception as e:
+                diario.evento(f"❌ Error al vender {par}: {e}")
+                registro.error = f"Error al vender: {e}"
+                vendido = False
+
+            registro.saldo_base_final = obtener_saldo(base)
+            registro.saldo_usdt_final = obtener_saldo(quote)
+            # Sin venta no se vuelve a comprar enseguida: el par espera y, si sigue fallando, se retira
+            return vendido
+
+        # Informe parcial con los pares nuevos, sin esperar al final de la sesión
+        def enviar_parcial():
+            nonlocal ultimo_parcial
+            if time.time() - ultimo_parcial >= INTERVALO_PARCIAL:
+                ultimo_parcial = time.time()
+                for mensaje in reporte.parcial():
+                    enviar_reporte_telegram(mensaje, parse_mode="Markdown")
+
+        ampliar_conexiones(client, len(pares))
+        planificador = PlanificadorPares(pares, ciclo_par, duracion=300 - (time.time() - inicio))
+        planificador.ejecutar(callback_detener, al_controlar=enviar_parcial)
+
+        saldos_finales = {token: obtener_saldo(token) for token in tokens}
+
+        # Estimación total final en USDT con un snapshot de precios (sin colocar órdenes)
+        try:
+            valoracion = valorar_cartera("USDT", {token: saldos_finales.get(token, 0.0) for token in tokens})
+            reporte.total_estimado = valoracion.total
+            if valoracion.sin_precio:
+                diario.evento(f"⚠️ Sin precio para valorar: {', '.join(valoracion.sin_precio)}")
+        except Exception as e:
+            diario.evento(f"❌ Error al valorar la cartera: {e}")
+
+        texto = reporte.texto()
+        print(texto)
+        print(resumen_validador())
+        print(planificador.resumen())
+        diario.evento(texto)
+        diario.evento(resumen_validador())
+        diario.evento(planificador.resumen())
+        for mensaje in reporte.mensajes():
+            enviar_reporte_telegram(mensaje, parse_mode="Markdown")
+    finally:
+        # También si la sesión falla: el hilo del stream no debe quedar vivo
+        detener_flujo_usuario()
+
+def ejecutar_estrategia_durante_5_minutos(callback_detener, estrategia=None, simbolos=None, nominal=10.0):
+    """
+    Variante con el motor de estrategias: en lugar de comprar y vender cada par
+    en bucle, opera solo cuando la estrategia (cruce de EMAs por defecto) cambia
+    de señal. Sin `simbolos` vigila los pares USDT del escáner. Las órdenes salen
+    por realizar_orden_compra/venta, es decir, por el validador de órdenes
+    """
+    inicio = time.time()
+    diario = diario_compartido()
+    motor, datos = iniciar_motor_estrategias(estrategia or CruceEMA(), simbolos, nominal=nominal)
+    diario.evento(f"🚀 Motor de estrategias por 5 minutos sobre {len(motor.simbolos)} símbolos...")
+
+    try:
+        iniciar_flujo_usuario()
+    except Exception as e:
+        print(f"⚠️ User-data stream no disponible, se usan las respuestas REST: {e}")
+
+    def al_emitir(intenciones):
+        for intencion in intenciones:
+            par, compra = intencion.symbol, intencion.lado == "BUY"
+            try:
+                orden = realizar_orden_compra if compra else realizar_orden_venta
+                estado = esperar_ejecucion(orden(par, intencion.cantidad))
+                if estado is None or estado.status != "FILLED":
+                    raise Exception("la orden no se ejecutó a tiempo")
+            except Exception as e:
+                # La posición vuelve a como estaba antes de la intención
+                motor.corregir(par, 0 if compra else 1, 0.0 if compra else intencion.cantidad)
+                diario.evento(f"❌ Error al {'comprar' if compra else 'vender'} {par}: {e}")
+                continue
+            if compra:
+                # La venta cierra lo recibido: lo ejecutado menos la comisión cobrada en el base
+                motor.corregir(par, 1, estado.ejecutada - estado.comisiones.get(extraer_base(par), 0.0))
+            diario.registrar_ejecucion(estado)
+            diario.evento(f"✔ {'Compra' if compra else 'Venta'} de {par} ejecutada a ${estado.precio_medio:.6f}")
+
+    try:
+        motor.ejecutar(datos.almacen, al_emitir,
+                       lambda: time.time() - inicio >= 300 or callback_detener())
+    finally:
+        datos.detener()
+        detener_flujo_usuario()
+
+    texto = motor.resumen()
+    print(texto)
+    print(resumen_validador())
+    diario.evento(texto)
+    diario.evento(resumen_validador())
+    enviar_reporte_telegram(f"{texto}\n{resumen_validador()}")
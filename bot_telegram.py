@@ -1,14 +1,27 @@
 import logging
 logging.getLogger("httpx").setLevel(logging.WARNING)
 import os
-import threading
+import asyncio
+import itertools
 import time
-from datetime import datetime
 from dotenv import load_dotenv
 from telegram import Update
 from telegram.ext import Application, CommandHandler, ContextTypes
-from binance.client import Client
+from binance import AsyncClient, Client
 from binance.exceptions import BinanceAPIException
+from libro_saldos import LibroSaldos
+from flujo_usuario import FlujoUsuario, URL_USUARIO_MAINNET
+from motor_async import MotorTrading
+from limitador import gobernador_compartido
+from historial_reportes import HistorialReportes, interpretar_argumentos
+from telegram_report import partir_mensaje
+from valoracion import MotorValoracion
+from metricas import metricas_compartidas, iniciar_servidor_metricas
+from telegram_utils import PeticionMedida
+from salud import salud_compartida
+from cache_simbolos import CacheSimbolos
+from validador_ordenes import ValidadorOrdenes
+from config import PARES_BOT_TELEGRAM
 
 # Configuración de logging
 logging.basicConfig(level=logging.INFO)
@@ -31,12 +44,41 @@ load_dotenv()
 TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
 
 # Constantes de trading , "WIFUSDT", "PEPEUSDT", "FLOKIUSDT", "SHIBUSDT"
-PARES = ["PEPEFLOKI"] 
+PARES = PARES_BOT_TELEGRAM
 CANTIDAD_POR_ORDEN = 1
-
-# Datos por usuario y threads
+DURACION_SESION = 300       # segundos por ejecución de /runbot
+URL_USER_STREAM = URL_USUARIO_MAINNET
+PAUSA_REINTENTO = 2         # segundos antes de reintentar tras saldo insuficiente o error
+PUERTO_METRICAS = int(os.getenv("METRICAS_PUERTO", "9108"))   # /metrics y /health; 0 los desactiva
+INTERVALO_LATIDO = 5        # segundos entre latidos del event loop
+MAX_SILENCIO_LOOP = 30      # sin latido del loop durante más tiempo: está bloqueado
+MAX_SILENCIO_TELEGRAM = 90  # getUpdates vuelve como mucho cada ~10 s
+MAX_SILENCIO_BINANCE = 120  # con sesiones en marcha hay peticiones cada pocos segundos
+MAX_SILENCIO_SESION = 120   # una vuelta por par: dos órdenes con su espera de fill y la pausa
+
+# Datos por usuario; todas las sesiones corren como tareas en el loop de la aplicación
 user_data = {}
-bot_threads = {}
+motor = MotorTrading(max_concurrencia=int(os.getenv("MAX_CONCURRENCIA_BINANCE", "100")))
+# Historial de reportes por usuario: buffer circular en memoria + JSONL en logs/reportes
+historial = HistorialReportes(os.path.join(os.path.dirname(__file__), "logs", "reportes"))
+grafo_conversion = None     # grafo de /portfolio, común a todos los usuarios (mismo exchangeInfo)
+# Filtros de los símbolos (exchangeInfo público, refrescado en segundo plano) para validar las órdenes de todos;
+# se crea en main(), no al importar el módulo, para no abrir conexiones ni hilos desde un import
+validador = None
+
+metricas = metricas_compartidas()
+IDA_VUELTA = metricas.histograma("orden_ida_vuelta_segundos", "Desde enviar la orden hasta conocer su ejecución",
+                                 ("lado",), limites=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0))
+TRADES = metricas.contador("trades", "Ciclos de compra/venta por resultado", ("resultado",))
+metricas.medidor("bot_sesiones_activas", "Sesiones de trading en curso", funcion=motor.sesiones_activas)
+metricas.medidor("bot_usuarios", "Usuarios con claves configuradas", funcion=lambda: len(user_data))
+
+# Salud por latidos de los propios bucles: /health no llama ni a Telegram ni a Binance
+salud = salud_compartida()
+gobernador_compartido().latido = salud.latido("binance", MAX_SILENCIO_BINANCE,
+                                              activo=lambda: motor.sesiones_activas() > 0)
+tarea_latido = None
+numero_sesion = itertools.count(1)     # distingue los latidos de dos sesiones seguidas del mismo usuario
 
 # --- Comandos ---
 
@@ -47,7 +89,9 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "/setapikeys <APIKEY> <SECRETKEY> - Configura tus claves API\n"
         "/status - Ver estado actual\n"
         "/runbot - Iniciar bot de trading\n"
-        "/report - Ver últimos 5 reportes"
+        "/stop - Detener el bot de trading\n"
+        "/report - Ver reportes (/report 50, /report page 3, /report error, /report PEPEUSDT)\n"
+        "/portfolio [ACTIVO] - Valor de la cartera en USDT (o en el activo indicado)"
     )
 
 async def setapikeys(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -61,31 +105,37 @@ async def setapikeys(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     await update.message.reply_text("🔄 Verificando las claves API...")
 
+    # Todos los usuarios salen por la misma IP: un único presupuesto de peso para todos
+    client = gobernador_compartido().aplicar(AsyncClient(api_key, secret_key))
     try:
-        client = Client(api_key, secret_key)
-        # Probar las claves obteniendo la cuenta
-        account = client.get_account()
-        
-        # Verificar que podemos obtener el balance
-        balance = client.get_asset_balance(asset='USDT')
-        
+        # Probar las claves obteniendo la cuenta (una sola llamada llena el libro de saldos)
+        client.saldos = LibroSaldos(client)
+        validador.aplicar(client)
+        saldo_usdt = await motor.llamar(client.saldos.libre_async, "USDT")
+
+        anterior = user_data.get(user_id)
+        if anterior is not None:
+            await motor.detener_sesion(user_id)
+            await anterior["client"].close_connection()
+
         user_data[user_id] = {
             "api_key": api_key,
             "secret_key": secret_key,
             "status": "ready",
             "client": client,
-            "last_report": f"✅ Balance USDT: {balance['free']}",
-            "report_history": []  # Lista para almacenar historial de reportes
+            "last_report": f"✅ Balance USDT: {saldo_usdt:.8f}",
         }
 
         await update.message.reply_text(
             "✅ Claves API configuradas correctamente\n"
-            f"💰 Balance USDT: {balance['free']}\n"
+            f"💰 Balance USDT: {saldo_usdt:.8f}\n"
             "🚀 Usa /runbot para comenzar el trading"
         )
     except BinanceAPIException as e:
+        await client.close_connection()
         await update.message.reply_text(f"❌ Error de Binance: {e.message}\n⚠️ Verifica tus claves API")
     except Exception as e:
+        await client.close_connection()
         await update.message.reply_text(
             f"❌ Error inesperado: {str(e)}\n"
             "⚠️ Asegúrate de que:\n"
@@ -101,57 +151,92 @@ async def runbot(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("❌ Primero configura tus claves con /setapikeys")
         return
 
-    if user_data[user_id]["status"] == "running":
+    if motor.activa(user_id):
         await update.message.reply_text("⚠️ El bot ya está en ejecución.")
         return
 
-    thread = threading.Thread(target=ejecutar_trading, args=(user_id,))
-    bot_threads[user_id] = thread
-    thread.start()
+    user_data[user_id]["status"] = "running"
+    motor.iniciar_sesion(user_id, ejecutar_trading, user_id)
 
-    await update.message.reply_text("🚀 Bot iniciado. Usa /status para ver el estado.")
+    await update.message.reply_text("🚀 Bot iniciado. Usa /status para ver el estado o /stop para detenerlo.")
+
+async def stop(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    user_id = update.effective_user.id
 
-def ejecutar_trading(user_id):
+    if await motor.detener_sesion(user_id):
+        await update.message.reply_text("🛑 Bot detenido.")
+    else:
+        await update.message.reply_text("ℹ️ El bot no está en ejecución.")
+
+async def ejecutar_orden(client, flujo, lado, par):
+    """Orden de mercado y espera de su fill; mide la ida y vuelta completa"""
+    funcion = client.order_market_buy if lado == "BUY" else client.order_market_sell
+    inicio = time.perf_counter()
+    orden = await motor.llamar(funcion, symbol=par, quantity=CANTIDAD_POR_ORDEN)
+    estado = await flujo.esperar_ejecucion_async(orden)
+    IDA_VUELTA.observar(time.perf_counter() - inicio, lado)
+    client.saldos.invalidar()
+    return estado
+
+async def ejecutar_trading(user_id):
     user = user_data[user_id]
     client = user["client"]
     user["status"] = "running"
-    start_time = time.time()
+    loop = asyncio.get_running_loop()
+    start_time = loop.time()
+
+    # Fills y saldos por eventos del user-data stream, en lugar de esperas fijas
+    flujo = await FlujoUsuario(client, url=URL_USER_STREAM, saldos=client.saldos).iniciar_async()
+    # Una sesión que deja de latir está atascada (orden o stream colgados)
+    # Uno por sesión: la que termina tras /stop no debe retirar el de la siguiente /runbot
+    nombre_latido = f"sesion-{user_id}-{next(numero_sesion)}"
+    latido = salud.latido(nombre_latido, MAX_SILENCIO_SESION)
 
     try:
-        while time.time() - start_time < 300 and user["status"] == "running":
+        while loop.time() - start_time < DURACION_SESION:
             for par in PARES:
+                latido.marcar()
                 try:
-                    balance = client.get_asset_balance(asset="USDT")
-                    disponible = float(balance["free"])
+                    disponible = await motor.llamar(client.saldos.libre_async, "USDT")
 
                     if disponible < 15:
                         nuevo_reporte = f"❌ Saldo insuficiente en {par}"
                         user["last_report"] = nuevo_reporte
-                        user["report_history"].insert(0, f"{datetime.now().strftime('%H:%M:%S')} - {nuevo_reporte}")
-                        user["report_history"] = user["report_history"][:5]
+                        historial.agregar(user_id, par, "saldo", nuevo_reporte)
+                        TRADES.inc("saldo")
+                        await asyncio.sleep(PAUSA_REINTENTO)
                         continue
 
-                    # Compra
-                    client.order_market_buy(symbol=par, quantity=CANTIDAD_POR_ORDEN)
-                    time.sleep(2)
+                    # Compra: esperar el fill real antes de vender
+                    compra = await ejecutar_orden(client, flujo, "BUY", par)
+                    if compra is None or compra.status != "FILLED":
+                        raise Exception("la orden de compra no se ejecutó a tiempo")
 
                     # Venta
-                    client.order_market_sell(symbol=par, quantity=CANTIDAD_POR_ORDEN)
-                    time.sleep(2)
+                    venta = await ejecutar_orden(client, flujo, "SELL", par)
+                    if venta is None or venta.status != "FILLED":
+                        raise Exception("la orden de venta no se ejecutó a tiempo")
 
                     nuevo_reporte = f"✅ Trade completado en {par}"
                     user["last_report"] = nuevo_reporte
-                    user["report_history"].insert(0, f"{datetime.now().strftime('%H:%M:%S')} - {nuevo_reporte}")
-                    user["report_history"] = user["report_history"][:5]
+                    historial.agregar(user_id, par, "ok", nuevo_reporte)
+                    TRADES.inc("ok")
 
                 except Exception as e:
                     nuevo_reporte = f"❌ Error en {par}: {str(e)}"
                     user["last_report"] = nuevo_reporte
-                    user["report_history"].insert(0, f"{datetime.now().strftime('%H:%M:%S')} - {nuevo_reporte}")
-                    user["report_history"] = user["report_history"][:5]
+                    historial.agregar(user_id, par, "error", nuevo_reporte)
+                    TRADES.inc("error")
                     logger.error(f"Error en trading para {user_id}: {e}")
+                    await asyncio.sleep(PAUSA_REINTENTO)
+    except asyncio.CancelledError:
+        user["status"] = "stopped"
+        raise
     finally:
-        user["status"] = "finished"
+        salud.retirar(nombre_latido, latido)
+        await flujo.detener_async()
+        if user["status"] == "running":
+            user["status"] = "finished"
 
 async def status(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
@@ -161,38 +246,106 @@ async def status(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     estado = user_data[user_id]["status"]
-    historial = user_data[user_id].get("report_history", [])
+    ultimos = historial.de(user_id).ultimos(5)
     
-    mensaje = f"📊 Estado: {estado}\n\n📝 Últimos reportes:\n"
-    if historial:
-        mensaje += "\n".join(historial)
+    mensaje = f"📊 Estado: {estado}\n{validador.resumen()}\n\n📝 Últimos reportes:\n"
+    if ultimos:
+        mensaje += "\n".join(r.linea() for r in ultimos)
     else:
         mensaje += "No hay reportes disponibles."
     
     await update.message.reply_text(mensaje)
 
 async def report(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/report [N] [page P] [ok|error|saldo] [PAR]"""
+    user_id = update.effective_user.id
+    # El historial persiste entre reinicios: no hace falta haber configurado claves en esta ejecución
+    reportes = historial.de(user_id)
+    consulta = interpretar_argumentos(context.args or [])
+    filtros = {"par": consulta["par"], "resultado": consulta["resultado"]}
+    etiqueta = " ".join(v for v in filtros.values() if v)
+
+    if consulta["cantidad"] is not None:
+        seleccion = reportes.ultimos(consulta["cantidad"], **filtros)
+        titulo = f"📝 Últimos {len(seleccion)} reportes{' ' + etiqueta if etiqueta else ''}:"
+    else:
+        seleccion, paginas = reportes.pagina(consulta["pagina"], **filtros)
+        titulo = (f"📝 Reportes{' ' + etiqueta if etiqueta else ''} — página "
+                  f"{min(consulta['pagina'], paginas)}/{paginas}:")
+
+    if not seleccion:
+        await update.message.reply_text("📝 No hay reportes disponibles.")
+        return
+    mensaje = titulo + "\n" + "\n".join(r.linea() for r in seleccion)
+    for trozo in partir_mensaje(mensaje):
+        await update.message.reply_text(trozo)
+
+async def portfolio(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/portfolio [ACTIVO]: todos los saldos valorados con un solo snapshot de precios"""
+    global grafo_conversion
     user_id = update.effective_user.id
     if user_id not in user_data:
-        await update.message.reply_text("❌ No hay datos para mostrar. Usa /setapikeys primero.")
+        await update.message.reply_text("❌ Primero configura tus claves con /setapikeys")
         return
-        
-    historial = user_data[user_id].get("report_history", [])
-    if historial:
-        mensaje = "📝 Últimos 5 reportes:\n" + "\n".join(historial)
-    else:
-        mensaje = "📝 No hay reportes disponibles."
-    
-    await update.message.reply_text(mensaje)
+
+    destino = context.args[0].upper() if context.args else "USDT"
+    valorador = MotorValoracion(user_data[user_id]["client"], grafo=grafo_conversion)
+    try:
+        valoracion = await valorador.valorar_async(destino, llamar=motor.llamar)
+    except BinanceAPIException as e:
+        await update.message.reply_text(f"❌ Error de Binance: {e.message}")
+        return
+    grafo_conversion = valorador.grafo_conversion
+    await update.message.reply_text(valoracion.texto(), parse_mode="Markdown")
+
+async def latir(latido):
+    """Marca el latido del event loop; si el loop se bloquea, deja de marcar"""
+    while True:
+        latido.marcar()
+        await asyncio.sleep(INTERVALO_LATIDO)
+
+async def exponer_metricas(app: Application):
+    """Medidores que necesitan el loop de la aplicación y arranque de /metrics y /health"""
+    global tarea_latido
+    loop = asyncio.get_running_loop()
+    tarea_latido = asyncio.create_task(latir(salud.latido("loop", MAX_SILENCIO_LOOP)), name="latido-loop")
+    metricas.medidor("asyncio_tareas", "Tareas vivas en el event loop del bot",
+                     funcion=lambda: len(asyncio.all_tasks(loop)))
+    metricas.medidor("telegram_actualizaciones_pendientes", "Updates recibidos que aún no se han procesado",
+                     funcion=app.update_queue.qsize)
+    iniciar_servidor_metricas(PUERTO_METRICAS, rutas={"/health": salud.respuesta})
+
+async def cerrar_motor(app: Application):
+    """Cancela las sesiones en curso y cierra las conexiones HTTP de cada usuario"""
+    if tarea_latido is not None:
+        tarea_latido.cancel()
+    await motor.cerrar()
+    for user in user_data.values():
+        await user["client"].close_connection()
+    historial.cerrar()
+
+def crear_validador():
+    """Validador común con la caché de exchangeInfo de mainnet (snapshot en logs/, refresco en segundo plano)"""
+    return ValidadorOrdenes(CacheSimbolos(
+        gobernador_compartido().aplicar(Client(ping=False)),
+        os.path.join(os.path.dirname(__file__), "logs", "exchange_info_mainnet.json"),
+    ))
 
 def main():
-    app = Application.builder().token(TELEGRAM_TOKEN).build()
+    global validador
+    validador = crear_validador()
+    app = (Application.builder().token(TELEGRAM_TOKEN)
+           .request(PeticionMedida(connection_pool_size=256))
+           .get_updates_request(PeticionMedida(latido=salud.latido("telegram", MAX_SILENCIO_TELEGRAM)))
+           .post_init(exponer_metricas).post_shutdown(cerrar_motor).build())
 
     app.add_handler(CommandHandler("start", start))
     app.add_handler(CommandHandler("setapikeys", setapikeys))
     app.add_handler(CommandHandler("runbot", runbot))
+    app.add_handler(CommandHandler("stop", stop))
     app.add_handler(CommandHandler("status", status))
     app.add_handler(CommandHandler("report", report))
+    app.add_handler(CommandHandler("portfolio", portfolio))
 
     logger.info("🤖 Bot de Telegram en marcha")
     app.run_polling(allowed_updates=Update.ALL_TYPES)
@@ -5,6 +5,13 @@ from telegram.ext import ApplicationBuilder, CommandHandler, ContextTypes
 import threading
 import time
 
+from binance.exceptions import BinanceAPIException
+
+from exchange_simulado import exchange_compartido
+
+PAR_SIMULADO = "BTCUSDT"
+IMPORTE_POR_OPERACION = 50.0   # USDT por compra simulada
+
 # Diccionario para almacenar claves API por usuario
 user_data = {}
 # Diccionario para almacenar los hilos de cada usuario
@@ -31,11 +38,28 @@ async def setapikeys(update: Update, context: ContextTypes.DEFAULT_TYPE):
 def simulated_bot(user_id):
     logging.info(f"Iniciando simulación para usuario {user_id}")
     user_data[user_id]["status"] = "running"
+    # Cada API key tiene su propia cuenta en el exchange simulado, con precios que se mueven solos
+    client = exchange_compartido().cliente(user_data[user_id]["api_key"])
+    usdt_inicial = float(client.get_asset_balance("USDT")["free"])
     report = []
     start_time = time.time()
     while time.time() - start_time < 300:
-        report.append("Operación simulada ejecutada.")
-        time.sleep(10)
+        try:
+            compra = client.order_market_buy(symbol=PAR_SIMULADO, quoteOrderQty=IMPORTE_POR_OPERACION)
+            recibido = sum(float(f["qty"]) - float(f["commission"]) for f in compra["fills"])
+            time.sleep(10)
+            venta = client.order_market_sell(symbol=PAR_SIMULADO, quantity=recibido)
+            pnl = (float(venta["cummulativeQuoteQty"]) - sum(float(f["commission"]) for f in venta["fills"])
+                   - float(compra["cummulativeQuoteQty"]))
+            precio_compra = float(compra["cummulativeQuoteQty"]) / float(compra["executedQty"])
+            precio_venta = float(venta["cummulativeQuoteQty"]) / float(venta["executedQty"])
+            report.append(f"{PAR_SIMULADO}: compra @ {precio_compra:.2f}, venta @ {precio_venta:.2f}, "
+                          f"PnL {pnl:+.4f} USDT")
+        except BinanceAPIException as e:
+            report.append(f"Operación rechazada: {e.message}")
+            time.sleep(10)
+    usdt_final = float(client.get_asset_balance("USDT")["free"])
+    report.append(f"Saldo USDT: {usdt_inicial:.2f} → {usdt_final:.2f} ({usdt_final - usdt_inicial:+.4f})")
     user_data[user_id]["report"] = report
     user_data[user_id]["status"] = "finished"
 
@@ -8,6 +8,8 @@ from binance.client import Client
 from binance.exceptions import BinanceAPIException
 from datetime import datetime
 from dotenv import load_dotenv
+from limitador import gobernador_compartido
+from config import PARES_BOT_TELEGRAM2
 
 # Configuración básica de logging
 logging.basicConfig(level=logging.INFO)
@@ -25,7 +27,7 @@ if TELEGRAM_TOKEN == "AQUI_TU_TOKEN":
     raise ValueError("❌ Error: Por favor, reemplaza AQUI_TU_TOKEN con tu token real de Telegram")
 
 # Configuración de trading
-PARES = ["DOGEUSDT", "WIFUSDT", "PEPEUSDT", "FLOKIUSDT", "SHIBUSDT"]
+PARES = PARES_BOT_TELEGRAM2
 CANTIDAD_POR_ORDEN = 1
 
 # Diccionario para almacenar datos de usuarios
@@ -68,7 +70,7 @@ async def setSECRETKEY(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         api_key = user_data[user_id]["api_key"]
         secret_key = context.args[0]
-        client = Client(api_key, secret_key)
+        client = gobernador_compartido().aplicar(Client(api_key, secret_key))
         # Verificar que las claves son válidas intentando obtener la cuenta
         client.get_account()
         
@@ -0,0 +1,163 @@
+"""
+Caché persistente de metadatos de símbolos (exchangeInfo).
+Carga un snapshot compacto desde disco al arrancar, se refresca en segundo
+plano según un TTL y ofrece búsquedas O(1) por símbolo.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+REINTENTO_ERROR = 60  # segundos de espera tras un refresco fallido
+
+
+@dataclass(frozen=True, slots=True)
+class InfoSimbolo:
+    symbol: str
+    status: str
+    base_asset: str
+    quote_asset: str
+    oco_allowed: bool = False
+    filtros: dict = field(default_factory=dict)  # filterType -> parámetros del filtro
+
+    def filtro(self, tipo):
+        return self.filtros.get(tipo)
+
+
+def _desde_exchange_info(s):
+    filtros = {}
+    for f in s.get('filters', []):
+        parametros = dict(f)
+        filtros[parametros.pop('filterType')] = parametros
+    return InfoSimbolo(
+        symbol=s['symbol'],
+        status=s['status'],
+        base_asset=s['baseAsset'],
+        quote_asset=s['quoteAsset'],
+        oco_allowed=bool(s.get('ocoAllowed', False)),
+        filtros=filtros,
+    )
+
+
+class CacheSimbolos:
+    """Metadatos de todos los símbolos, compartidos por todo el proceso"""
+
+    def __init__(self, client, ruta_snapshot, ttl=3600, refresco_en_segundo_plano=True):
+        self._client = client
+        self._ruta = ruta_snapshot
+        self._ttl = ttl
+        self._simbolos = {}
+        self._actualizado = 0.0
+        self._lock = threading.Lock()
+        self._lock_carga = threading.Lock()
+        self._detener = threading.Event()
+
+        self._cargar_snapshot()
+
+        self._hilo = None
+        if refresco_en_segundo_plano:
+            self._hilo = threading.Thread(target=self._bucle_refresco, name="cache-simbolos", daemon=True)
+            self._hilo.start()
+
+    # --- Consultas ---
+
+    def get(self, symbol):
+        """Metadatos del símbolo o None si no existe"""
+        self._asegurar_cargado()
+        return self._simbolos.get(symbol)
+
+    def __contains__(self, symbol):
+        self._asegurar_cargado()
+        return symbol in self._simbolos
+
+    def __len__(self):
+        return len(self._simbolos)
+
+    def simbolos(self, quote_asset=None, estados=None):
+        """Lista de símbolos filtrada por moneda de cotización y estado"""
+        self._asegurar_cargado()
+        return [
+            info for info in self._simbolos.values()
+            if (quote_asset is None or info.quote_asset == quote_asset)
+            and (estados is None or info.status in estados)
+        ]
+
+    def edad(self):
+        """Segundos desde la última actualización de los datos"""
+        return time.time() - self._actualizado
+
+    # --- Refresco ---
+
+    def refrescar(self):
+        """Descarga exchangeInfo, reemplaza el índice y guarda el snapshot"""
+        info = self._client.get_exchange_info()
+        simbolos = {s['symbol']: _desde_exchange_info(s) for s in info['symbols']}
+        with self._lock:
+            self._simbolos = simbolos
+            self._actualizado = time.time()
+        self._guardar_snapshot()
+        logger.info("Caché de símbolos actualizada: %d símbolos", len(simbolos))
+
+    def detener(self):
+        self._detener.set()
+
+    def _asegurar_cargado(self):
+        # Sin snapshot en disco: la primera consulta paga la descarga una única vez
+        if self._simbolos:
+            return
+        with self._lock_carga:
+            if not self._simbolos:
+                self.refrescar()
+
+    def _bucle_refresco(self):
+        while not self._detener.is_set():
+            espera = max(0.0, self._actualizado + self._ttl - time.time())
+            if self._detener.wait(espera):
+                return
+            try:
+                with self._lock_carga:
+                    if self.edad() >= self._ttl:
+                        self.refrescar()
+            except Exception as e:
+                logger.warning("No se pudo refrescar la caché de símbolos: %s", e)
+                self._detener.wait(REINTENTO_ERROR)
+
+    # --- Snapshot en disco ---
+
+    def _cargar_snapshot(self):
+        try:
+            with open(self._ruta, "r", encoding="utf-8") as f:
+                datos = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning("Snapshot de símbolos ilegible (%s), se descargará de nuevo", e)
+            return
+
+        self._simbolos = {
+            fila[0]: InfoSimbolo(fila[0], fila[1], fila[2], fila[3], fila[4], fila[5])
+            for fila in datos.get('simbolos', [])
+        }
+        self._actualizado = datos.get('actualizado', 0.0)
+
+    def _guardar_snapshot(self):
+        with self._lock:
+            datos = {
+                'actualizado': self._actualizado,
+                'simbolos': [
+                    [i.symbol, i.status, i.base_asset, i.quote_asset, i.oco_allowed, i.filtros]
+                    for i in self._simbolos.values()
+                ],
+            }
+        try:
+            os.makedirs(os.path.dirname(self._ruta) or ".", exist_ok=True)
+            temporal = self._ruta + ".tmp"
+            with open(temporal, "w", encoding="utf-8") as f:
+                json.dump(datos, f, separators=(",", ":"))
+            os.replace(temporal, self._ruta)
+        except OSError as e:
+            logger.warning("No se pudo guardar el snapshot de símbolos: %s", e)
@@ -1,10 +1,28 @@
 import os
+import threading
 from dataclasses import dataclass
 from dotenv import load_dotenv
 from binance.client import Client
+from cache_simbolos import CacheSimbolos
+from libro_saldos import LibroSaldos
+from limitador import gobernador_compartido
+from datos_mercado import URL_STREAM_MAINNET, URL_STREAM_TESTNET
+from flujo_usuario import URL_USUARIO_MAINNET, URL_USUARIO_TESTNET
+from exchange_simulado import exchange_compartido
+from validador_ordenes import ValidadorOrdenes
 
 load_dotenv()
 
+LOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs")
+
+# Pares de cada bot de Telegram; aquí y no en los bots para leerlos sin importarlos
+PARES_BOT_TELEGRAM = ["PEPEFLOKI"]
+PARES_BOT_TELEGRAM2 = ["DOGEUSDT", "WIFUSDT", "PEPEUSDT", "FLOKIUSDT", "SHIBUSDT"]
+
+
+def _snapshot_por_defecto(env: str) -> str:
+    return os.path.join(LOG_DIR, f"exchange_info_{env}.json")
+
 
 @dataclass(frozen=True)
 class Settings:
@@ -13,6 +31,12 @@ class Settings:
     telegram_token: str
     telegram_chat_id: str
     binance_env: str = "testnet"
+    exchange_info_ttl: int = 3600
+    exchange_info_snapshot: str = ""
+    saldos_max_antiguedad: float = 2.0
+    simulado_saldos: str = "USDT=10000"
+    diario_operaciones: str = ""
+    diario_sincronizacion: str = "normal"
 
 
 def get_settings() -> Settings:
@@ -22,12 +46,22 @@ def get_settings() -> Settings:
     chat_id = os.getenv("TELEGRAM_CHAT_ID")
     env = os.getenv("BINANCE_ENV", "testnet").lower()
 
+    if env == "simulado":
+        # Paper trading contra el exchange en memoria: no hacen falta claves reales
+        api_key = api_key or "simulado"
+        api_secret = api_secret or "simulado"
     if not api_key or not api_secret:
         raise ValueError("BINANCE_API_KEY/BINANCE_API_SECRET faltantes en .env")
     if not telegram_token or not chat_id:
         raise ValueError("TELEGRAM_TOKEN/TELEGRAM_CHAT_ID faltantes en .env")
-    if env not in ("testnet", "mainnet"):
+    if env not in ("testnet", "mainnet", "simulado"):
         env = "testnet"
+    exchange_info_ttl = int(os.getenv("EXCHANGE_INFO_TTL", "3600"))
+    exchange_info_snapshot = os.getenv("EXCHANGE_INFO_SNAPSHOT", _snapshot_por_defecto(env))
+    saldos_max_antiguedad = float(os.getenv("SALDOS_MAX_ANTIGUEDAD", "2.0"))
+    simulado_saldos = os.getenv("SIMULADO_SALDOS", "USDT=10000")
+    diario_operaciones = os.getenv("DIARIO_OPERACIONES", os.path.join(LOG_DIR, "operaciones.db"))
+    diario_sincronizacion = os.getenv("DIARIO_SINCRONIZACION", "normal").lower()
 
     return Settings(
         binance_api_key=api_key,
@@ -35,17 +69,84 @@ def get_settings() -> Settings:
         telegram_token=telegram_token,
         telegram_chat_id=chat_id,
         binance_env=env,
+        exchange_info_ttl=exchange_info_ttl,
+        exchange_info_snapshot=exchange_info_snapshot,
+        saldos_max_antiguedad=saldos_max_antiguedad,
+        simulado_saldos=simulado_saldos,
+        diario_operaciones=diario_operaciones,
+        diario_sincronizacion=diario_sincronizacion,
     )
 
 
 def get_binance_client(settings: Settings | None = None) -> Client:
     s = settings or get_settings()
+    if s.binance_env == "simulado":
+        return get_cliente_simulado(s)
     client = Client(s.binance_api_key, s.binance_api_secret)
     if s.binance_env == "testnet":
         client.API_URL = "https://testnet.binance.vision/api"
+    # Todas las peticiones del proceso comparten el presupuesto de peso de la IP
+    gobernador_compartido().aplicar(client)
+    client.simbolos = get_cache_simbolos(client, s)
+    client.saldos = LibroSaldos(client, max_antiguedad=s.saldos_max_antiguedad)
+    # Cantidades y precios ajustados a los filtros del símbolo; lo imposible no sale a la red
+    ValidadorOrdenes(client.simbolos).aplicar(client)
+    return client
+
+
+def get_cliente_simulado(settings: Settings | None = None):
+    """ClienteSimulado del exchange en memoria, con los mismos añadidos que el cliente real"""
+    s = settings or get_settings()
+    saldos = {
+        asset.strip().upper(): float(cantidad)
+        for asset, cantidad in (par.split("=") for par in s.simulado_saldos.split(",") if par.strip())
+    }
+    client = exchange_compartido().cliente(s.binance_api_key, saldos)
+    client.simbolos = get_cache_simbolos(client, s)
+    client.saldos = LibroSaldos(client, max_antiguedad=s.saldos_max_antiguedad)
+    ValidadorOrdenes(client.simbolos).aplicar(client)
     return client
 
 
+# Una sola caché de símbolos por snapshot, compartida por todos los clientes del proceso
+_caches_simbolos: dict[str, CacheSimbolos] = {}
+_lock_caches = threading.Lock()
+
+
+def get_cache_simbolos(client: Client, settings: Settings | None = None) -> CacheSimbolos:
+    s = settings or get_settings()
+    ruta = s.exchange_info_snapshot or _snapshot_por_defecto(s.binance_env)
+    # Con el lock: dos hilos no crean cada uno su caché con su propio hilo de refresco
+    with _lock_caches:
+        if ruta not in _caches_simbolos:
+            _caches_simbolos[ruta] = CacheSimbolos(client, ruta, ttl=s.exchange_info_ttl)
+        return _caches_simbolos[ruta]
+
+
+def get_stream_url(settings: Settings | None = None) -> str:
+    """URL de los streams combinados de mercado según el entorno"""
+    s = settings or get_settings()
+    if s.binance_env == "testnet":
+        return URL_STREAM_TESTNET
+    return URL_STREAM_MAINNET
+
+
+def get_user_stream_url(settings: Settings | None = None) -> str:
+    """URL base del user-data stream según el entorno"""
+    s = settings or get_settings()
+    if s.binance_env == "testnet":
+        return URL_USUARIO_TESTNET
+    return URL_USUARIO_MAINNET
+
+
+def get_diario_config(settings: Settings | None = None):
+    """(ruta, sincronización) del diario de operaciones; crea el directorio si falta"""
+    s = settings or get_settings()
+    ruta = s.diario_operaciones or os.path.join(LOG_DIR, "operaciones.db")
+    os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+    return ruta, s.diario_sincronizacion
+
+
 def get_telegram_config(settings: Settings | None = None):
     s = settings or get_settings()
     return s.telegram_token, s.telegram_chat_id
\ No newline at end of file
@@ -0,0 +1,183 @@
+"""
+Motor de datos de mercado por WebSocket.
+Se suscribe a los streams combinados miniTicker/bookTicker de Binance para un
+conjunto de símbolos y guarda el último bid/ask/precio en un almacén compacto
+en memoria, de modo que las funciones de trading lo lean sin coste de red.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+
+import numpy as np
+from websockets.asyncio.client import connect
+
+logger = logging.getLogger(__name__)
+
+URL_STREAM_MAINNET = "wss://stream.binance.com:9443/stream"
+URL_STREAM_TESTNET = "wss://stream.testnet.binance.vision/stream"
+
+STREAMS_POR_MENSAJE = 200     # parámetros por mensaje SUBSCRIBE
+PAUSA_SUSCRIPCION = 0.25      # Binance admite 5 mensajes entrantes por segundo y conexión
+ESPERA_MAXIMA_RECONEXION = 30
+
+# ACTUALIZADO es la hora del último bookTicker (bid/ask); ACTUALIZADO_ULTIMO, la del último miniTicker (precio)
+BID, ASK, ULTIMO, ACTUALIZADO, ACTUALIZADO_ULTIMO = range(5)
+
+
+class AlmacenTickers:
+    """Último bid/ask/precio por símbolo en un arreglo NumPy (símbolos x 5), con la hora de cada uno"""
+
+    def __init__(self, simbolos):
+        self.simbolos = [s.upper() for s in simbolos]
+        self.indice = {s: i for i, s in enumerate(self.simbolos)}
+        self.datos = np.full((len(self.simbolos), 5), np.nan)
+
+    def __contains__(self, symbol):
+        return symbol in self.indice
+
+    def actualizar_libro(self, symbol, bid, ask, ts=None):
+        i = self.indice.get(symbol)
+        if i is None:
+            return
+        fila = self.datos[i]
+        fila[BID] = bid
+        fila[ASK] = ask
+        fila[ACTUALIZADO] = ts or time.time()
+
+    def actualizar_ultimo(self, symbol, ultimo, ts=None):
+        i = self.indice.get(symbol)
+        if i is None:
+            return
+        fila = self.datos[i]
+        fila[ULTIMO] = ultimo
+        fila[ACTUALIZADO_ULTIMO] = ts or time.time()
+
+    def _valor(self, symbol, columna, max_edad, columna_hora=ACTUALIZADO):
+        i = self.indice.get(symbol)
+        if i is None:
+            return None
+        fila = self.datos[i]
+        valor = fila[columna]
+        if valor != valor:  # NaN: todavía sin datos
+            return None
+        if max_edad is not None and time.time() - fila[columna_hora] > max_edad:
+            return None
+        return float(valor)
+
+    def precio(self, symbol, max_edad=None):
+        """Último precio negociado, o None si no hay dato (o es más viejo que max_edad)"""
+        return self._valor(symbol, ULTIMO, max_edad, ACTUALIZADO_ULTIMO)
+
+    def bid(self, symbol, max_edad=None):
+        return self._valor(symbol, BID, max_edad)
+
+    def ask(self, symbol, max_edad=None):
+        return self._valor(symbol, ASK, max_edad)
+
+    def instantanea(self):
+        """Copia del arreglo completo, para lecturas consistentes de todo el universo"""
+        return self.datos.copy()
+
+
+class MotorDatosMercado:
+    """Conexión WebSocket en un hilo propio con reconexión automática"""
+
+    def __init__(self, simbolos, url=URL_STREAM_MAINNET, almacen=None, al_precio=None):
+        self.almacen = almacen or AlmacenTickers(simbolos)
+        self.url = url
+        # al_precio(symbol, precio, ts) en cada miniTicker, p. ej. para guardar el historial de un gráfico
+        self.al_precio = al_precio
+        self.mensajes = 0
+        self.reconexiones = 0
+        self._listo = threading.Event()
+        self._detener = threading.Event()
+        self._loop = None
+        self._ws = None
+        self._hilo = None
+
+    def streams(self):
+        nombres = []
+        for s in self.almacen.simbolos:
+            s = s.lower()
+            nombres.append(f"{s}@miniTicker")
+            nombres.append(f"{s}@bookTicker")
+        return nombres
+
+    def iniciar(self):
+        self._hilo = threading.Thread(target=self._ejecutar_hilo, name="datos-mercado", daemon=True)
+        self._hilo.start()
+        return self
+
+    def esperar_listo(self, timeout=None):
+        """Bloquea hasta recibir el primer dato de mercado"""
+        return self._listo.wait(timeout)
+
+    def detener(self):
+        self._detener.set()
+        if self._loop is not None and self._ws is not None:
+            asyncio.run_coroutine_threadsafe(self._ws.close(), self._loop)
+        if self._hilo is not None:
+            self._hilo.join(timeout=5)
+
+    def _ejecutar_hilo(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self._ejecutar())
+        finally:
+            self._loop.close()
+
+    async def _ejecutar(self):
+        espera = 1
+        while not self._detener.is_set():
+            try:
+                async with connect(self.url, max_queue=None) as ws:
+                    self._ws = ws
+                    await self._suscribir(ws)
+                    espera = 1
+                    async for mensaje in ws:
+                        self._procesar(mensaje)
+            except Exception as e:
+                if self._detener.is_set():
+                    break
+                logger.warning("Stream de mercado desconectado (%s), reintento en %ss", e, espera)
+            finally:
+                self._ws = None
+
+            if self._detener.is_set():
+                break
+            self.reconexiones += 1
+            # Espera interrumpible: detener() no tiene que aguardar el backoff entero
+            await asyncio.get_running_loop().run_in_executor(None, self._detener.wait, espera)
+            espera = min(espera * 2, ESPERA_MAXIMA_RECONEXION)
+
+    async def _suscribir(self, ws):
+        streams = self.streams()
+        for n, i in enumerate(range(0, len(streams), STREAMS_POR_MENSAJE)):
+            if n:
+                await asyncio.sleep(PAUSA_SUSCRIPCION)
+            await ws.send(json.dumps({
+                "method": "SUBSCRIBE",
+                "params": streams[i:i + STREAMS_POR_MENSAJE],
+                "id": n + 1,
+            }))
+
+    def _procesar(self, mensaje):
+        datos = json.loads(mensaje).get("data")
+        if datos is None:
+            return  # respuesta a SUBSCRIBE
+        ahora = time.time()
+        if "b" in datos and "a" in datos:
+            # bookTicker: mejor bid/ask
+            self.almacen.actualizar_libro(datos["s"], float(datos["b"]), float(datos["a"]), ahora)
+        elif datos.get("e") == "24hrMiniTicker":
+            ultimo = float(datos["c"])
+            self.almacen.actualizar_ultimo(datos["s"], ultimo, ahora)
+            if self.al_precio is not None:
+                self.al_precio(datos["s"], ultimo, ahora)
+        else:
+            return
+        self.mensajes += 1
+        if not self._listo.is_set():
+            self._listo.set()
@@ -0,0 +1,301 @@
+"""
+Diario de operaciones en SQLite (modo WAL) con escritura en segundo plano.
+
+registrar() y evento() solo encolan la fila y vuelven: un hilo escritor las
+inserta por lotes en una transacción y, en la misma, acumula el resumen por
+hora, símbolo y usuario. Así las consultas de operaciones recientes usan los
+índices (simbolo, ts), (usuario, ts) y (ts), y los agregados por hora, día o
+semana leen el resumen en lugar de recorrer millones de filas. El resumen
+guarda también los totales de todos los usuarios y/o todos los símbolos
+(TODOS en la columna), así cada consulta lee como mucho una fila por hora.
+
+La política de sincronización decide cuándo se hace fsync:
+- "lote": en cada lote confirmado (synchronous=FULL), no se pierde nada confirmado.
+- "normal": en los checkpoints del WAL (synchronous=NORMAL); sobrevive a la
+  caída del proceso, un corte de luz puede llevarse los últimos lotes.
+- "nunca": lo decide el sistema operativo (synchronous=OFF).
+"""
+import atexit
+import logging
+import sqlite3
+import threading
+import time
+from collections import deque
+
+from config import get_diario_config
+
+logger = logging.getLogger(__name__)
+
+MAX_LOTE = 5000           # filas por transacción
+VENTANA_LOTE = 0.05       # segundos que se esperan más filas antes de escribir
+CACHE_KB = 65536          # caché de páginas del escritor: los índices y el resumen caben en memoria
+SINCRONIZACION = {"lote": "FULL", "normal": "NORMAL", "nunca": "OFF"}
+PERIODOS = {"hora": 3600, "dia": 86400, "semana": 7 * 86400}
+_LADOS = {"BUY": "COMPRA", "SELL": "VENTA"}
+TODOS = "*"               # usuario/símbolo de las filas del resumen que suman todos
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS operaciones (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    usuario TEXT NOT NULL,
+    simbolo TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    cantidad REAL NOT NULL,
+    precio REAL NOT NULL,
+    importe REAL NOT NULL,
+    comision REAL NOT NULL,
+    orden_id INTEGER,
+    resultado TEXT
+);
+CREATE INDEX IF NOT EXISTS operaciones_simbolo ON operaciones (simbolo, ts);
+CREATE INDEX IF NOT EXISTS operaciones_usuario ON operaciones (usuario, ts);
+CREATE INDEX IF NOT EXISTS operaciones_ts ON operaciones (ts);
+CREATE TABLE IF NOT EXISTS resumen_hora (
+    hora INTEGER NOT NULL,
+    usuario TEXT NOT NULL,
+    simbolo TEXT NOT NULL,
+    operaciones INTEGER NOT NULL,
+    compras INTEGER NOT NULL,
+    ventas INTEGER NOT NULL,
+    importe_compras REAL NOT NULL,
+    importe_ventas REAL NOT NULL,
+    comisiones REAL NOT NULL,
+    PRIMARY KEY (usuario, simbolo, hora)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS eventos (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    usuario TEXT NOT NULL,
+    mensaje TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS eventos_ts ON eventos (ts);
+"""
+
+_INSERTAR_OPERACION = (
+    "INSERT INTO operaciones (ts, usuario, simbolo, tipo, cantidad, precio, importe, comision, orden_id, resultado) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+_INSERTAR_EVENTO = "INSERT INTO eventos (ts, usuario, mensaje) VALUES (?, ?, ?)"
+_ACUMULAR_RESUMEN = """
+INSERT INTO resumen_hora VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (usuario, simbolo, hora) DO UPDATE SET
+    operaciones = operaciones + excluded.operaciones,
+    compras = compras + excluded.compras,
+    ventas = ventas + excluded.ventas,
+    importe_compras = importe_compras + excluded.importe_compras,
+    importe_ventas = importe_ventas + excluded.importe_ventas,
+    comisiones = comisiones + excluded.comisiones
+"""
+
+
+class DiarioOperaciones:
+    """Diario append-only de operaciones y eventos con un hilo escritor por lotes"""
+
+    def __init__(self, ruta, sincronizacion="normal", max_lote=MAX_LOTE, ventana=VENTANA_LOTE):
+        if sincronizacion not in SINCRONIZACION:
+            raise ValueError(f"Sincronización desconocida: {sincronizacion} (opciones: {', '.join(SINCRONIZACION)})")
+        self.ruta = ruta
+        self.sincronizacion = sincronizacion
+        self.max_lote = max_lote
+        self.ventana = ventana
+        self._lecturas = threading.local()
+        self._cola = deque()                   # ("operacion" | "evento", fila)
+        self._cambio = threading.Condition()
+        self._ocupado = False
+        self._cerrado = False
+        # Monitorización
+        self.encolados = 0
+        self.escritos = 0
+        self.lotes = 0
+        self.errores = 0
+        self._escritor = self._conectar()
+        self._escritor.executescript(_ESQUEMA)
+        self._hilo = threading.Thread(target=self._ejecutar, name="diario-operaciones", daemon=True)
+        self._hilo.start()
+
+    def _conectar(self):
+        conexion = sqlite3.connect(self.ruta, check_same_thread=False, isolation_level=None)
+        conexion.execute("PRAGMA journal_mode=WAL")
+        conexion.execute(f"PRAGMA synchronous={SINCRONIZACION[self.sincronizacion]}")
+        conexion.execute(f"PRAGMA cache_size=-{CACHE_KB}")
+        return conexion
+
+    # --- Escritura (no bloquea) ---
+
+    def registrar(self, tipo, simbolo, cantidad, precio, usuario="", comision=0.0, orden_id=None,
+                  resultado=None, ts=None):
+        """
+        Encola una operación; `tipo` COMPRA/VENTA (o BUY/SELL) u otro texto libre,
+        `comision` en el activo de cotización (la misma unidad que el importe)
+        """
+        tipo = _LADOS.get(tipo.upper(), tipo.upper())
+        cantidad, precio = float(cantidad), float(precio)
+        self._encolar("operacion", (ts or time.time(), str(usuario), simbolo, tipo, cantidad, precio,
+                                    cantidad * precio, float(comision), orden_id,
+                                    None if resultado is None else str(resultado)))
+
+    def registrar_ejecucion(self, estado, usuario="", resultado=None):
+        """
+        Encola la operación de un EstadoOrden (flujo_usuario) ya ejecutado. La
+        comisión se guarda en el activo de cotización, como los importes, para
+        que los totales sumen una sola unidad; la cobrada en BNB no se incluye
+        """
+        self.registrar(estado.side, estado.symbol, estado.ejecutada, estado.precio_medio, usuario=usuario,
+                       comision=estado.comision_en_cotizacion(), orden_id=estado.order_id,
+                       resultado=resultado or estado.status)
+
+    def evento(self, mensaje, usuario=""):
+        """Encola una línea de texto libre (arranques, errores, saldos...)"""
+        self._encolar("evento", (time.time(), str(usuario), str(mensaje)))
+
+    def _encolar(self, clase, fila):
+        with self._cambio:
+            if self._cerrado:
+                logger.warning("Diario de operaciones cerrado; fila descartada: %s", fila)
+                return
+            self._cola.append((clase, fila))
+            self.encolados += 1
+            # Solo se despierta al escritor al empezar un lote o al llenarlo
+            if len(self._cola) == 1 or len(self._cola) >= self.max_lote:
+                self._cambio.notify_all()
+
+    def pendientes(self):
+        with self._cambio:
+            return len(self._cola) + (1 if self._ocupado else 0)
+
+    def vaciar(self, timeout=30):
+        """Espera a que todo lo encolado esté escrito; False si vence el timeout"""
+        with self._cambio:
+            return self._cambio.wait_for(lambda: not self._cola and not self._ocupado, timeout)
+
+    def cerrar(self, timeout=30):
+        """Escribe lo pendiente y detiene el hilo escritor"""
+        self.vaciar(timeout)
+        with self._cambio:
+            self._cerrado = True
+            self._cambio.notify_all()
+        self._hilo.join(timeout=5)
+        self._escritor.close()
+
+    # --- Hilo escritor ---
+
+    def _ejecutar(self):
+        while True:
+            with self._cambio:
+                self._cambio.wait_for(lambda: self._cola or self._cerrado)
+                if not self._cola:
+                    return
+                # Deja que se junte un lote más grande, salvo si estamos cerrando
+                limite = time.monotonic() + self.ventana
+                while (not self._cerrado and len(self._cola) < self.max_lote
+                       and (espera := limite - time.monotonic()) > 0):
+                    self._cambio.wait(espera)
+                lote = [self._cola.popleft() for _ in range(min(len(self._cola), self.max_lote))]
+                self._ocupado = True
+            try:
+                self._escribir(lote)
+            except sqlite3.Error as e:
+                # Se devuelven a la cola para el siguiente intento: el diario no pierde filas
+                logger.error("Error escribiendo el diario de operaciones: %s", e)
+                self.errores += 1
+                with self._cambio:
+                    self._cola.extendleft(reversed(lote))
+                time.sleep(1.0)
+            finally:
+                with self._cambio:
+                    self._ocupado = False
+                    self._cambio.notify_all()
+
+    def _escribir(self, lote):
+        operaciones = [fila for clase, fila in lote if clase == "operacion"]
+        eventos = [fila for clase, fila in lote if clase == "evento"]
+        resumen = {}
+        for ts, usuario, simbolo, tipo, _, _, importe, comision, _, _ in operaciones:
+            hora = int(ts // 3600) * 3600
+            for clave in ((hora, usuario, simbolo), (hora, usuario, TODOS),
+                          (hora, TODOS, simbolo), (hora, TODOS, TODOS)):
+                acumulado = resumen.setdefault(clave, [0, 0, 0, 0.0, 0.0, 0.0])
+                acumulado[0] += 1
+                if tipo == "COMPRA":
+                    acumulado[1] += 1
+                    acumulado[3] += importe
+                elif tipo == "VENTA":
+                    acumulado[2] += 1
+                    acumulado[4] += importe
+                acumulado[5] += comision
+        with self._escritor:
+            self._escritor.execute("BEGIN")
+            self._escritor.executemany(_INSERTAR_OPERACION, operaciones)
+            self._escritor.executemany(_INSERTAR_EVENTO, eventos)
+            self._escritor.executemany(_ACUMULAR_RESUMEN, [clave + tuple(v) for clave, v in resumen.items()])
+        self.escritos += len(lote)
+        self.lotes += 1
+
+    # --- Consultas (una conexión de lectura por hilo; el WAL no las bloquea) ---
+
+    def _lectura(self):
+        conexion = getattr(self._lecturas, "conexion", None)
+        if conexion is None:
+            conexion = sqlite3.connect(self.ruta, check_same_thread=False)
+            conexion.row_factory = sqlite3.Row
+            self._lecturas.conexion = conexion
+        return conexion
+
+    @staticmethod
+    def _filtros(columna_ts, simbolo, usuario, desde, hasta):
+        condiciones, valores = [], []
+        for condicion, valor in (("simbolo = ?", simbolo), ("usuario = ?", usuario),
+                                 (f"{columna_ts} >= ?", desde), (f"{columna_ts} < ?", hasta)):
+            if valor is not None:
+                condiciones.append(condicion)
+                valores.append(valor)
+        return (" WHERE " + " AND ".join(condiciones) if condiciones else ""), valores
+
+    def recientes(self, limite=50, simbolo=None, usuario=None, desde=None, hasta=None):
+        """Últimas operaciones (más nuevas primero) como dicts; `desde`/`hasta` en segundos epoch"""
+        donde, valores = self._filtros("ts", simbolo, usuario, desde, hasta)
+        filas = self._lectura().execute(
+            f"SELECT * FROM operaciones{donde} ORDER BY ts DESC LIMIT ?", valores + [limite])
+        return [dict(fila) for fila in filas]
+
+    def agregados(self, periodo="dia", simbolo=None, usuario=None, desde=None, hasta=None):
+        """
+        Totales por hora, día o semana (UTC) desde el resumen: operaciones,
+        compras, ventas, importes, comisiones y neto (ventas - compras).
+        `desde`/`hasta` se redondean a la hora.
+        """
+        segundos = PERIODOS[periodo]
+        donde, valores = self._filtros(
+            "hora", TODOS if simbolo is None else simbolo, TODOS if usuario is None else usuario,
+            None if desde is None else int(desde // 3600) * 3600,
+            None if hasta is None else int(hasta // 3600) * 3600)
+        filas = self._lectura().execute(
+            f"SELECT hora / {segundos} * {segundos} AS inicio, SUM(operaciones) AS operaciones, "
+            "SUM(compras) AS compras, SUM(ventas) AS ventas, SUM(importe_compras) AS importe_compras, "
+            "SUM(importe_ventas) AS importe_ventas, SUM(comisiones) AS comisiones, "
+            f"SUM(importe_ventas) - SUM(importe_compras) AS neto FROM resumen_hora{donde} "
+            "GROUP BY inicio ORDER BY inicio", valores)
+        return [dict(fila) for fila in filas]
+
+    def eventos(self, limite=50, usuario=None, desde=None):
+        """Últimos eventos de texto (más nuevos primero)"""
+        donde, valores = self._filtros("ts", None, usuario, desde, None)
+        filas = self._lectura().execute(
+            f"SELECT ts, usuario, mensaje FROM eventos{donde} ORDER BY ts DESC LIMIT ?", valores + [limite])
+        return [dict(fila) for fila in filas]
+
+
+_diario = None
+_lock_diario = threading.Lock()
+
+
+def diario_compartido():
+    """Diario único del proceso, en la ruta y con la sincronización del .env"""
+    global _diario
+    with _lock_diario:
+        if _diario is None:
+            ruta, sincronizacion = get_diario_config()
+            _diario = DiarioOperaciones(ruta, sincronizacion)
+            atexit.register(_diario.cerrar)
+        return _diario
@@ -0,0 +1,75 @@
+"""
+Escáner de pares basado en tickers masivos.
+Descarga todos los precios y estadísticas de 24h con una llamada cada uno
+y filtra/ordena todos los símbolos en una sola pasada vectorizada con NumPy.
+"""
+import numpy as np
+
+
+def _simbolos_candidatos(client, base_asset, estados):
+    """Símbolos con la moneda de cotización y estado pedidos"""
+    cache = getattr(client, 'simbolos', None)
+    if cache is not None:
+        # Caché de config.get_binance_client: sin descargar exchangeInfo
+        return {info.symbol for info in cache.simbolos(quote_asset=base_asset, estados=estados)}
+
+    info = client.get_exchange_info()
+    return {
+        s['symbol']
+        for s in info['symbols']
+        if s['quoteAsset'] == base_asset and s['status'] in estados
+    }
+
+
+def escanear_pares(client, base_asset='USDT', max_pares=5, min_volumen=100000,
+                   max_spread=None, estados=('TRADING',)):
+    """
+    Devuelve los pares más baratos con la moneda base especificada.
+
+    - min_volumen: volumen mínimo de 24h expresado en la moneda de cotización
+    - max_spread: spread máximo relativo (ask - bid) / precio medio, p. ej. 0.002 = 0,2 %
+    - estados: estados de símbolo admitidos (por defecto solo 'TRADING')
+    """
+    candidatos = _simbolos_candidatos(client, base_asset, set(estados))
+    if not candidatos:
+        return []
+
+    precios = client.get_all_tickers()    # 1 llamada: último precio de todos los símbolos
+    estadisticas = client.get_ticker()    # 1 llamada: estadísticas 24h de todos los símbolos
+    indice_stats = {t['symbol']: t for t in estadisticas}
+
+    simbolos, precio, volumen, bid, ask = [], [], [], [], []
+    for t in precios:
+        stats = indice_stats.get(t['symbol'])
+        if stats is None or t['symbol'] not in candidatos:
+            continue
+        simbolos.append(t['symbol'])
+        precio.append(t['price'])
+        volumen.append(stats['quoteVolume'])
+        bid.append(stats.get('bidPrice', '0'))
+        ask.append(stats.get('askPrice', '0'))
+
+    if not simbolos:
+        return []
+
+    precio = np.asarray(precio, dtype=np.float64)
+    volumen = np.asarray(volumen, dtype=np.float64)
+    bid = np.asarray(bid, dtype=np.float64)
+    ask = np.asarray(ask, dtype=np.float64)
+
+    # Solo considerar pares con precio válido y suficiente liquidez
+    mascara = (precio > 0) & (volumen > min_volumen)
+    if max_spread is not None:
+        medio = (bid + ask) / 2
+        with np.errstate(divide='ignore', invalid='ignore'):
+            spread = np.where(medio > 0, (ask - bid) / medio, np.inf)
+        mascara &= spread <= max_spread
+
+    indices = np.flatnonzero(mascara)
+    # Ordenar por precio (de menor a mayor) y quedarse con los N primeros
+    orden = indices[np.argsort(precio[indices], kind='stable')[:max_pares]]
+
+    return [
+        {'symbol': simbolos[i], 'price': float(precio[i]), 'volume': float(volumen[i])}
+        for i in orden
+    ]
@@ -0,0 +1,779 @@
+"""
+Exchange simulado en memoria para paper trading, pruebas de estrategias y de
+carga, sin red.
+
+ExchangeSimulado guarda por símbolo un libro de órdenes (sintético alrededor
+del precio actual o fijado desde un snapshot de profundidad), las órdenes en
+reposo y los saldos de cada cuenta. ClienteSimulado expone sobre una cuenta el
+subconjunto de binance.client.Client que usa el proyecto: order_market_buy/sell,
+create_order (MARKET, LIMIT, LIMIT_MAKER, STOP_LOSS_LIMIT, TAKE_PROFIT_LIMIT),
+create_oco_order, get_account,
+get_asset_balance, get_symbol_ticker, get_ticker, get_exchange_info...
+con respuestas del mismo formato y errores BinanceAPIException.
+
+- Las órdenes a mercado recorren los niveles del libro contrario y pagan la
+  comisión taker en el activo recibido, como en Binance.
+- Las órdenes limit que quedan en el libro se ejecutan a su precio (maker)
+  cuando el mejor precio contrario las cruza.
+- Los stops se disparan con el último precio negociado y pasan a ser limit.
+- El libro sintético se repone al moverse el precio, cada REPOSICION segundos
+  y cuando a uno de sus lados le queda menos de la mitad de los niveles.
+"""
+import heapq
+import itertools
+import json
+import math
+import random
+import threading
+import time
+
+from binance.exceptions import BinanceAPIException
+
+from backtesting import Comisiones
+
+NIVELES_LIBRO = 20
+PASO_NIVEL = 0.0005          # separación relativa entre niveles del libro sintético
+NOMINAL_NIVEL = 50_000.0     # liquidez de cada nivel, en moneda de cotización
+SPREAD = 0.0005              # spread relativo del libro sintético
+REPOSICION = 1.0             # segundos tras los que el libro sintético recupera la liquidez consumida
+MINIMO_NOMINAL = 5.0
+MAX_ORDENES_GUARDADAS = 100_000
+SALDOS_INICIALES = {"USDT": 10_000.0}
+
+# Precios de arranque del exchange compartido cuando no hay velas guardadas
+PRECIOS_POR_DEFECTO = {
+    "BTCUSDT": 60_000.0, "ETHUSDT": 3_000.0, "BNBUSDT": 550.0, "SOLUSDT": 150.0,
+    "DOGEUSDT": 0.15, "PEPEUSDT": 0.00001, "FLOKIUSDT": 0.0002, "ETHBTC": 0.05,
+}
+ACTIVOS_COTIZACION = ("USDT", "FDUSD", "BTC", "ETH", "BNB")
+
+# Con qué se compara cada disparo: "sube" salta cuando el precio llega a >= nivel,
+# "baja" cuando llega a <= nivel
+_DIRECCION_STOP = {
+    ("SELL", "STOP_LOSS_LIMIT"): "baja", ("SELL", "TAKE_PROFIT_LIMIT"): "sube",
+    ("BUY", "STOP_LOSS_LIMIT"): "sube", ("BUY", "TAKE_PROFIT_LIMIT"): "baja",
+}
+_RESPUESTA_POR_DEFECTO = {"MARKET": "FULL", "LIMIT": "FULL"}
+_TIPOS = ("MARKET", "LIMIT", "LIMIT_MAKER", "STOP_LOSS_LIMIT", "TAKE_PROFIT_LIMIT")
+
+
+def error_api(codigo, mensaje, estado=400):
+    """BinanceAPIException con el mismo código y mensaje que daría Binance"""
+    return BinanceAPIException(None, estado, json.dumps({"code": codigo, "msg": mensaje}))
+
+
+def _texto(valor):
+    return f"{valor:.8f}"
+
+
+def _separar_simbolo(simbolo):
+    for quote in ACTIVOS_COTIZACION:
+        if simbolo.endswith(quote) and len(simbolo) > len(quote):
+            return simbolo[:-len(quote)], quote
+    raise ValueError(f"No se reconoce la moneda de cotización de {simbolo}")
+
+
+class Cuenta:
+    """Saldos (libre, bloqueado) por activo de una API key"""
+
+    def __init__(self, api_key, saldos=None, comisiones=Comisiones()):
+        self.api_key = api_key
+        self.comisiones = comisiones
+        self.saldos = {a: [float(v), 0.0] for a, v in (SALDOS_INICIALES if saldos is None else saldos).items()}
+
+    def libre(self, asset):
+        return self.saldos.get(asset, (0.0, 0.0))[0]
+
+    def _mover(self, asset, libre=0.0, bloqueado=0.0):
+        saldo = self.saldos.setdefault(asset, [0.0, 0.0])
+        saldo[0] += libre
+        saldo[1] += bloqueado
+
+    def _bloquear(self, asset, cantidad):
+        if self.libre(asset) < cantidad * (1 - 1e-12):
+            raise error_api(-2010, "Account has insufficient balance for requested action.")
+        self._mover(asset, -cantidad, cantidad)
+
+
+class _Orden:
+    __slots__ = ("id", "client_id", "cuenta", "simbolo", "lado", "tipo", "tif", "cantidad", "precio",
+                 "stop", "ejecutada", "nominal", "estado", "tiempo", "fills", "bloqueado", "lista", "hermana")
+
+    def __init__(self, id, client_id, cuenta, simbolo, lado, tipo, tif, cantidad, precio, stop):
+        self.id = id
+        self.client_id = client_id
+        self.cuenta = cuenta
+        self.simbolo = simbolo
+        self.lado = lado
+        self.tipo = tipo
+        self.tif = tif
+        self.cantidad = cantidad
+        self.precio = precio
+        self.stop = stop
+        self.ejecutada = 0.0
+        self.nominal = 0.0
+        self.estado = "NEW"
+        self.tiempo = int(time.time() * 1000)
+        self.fills = []
+        self.bloqueado = 0.0      # fondos aún bloqueados por la orden (base si vende, quote si compra)
+        self.lista = -1           # orderListId si es un tramo de un OCO
+        self.hermana = None       # el otro tramo del OCO
+
+    @property
+    def abierta(self):
+        return self.estado in ("NEW", "PARTIALLY_FILLED")
+
+    def respuesta(self, tipo_respuesta="RESULT"):
+        datos = {
+            "symbol": self.simbolo.symbol, "orderId": self.id, "orderListId": self.lista,
+            "clientOrderId": self.client_id, "transactTime": self.tiempo,
+        }
+        if tipo_respuesta == "ACK":
+            return datos
+        datos.update({
+            "price": _texto(self.precio or 0.0), "origQty": _texto(self.cantidad),
+            "executedQty": _texto(self.ejecutada), "cummulativeQuoteQty": _texto(self.nominal),
+            "status": self.estado, "timeInForce": self.tif, "type": self.tipo, "side": self.lado,
+        })
+        if self.stop:
+            datos["stopPrice"] = _texto(self.stop)
+        if tipo_respuesta == "FULL":
+            datos["fills"] = [
+                {"price": _texto(p), "qty": _texto(q), "commission": _texto(c), "commissionAsset": a, "tradeId": t}
+                for p, q, c, a, t in self.fills
+            ]
+        return datos
+
+
+class _Simbolo:
+    """Precio, libro y órdenes en reposo de un símbolo"""
+
+    __slots__ = ("symbol", "base", "quote", "precio", "medio", "spread", "bids", "asks", "sintetico",
+                 "repuesto", "sube", "baja", "limites_venta", "limites_compra", "volumen", "filtros", "paso")
+
+    def __init__(self, symbol, precio, spread=SPREAD):
+        self.symbol = symbol
+        self.base, self.quote = _separar_simbolo(symbol)
+        self.precio = precio          # último negociado (dispara los stops)
+        self.medio = precio           # centro del libro sintético
+        self.spread = spread
+        self.bids = []                # [[precio, cantidad], ...] del mejor al peor
+        self.asks = []
+        self.sintetico = True
+        self.repuesto = 0.0           # monotonic de la última reposición; 0 = hay que regenerar
+        self.sube = []                # heap (nivel, seq, orden): stops que saltan con precio >= nivel
+        self.baja = []                # heap (-nivel, seq, orden): stops que saltan con precio <= nivel
+        self.limites_venta = []       # heap (precio, seq, orden)
+        self.limites_compra = []      # heap (-precio, seq, orden)
+        self.volumen = 0.0            # nominal negociado en la simulación
+        self.filtros = _filtros(precio)
+        self.paso = float(self.filtros[1]["stepSize"])
+
+    def libro(self):
+        """(bids, asks) vigentes, regenerando el libro sintético si toca"""
+        # Los creadores de mercado reponen la liquidez consumida cada REPOSICION
+        # segundos, o enseguida si a un lado le queda menos de la mitad de los niveles
+        minimo = NIVELES_LIBRO // 2
+        if self.sintetico and (time.monotonic() - self.repuesto > REPOSICION
+                               or len(self.bids) < minimo or len(self.asks) < minimo):
+            bid = self.medio * (1 - self.spread / 2)
+            ask = self.medio * (1 + self.spread / 2)
+            # Cantidades múltiplo del stepSize, como las del libro real
+            cantidad = math.floor(NOMINAL_NIVEL / self.medio / self.paso) * self.paso
+            self.bids = [[bid * (1 - PASO_NIVEL * k), cantidad] for k in range(NIVELES_LIBRO)]
+            self.asks = [[ask * (1 + PASO_NIVEL * k), cantidad] for k in range(NIVELES_LIBRO)]
+            self.repuesto = time.monotonic()
+        return self.bids, self.asks
+
+    def mejor(self, lado):
+        """Mejor precio contrario para una orden de `lado` (ask para compras, bid para ventas)"""
+        niveles = self.libro()[1 if lado == "BUY" else 0]
+        return niveles[0][0] if niveles else None
+
+
+def _filtros(precio):
+    # Tamaños de tick y de lote en proporción al precio, como en los pares reales
+    tick = 10.0 ** max(-8, math.floor(math.log10(precio)) - 5)
+    paso = 10.0 ** min(0, max(-8, math.floor(math.log10(0.1 / precio))))
+    return [
+        {"filterType": "PRICE_FILTER", "minPrice": _texto(tick), "maxPrice": "1000000.00000000",
+         "tickSize": _texto(tick)},
+        {"filterType": "LOT_SIZE", "minQty": _texto(paso), "maxQty": "90000000000.00000000",
+         "stepSize": _texto(paso)},
+        {"filterType": "NOTIONAL", "minNotional": _texto(MINIMO_NOMINAL), "applyMinToMarket": True,
+         "maxNotional": "9000000.00000000", "applyMaxToMarket": False, "avgPriceMins": 5},
+    ]
+
+
+class ExchangeSimulado:
+    def __init__(self, precios=None, comisiones=Comisiones(), spread=SPREAD, semilla=None):
+        self.comisiones = comisiones
+        self.spread = spread
+        self._simbolos = {}
+        self._cuentas = {}
+        self._ordenes = {}            # orderId -> _Orden (acotado a MAX_ORDENES_GUARDADAS)
+        self._ids = itertools.count(1)
+        self._trades = itertools.count(1)
+        self._secuencia = itertools.count()
+        self._lock = threading.RLock()
+        self._rnd = random.Random(semilla)
+        self._paseo = None
+        self.ordenes_procesadas = 0
+        for simbolo, precio in (precios or PRECIOS_POR_DEFECTO).items():
+            self.agregar_simbolo(simbolo, precio)
+
+    @classmethod
+    def sintetico(cls, n_simbolos=100, semilla=42, **kwargs):
+        """Exchange con `n_simbolos` pares inventados (SIM0000USDT...) a precios aleatorios"""
+        rnd = random.Random(semilla)
+        precios = {f"SIM{i:04d}{ACTIVOS_COTIZACION[i % 3]}": 10 ** rnd.uniform(-4, 4) for i in range(n_simbolos)}
+        return cls(precios, semilla=semilla, **kwargs)
+
+    # --- Mercado ---
+
+    def agregar_simbolo(self, simbolo, precio):
+        with self._lock:
+            self._simbolos[simbolo] = _Simbolo(simbolo, float(precio), self.spread)
+
+    def simbolo(self, simbolo):
+        try:
+            return self._simbolos[simbolo]
+        except KeyError:
+            raise error_api(-1121, "Invalid symbol.") from None
+
+    def simbolos(self):
+        return list(self._simbolos)
+
+    def fijar_precio(self, simbolo, precio):
+        """Mueve el precio (y el libro sintético) de un símbolo y ejecuta lo que dispare"""
+        with self._lock:
+            s = self.simbolo(simbolo)
+            s.precio = s.medio = float(precio)
+            s.repuesto = 0.0
+            self._al_moverse(s)
+
+    def fijar_libro(self, simbolo, bids, asks):
+        """Reproduce un snapshot de profundidad ([[precio, cantidad], ...], p. ej. de get_order_book)"""
+        with self._lock:
+            s = self.simbolo(simbolo)
+            s.bids = [[float(p), float(q)] for p, q in bids]
+            s.asks = [[float(p), float(q)] for p, q in asks]
+            s.sintetico = False
+            if s.bids and s.asks:
+                s.medio = (s.bids[0][0] + s.asks[0][0]) / 2
+            self._al_moverse(s)
+
+    def reproducir(self, simbolo, velas):
+        """
+        Recorre velas (backtesting.Velas o Klines del almacén) moviendo el precio por
+        apertura, extremos y cierre para que los stops salten dentro de cada vela
+        """
+        for vela in zip(velas.apertura, velas.maximo, velas.minimo, velas.cierre):
+            self.reproducir_vela(simbolo, *vela)
+
+    def reproducir_vela(self, simbolo, apertura, maximo, minimo, cierre):
+        # Vela alcista: apertura → mínimo → máximo → cierre; bajista al revés
+        extremos = (minimo, maximo) if cierre >= apertura else (maximo, minimo)
+        for precio in (apertura, *extremos, cierre):
+            self.fijar_precio(simbolo, float(precio))
+
+    def paso_aleatorio(self, volatilidad=0.001):
+        """Un paso de paseo aleatorio geométrico en todos los símbolos"""
+        with self._lock:
+            for s in self._simbolos.values():
+                self.fijar_precio(s.symbol, s.medio * math.exp(self._rnd.gauss(0, volatilidad)))
+
+    def iniciar_paseo(self, intervalo=1.0, volatilidad=0.001):
+        """Hilo de fondo que mueve los precios cada `intervalo` segundos (paper trading en vivo)"""
+        if self._paseo is None:
+            detener = threading.Event()
+
+            def bucle():
+                while not detener.wait(intervalo):
+                    self.paso_aleatorio(volatilidad)
+
+            self._paseo = detener
+            threading.Thread(target=bucle, name="paseo-simulado", daemon=True).start()
+        return self
+
+    def detener_paseo(self):
+        if self._paseo is not None:
+            self._paseo.set()
+            self._paseo = None
+
+    # --- Cuentas ---
+
+    def cuenta(self, api_key="simulado", saldos=None):
+        """Cuenta de la API key; se crea con `saldos` (o SALDOS_INICIALES) la primera vez"""
+        with self._lock:
+            if api_key not in self._cuentas:
+                self._cuentas[api_key] = Cuenta(api_key, saldos, self.comisiones)
+            return self._cuentas[api_key]
+
+    def cliente(self, api_key="simulado", saldos=None):
+        return ClienteSimulado(self, self.cuenta(api_key, saldos))
+
+    # --- Órdenes ---
+
+    def _nueva_orden(self, cuenta, params):
+        """Valida los parámetros de create_order; devuelve (_Orden, quoteOrderQty o None)"""
+        s = self.simbolo(params["symbol"])
+        tipo = params["type"].upper()
+        precio = float(params["price"]) if params.get("price") is not None else None
+        stop = float(params["stopPrice"]) if params.get("stopPrice") is not None else None
+        cantidad = float(params["quantity"]) if params.get("quantity") is not None else None
+        nominal = float(params["quoteOrderQty"]) if params.get("quoteOrderQty") is not None else None
+        if tipo not in _TIPOS:
+            raise error_api(-1116, "Invalid orderType.")
+        if tipo != "MARKET" and (precio is None or cantidad is None):
+            raise error_api(-1102, "Mandatory parameter 'price' or 'quantity' was not sent.")
+        if tipo in ("STOP_LOSS_LIMIT", "TAKE_PROFIT_LIMIT") and stop is None:
+            raise error_api(-1102, "Mandatory parameter 'stopPrice' was not sent.")
+        if (cantidad is None) == (nominal is None) and tipo == "MARKET":
+            raise error_api(-1102, "Send either 'quantity' or 'quoteOrderQty'.")
+        if (cantidad is not None and cantidad <= 0) or (nominal is not None and nominal <= 0):
+            raise error_api(-1013, "Filter failure: LOT_SIZE")
+        if tipo != "MARKET" and cantidad * precio < MINIMO_NOMINAL:
+            raise error_api(-1013, "Filter failure: NOTIONAL")
+        orden_id = next(self._ids)
+        orden = _Orden(orden_id, params.get("newClientOrderId") or f"sim-{orden_id}", cuenta, s,
+                       params["side"].upper(), tipo, params.get("timeInForce", "GTC"), cantidad or 0.0,
+                       precio, stop)
+        return orden, nominal
+
+    def crear_orden(self, cuenta, params):
+        with self._lock:
+            orden, nominal = self._nueva_orden(cuenta, params)
+            if orden.tipo == "MARKET":
+                self._ejecutar_mercado(orden, nominal)
+            elif orden.tipo in ("LIMIT", "LIMIT_MAKER"):
+                self._comprobar(orden)
+                self._bloquear_fondos(orden)
+                self._colocar_limite(orden)
+            else:
+                self._comprobar(orden)
+                self._bloquear_fondos(orden)
+                self._colocar_stop(orden)
+            self._guardar(orden)
+            self.ordenes_procesadas += 1
+            if orden.fills:
+                self._al_moverse(orden.simbolo)
+            return orden.respuesta(params.get("newOrderRespType") or _RESPUESTA_POR_DEFECTO.get(orden.tipo, "ACK"))
+
+    def crear_oco(self, cuenta, params):
+        """
+        OCO de orderList/oco: un tramo por encima y otro por debajo del último
+        precio que comparten la cantidad bloqueada; al ejecutarse uno, el otro expira
+        """
+        with self._lock:
+            s = self.simbolo(params["symbol"])
+            lado = params["side"].upper()
+            tramos = {}
+            for posicion in ("above", "below"):
+                tramos[posicion], _ = self._nueva_orden(cuenta, {
+                    "symbol": s.symbol, "side": lado, "type": params[f"{posicion}Type"],
+                    "quantity": params["quantity"],
+                    "price": params.get(f"{posicion}Price", params.get(f"{posicion}StopPrice")),
+                    "stopPrice": params.get(f"{posicion}StopPrice"),
+                    "timeInForce": params.get(f"{posicion}TimeInForce", "GTC"),
+                    "newClientOrderId": params.get(f"{posicion}ClientOrderId"),
+                })
+            encima, debajo = tramos["above"], tramos["below"]
+            if not (encima.stop or encima.precio) > s.precio > (debajo.stop or debajo.precio):
+                raise error_api(-1165, "A limit order in a buy OCO must be below." if lado == "BUY"
+                                else "A limit order in a sell OCO must be above.")
+            for orden in (encima, debajo):
+                self._comprobar(orden)
+            # Los fondos se bloquean una sola vez, en el tramo que más necesita
+            self._bloquear_fondos(max((encima, debajo), key=lambda o: o.cantidad * (o.precio if lado == "BUY" else 1)))
+            lista = next(self._ids)
+            for orden, otra in ((encima, debajo), (debajo, encima)):
+                orden.lista, orden.hermana = lista, otra
+            for orden in (encima, debajo):
+                if orden.tipo == "LIMIT_MAKER":
+                    self._colocar_limite(orden)
+                else:
+                    self._colocar_stop(orden)
+                self._guardar(orden)
+            self.ordenes_procesadas += 1
+            return {
+                "orderListId": lista, "contingencyType": "OCO", "listStatusType": "EXEC_STARTED",
+                "listOrderStatus": "EXECUTING",
+                "listClientOrderId": params.get("listClientOrderId") or f"sim-lista-{lista}",
+                "transactionTime": int(time.time() * 1000), "symbol": s.symbol,
+                "orders": [{"symbol": s.symbol, "orderId": o.id, "clientOrderId": o.client_id}
+                           for o in (encima, debajo)],
+                "orderReports": [o.respuesta() for o in (encima, debajo)],
+            }
+
+    def cancelar_orden(self, cuenta, params):
+        with self._lock:
+            orden = self._buscar(cuenta, params)
+            if not orden.abierta:
+                raise error_api(-2011, "Unknown order sent.")
+            # Cancelar un tramo de un OCO cancela la lista entera
+            for tramo in (orden, orden.hermana):
+                if tramo is not None and tramo.abierta:
+                    self._liberar(tramo)
+                    tramo.estado = "CANCELED"
+            return orden.respuesta()
+
+    def consultar_orden(self, cuenta, params):
+        with self._lock:
+            return self._buscar(cuenta, params).respuesta()
+
+    def ordenes_abiertas(self, cuenta, simbolo=None):
+        with self._lock:
+            return [o.respuesta() for o in self._ordenes.values()
+                    if o.cuenta is cuenta and o.abierta and (simbolo is None or o.simbolo.symbol == simbolo)]
+
+    def _buscar(self, cuenta, params):
+        orden = self._ordenes.get(int(params.get("orderId") or 0))
+        if orden is None and params.get("origClientOrderId"):
+            orden = next((o for o in self._ordenes.values() if o.client_id == params["origClientOrderId"]), None)
+        if orden is None or orden.cuenta is not cuenta or orden.simbolo.symbol != params.get("symbol"):
+            raise error_api(-2013, "Order does not exist.")
+        return orden
+
+    def _guardar(self, orden):
+        self._ordenes[orden.id] = orden
+        if len(self._ordenes) > MAX_ORDENES_GUARDADAS:
+            # Olvida la más antigua que ya no esté abierta
+            for orden_id, vieja in self._ordenes.items():
+                if not vieja.abierta:
+                    del self._ordenes[orden_id]
+                    break
+
+    # --- Casamiento ---
+
+    def _barrer(self, orden, cantidad=None, nominal=None, limite=None):
+        """
+        Niveles del libro contrario que llenarían la orden (hasta `limite` si es
+        limit): lista de (nivel, cantidad) sin consumir todavía
+        """
+        niveles = orden.simbolo.libro()[1 if orden.lado == "BUY" else 0]
+        compra = orden.lado == "BUY"
+        tomados = []
+        for nivel in niveles:
+            precio, disponible = nivel
+            if limite is not None and (precio > limite if compra else precio < limite):
+                break
+            if disponible <= 0:
+                continue
+            q = min(disponible, cantidad if nominal is None else nominal / precio)
+            tomados.append((nivel, q))
+            if nominal is None:
+                cantidad -= q
+                if cantidad <= 1e-12:
+                    break
+            else:
+                nominal -= q * precio
+                if nominal <= 1e-9:
+                    break
+        return tomados
+
+    def _llenar(self, orden, precio, cantidad, maker=False):
+        """Liquida un fill en la cuenta: cobra, entrega menos comisión y anota el fill"""
+        cuenta, s = orden.cuenta, orden.simbolo
+        tasa = cuenta.comisiones.maker if maker else cuenta.comisiones.taker
+        nominal = precio * cantidad
+        if orden.lado == "BUY":
+            pagado, pago, asset, recibe = s.quote, nominal, s.base, cantidad
+        else:
+            pagado, pago, asset, recibe = s.base, cantidad, s.quote, nominal
+        # Las limit y los stops pagan de lo que bloquearon; las de mercado, del saldo libre
+        if orden.bloqueado:
+            cuenta._mover(pagado, bloqueado=-pago)
+            orden.bloqueado -= pago
+        else:
+            cuenta._mover(pagado, -pago)
+        # Binance redondea la comisión a 8 decimales
+        comision = round(recibe * tasa, 8)
+        cuenta._mover(asset, recibe - comision)
+        orden.ejecutada += cantidad
+        orden.nominal += nominal
+        orden.fills.append((precio, cantidad, comision, asset, next(self._trades)))
+        s.precio = precio
+        s.volumen += nominal
+
+    def _tomar(self, orden, tomados):
+        """Consume los niveles barridos y liquida cada uno como taker"""
+        for nivel, q in tomados:
+            nivel[1] -= q
+            self._llenar(orden, nivel[0], q)
+        niveles = orden.simbolo.bids if orden.lado == "SELL" else orden.simbolo.asks
+        while niveles and niveles[0][1] <= 1e-12:
+            niveles.pop(0)
+
+    def _ejecutar_mercado(self, orden, nominal):
+        s, cuenta = orden.simbolo, orden.cuenta
+        if nominal is not None:
+            # Con quoteOrderQty, Binance ejecuta la cantidad que cabe redondeada al stepSize
+            cantidad = sum(q for _, q in self._barrer(orden, nominal=nominal))
+            orden.cantidad = math.floor(cantidad / s.paso + 1e-9) * s.paso
+        tomados = self._barrer(orden, orden.cantidad)
+        cantidad = sum(q for _, q in tomados)
+        coste = sum(n[0] * q for n, q in tomados)
+        if orden.lado == "BUY" and cuenta.libre(s.quote) < coste * (1 - 1e-12):
+            raise error_api(-2010, "Account has insufficient balance for requested action.")
+        if orden.lado == "SELL" and cuenta.libre(s.base) < cantidad * (1 - 1e-12):
+            raise error_api(-2010, "Account has insufficient balance for requested action.")
+        if coste < MINIMO_NOMINAL:
+            raise error_api(-1013, "Filter failure: NOTIONAL")
+        self._tomar(orden, tomados)
+        # Sin liquidez suficiente en el libro, Binance deja el resto de la orden a mercado EXPIRED
+        orden.estado = "FILLED" if orden.ejecutada >= orden.cantidad * (1 - 1e-9) else "EXPIRED"
+
+    def _bloquear_fondos(self, orden):
+        s = orden.simbolo
+        if orden.lado == "BUY":
+            orden.cuenta._bloquear(s.quote, orden.cantidad * orden.precio)
+            orden.bloqueado = orden.cantidad * orden.precio
+        else:
+            orden.cuenta._bloquear(s.base, orden.cantidad)
+            orden.bloqueado = orden.cantidad
+
+    def _colocar_limite(self, orden):
+        self._activar_limite(orden)
+
+    def _activar_limite(self, orden):
+        """Cruza la parte marketable como taker y deja el resto en el libro según timeInForce"""
+        tomados = self._barrer(orden, orden.cantidad - orden.ejecutada, limite=orden.precio)
+        llenable = sum(q for _, q in tomados)
+        pendiente = orden.cantidad - orden.ejecutada
+        if orden.tif == "FOK" and llenable < pendiente * (1 - 1e-9):
+            self._liberar(orden)
+            orden.estado = "EXPIRED"
+            return
+        if tomados:
+            # Las compras bloquearon cantidad * precio límite; se pagan los precios del libro
+            self._tomar(orden, tomados)
+        if orden.ejecutada >= orden.cantidad * (1 - 1e-9):
+            self._liberar(orden)
+            orden.estado = "FILLED"
+        elif orden.tif == "IOC":
+            self._liberar(orden)
+            orden.estado = "EXPIRED"
+        else:
+            orden.estado = "PARTIALLY_FILLED" if orden.ejecutada else "NEW"
+            s = orden.simbolo
+            if orden.lado == "BUY":
+                heapq.heappush(s.limites_compra, (-orden.precio, next(self._secuencia), orden))
+            else:
+                heapq.heappush(s.limites_venta, (orden.precio, next(self._secuencia), orden))
+
+    def _comprobar(self, orden):
+        """Binance rechaza el LIMIT_MAKER que tomaría liquidez y el stop que saltaría en el acto"""
+        if orden.tipo == "LIMIT_MAKER":
+            mejor = orden.simbolo.mejor(orden.lado)
+            if mejor is not None and (orden.precio >= mejor if orden.lado == "BUY" else orden.precio <= mejor):
+                raise error_api(-2010, "Order would immediately match and take.")
+        elif orden.tipo != "LIMIT":
+            direccion, precio = _DIRECCION_STOP[(orden.lado, orden.tipo)], orden.simbolo.precio
+            if (direccion == "sube" and precio >= orden.stop) or (direccion == "baja" and precio <= orden.stop):
+                raise error_api(-2010, "Order would trigger immediately.")
+
+    def _colocar_stop(self, orden):
+        s = orden.simbolo
+        if _DIRECCION_STOP[(orden.lado, orden.tipo)] == "sube":
+            heapq.heappush(s.sube, (orden.stop, next(self._secuencia), orden))
+        else:
+            heapq.heappush(s.baja, (-orden.stop, next(self._secuencia), orden))
+
+    def _liberar(self, orden):
+        """Devuelve al saldo libre lo que la orden aún tenía bloqueado"""
+        if orden.bloqueado:
+            s = orden.simbolo
+            orden.cuenta._mover(s.quote if orden.lado == "BUY" else s.base, orden.bloqueado, -orden.bloqueado)
+            orden.bloqueado = 0.0
+
+    def _al_moverse(self, s):
+        """Dispara stops con el último precio y llena las limit cruzadas, hasta que no cambie nada"""
+        while True:
+            if s.sube and s.sube[0][0] <= s.precio:
+                orden = heapq.heappop(s.sube)[2]
+            elif s.baja and -s.baja[0][0] >= s.precio:
+                orden = heapq.heappop(s.baja)[2]
+            else:
+                break
+            if orden.abierta:
+                self._relevar(orden)
+                self._activar_limite(orden)
+        if s.limites_venta:
+            bid = s.mejor("SELL")
+            while s.limites_venta and bid is not None and s.limites_venta[0][0] <= bid:
+                self._llenar_en_reposo(heapq.heappop(s.limites_venta)[2])
+        if s.limites_compra:
+            ask = s.mejor("BUY")
+            while s.limites_compra and ask is not None and -s.limites_compra[0][0] >= ask:
+                self._llenar_en_reposo(heapq.heappop(s.limites_compra)[2])
+
+    def _relevar(self, orden):
+        """Al activarse un tramo de un OCO, el otro expira y le pasa los fondos bloqueados"""
+        hermana = orden.hermana
+        if hermana is not None and hermana.abierta:
+            orden.bloqueado += hermana.bloqueado
+            hermana.bloqueado = 0.0
+            hermana.estado = "EXPIRED"
+
+    def _llenar_en_reposo(self, orden):
+        if not orden.abierta:
+            return
+        self._relevar(orden)
+        self._llenar(orden, orden.precio, orden.cantidad - orden.ejecutada, maker=True)
+        self._liberar(orden)
+        orden.estado = "FILLED"
+
+
+class ClienteSimulado:
+    """Subconjunto de binance.client.Client sobre una cuenta de un ExchangeSimulado"""
+
+    def __init__(self, exchange, cuenta):
+        self.exchange = exchange
+        self.cuenta = cuenta
+        self.API_KEY = cuenta.api_key
+
+    # --- Órdenes ---
+
+    def create_order(self, **params):
+        return self.exchange.crear_orden(self.cuenta, params)
+
+    def create_oco_order(self, **params):
+        return self.exchange.crear_oco(self.cuenta, params)
+
+    def order_oco_sell(self, **params):
+        return self.create_oco_order(side="SELL", **params)
+
+    def order_market_buy(self, **params):
+        return self.create_order(side="BUY", type="MARKET", **params)
+
+    def order_market_sell(self, **params):
+        return self.create_order(side="SELL", type="MARKET", **params)
+
+    def order_limit_buy(self, timeInForce="GTC", **params):
+        return self.create_order(side="BUY", type="LIMIT", timeInForce=timeInForce, **params)
+
+    def order_limit_sell(self, timeInForce="GTC", **params):
+        return self.create_order(side="SELL", type="LIMIT", timeInForce=timeInForce, **params)
+
+    def cancel_order(self, **params):
+        return self.exchange.cancelar_orden(self.cuenta, params)
+
+    def get_order(self, **params):
+        return self.exchange.consultar_orden(self.cuenta, params)
+
+    def get_open_orders(self, **params):
+        return self.exchange.ordenes_abiertas(self.cuenta, params.get("symbol"))
+
+    # --- Cuenta ---
+
+    def get_account(self, **params):
+        comisiones = self.cuenta.comisiones
+        with self.exchange._lock:
+            saldos = [{"asset": a, "free": _texto(libre), "locked": _texto(bloqueado)}
+                      for a, (libre, bloqueado) in self.cuenta.saldos.items()]
+        return {
+            "makerCommission": round(comisiones.maker * 10000),
+            "takerCommission": round(comisiones.taker * 10000),
+            "commissionRates": {"maker": _texto(comisiones.maker), "taker": _texto(comisiones.taker),
+                                "buyer": "0.00000000", "seller": "0.00000000"},
+            "canTrade": True, "canWithdraw": False, "canDeposit": False,
+            "updateTime": int(time.time() * 1000), "accountType": "SPOT",
+            "balances": saldos, "permissions": ["SPOT"],
+        }
+
+    def get_asset_balance(self, asset=None, **params):
+        with self.exchange._lock:
+            if asset is None:
+                return self.get_account()["balances"]
+            if asset not in self.cuenta.saldos:
+                return None
+            libre, bloqueado = self.cuenta.saldos[asset]
+        return {"asset": asset, "free": _texto(libre), "locked": _texto(bloqueado)}
+
+    # --- Mercado ---
+
+    def get_symbol_ticker(self, **params):
+        if "symbol" in params:
+            s = self.exchange.simbolo(params["symbol"])
+            return {"symbol": s.symbol, "price": _texto(s.precio)}
+        return [{"symbol": s.symbol, "price": _texto(s.precio)} for s in self.exchange._simbolos.values()]
+
+    def get_all_tickers(self, **params):
+        return self.get_symbol_ticker(**params)
+
+    def get_ticker(self, **params):
+        def fila(s):
+            with self.exchange._lock:
+                bid, ask = s.mejor("SELL"), s.mejor("BUY")
+            return {"symbol": s.symbol, "lastPrice": _texto(s.precio), "bidPrice": _texto(bid or 0.0),
+                    "askPrice": _texto(ask or 0.0), "volume": _texto(s.volumen / s.precio),
+                    "quoteVolume": _texto(s.volumen)}
+        if "symbol" in params:
+            return fila(self.exchange.simbolo(params["symbol"]))
+        return [fila(s) for s in self.exchange._simbolos.values()]
+
+    def get_order_book(self, **params):
+        limite = int(params.get("limit", 100))
+        with self.exchange._lock:
+            bids, asks = self.exchange.simbolo(params["symbol"]).libro()
+            return {"lastUpdateId": self.exchange.ordenes_procesadas,
+                    "bids": [[_texto(p), _texto(q)] for p, q in bids[:limite] if q > 0],
+                    "asks": [[_texto(p), _texto(q)] for p, q in asks[:limite] if q > 0]}
+
+    def get_exchange_info(self, **params):
+        return {
+            "timezone": "UTC",
+            "serverTime": int(time.time() * 1000),
+            "symbols": [
+                {"symbol": s.symbol, "status": "TRADING", "baseAsset": s.base, "quoteAsset": s.quote,
+                 "ocoAllowed": True, "orderTypes": ["LIMIT", "MARKET", "STOP_LOSS_LIMIT", "TAKE_PROFIT_LIMIT"],
+                 "filters": s.filtros}
+                for s in self.exchange._simbolos.values()
+            ],
+        }
+
+    def get_symbol_info(self, symbol):
+        return next((s for s in self.get_exchange_info()["symbols"] if s["symbol"] == symbol), None)
+
+    # --- Varios ---
+
+    def ping(self):
+        return {}
+
+    def get_system_status(self):
+        return {"status": 0, "msg": "normal"}
+
+    def get_server_time(self):
+        return {"serverTime": int(time.time() * 1000)}
+
+    def close_connection(self):
+        pass
+
+
+_exchange = None
+_lock_exchange = threading.Lock()
+
+
+def precios_iniciales(intervalo="1m"):
+    """Últimos cierres del almacén de velas, completados con PRECIOS_POR_DEFECTO"""
+    precios = dict(PRECIOS_POR_DEFECTO)
+    try:
+        from almacen_klines import AlmacenKlines
+        almacen = AlmacenKlines()
+        for simbolo in almacen.simbolos(intervalo):
+            klines = almacen.leer(simbolo, intervalo)
+            if len(klines):
+                precios[simbolo] = float(klines.cierre[-1])
+    except Exception as e:
+        print(f"⚠️ No se pudieron leer precios del almacén de velas: {e}")
+    return {s: p for s, p in precios.items() if any(s.endswith(q) for q in ACTIVOS_COTIZACION)}
+
+
+def exchange_compartido():
+    """Exchange simulado único del proceso, con los precios moviéndose en segundo plano"""
+    global _exchange
+    with _lock_exchange:
+        if _exchange is None:
+            _exchange = ExchangeSimulado(precios_iniciales()).iniciar_paseo()
+        return _exchange
@@ -0,0 +1,290 @@
+"""
+Listener del user-data stream de Binance.
+Sigue el estado y las ejecuciones de las órdenes (executionReport) y los saldos
+(outboundAccountPosition) como eventos, para esperar el fill real de una orden
+en lugar de dormir un tiempo fijo y volver a consultar saldos.
+
+Funciona en un hilo propio (iniciar) o como tarea dentro de un event loop
+existente con un AsyncClient (iniciar_async), p. ej. el motor multiusuario.
+"""
+import asyncio
+import inspect
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+
+from websockets.asyncio.client import connect
+
+logger = logging.getLogger(__name__)
+
+URL_USUARIO_MAINNET = "wss://stream.binance.com:9443/ws"
+URL_USUARIO_TESTNET = "wss://stream.testnet.binance.vision/ws"
+
+KEEPALIVE = 30 * 60  # Binance caduca el listenKey a los 60 minutos sin keepalive
+ESPERA_MAXIMA_RECONEXION = 30
+ESTADOS_FINALES = {"FILLED", "CANCELED", "REJECTED", "EXPIRED", "EXPIRED_IN_MATCH"}
+MAX_ORDENES = 1000   # órdenes recordadas; se descartan primero las finalizadas más antiguas
+
+
+@dataclass
+class EstadoOrden:
+    symbol: str
+    order_id: int
+    client_order_id: str
+    side: str
+    status: str
+    cantidad: float
+    ejecutada: float = 0.0
+    cotizacion_acumulada: float = 0.0
+    comisiones: dict = field(default_factory=dict)    # activo -> comisión cobrada en ese activo
+    actualizado: float = 0.0
+
+    @property
+    def final(self):
+        return self.status in ESTADOS_FINALES
+
+    @property
+    def precio_medio(self):
+        return self.cotizacion_acumulada / self.ejecutada if self.ejecutada else 0.0
+
+    def comision_en_cotizacion(self):
+        """
+        Comisión en el activo de cotización: la cobrada en el base se convierte
+        al precio del fill; la de otros activos (BNB) no se puede sumar y queda fuera
+        """
+        total = 0.0
+        for activo, comision in self.comisiones.items():
+            if self.symbol.endswith(activo):
+                total += comision
+            elif self.symbol.startswith(activo):
+                total += comision * self.precio_medio
+        return total
+
+    def _sumar_comision(self, activo, comision):
+        if comision:
+            self.comisiones[activo] = self.comisiones.get(activo, 0.0) + comision
+
+    @classmethod
+    def desde_respuesta(cls, orden):
+        """Estado a partir de la respuesta REST de create_order"""
+        estado = cls(
+            symbol=orden['symbol'],
+            order_id=orden['orderId'],
+            client_order_id=orden.get('clientOrderId', ''),
+            side=orden.get('side', ''),
+            status=orden.get('status', 'NEW'),
+            cantidad=float(orden.get('origQty', 0)),
+            ejecutada=float(orden.get('executedQty', 0)),
+            cotizacion_acumulada=float(orden.get('cummulativeQuoteQty', 0)),
+            actualizado=time.time(),
+        )
+        for f in orden.get('fills', []):
+            estado._sumar_comision(f.get('commissionAsset') or '', float(f.get('commission', 0)))
+        return estado
+
+
+class FlujoUsuario:
+    """Conexión al user-data stream con keepalive y reconexión"""
+
+    def __init__(self, client, url=URL_USUARIO_MAINNET, saldos=None):
+        self._client = client
+        self.url = url
+        self.saldos = saldos or getattr(client, 'saldos', None)
+        self.ordenes = {}            # orderId -> EstadoOrden
+        self.eventos = 0
+        self.reconexiones = 0
+        self._cambio = threading.Condition()
+        self._conectado = threading.Event()
+        self._detener = threading.Event()
+        self._listen_key = None
+        self._loop = None
+        self._ws = None
+        self._hilo = None
+        self._tarea = None
+        self._esperas = {}           # orderId -> asyncio.Event (solo modo asíncrono)
+
+    def iniciar(self, esperar=5.0):
+        """
+        Arranca el listener en un hilo propio. Si no conecta en `esperar`
+        segundos lo detiene y lanza ConnectionError, para que quien llama use
+        las respuestas REST en lugar de esperar eventos que no van a llegar
+        """
+        self._hilo = threading.Thread(target=self._ejecutar_hilo, name="flujo-usuario", daemon=True)
+        self._hilo.start()
+        if not self._conectado.wait(esperar):
+            self.detener()
+            raise ConnectionError(f"User-data stream sin conectar tras {esperar:.0f}s")
+        return self
+
+    def detener(self):
+        self._detener.set()
+        if self._loop is not None and self._ws is not None:
+            asyncio.run_coroutine_threadsafe(self._ws.close(), self._loop)
+        if self._hilo is not None:
+            self._hilo.join(timeout=5)
+
+    async def iniciar_async(self, esperar=5.0):
+        """Arranca el listener como tarea del event loop actual"""
+        self._loop = asyncio.get_running_loop()
+        self._tarea = asyncio.create_task(self._ejecutar(), name="flujo-usuario")
+        limite = self._loop.time() + esperar
+        while not self._conectado.is_set() and self._loop.time() < limite:
+            await asyncio.sleep(0.01)
+        return self
+
+    async def detener_async(self):
+        self._detener.set()
+        if self._ws is not None:
+            await self._ws.close()
+        if self._tarea is not None:
+            self._tarea.cancel()
+            await asyncio.gather(self._tarea, return_exceptions=True)
+
+    # --- Espera de órdenes ---
+
+    def estado(self, order_id):
+        return self.ordenes.get(order_id)
+
+    def esperar_orden(self, order_id, timeout=10.0):
+        """Bloquea hasta que la orden llega a un estado final; None si vence el timeout"""
+        with self._cambio:
+            self._cambio.wait_for(
+                lambda: (e := self.ordenes.get(order_id)) is not None and e.final, timeout
+            )
+            estado = self.ordenes.get(order_id)
+        return estado if estado is not None and estado.final else None
+
+    def esperar_ejecucion(self, orden, timeout=10.0):
+        """
+        Recibe la respuesta REST de una orden y devuelve su EstadoOrden final.
+        Si la respuesta ya indica un estado final no hay espera alguna.
+        """
+        estado = EstadoOrden.desde_respuesta(orden)
+        if estado.final:
+            return estado
+        return self.esperar_orden(estado.order_id, timeout)
+
+    async def esperar_ejecucion_async(self, orden, timeout=10.0):
+        """
+        Versión asíncrona de esperar_ejecucion. Si el evento no llega a tiempo
+        (p. ej. el stream estaba reconectando) consulta la orden una vez por REST.
+        """
+        estado = EstadoOrden.desde_respuesta(orden)
+        if estado.final:
+            return estado
+        actual = self.ordenes.get(estado.order_id)
+        if actual is not None and actual.final:
+            return actual
+
+        evento = self._esperas.setdefault(estado.order_id, asyncio.Event())
+        try:
+            await asyncio.wait_for(evento.wait(), timeout)
+            return self.ordenes.get(estado.order_id)
+        except asyncio.TimeoutError:
+            respuesta = await self._llamar_cliente(
+                self._client.get_order, symbol=estado.symbol, orderId=estado.order_id
+            )
+            estado = EstadoOrden.desde_respuesta(respuesta)
+            return estado if estado.final else None
+        finally:
+            self._esperas.pop(estado.order_id, None)
+
+    # --- Conexión ---
+
+    def _ejecutar_hilo(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self._ejecutar())
+        finally:
+            self._loop.close()
+
+    async def _ejecutar(self):
+        espera = 1
+        keepalive = None
+        while not self._detener.is_set():
+            try:
+                self._listen_key = await self._llamar_cliente(self._client.stream_get_listen_key)
+                if keepalive is None:
+                    keepalive = asyncio.create_task(self._mantener_vivo())
+                async with connect(f"{self.url}/{self._listen_key}") as ws:
+                    self._ws = ws
+                    self._conectado.set()
+                    espera = 1
+                    async for mensaje in ws:
+                        self._procesar(json.loads(mensaje))
+            except Exception as e:
+                if self._detener.is_set():
+                    break
+                logger.warning("User-data stream desconectado (%s), reintento en %ss", e, espera)
+            finally:
+                self._ws = None
+                self._conectado.clear()
+
+            if self._detener.is_set():
+                break
+            self.reconexiones += 1
+            # Espera interrumpible: detener() no tiene que aguardar el backoff entero
+            await asyncio.get_running_loop().run_in_executor(None, self._detener.wait, espera)
+            espera = min(espera * 2, ESPERA_MAXIMA_RECONEXION)
+
+        if keepalive is not None:
+            keepalive.cancel()
+
+    async def _mantener_vivo(self):
+        while True:
+            await asyncio.sleep(KEEPALIVE)
+            try:
+                await self._llamar_cliente(self._client.stream_keepalive, self._listen_key)
+            except Exception as e:
+                logger.warning("Keepalive del listenKey falló: %s", e)
+
+    async def _llamar_cliente(self, funcion, *args, **kwargs):
+        # Client síncrono en un hilo auxiliar; AsyncClient directamente
+        if inspect.iscoroutinefunction(funcion):
+            return await funcion(*args, **kwargs)
+        return await asyncio.to_thread(funcion, *args, **kwargs)
+
+    # --- Eventos ---
+
+    def _procesar(self, evento):
+        tipo = evento.get('e')
+        if tipo == 'executionReport':
+            self._procesar_ejecucion(evento)
+        elif tipo == 'outboundAccountPosition':
+            if self.saldos is not None:
+                for b in evento['B']:
+                    self.saldos.aplicar(b['a'], b['f'], b['l'])
+        else:
+            return
+        self.eventos += 1
+
+    def _procesar_ejecucion(self, evento):
+        with self._cambio:
+            estado = self.ordenes.get(evento['i'])
+            if estado is None:
+                estado = EstadoOrden(
+                    symbol=evento['s'],
+                    order_id=evento['i'],
+                    client_order_id=evento['c'],
+                    side=evento['S'],
+                    status=evento['X'],
+                    cantidad=float(evento['q']),
+                )
+                self.ordenes[evento['i']] = estado
+            estado.status = evento['X']
+            estado.ejecutada = float(evento['z'])
+            estado.cotizacion_acumulada = float(evento['Z'])
+            estado._sumar_comision(evento.get('N') or '', float(evento.get('n') or 0))
+            estado.actualizado = time.time()
+            if len(self.ordenes) > MAX_ORDENES:
+                self._podar()
+            self._cambio.notify_all()
+        if estado.final and estado.order_id in self._esperas:
+            self._esperas[estado.order_id].set()
+
+    def _podar(self):
+        sobrantes = len(self.ordenes) - MAX_ORDENES
+        for order_id in [i for i, e in self.ordenes.items() if e.final][:sobrantes]:
+            del self.ordenes[order_id]
@@ -1,14 +1,25 @@
+import os
 from telegram import Update
 from telegram.ext import Application, CommandHandler
 from config import get_telegram_config
+from metricas import iniciar_servidor_metricas
+from salud import salud_compartida
+from telegram_utils import PeticionMedida
 
 TOKEN, _ = get_telegram_config()
+salud = salud_compartida()
 
 async def start(update: Update, context):
     chat_id = update.effective_chat.id
     await update.message.reply_text(f"✅ Tu chat_id es: {chat_id}")
 
-app = Application.builder().token(TOKEN).build()
+async def exponer_salud(app):
+    # /health para el healthcheck del contenedor: latido de cada getUpdates
+    iniciar_servidor_metricas(int(os.getenv("METRICAS_PUERTO", "9108")), rutas={"/health": salud.respuesta})
+
+app = (Application.builder().token(TOKEN)
+       .get_updates_request(PeticionMedida(latido=salud.latido("telegram", 90)))
+       .post_init(exponer_salud).build())
 app.add_handler(CommandHandler("start", start))
 print("📡 Ejecutando bot... Enviá /start desde Telegram para obtener tu chat_id.")
 app.run_polling()
@@ -0,0 +1,189 @@
+"""
+Gráfico de precios en vivo para la ventana de main.py.
+
+Cada símbolo guarda su historial en un AnilloPrecios: dos arrays NumPy de
+tamaño fijo (tiempo, precio) donde cada tick nuevo pisa al más viejo, así que
+memoria y coste de añadir no crecen con las horas de sesión. Antes de dibujar,
+la serie se reduce al ancho en píxeles con Largest-Triangle-Three-Buckets
+(LTTB): en cada tramo se queda el punto que forma el triángulo de mayor área
+con el elegido antes y la media del tramo siguiente, lo que conserva picos y
+caídas. El Canvas recibe siempre como mucho un punto por píxel, en una sola
+línea cuyas coordenadas se reemplazan, más los marcadores de compras y ventas.
+"""
+import threading
+import time
+import tkinter as tk
+from collections import deque
+
+import numpy as np
+
+CAPACIDAD = 200_000         # puntos por símbolo (~55 h a un tick por segundo)
+MAX_MARCAS = 500            # órdenes recordadas por símbolo
+FPS_GRAFICO = 4             # redibujados por segundo como máximo
+MARGEN = 8                  # píxeles libres alrededor de la línea
+COLOR_LINEA = "#1f77b4"
+COLOR_COMPRA = "#2ca02c"
+COLOR_VENTA = "#d62728"
+
+
+def lttb(x, y, umbral):
+    """Índices de los `umbral` puntos que LTTB conserva de (x, y); todos si ya son menos"""
+    n = len(x)
+    if umbral >= n or umbral < 3:
+        return np.arange(n)
+    # Tramos interiores de igual tamaño; el primer y el último punto se conservan siempre
+    limites = np.linspace(1, n - 1, umbral - 1).astype(np.int64)
+    sumas_x = np.add.reduceat(x[1:n - 1], limites[:-1] - 1)
+    sumas_y = np.add.reduceat(y[1:n - 1], limites[:-1] - 1)
+    tamanos = np.diff(limites)
+    medias_x = np.append(sumas_x / tamanos, x[-1])
+    medias_y = np.append(sumas_y / tamanos, y[-1])
+
+    elegidos = np.empty(umbral, dtype=np.int64)
+    elegidos[0], elegidos[-1] = 0, n - 1
+    a = 0
+    for i in range(umbral - 2):
+        inicio, fin = limites[i], limites[i + 1]
+        ax, ay = x[a], y[a]
+        cx, cy = medias_x[i + 1], medias_y[i + 1]
+        # Doble del área del triángulo (a, b, c) para cada candidato b del tramo
+        areas = np.abs((ax - cx) * (y[inicio:fin] - ay) - (ax - x[inicio:fin]) * (cy - ay))
+        a = inicio + int(areas.argmax())
+        elegidos[i + 1] = a
+    return elegidos
+
+
+class AnilloPrecios:
+    """Últimos `capacidad` (tiempo, precio) de un símbolo en arrays de tamaño fijo"""
+
+    def __init__(self, capacidad=CAPACIDAD):
+        self.capacidad = capacidad
+        self._t = np.empty(capacidad)
+        self._p = np.empty(capacidad)
+        self._pos = 0
+        self.total = 0              # puntos añadidos desde el inicio
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return min(self.total, self.capacidad)
+
+    def agregar(self, precio, ts=None):
+        with self._lock:
+            self._t[self._pos] = time.time() if ts is None else ts
+            self._p[self._pos] = precio
+            self._pos = (self._pos + 1) % self.capacidad
+            self.total += 1
+
+    def serie(self, desde=None):
+        """(tiempos, precios) en orden cronológico, copiados; solo desde `desde` si se indica"""
+        with self._lock:
+            if self.total < self.capacidad:
+                t, p = self._t[:self._pos].copy(), self._p[:self._pos].copy()
+            else:
+                t = np.concatenate((self._t[self._pos:], self._t[:self._pos]))
+                p = np.concatenate((self._p[self._pos:], self._p[:self._pos]))
+        if desde is not None:
+            inicio = np.searchsorted(t, desde)
+            t, p = t[inicio:], p[inicio:]
+        return t, p
+
+
+class GraficoPrecios(tk.Frame):
+    """
+    Canvas con la serie del símbolo elegido y sus órdenes. agregar() y marcar()
+    se pueden llamar desde cualquier hilo; el dibujo corre en el hilo de Tk a
+    FPS_GRAFICO como mucho y solo si hubo datos nuevos o cambió el tamaño
+    """
+
+    def __init__(self, master, simbolos, capacidad=CAPACIDAD, ventana=None, fps=FPS_GRAFICO,
+                 ancho=640, alto=240, **kwargs):
+        super().__init__(master, **kwargs)
+        self.simbolos = list(simbolos)
+        self.ventana = ventana              # segundos visibles; None = todo el historial
+        self.intervalo_ms = max(1, round(1000 / fps))
+        self.anillos = {s: AnilloPrecios(capacidad) for s in self.simbolos}
+        self.marcas = {s: deque(maxlen=MAX_MARCAS) for s in self.simbolos}
+        self._lock_marcas = threading.Lock()
+        self._dibujado = None               # (símbolo, total de puntos, nº de marcas, ancho, alto)
+        self.ultimo_coste = 0.0             # segundos del último redibujado
+        self.redibujados = 0
+
+        barra = tk.Frame(self)
+        barra.pack(fill=tk.X)
+        self.simbolo = tk.StringVar(value=self.simbolos[0])
+        tk.OptionMenu(barra, self.simbolo, *self.simbolos).pack(side=tk.LEFT)
+        self._rango = tk.Label(barra, text="Sin datos", font=("Arial", 10))
+        self._rango.pack(side=tk.LEFT, padx=8)
+
+        self.canvas = tk.Canvas(self, width=ancho, height=alto, bg="white", highlightthickness=0)
+        self.canvas.pack(fill=tk.BOTH, expand=True)
+        self._linea = self.canvas.create_line(0, 0, 0, 0, fill=COLOR_LINEA, width=1.5)
+        self._maximo = self.canvas.create_text(MARGEN, MARGEN, anchor="nw", font=("Courier", 9))
+        self._minimo = self.canvas.create_text(MARGEN, alto - MARGEN, anchor="sw", font=("Courier", 9))
+        self.after(self.intervalo_ms, self._redibujar)
+
+    # --- Datos (cualquier hilo) ---
+
+    def agregar(self, symbol, precio, ts=None):
+        anillo = self.anillos.get(symbol)
+        if anillo is not None:
+            anillo.agregar(precio, ts)
+
+    def marcar(self, symbol, lado, precio, ts=None):
+        """Marca una orden ejecutada ("BUY"/"SELL") en el gráfico del símbolo"""
+        if symbol in self.marcas:
+            with self._lock_marcas:
+                self.marcas[symbol].append((time.time() if ts is None else ts, lado, precio))
+
+    # --- Dibujo (hilo de Tk) ---
+
+    def _redibujar(self):
+        try:
+            symbol = self.simbolo.get()
+            ancho, alto = self.canvas.winfo_width(), self.canvas.winfo_height()
+            estado = (symbol, self.anillos[symbol].total, len(self.marcas[symbol]), ancho, alto)
+            if estado != self._dibujado and ancho > 2 * MARGEN and alto > 2 * MARGEN:
+                self._dibujado = estado
+                self._dibujar(symbol, ancho, alto)
+        finally:
+            self.after(self.intervalo_ms, self._redibujar)
+
+    def _dibujar(self, symbol, ancho, alto):
+        inicio = time.perf_counter()
+        self.canvas.delete("marca")
+        desde = time.time() - self.ventana if self.ventana else None
+        t, p = self.anillos[symbol].serie(desde)
+        if len(t) < 2:
+            self.canvas.coords(self._linea, 0, 0, 0, 0)
+            self._rango.config(text="Sin datos" if not len(t) else f"{symbol}: {p[-1]:.8g}")
+            return
+
+        indices = lttb(t, p, ancho - 2 * MARGEN)
+        t_min, t_max = t[0], t[-1]
+        p_min, p_max = float(p.min()), float(p.max())
+        escala_t = (ancho - 2 * MARGEN) / ((t_max - t_min) or 1.0)
+        escala_p = (alto - 2 * MARGEN) / ((p_max - p_min) or 1.0)
+        xs = MARGEN + (t[indices] - t_min) * escala_t
+        ys = alto - MARGEN - (p[indices] - p_min) * escala_p
+        coordenadas = np.empty(2 * len(indices))
+        coordenadas[0::2], coordenadas[1::2] = xs, ys
+        self.canvas.coords(self._linea, *coordenadas.tolist())
+
+        with self._lock_marcas:
+            marcas = [m for m in self.marcas[symbol] if m[0] >= t_min]
+        for ts, lado, precio in marcas:
+            x = MARGEN + (ts - t_min) * escala_t
+            y = alto - MARGEN - (min(max(precio, p_min), p_max) - p_min) * escala_p
+            if lado == "BUY":
+                puntos, color = (x, y - 7, x - 6, y + 5, x + 6, y + 5), COLOR_COMPRA
+            else:
+                puntos, color = (x, y + 7, x - 6, y - 5, x + 6, y - 5), COLOR_VENTA
+            self.canvas.create_polygon(*puntos, fill=color, outline="", tags="marca")
+
+        self.canvas.coords(self._minimo, MARGEN, alto - MARGEN)
+        self.canvas.itemconfig(self._maximo, text=f"{p_max:.8g}")
+        self.canvas.itemconfig(self._minimo, text=f"{p_min:.8g}")
+        horas = (t_max - t_min) / 3600
+        self._rango.config(text=f"{symbol}: {p[-1]:.8g} · {len(t):,} puntos en {horas:.1f} h → {len(indices)} dibujados")
+        self.ultimo_coste = time.perf_counter() - inicio
+        self.redibujados += 1
@@ -1,18 +1,16 @@
+import os
 import sys
-import requests
+
+from salud import sondear
 
 def main():
-    # Simple ping a la API pública de Binance
-    try:
-        r = requests.get("https://api.binance.com/api/v3/ping", timeout=8)
-        if r.status_code == 200:
-            sys.exit(0)
-        else:
-            print(f"Healthcheck Binance falló: status={r.status_code}")
-            sys.exit(1)
-    except Exception as e:
-        print(f"Healthcheck Binance error: {e}")
+    # Última petición correcta a Binance según el gobernador del bot (solo se vigila con sesiones en marcha)
+    puerto = os.getenv("METRICAS_PUERTO", "9108")
+    ok, detalle = sondear(f"http://127.0.0.1:{puerto}/health?componente=binance")
+    if not ok:
+        print(f"Healthcheck Binance falló: {detalle[:500]}")
         sys.exit(1)
+    sys.exit(0)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
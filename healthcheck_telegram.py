@@ -1,23 +1,16 @@
 import os
 import sys
-import requests
 
-def main():
-    token = os.getenv("TELEGRAM_TOKEN")
-    if not token:
-        print("TELEGRAM_TOKEN no configurado")
-        sys.exit(1)
+from salud import sondear
 
-    try:
-        r = requests.get(f"https://api.telegram.org/bot{token}/getMe", timeout=8)
-        if r.status_code == 200 and r.json().get("ok"):
-            sys.exit(0)
-        else:
-            print(f"Healthcheck Telegram falló: status={r.status_code}, body={r.text[:200]}")
-            sys.exit(1)
-    except Exception as e:
-        print(f"Healthcheck Telegram error: {e}")
+def main():
+    # Salud que el propio bot calcula con los latidos de sus bucles (loop, polling, sesiones)
+    puerto = os.getenv("METRICAS_PUERTO", "9108")
+    ok, detalle = sondear(f"http://127.0.0.1:{puerto}/health")
+    if not ok:
+        print(f"Healthcheck del bot falló: {detalle[:500]}")
         sys.exit(1)
+    sys.exit(0)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
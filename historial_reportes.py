@@ -0,0 +1,185 @@
+"""
+Historial de reportes por usuario para /report y /status de bot_telegram.py.
+
+Cada usuario tiene un buffer circular en memoria (deque con maxlen: añadir es
+O(1) y lo más viejo se cae solo) respaldado por un archivo JSONL en disco al
+que solo se añaden líneas. El historial de un usuario se carga la primera vez
+que se consulta o se escribe, leyendo únicamente las últimas `capacidad`
+líneas desde el final del archivo; cuando el archivo dobla la capacidad se
+reescribe con lo que hay en memoria.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+
+CAPACIDAD = 1000          # reportes por usuario en memoria y tras compactar el archivo
+TAMANO_PAGINA = 10
+RESULTADOS = ("ok", "error", "saldo")
+_BLOQUE_LECTURA = 64 * 1024
+
+
+@dataclass(frozen=True)
+class Reporte:
+    ts: float
+    par: str
+    resultado: str        # "ok", "error" o "saldo"
+    texto: str
+
+    def json(self):
+        return json.dumps({"ts": self.ts, "par": self.par, "resultado": self.resultado, "texto": self.texto},
+                          ensure_ascii=False)
+
+    def linea(self):
+        return f"{time.strftime('%d/%m %H:%M:%S', time.localtime(self.ts))} - {self.texto}"
+
+
+def _ultimas_lineas(ruta, n):
+    """Las últimas `n` líneas del archivo, leyendo bloques desde el final"""
+    try:
+        archivo = open(ruta, "rb")
+    except FileNotFoundError:
+        return []
+    with archivo:
+        archivo.seek(0, os.SEEK_END)
+        posicion = archivo.tell()
+        datos = b""
+        while posicion > 0 and datos.count(b"\n") <= n:
+            leer = min(_BLOQUE_LECTURA, posicion)
+            posicion -= leer
+            archivo.seek(posicion)
+            datos = archivo.read(leer) + datos
+    return [linea.decode("utf-8") for linea in datos.splitlines()[-n:] if linea.strip()]
+
+
+class HistorialUsuario:
+    """Buffer circular de reportes de un usuario con su archivo JSONL"""
+
+    def __init__(self, ruta, capacidad=CAPACIDAD):
+        self.ruta = ruta
+        self.capacidad = capacidad
+        self._reportes = deque(maxlen=capacidad)
+        for linea in _ultimas_lineas(ruta, capacidad):
+            try:
+                self._reportes.append(Reporte(**json.loads(linea)))
+            except (ValueError, TypeError):
+                continue   # línea a medias de una caída: se ignora
+        self._lineas = len(self._reportes)
+        self._archivo = None
+        self._lock = threading.Lock()
+
+    def agregar(self, par, resultado, texto, ts=None):
+        reporte = Reporte(ts or time.time(), par, resultado, texto)
+        with self._lock:
+            self._reportes.append(reporte)
+            if self._archivo is None:
+                self._archivo = open(self.ruta, "a", encoding="utf-8")
+            self._archivo.write(reporte.json() + "\n")
+            self._archivo.flush()
+            self._lineas += 1
+            if self._lineas >= 2 * self.capacidad:
+                self._compactar()
+        return reporte
+
+    def _compactar(self):
+        # Se copian las últimas líneas tal cual, sin volver a serializar
+        self._archivo.close()
+        temporal = f"{self.ruta}.tmp"
+        with open(temporal, "w", encoding="utf-8") as archivo:
+            archivo.writelines(linea + "\n" for linea in _ultimas_lineas(self.ruta, self.capacidad))
+        os.replace(temporal, self.ruta)
+        self._archivo = open(self.ruta, "a", encoding="utf-8")
+        self._lineas = len(self._reportes)
+
+    def __len__(self):
+        return len(self._reportes)
+
+    def ultimo(self):
+        return self._reportes[-1] if self._reportes else None
+
+    def filtrar(self, par=None, resultado=None):
+        """Reportes del más nuevo al más viejo que cumplen los filtros (generador perezoso)"""
+        for reporte in reversed(self._reportes):
+            if (par is None or reporte.par == par) and (resultado is None or reporte.resultado == resultado):
+                yield reporte
+
+    def ultimos(self, n, par=None, resultado=None):
+        if par is None and resultado is None:
+            # Sin filtros basta recorrer los n últimos, sin copiar el buffer
+            return [self._reportes[-1 - i] for i in range(min(n, len(self._reportes)))]
+        seleccion = []
+        for reporte in self.filtrar(par, resultado):
+            seleccion.append(reporte)
+            if len(seleccion) == n:
+                break
+        return seleccion
+
+    def pagina(self, numero=1, tamano=TAMANO_PAGINA, par=None, resultado=None):
+        """(reportes de la página, total de páginas); la página 1 es la más reciente"""
+        if par is None and resultado is None:
+            total = len(self._reportes)
+            inicio = (numero - 1) * tamano
+            reportes = [self._reportes[-1 - i] for i in range(inicio, min(inicio + tamano, total))]
+        else:
+            coincidencias = list(self.filtrar(par, resultado))
+            total = len(coincidencias)
+            reportes = coincidencias[(numero - 1) * tamano:numero * tamano]
+        return reportes, max(1, -(-total // tamano))
+
+    def cerrar(self):
+        with self._lock:
+            if self._archivo is not None:
+                self._archivo.close()
+                self._archivo = None
+
+
+class HistorialReportes:
+    """Historiales de todos los usuarios; cada uno se carga de disco al usarse por primera vez"""
+
+    def __init__(self, directorio, capacidad=CAPACIDAD):
+        self.directorio = directorio
+        self.capacidad = capacidad
+        self._usuarios = {}
+        self._lock = threading.Lock()
+        os.makedirs(directorio, exist_ok=True)
+
+    def de(self, user_id):
+        historial = self._usuarios.get(user_id)
+        if historial is None:
+            with self._lock:
+                historial = self._usuarios.get(user_id)
+                if historial is None:
+                    ruta = os.path.join(self.directorio, f"{user_id}.jsonl")
+                    historial = self._usuarios[user_id] = HistorialUsuario(ruta, self.capacidad)
+        return historial
+
+    def agregar(self, user_id, par, resultado, texto):
+        return self.de(user_id).agregar(par, resultado, texto)
+
+    def cerrar(self):
+        with self._lock:
+            for historial in self._usuarios.values():
+                historial.cerrar()
+
+
+def interpretar_argumentos(args):
+    """
+    Argumentos de /report: `50` (los últimos 50), `page 3` / `pagina 3`,
+    un resultado (ok, error, saldo) y/o un par, en cualquier orden.
+    Devuelve dict con cantidad, pagina, par y resultado.
+    """
+    consulta = {"cantidad": None, "pagina": 1, "par": None, "resultado": None}
+    args = list(args)
+    while args:
+        arg = args.pop(0).lower()
+        if arg in ("page", "pagina", "página") and args and args[0].isdigit():
+            consulta["pagina"] = max(1, int(args.pop(0)))
+        elif arg.isdigit():
+            consulta["cantidad"] = max(1, int(arg))
+        elif arg in RESULTADOS:
+            consulta["resultado"] = arg
+        else:
+            consulta["par"] = arg.upper()
+    return consulta
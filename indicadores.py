@@ -0,0 +1,365 @@
+"""
+Indicadores técnicos: EMA, SMA, RSI, ATR, bandas de Bollinger y VWAP.
+
+Cada indicador tiene dos formas que dan el mismo resultado (salvo redondeo):
+
+- Por lotes (funciones ema, sma, rsi, ...): NumPy sobre el último eje, para
+  el historial. Aceptan una serie (T,) o una matriz símbolos × tiempo (S, T) y
+  devuelven NaN en las velas de calentamiento.
+- Incremental (clases EMA, SMA, RSI, ...): O(1) por tick para S símbolos a la
+  vez, con anillos y buffers reservados al crear el objeto; actualizar() no
+  reserva memoria y devuelve el mismo array cada vez (sobrescrito en el tick
+  siguiente: copiarlo si hay que guardarlo). Todos los símbolos avanzan juntos,
+  un valor por símbolo y llamada (una vela cerrada, un !miniTicker@arr...).
+
+EMA, RSI y ATR arrancan con la media simple de los primeros `periodo` valores;
+RSI y ATR usan el suavizado de Wilder (alfa = 1/periodo). Bollinger usa la
+desviación típica poblacional, como es habitual.
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+BLOQUE = 128     # elementos por bloque en la recurrencia por lotes
+
+
+# --- Por lotes ---
+
+def _recurrencia(u, f, y0):
+    """
+    y[t] = f*y[t-1] + u[t] sobre el último eje, con y[-1] = y0.
+    Se resuelve por bloques con un producto de matrices (potencias de f) y la
+    entrada de cada bloque se obtiene aplicando la misma recurrencia a los
+    finales de bloque con factor f**BLOQUE, sin bucles en Python.
+    """
+    n = u.shape[-1]
+    b = min(BLOQUE, n)
+    nb = -(-n // b)
+    relleno = [(0, 0)] * (u.ndim - 1) + [(0, nb * b - n)]
+    bloques = np.pad(u, relleno).reshape(u.shape[:-1] + (nb, b))
+    k = np.arange(b)
+    potencias = np.tril(f ** np.maximum(k[:, None] - k[None, :], 0))
+    local = bloques @ potencias.T                 # cada bloque partiendo de 0
+    y0 = np.broadcast_to(np.asarray(y0, dtype=np.float64), u.shape[:-1])
+    if nb > 1:
+        finales = _recurrencia(local[..., :-1, -1], f ** b, y0)
+        entrada = np.concatenate([y0[..., None], finales], axis=-1)
+    else:
+        entrada = y0[..., None]
+    y = local + entrada[..., None] * f ** (k + 1)
+    return y.reshape(u.shape[:-1] + (nb * b,))[..., :n]
+
+
+def ema(x, periodo, alfa=None):
+    """Media móvil exponencial (alfa = 2/(periodo+1) por defecto), sembrada con la SMA inicial"""
+    x = np.asarray(x, dtype=np.float64)
+    alfa = 2 / (periodo + 1) if alfa is None else alfa
+    y = np.full(x.shape, np.nan)
+    if x.shape[-1] < periodo:
+        return y
+    semilla = x[..., :periodo].mean(axis=-1)
+    y[..., periodo - 1] = semilla
+    if x.shape[-1] > periodo:
+        y[..., periodo:] = _recurrencia(alfa * x[..., periodo:], 1 - alfa, semilla)
+    return y
+
+
+def sma(x, periodo):
+    """Media móvil simple"""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.full(x.shape, np.nan)
+    if x.shape[-1] >= periodo:
+        y[..., periodo - 1:] = sliding_window_view(x, periodo, axis=-1).mean(axis=-1)
+    return y
+
+
+def _rsi_de(media_ganancia, media_perdida):
+    total = media_ganancia + media_perdida
+    # Sin movimiento en toda la ventana: 50 (neutral)
+    return np.divide(100 * media_ganancia, total, out=np.full(total.shape, 50.0), where=total > 0)
+
+
+def rsi(cierre, periodo=14):
+    """RSI de Wilder; el primer valor válido está en el índice `periodo`"""
+    cierre = np.asarray(cierre, dtype=np.float64)
+    y = np.full(cierre.shape, np.nan)
+    if cierre.shape[-1] <= periodo:
+        return y
+    delta = np.diff(cierre, axis=-1)
+    ganancia = ema(np.maximum(delta, 0), periodo, alfa=1 / periodo)
+    perdida = ema(np.maximum(-delta, 0), periodo, alfa=1 / periodo)
+    y[..., periodo:] = _rsi_de(ganancia[..., periodo - 1:], perdida[..., periodo - 1:])
+    return y
+
+
+def rango_verdadero(maximo, minimo, cierre):
+    """True range; en la primera vela, maximo - minimo"""
+    maximo, minimo, cierre = (np.asarray(a, dtype=np.float64) for a in (maximo, minimo, cierre))
+    rango = maximo - minimo
+    anterior = cierre[..., :-1]
+    rango[..., 1:] = np.maximum(rango[..., 1:], np.maximum(np.abs(maximo[..., 1:] - anterior),
+                                                           np.abs(minimo[..., 1:] - anterior)))
+    return rango
+
+
+def atr(maximo, minimo, cierre, periodo=14):
+    """Average true range de Wilder"""
+    return ema(rango_verdadero(maximo, minimo, cierre), periodo, alfa=1 / periodo)
+
+
+def bollinger(x, periodo=20, desviaciones=2.0):
+    """(media, banda superior, banda inferior)"""
+    x = np.asarray(x, dtype=np.float64)
+    media = np.full(x.shape, np.nan)
+    desviacion = np.full(x.shape, np.nan)
+    if x.shape[-1] >= periodo:
+        ventanas = sliding_window_view(x, periodo, axis=-1)
+        media[..., periodo - 1:] = ventanas.mean(axis=-1)
+        desviacion[..., periodo - 1:] = ventanas.std(axis=-1)
+    return media, media + desviaciones * desviacion, media - desviaciones * desviacion
+
+
+def precio_tipico(maximo, minimo, cierre):
+    return (np.asarray(maximo, dtype=np.float64) + minimo + cierre) / 3
+
+
+def vwap(precio, volumen, periodo=None):
+    """
+    Precio medio ponderado por volumen de `precio` (precio_tipico de las velas
+    o el precio de cada trade): acumulado desde el principio o, con `periodo`,
+    de las últimas `periodo` entradas. NaN mientras el volumen sea 0.
+    """
+    precio = np.asarray(precio, dtype=np.float64)
+    volumen = np.asarray(volumen, dtype=np.float64)
+    nominal = precio * volumen
+    if periodo is None:
+        suma_nominal, suma_volumen = np.cumsum(nominal, axis=-1), np.cumsum(volumen, axis=-1)
+    else:
+        suma_nominal, suma_volumen = np.full(precio.shape, np.nan), np.full(precio.shape, np.nan)
+        if precio.shape[-1] >= periodo:
+            suma_nominal[..., periodo - 1:] = sliding_window_view(nominal, periodo, axis=-1).sum(axis=-1)
+            suma_volumen[..., periodo - 1:] = sliding_window_view(volumen, periodo, axis=-1).sum(axis=-1)
+    return np.divide(suma_nominal, suma_volumen, out=np.full(precio.shape, np.nan), where=suma_volumen > 0)
+
+
+# --- Incrementales ---
+
+class _Incremental:
+    """Estado común: número de ticks vistos y valor actual por símbolo"""
+
+    def __init__(self, periodo, simbolos=1):
+        self.periodo = periodo
+        self.simbolos = simbolos
+        self.ticks = 0
+        self.valor = np.full(simbolos, np.nan)
+
+    def listo(self):
+        """True cuando ya pasó el calentamiento y `valor` es válido"""
+        return self.ticks >= self.periodo
+
+    def cargar(self, *historial):
+        """Procesa un historial (S, T) o (T,) tick a tick; deja el estado listo para seguir en vivo"""
+        columnas = [np.asarray(h, dtype=np.float64).reshape(-1, np.shape(h)[-1]) for h in historial]
+        for t in range(columnas[0].shape[-1]):
+            self.actualizar(*(c[:, t] for c in columnas))
+        return self.valor
+
+
+class EMA(_Incremental):
+    def __init__(self, periodo, simbolos=1, alfa=None):
+        super().__init__(periodo, simbolos)
+        self.alfa = 2 / (periodo + 1) if alfa is None else alfa
+        self._suma = np.zeros(simbolos)
+        self._tmp = np.empty(simbolos)
+
+    def actualizar(self, x):
+        self.ticks += 1
+        if self.ticks < self.periodo:
+            np.add(self._suma, x, out=self._suma)
+        elif self.ticks == self.periodo:
+            np.add(self._suma, x, out=self._suma)
+            np.divide(self._suma, self.periodo, out=self.valor)
+        else:
+            np.multiply(x, self.alfa, out=self._tmp)
+            self.valor *= 1 - self.alfa
+            self.valor += self._tmp
+        return self.valor
+
+
+class SMA(_Incremental):
+    """Suma deslizante sobre un anillo (periodo, S); la suma se recalcula en cada vuelta para no acumular error"""
+
+    def __init__(self, periodo, simbolos=1):
+        super().__init__(periodo, simbolos)
+        self._anillo = np.zeros((periodo, simbolos))
+        self._pos = 0
+        self._suma = np.zeros(simbolos)
+
+    def actualizar(self, x):
+        self.ticks += 1
+        hueco = self._anillo[self._pos]
+        self._suma -= hueco
+        self._suma += x
+        hueco[:] = x
+        self._pos = (self._pos + 1) % self.periodo
+        if self._pos == 0:
+            np.sum(self._anillo, axis=0, out=self._suma)
+        if self.ticks >= self.periodo:
+            np.divide(self._suma, self.periodo, out=self.valor)
+        return self.valor
+
+
+class RSI(_Incremental):
+    def __init__(self, periodo=14, simbolos=1):
+        super().__init__(periodo, simbolos)
+        self._anterior = np.empty(simbolos)
+        self._delta = np.empty(simbolos)
+        self._movimiento = np.empty(simbolos)
+        self._total = np.empty(simbolos)
+        self._movido = np.empty(simbolos, dtype=bool)
+        self._ganancia = EMA(periodo, simbolos, alfa=1 / periodo)
+        self._perdida = EMA(periodo, simbolos, alfa=1 / periodo)
+
+    def listo(self):
+        return self.ticks > self.periodo
+
+    def actualizar(self, cierre):
+        self.ticks += 1
+        if self.ticks > 1:
+            np.subtract(cierre, self._anterior, out=self._delta)
+            ganancia = self._ganancia.actualizar(np.maximum(self._delta, 0, out=self._movimiento))
+            np.negative(self._delta, out=self._delta)
+            perdida = self._perdida.actualizar(np.maximum(self._delta, 0, out=self._movimiento))
+            if self.ticks > self.periodo:
+                np.add(ganancia, perdida, out=self._total)
+                np.multiply(ganancia, 100, out=self.valor)
+                np.greater(self._total, 0, out=self._movido)
+                np.divide(self.valor, self._total, out=self.valor, where=self._movido)
+                np.logical_not(self._movido, out=self._movido)
+                np.copyto(self.valor, 50.0, where=self._movido)
+        self._anterior[:] = cierre
+        return self.valor
+
+
+class ATR(_Incremental):
+    def __init__(self, periodo=14, simbolos=1):
+        super().__init__(periodo, simbolos)
+        self._anterior = np.empty(simbolos)
+        self._rango = np.empty(simbolos)
+        self._tmp = np.empty(simbolos)
+        self._media = EMA(periodo, simbolos, alfa=1 / periodo)
+
+    def actualizar(self, maximo, minimo, cierre):
+        self.ticks += 1
+        np.subtract(maximo, minimo, out=self._rango)
+        if self.ticks > 1:
+            np.subtract(maximo, self._anterior, out=self._tmp)
+            np.abs(self._tmp, out=self._tmp)
+            np.maximum(self._rango, self._tmp, out=self._rango)
+            np.subtract(minimo, self._anterior, out=self._tmp)
+            np.abs(self._tmp, out=self._tmp)
+            np.maximum(self._rango, self._tmp, out=self._rango)
+        self._anterior[:] = cierre
+        self.valor[:] = self._media.actualizar(self._rango)
+        return self.valor
+
+
+class Bollinger(_Incremental):
+    """
+    Media y varianza deslizantes (Welford) sobre un anillo; en cada vuelta del
+    anillo se recalculan exactas. `valor` es la media; actualizar() devuelve
+    (media, superior, inferior).
+    """
+
+    def __init__(self, periodo=20, simbolos=1, desviaciones=2.0):
+        super().__init__(periodo, simbolos)
+        self.desviaciones = desviaciones
+        self._anillo = np.zeros((periodo, simbolos))
+        self._pos = 0
+        self._m2 = np.zeros(simbolos)
+        self._media = np.zeros(simbolos)
+        self._delta = np.empty(simbolos)
+        self._tmp = np.empty(simbolos)
+        self._paso = np.empty(simbolos)
+        self.desviacion = np.full(simbolos, np.nan)
+        self.superior = np.full(simbolos, np.nan)
+        self.inferior = np.full(simbolos, np.nan)
+
+    def actualizar(self, x):
+        self.ticks += 1
+        hueco = self._anillo[self._pos]
+        if self.ticks <= self.periodo:
+            # Calentamiento: Welford añadiendo
+            np.subtract(x, self._media, out=self._delta)
+            np.multiply(self._delta, 1 / self.ticks, out=self._tmp)
+            self._media += self._tmp
+            np.subtract(x, self._media, out=self._tmp)
+            self._tmp *= self._delta
+            self._m2 += self._tmp
+        else:
+            # Sale `hueco`, entra x
+            np.subtract(x, hueco, out=self._delta)
+            np.add(x, hueco, out=self._tmp)
+            self._tmp -= self._media
+            np.multiply(self._delta, 1 / self.periodo, out=self._paso)
+            self._media += self._paso
+            self._tmp -= self._media
+            self._tmp *= self._delta
+            self._m2 += self._tmp
+        hueco[:] = x
+        self._pos = (self._pos + 1) % self.periodo
+        if self._pos == 0:
+            np.sum(self._anillo, axis=0, out=self._media)
+            self._media /= self.periodo
+            # Fila a fila: restar con broadcasting reservaría un buffer interno
+            self._m2.fill(0.0)
+            for fila in self._anillo:
+                np.subtract(fila, self._media, out=self._tmp)
+                self._tmp *= self._tmp
+                self._m2 += self._tmp
+        if self.ticks >= self.periodo:
+            np.maximum(self._m2, 0, out=self.desviacion)
+            self.desviacion /= self.periodo
+            np.sqrt(self.desviacion, out=self.desviacion)
+            self.valor[:] = self._media
+            np.multiply(self.desviacion, self.desviaciones, out=self._tmp)
+            np.add(self._media, self._tmp, out=self.superior)
+            np.subtract(self._media, self._tmp, out=self.inferior)
+        return self.valor, self.superior, self.inferior
+
+
+class VWAP(_Incremental):
+    """VWAP acumulado (periodo=None) o de las últimas `periodo` entradas con un anillo"""
+
+    def __init__(self, periodo=None, simbolos=1):
+        super().__init__(periodo or 1, simbolos)
+        self.ventana = periodo
+        self._nominal = np.empty(simbolos)
+        self._suma_nominal = np.zeros(simbolos)
+        self._suma_volumen = np.zeros(simbolos)
+        self._con_volumen = np.empty(simbolos, dtype=bool)
+        if periodo:
+            self._anillo_nominal = np.zeros((periodo, simbolos))
+            self._anillo_volumen = np.zeros((periodo, simbolos))
+            self._pos = 0
+
+    def actualizar(self, precio, volumen):
+        self.ticks += 1
+        np.multiply(precio, volumen, out=self._nominal)
+        self._suma_nominal += self._nominal
+        self._suma_volumen += volumen
+        if self.ventana:
+            hueco_nominal = self._anillo_nominal[self._pos]
+            hueco_volumen = self._anillo_volumen[self._pos]
+            self._suma_nominal -= hueco_nominal
+            self._suma_volumen -= hueco_volumen
+            hueco_nominal[:] = self._nominal
+            hueco_volumen[:] = volumen
+            self._pos = (self._pos + 1) % self.ventana
+            if self._pos == 0:
+                np.sum(self._anillo_nominal, axis=0, out=self._suma_nominal)
+                np.sum(self._anillo_volumen, axis=0, out=self._suma_volumen)
+        if self.ticks >= self.periodo:
+            self.valor.fill(np.nan)
+            np.greater(self._suma_volumen, 0, out=self._con_volumen)
+            np.divide(self._suma_nominal, self._suma_volumen, out=self.valor, where=self._con_volumen)
+        return self.valor
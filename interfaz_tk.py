@@ -0,0 +1,182 @@
+"""
+Piezas para que la ventana de main.py no se congele nunca.
+
+Tk solo admite llamadas desde el hilo que creó la ventana, y cualquier espera
+en ese hilo (una petición a Binance, un sleep) congela la interfaz. Por eso:
+
+- Trabajador: hilo de fondo con su cola de tareas; la red y el disco van ahí.
+- ColaInterfaz: cola segura entre hilos de llamadas a widgets, que el hilo de
+  Tk vacía con root.after en tandas de como mucho PRESUPUESTO_DRENADO segundos.
+- PanelSaldos: tabla de activos cuyos datos se publican desde cualquier hilo;
+  solo se guarda el último snapshot y se redibuja como mucho FPS_PANEL veces
+  por segundo, tocando únicamente las celdas cuyo texto cambió.
+"""
+import logging
+import queue
+import threading
+import time
+import tkinter as tk
+
+logger = logging.getLogger(__name__)
+
+INTERVALO_DRENADO_MS = 16      # cada cuánto vacía Tk la cola de llamadas (~60 por segundo)
+PRESUPUESTO_DRENADO = 0.008    # segundos máximos por tanda, para no retrasar los eventos de la ventana
+FPS_PANEL = 10                 # redibujados por segundo como máximo del panel en vivo
+
+
+class ColaInterfaz:
+    """Llamadas a widgets encoladas desde cualquier hilo y ejecutadas en el hilo de Tk"""
+
+    def __init__(self, root, intervalo_ms=INTERVALO_DRENADO_MS, presupuesto=PRESUPUESTO_DRENADO):
+        self.root = root
+        self.intervalo_ms = intervalo_ms
+        self.presupuesto = presupuesto
+        self._cola = queue.SimpleQueue()
+        self.ejecutadas = 0
+
+    def llamar(self, funcion, *args, **kwargs):
+        """Programa funcion(*args, **kwargs) en el hilo de Tk; se puede llamar desde cualquier hilo"""
+        self._cola.put((funcion, args, kwargs))
+
+    def pendientes(self):
+        return self._cola.qsize()
+
+    def iniciar(self):
+        self.root.after(self.intervalo_ms, self._drenar)
+        return self
+
+    def _drenar(self):
+        limite = time.perf_counter() + self.presupuesto
+        while time.perf_counter() < limite:
+            try:
+                funcion, args, kwargs = self._cola.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                funcion(*args, **kwargs)
+            except Exception:
+                logger.exception("Error actualizando la interfaz")
+            self.ejecutadas += 1
+        self.root.after(self.intervalo_ms, self._drenar)
+
+
+class Trabajador:
+    """
+    Hilo de fondo que ejecuta las tareas en orden. al_terminar(resultado) y
+    al_fallar(excepción) se ejecutan en el hilo de Tk a través de la ColaInterfaz
+    """
+
+    def __init__(self, interfaz, nombre="trabajador-gui"):
+        self.interfaz = interfaz
+        self._tareas = queue.SimpleQueue()
+        self._en_curso = 0
+        self._lock = threading.Lock()
+        self._parada = threading.Event()
+        self._hilo = threading.Thread(target=self._ejecutar, name=nombre, daemon=True)
+        self._hilo.start()
+
+    @property
+    def ocupado(self):
+        """True si hay tareas en cola o ejecutándose"""
+        return self._en_curso > 0
+
+    def enviar(self, funcion, *args, al_terminar=None, al_fallar=None):
+        with self._lock:
+            self._en_curso += 1
+        self._tareas.put((funcion, args, al_terminar, al_fallar))
+
+    def cada(self, intervalo, funcion, al_terminar=None):
+        """
+        Repite funcion cada `intervalo` segundos mientras el trabajador viva; si
+        la vuelta anterior sigue en curso (red lenta) se salta, no se acumula
+        """
+        def programar():
+            while not self._parada.wait(intervalo):
+                if not self.ocupado:
+                    self.enviar(funcion, al_terminar=al_terminar)
+
+        threading.Thread(target=programar, name=f"{self._hilo.name}-cada", daemon=True).start()
+        self.enviar(funcion, al_terminar=al_terminar)
+
+    def detener(self, timeout=2):
+        self._parada.set()
+        self._tareas.put(None)
+        self._hilo.join(timeout)
+
+    def _ejecutar(self):
+        while True:
+            tarea = self._tareas.get()
+            if tarea is None:
+                return
+            funcion, args, al_terminar, al_fallar = tarea
+            try:
+                resultado = funcion(*args)
+            except Exception as e:
+                logger.exception("Error en tarea de fondo %s", getattr(funcion, "__name__", funcion))
+                if al_fallar is not None:
+                    self.interfaz.llamar(al_fallar, e)
+            else:
+                if al_terminar is not None:
+                    self.interfaz.llamar(al_terminar, resultado)
+            finally:
+                with self._lock:
+                    self._en_curso -= 1
+
+
+class PanelSaldos(tk.Frame):
+    """
+    Saldo, precio y valor por activo. publicar() se llama desde el hilo que lee
+    los datos; el redibujado corre en el hilo de Tk a FPS_PANEL como mucho
+    """
+
+    COLUMNAS = ("Activo", "Libre", "Precio USDT", "Valor USDT")
+
+    def __init__(self, master, activos, fps=FPS_PANEL, **kwargs):
+        super().__init__(master, **kwargs)
+        self.activos = list(activos)
+        self.intervalo_ms = max(1, round(1000 / fps))
+        self._ultimo = None                 # (filas, pie) pendientes de dibujar
+        self._lock = threading.Lock()
+        self._textos = {}                   # (fila, columna) -> texto mostrado
+        self.redibujados = 0
+
+        for j, titulo in enumerate(self.COLUMNAS):
+            tk.Label(self, text=titulo, font=("Arial", 11, "bold")).grid(row=0, column=j, padx=8, sticky="e" if j else "w")
+        self._celdas = []
+        for i, activo in enumerate(self.activos, start=1):
+            fila = [tk.Label(self, text=activo, font=("Arial", 11), anchor="w")]
+            fila += [tk.Label(self, text="—", font=("Courier", 11), anchor="e") for _ in self.COLUMNAS[1:]]
+            for j, celda in enumerate(fila):
+                celda.grid(row=i, column=j, padx=8, sticky="ew")
+            self._celdas.append(fila)
+        self._pie = tk.Label(self, text="Esperando datos...", font=("Arial", 10, "italic"))
+        self._pie.grid(row=len(self.activos) + 1, column=0, columnspan=len(self.COLUMNAS), pady=(4, 0))
+        self.after(self.intervalo_ms, self._redibujar)
+
+    def publicar(self, datos, pie=""):
+        """datos: activo -> (libre, precio o None); seguro desde cualquier hilo, se queda el último"""
+        filas = []
+        for activo in self.activos:
+            libre, precio = datos.get(activo, (0.0, None))
+            if precio is None:
+                filas.append((f"{libre:.8g}", "—", "—"))
+            else:
+                filas.append((f"{libre:.8g}", f"{precio:.8g}", f"{libre * precio:,.2f}"))
+        with self._lock:
+            self._ultimo = (filas, pie)
+
+    def _redibujar(self):
+        with self._lock:
+            pendiente, self._ultimo = self._ultimo, None
+        if pendiente is not None:
+            filas, pie = pendiente
+            for i, textos in enumerate(filas):
+                for j, texto in enumerate(textos, start=1):
+                    if self._textos.get((i, j)) != texto:
+                        self._textos[(i, j)] = texto
+                        self._celdas[i][j].config(text=texto)
+            if self._textos.get("pie") != pie:
+                self._textos["pie"] = pie
+                self._pie.config(text=pie)
+            self.redibujados += 1
+        self.after(self.intervalo_ms, self._redibujar)
@@ -0,0 +1,120 @@
+"""
+Libro de saldos compartido: una sola llamada a get_account llena los saldos
+de todos los activos, que se sirven desde memoria mientras no estén viejos.
+Las órdenes ejecutadas invalidan el libro para forzar la siguiente lectura.
+Cada invalidación sube una generación: una descarga que empezó antes de la
+orden no deja el libro como vigente con los saldos de antes.
+"""
+import threading
+import time
+
+
+class LibroSaldos:
+    """Saldos por activo de una cuenta, con ventana de antigüedad configurable"""
+
+    def __init__(self, client, max_antiguedad=2.0):
+        self._client = client
+        self.max_antiguedad = max_antiguedad
+        self._cuenta = None
+        self._saldos = {}          # asset -> (free, locked)
+        self._actualizado = 0.0
+        self._valido = False
+        self._generacion = 0       # sube en cada invalidar()
+        self._lock = threading.Lock()
+        self._lock_descarga = threading.Lock()
+
+    # --- Lecturas ---
+
+    def libre(self, asset):
+        """Saldo disponible del activo (0.0 si la cuenta no lo tiene)"""
+        self._asegurar_fresco()
+        return self._saldos.get(asset, (0.0, 0.0))[0]
+
+    def bloqueado(self, asset):
+        """Saldo bloqueado en órdenes abiertas"""
+        self._asegurar_fresco()
+        return self._saldos.get(asset, (0.0, 0.0))[1]
+
+    def saldos(self):
+        """Copia de todos los saldos: asset -> (free, locked)"""
+        self._asegurar_fresco()
+        with self._lock:
+            return dict(self._saldos)
+
+    def cuenta(self):
+        """Última respuesta completa de get_account (tipo de cuenta, comisiones...)"""
+        self._asegurar_fresco()
+        return self._cuenta
+
+    def edad(self):
+        return time.time() - self._actualizado
+
+    def vigente(self):
+        return self._valido and self.edad() <= self.max_antiguedad
+
+    # --- Variante asíncrona (client es un AsyncClient) ---
+
+    async def refrescar_async(self):
+        generacion = self._generacion
+        self.actualizar(await self._client.get_account(), generacion)
+
+    async def libre_async(self, asset):
+        for _ in range(2):
+            if self.vigente():
+                break
+            await self.refrescar_async()
+        return self._saldos.get(asset, (0.0, 0.0))[0]
+
+    async def saldos_async(self):
+        """Copia de todos los saldos sin pasar por la descarga síncrona de saldos()"""
+        for _ in range(2):
+            if self.vigente():
+                break
+            await self.refrescar_async()
+        with self._lock:
+            return dict(self._saldos)
+
+    # --- Escrituras ---
+
+    def invalidar(self):
+        """Marca el libro como viejo; llamar tras cada orden ejecutada"""
+        with self._lock:
+            self._generacion += 1
+            self._valido = False
+
+    def refrescar(self):
+        """Descarga la cuenta completa con una sola petición"""
+        generacion = self._generacion
+        self.actualizar(self._client.get_account(), generacion)
+
+    def actualizar(self, cuenta, generacion=None):
+        """
+        Carga los saldos desde una respuesta de get_account. Con `generacion`
+        (la leída antes de pedirla), si hubo un invalidar() entretanto los saldos
+        se guardan pero el libro sigue sin estar vigente
+        """
+        saldos = {
+            b['asset']: (float(b['free']), float(b['locked']))
+            for b in cuenta['balances']
+        }
+        with self._lock:
+            self._cuenta = cuenta
+            self._saldos = saldos
+            self._actualizado = time.time()
+            self._valido = generacion is None or generacion == self._generacion
+
+    def aplicar(self, asset, libre, bloqueado=0.0):
+        """Actualiza un solo activo a partir de un evento externo"""
+        with self._lock:
+            self._saldos[asset] = (float(libre), float(bloqueado))
+
+    def _asegurar_fresco(self):
+        if self.vigente():
+            return
+        # Solo un hilo descarga; el resto espera y reutiliza el resultado
+        with self._lock_descarga:
+            # Si una orden invalida el libro durante la descarga se repite (como mucho una vez más)
+            for _ in range(2):
+                if self.vigente():
+                    return
+                self.refrescar()
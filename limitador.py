@@ -0,0 +1,452 @@
+"""
+Gobernador del peso de la API REST de Binance.
+Todas las peticiones de los clientes envueltos pasan por cubetas de tokens
+(peso por minuto y peticiones crudas por IP, órdenes por cuenta), se encolan
+por prioridad (órdenes antes que datos de mercado) cuando no hay presupuesto y
+se autocorrigen con las cabeceras X-MBX-USED-WEIGHT-1M / X-MBX-ORDER-COUNT-*
+que devuelve el servidor. Un 429 bloquea a todos los clientes durante el
+Retry-After y la petición se reintenta; un 418 (IP baneada) se propaga.
+"""
+import asyncio
+import contextvars
+import heapq
+import inspect
+import itertools
+import logging
+import threading
+import time
+from urllib.parse import urlparse
+
+from binance.exceptions import BinanceAPIException
+
+from metricas import metricas_compartidas
+
+logger = logging.getLogger(__name__)
+
+# Prioridades: menor número, antes sale de la cola
+PRIORIDAD_ORDEN = 0
+PRIORIDAD_CUENTA = 1
+PRIORIDAD_MERCADO = 2
+
+# Límites publicados por Binance para spot (rateLimits de exchangeInfo)
+PESO_POR_MINUTO = 6000
+PETICIONES_POR_5MIN = 61000
+ORDENES_POR_10S = 100
+ORDENES_POR_DIA = 200000
+
+FRACCION_SEGURA = 0.9        # margen para otros procesos que comparten la IP
+RESERVA_ORDENES = 0.05       # fracción del peso que solo pueden gastar las órdenes
+MAX_REINTENTOS_429 = 3
+RETRY_AFTER_POR_DEFECTO = 60
+ESPERA_MAXIMA_SONDEO = 0.25
+
+# Respuesta HTTP de la última petición de este hilo o tarea asyncio: client.response es
+# compartido por todos los hilos y tareas que usan el cliente y puede ser de otra petición
+_RESPUESTA = contextvars.ContextVar("respuesta_binance", default=None)
+
+# Peso fijo por (método, ruta); las rutas con peso variable se resuelven en peso_peticion
+_PESOS = {
+    ("GET", "ping"): 1,
+    ("GET", "time"): 1,
+    ("GET", "exchangeInfo"): 20,
+    ("GET", "trades"): 25,
+    ("GET", "historicalTrades"): 25,
+    ("GET", "aggTrades"): 4,
+    ("GET", "klines"): 2,
+    ("GET", "uiKlines"): 2,
+    ("GET", "avgPrice"): 2,
+    ("GET", "account"): 20,
+    ("GET", "myTrades"): 20,
+    ("GET", "order"): 4,
+    ("GET", "allOrders"): 20,
+    ("GET", "openOrderList"): 6,
+    ("GET", "rateLimit/order"): 40,
+    ("POST", "order/test"): 1,
+    ("DELETE", "openOrders"): 1,
+}
+# Ruta de escritura -> órdenes que cuenta contra ORDER_COUNT
+_ORDENES = {
+    "order": 1,
+    "order/oco": 2,
+    "orderList/oco": 2,
+    "orderList/oto": 2,
+    "orderList/otoco": 3,
+    "order/cancelReplace": 1,
+}
+
+_metricas = metricas_compartidas()
+LATENCIA = _metricas.histograma("binance_peticion_segundos",
+                                "Duración de cada petición REST a Binance, sin la espera en el gobernador",
+                                ("metodo", "ruta"))
+PESO_CONSUMIDO = _metricas.contador("binance_peso", "Peso de la API descontado por las peticiones", ("ruta",))
+ERRORES = _metricas.contador("binance_errores", "Respuestas de error de Binance por código", ("ruta", "codigo"))
+
+
+def _peso_profundidad(limite):
+    limite = int(limite or 100)
+    if limite <= 100:
+        return 5
+    if limite <= 500:
+        return 25
+    if limite <= 1000:
+        return 50
+    return 250
+
+
+def peso_peticion(metodo, ruta, params=None):
+    """
+    Devuelve (peso, ordenes) de una petición a /api/v3/<ruta>.
+    `params` es el dict de parámetros tal como lo recibe el cliente.
+    """
+    metodo = metodo.upper()
+    params = params if isinstance(params, dict) else {}
+    if metodo in ("POST", "PUT", "DELETE") and ruta == "userDataStream":
+        return 2, 0
+    if metodo == "POST" and ruta in _ORDENES:
+        return 1, _ORDENES[ruta]
+    if metodo == "GET":
+        un_simbolo = "symbol" in params
+        if ruta == "depth":
+            return _peso_profundidad(params.get("limit")), 0
+        if ruta == "ticker/24hr":
+            return (2 if un_simbolo else 80), 0
+        if ruta in ("ticker/price", "ticker/bookTicker"):
+            return (2 if un_simbolo else 4), 0
+        if ruta == "openOrders":
+            return (6 if un_simbolo else 80), 0
+    return _PESOS.get((metodo, ruta), 1), 0
+
+
+def prioridad_peticion(metodo, ruta, firmada):
+    if metodo.upper() in ("POST", "DELETE") and (ruta in _ORDENES or ruta.startswith("order")):
+        return PRIORIDAD_ORDEN
+    if firmada or ruta == "userDataStream":
+        return PRIORIDAD_CUENTA
+    return PRIORIDAD_MERCADO
+
+
+def _ruta_api(uri):
+    # https://api.binance.com/api/v3/ticker/price -> ticker/price
+    partes = urlparse(uri).path.split("/", 3)
+    return partes[3] if len(partes) > 3 else partes[-1]
+
+
+class Cubeta:
+    """Cubeta de tokens: `capacidad` unidades que se reponen linealmente en `intervalo` segundos"""
+
+    __slots__ = ("nombre", "capacidad", "tasa", "tokens", "_ultimo")
+
+    def __init__(self, nombre, capacidad, intervalo):
+        self.nombre = nombre
+        self.capacidad = float(capacidad)
+        self.tasa = self.capacidad / intervalo
+        self.tokens = self.capacidad
+        self._ultimo = time.monotonic()
+
+    def reponer(self, ahora):
+        self.tokens = min(self.capacidad, self.tokens + (ahora - self._ultimo) * self.tasa)
+        self._ultimo = ahora
+
+    def espera(self, coste, reserva=0.0):
+        """Segundos hasta tener `coste` tokens por encima de `reserva` (0 si ya los hay)"""
+        faltan = min(coste + reserva, self.capacidad) - self.tokens
+        return faltan / self.tasa if faltan > 0 else 0.0
+
+    def corregir(self, usado):
+        """Ajusta a la baja con el consumo que informa el servidor"""
+        self.tokens = min(self.tokens, self.capacidad - usado)
+
+
+class GobernadorPeso:
+    """Presupuesto de peso compartido por todos los clientes (síncronos y asíncronos) que envuelve"""
+
+    def __init__(self, peso=PESO_POR_MINUTO, intervalo_peso=60, peticiones=PETICIONES_POR_5MIN,
+                 ordenes_10s=ORDENES_POR_10S, ordenes_dia=ORDENES_POR_DIA, fraccion=FRACCION_SEGURA,
+                 reserva_ordenes=RESERVA_ORDENES):
+        self.peso = Cubeta("peso", peso * fraccion, intervalo_peso)
+        self.reserva_ordenes = self.peso.capacidad * reserva_ordenes
+        self.peticiones = Cubeta("peticiones", peticiones * fraccion, 300)
+        self._limites_ordenes = ((ordenes_10s * fraccion, 10), (ordenes_dia * fraccion, 86400))
+        self._ordenes = {}           # api_key -> (cubeta 10s, cubeta 1 día); ORDER_COUNT es por cuenta
+        self._cambio = threading.Condition()
+        self._cola = []              # heap de turnos (prioridad, secuencia)
+        self._secuencia = itertools.count()
+        self._espera_cabeza = 0.0
+        self._peso_en_vuelo = 0
+        self._bloqueado_hasta = 0.0
+        # Monitorización
+        self.peso_usado_servidor = 0
+        self.total_peticiones = 0
+        self.esperas = 0
+        self.segundos_esperando = 0.0
+        self.rechazos_429 = 0
+        self.baneos_418 = 0
+        self.latido = None           # salud.Latido que marca cada respuesta correcta
+
+    # --- Envoltura de clientes ---
+
+    def aplicar(self, client):
+        """Hace que todas las peticiones REST de `client` (Client o AsyncClient) pasen por el gobernador"""
+        if getattr(client, "gobernador", None) is self:
+            return client
+        original = client._request
+        manejar = client._handle_response
+        api_key = getattr(client, "API_KEY", None)
+
+        # La respuesta de cada petición se guarda en el contexto de quien llama, para leer las
+        # cabeceras de esa petición y no de otra. AsyncClient pasa su respuesta local a
+        # _handle_response; Client le pasa self.response, que otro hilo puede haber pisado,
+        # así que ahí se toma con un hook de requests, que corre en el hilo de la petición
+        if inspect.iscoroutinefunction(manejar):
+            async def _handle_response(response):
+                _RESPUESTA.set(response)
+                return await manejar(response)
+            client._handle_response = _handle_response
+        else:
+            def _anotar_respuesta(response, *args, **kwargs):
+                _RESPUESTA.set(response)      # devuelve None: requests conserva la respuesta
+
+            client.session.hooks["response"].append(_anotar_respuesta)
+
+        if inspect.iscoroutinefunction(original):
+            async def _request(method, uri, signed, force_params=False, **kwargs):
+                ruta, peso, ordenes, prioridad = self._clasificar(method, uri, signed, kwargs.get("data"))
+                for intento in itertools.count():
+                    await self.adquirir_async(peso, ordenes, prioridad, api_key)
+                    _RESPUESTA.set(None)
+                    inicio = time.perf_counter()
+                    try:
+                        respuesta = await original(method, uri, signed, force_params, **_copiar(kwargs))
+                        if self.latido is not None:
+                            self.latido.marcar()
+                        return respuesta
+                    except BinanceAPIException as e:
+                        ERRORES.inc(ruta, str(e.code))
+                        if not self._reintentable(e, intento):
+                            raise
+                    finally:
+                        LATENCIA.observar(time.perf_counter() - inicio, method, ruta)
+                        PESO_CONSUMIDO.inc(ruta, valor=peso)
+                        self._liberar(peso, _RESPUESTA.get(), api_key)
+        else:
+            def _request(method, uri, signed, force_params=False, **kwargs):
+                ruta, peso, ordenes, prioridad = self._clasificar(method, uri, signed, kwargs.get("data"))
+                for intento in itertools.count():
+                    self.adquirir(peso, ordenes, prioridad, api_key)
+                    _RESPUESTA.set(None)
+                    inicio = time.perf_counter()
+                    try:
+                        respuesta = original(method, uri, signed, force_params, **_copiar(kwargs))
+                        if self.latido is not None:
+                            self.latido.marcar()
+                        return respuesta
+                    except BinanceAPIException as e:
+                        ERRORES.inc(ruta, str(e.code))
+                        if not self._reintentable(e, intento):
+                            raise
+                    finally:
+                        LATENCIA.observar(time.perf_counter() - inicio, method, ruta)
+                        PESO_CONSUMIDO.inc(ruta, valor=peso)
+                        self._liberar(peso, _RESPUESTA.get(), api_key)
+
+        client._request = _request
+        client.gobernador = self
+        return client
+
+    def _clasificar(self, metodo, uri, firmada, params):
+        ruta = _ruta_api(uri)
+        if "/api/" not in uri:
+            # sapi, futuros, etc. tienen sus propios límites: solo cuentan como petición cruda
+            return ruta, 0, 0, prioridad_peticion(metodo, ruta, firmada)
+        peso, ordenes = peso_peticion(metodo, ruta, params)
+        return ruta, peso, ordenes, prioridad_peticion(metodo, ruta, firmada)
+
+    # --- Adquisición de presupuesto ---
+
+    def adquirir(self, peso, ordenes=0, prioridad=PRIORIDAD_MERCADO, api_key=None):
+        """Bloquea al hilo llamante hasta que hay presupuesto y es su turno"""
+        inicio = time.monotonic()
+        with self._cambio:
+            turno = self._encolar(prioridad)
+            try:
+                while (espera := self._intentar(turno, peso, ordenes, prioridad, api_key)) > 0:
+                    self._cambio.wait(espera)
+            except BaseException:
+                self._descartar(turno)
+                raise
+        self._contar_espera(inicio)
+
+    async def adquirir_async(self, peso, ordenes=0, prioridad=PRIORIDAD_MERCADO, api_key=None):
+        """Igual que adquirir, cediendo el event loop mientras espera"""
+        inicio = time.monotonic()
+        with self._cambio:
+            turno = self._encolar(prioridad)
+        try:
+            while True:
+                with self._cambio:
+                    espera = self._intentar(turno, peso, ordenes, prioridad, api_key)
+                if espera <= 0:
+                    break
+                await asyncio.sleep(espera)
+        except BaseException:
+            with self._cambio:
+                self._descartar(turno)
+            raise
+        self._contar_espera(inicio)
+
+    def _encolar(self, prioridad):
+        turno = (prioridad, next(self._secuencia))
+        heapq.heappush(self._cola, turno)
+        return turno
+
+    def _descartar(self, turno):
+        if turno in self._cola:
+            self._cola.remove(turno)
+            heapq.heapify(self._cola)
+            self._cambio.notify_all()
+
+    def _intentar(self, turno, peso, ordenes, prioridad, api_key):
+        """Con el lock tomado: consume el presupuesto y devuelve 0, o los segundos a esperar"""
+        ahora = time.monotonic()
+        if ahora < self._bloqueado_hasta:
+            return min(self._bloqueado_hasta - ahora, ESPERA_MAXIMA_SONDEO)
+        if self._cola[0] != turno:
+            # Solo sale la cabeza de la cola; el resto espera al menos lo mismo que ella
+            return min(max(self._espera_cabeza, 0.005), ESPERA_MAXIMA_SONDEO)
+
+        costes = [(self.peso, peso), (self.peticiones, 1)]
+        if ordenes:
+            costes += [(c, ordenes) for c in self._cubetas_ordenes(api_key)]
+        for cubeta, _ in costes:
+            cubeta.reponer(ahora)
+        # El resto de peticiones no puede gastar la reserva de peso de las órdenes
+        reserva = 0.0 if prioridad == PRIORIDAD_ORDEN else self.reserva_ordenes
+        espera = max(self.peso.espera(peso, reserva),
+                     *(cubeta.espera(coste) for cubeta, coste in costes[1:]))
+        if espera > 0:
+            self._espera_cabeza = espera
+            return min(espera, ESPERA_MAXIMA_SONDEO)
+
+        for cubeta, coste in costes:
+            cubeta.tokens -= coste
+        self._peso_en_vuelo += peso
+        self._espera_cabeza = 0.0
+        self.total_peticiones += 1
+        heapq.heappop(self._cola)
+        self._cambio.notify_all()
+        return 0
+
+    def _cubetas_ordenes(self, api_key):
+        if api_key not in self._ordenes:
+            self._ordenes[api_key] = tuple(
+                Cubeta("ordenes", capacidad, intervalo) for capacidad, intervalo in self._limites_ordenes
+            )
+        return self._ordenes[api_key]
+
+    def _contar_espera(self, inicio):
+        esperado = time.monotonic() - inicio
+        if esperado > 0.001:
+            with self._cambio:
+                self.esperas += 1
+                self.segundos_esperando += esperado
+
+    # --- Respuestas ---
+
+    def _liberar(self, peso, respuesta, api_key):
+        with self._cambio:
+            self._peso_en_vuelo -= peso
+        if respuesta is not None:
+            self.registrar_cabeceras(respuesta.headers, api_key)
+
+    def registrar_cabeceras(self, cabeceras, api_key=None):
+        """Corrige las cubetas con el consumo real que informa Binance"""
+        usado = cabeceras.get("X-MBX-USED-WEIGHT-1M")
+        ordenes_10s = cabeceras.get("X-MBX-ORDER-COUNT-10S")
+        ordenes_dia = cabeceras.get("X-MBX-ORDER-COUNT-1D")
+        with self._cambio:
+            if usado is not None:
+                self.peso_usado_servidor = int(usado)
+                # Las peticiones aún en vuelo ya descontaron su peso pero el servidor puede no contarlas
+                self.peso.corregir(int(usado) + max(self._peso_en_vuelo, 0))
+            if api_key is not None and (ordenes_10s is not None or ordenes_dia is not None):
+                cubeta_10s, cubeta_dia = self._cubetas_ordenes(api_key)
+                if ordenes_10s is not None:
+                    cubeta_10s.corregir(int(ordenes_10s))
+                if ordenes_dia is not None:
+                    cubeta_dia.corregir(int(ordenes_dia))
+
+    def _reintentable(self, error, intento):
+        """Registra un 429/418; True si la petición debe reintentarse tras la espera"""
+        if error.status_code not in (418, 429):
+            return False
+        cabeceras = getattr(error.response, "headers", None) or {}
+        espera = float(cabeceras.get("Retry-After") or RETRY_AFTER_POR_DEFECTO)
+        with self._cambio:
+            self._bloqueado_hasta = max(self._bloqueado_hasta, time.monotonic() + espera)
+            self.peso.tokens = min(self.peso.tokens, 0.0)
+            if error.status_code == 418:
+                self.baneos_418 += 1
+            else:
+                self.rechazos_429 += 1
+        logger.warning("Binance devolvió %s; todas las peticiones esperan %.0fs",
+                       error.status_code, espera)
+        return error.status_code == 429 and intento < MAX_REINTENTOS_429
+
+    # --- Monitorización ---
+
+    def presupuesto(self):
+        """Estado actual del presupuesto, para logs o paneles"""
+        with self._cambio:
+            ahora = time.monotonic()
+            self.peso.reponer(ahora)
+            self.peticiones.reponer(ahora)
+            en_cola = {}
+            for prioridad, _ in self._cola:
+                en_cola[prioridad] = en_cola.get(prioridad, 0) + 1
+            return {
+                "peso_disponible": int(self.peso.tokens),
+                "peso_capacidad": int(self.peso.capacidad),
+                "peso_usado_servidor": self.peso_usado_servidor,
+                "peticiones_disponibles": int(self.peticiones.tokens),
+                "en_cola": en_cola,
+                "bloqueado_segundos": max(0.0, self._bloqueado_hasta - ahora),
+                "total_peticiones": self.total_peticiones,
+                "esperas": self.esperas,
+                "segundos_esperando": round(self.segundos_esperando, 3),
+                "rechazos_429": self.rechazos_429,
+                "baneos_418": self.baneos_418,
+            }
+
+
+def _copiar(kwargs):
+    # python-binance firma añadiendo timestamp/signature al dict de datos; cada intento parte de una copia
+    datos = kwargs.get("data")
+    if isinstance(datos, dict):
+        return dict(kwargs, data=dict(datos))
+    return kwargs
+
+
+_gobernador = None
+_lock_gobernador = threading.Lock()
+
+
+def gobernador_compartido():
+    """Gobernador único del proceso: todos los clientes salen por la misma IP"""
+    global _gobernador
+    with _lock_gobernador:
+        if _gobernador is None:
+            _gobernador = GobernadorPeso()
+            _exponer(_gobernador)
+        return _gobernador
+
+
+def _exponer(gobernador):
+    """Medidores del presupuesto compartido, calculados en cada scrape"""
+    _metricas.medidor("binance_peso_usado_servidor", "Último X-MBX-USED-WEIGHT-1M devuelto por Binance",
+                      funcion=lambda: gobernador.peso_usado_servidor)
+    _metricas.medidor("binance_peso_disponible", "Peso que queda en la cubeta del gobernador",
+                      funcion=lambda: gobernador.presupuesto()["peso_disponible"])
+    _metricas.medidor("binance_peticiones_en_cola", "Peticiones esperando presupuesto en el gobernador",
+                      funcion=lambda: len(gobernador._cola))
+    _metricas.medidor("binance_bloqueado_segundos", "Segundos que quedan de bloqueo tras un 429/418",
+                      funcion=lambda: gobernador.presupuesto()["bloqueado_segundos"])
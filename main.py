@@ -4,15 +4,20 @@
 # IMPORTACIONES PRINCIPALES
 # ==========================
 import tkinter as tk             # Interfaz gráfica nativa de Python (para ventanas, botones, etc.)
-import threading                 # Permite ejecutar funciones en paralelo sin bloquear la interfaz
-import time                      # Para pausas, timestamps, etc. (no usado directamente aquí)
+import time                      # Para pausas, timestamps y medir la latencia de Telegram
 from binance.exceptions import BinanceAPIException  # Captura errores específicos de Binance
 from datetime import datetime    # Para registrar fecha y hora en logs
-from telegram import Bot          # Cliente Telegram para enviar mensajes
-import asyncio                   # Necesario para ejecutar funciones async de Telegram
+from flujo_usuario import EstadoOrden  # Fill de la respuesta REST (precio medio, comisión)
 import tkinter.messagebox as messagebox  # Para mostrar mensajes de error en ventanas emergentes
-from config import get_settings, get_binance_client, get_telegram_config
+from config import get_settings, get_binance_client, get_telegram_config, get_stream_url
 # ^ Importa funciones desde tu archivo config.py para traer configuración, cliente Binance y Telegram
+from telegram_report import despachador as despachador_telegram  # Envío a Telegram en segundo plano
+from telegram_utils import puente_telegram  # Loop asyncio único para envíos con confirmación
+from diario_operaciones import diario_compartido  # Diario SQLite con escritura en segundo plano
+from valoracion import MotorValoracion, precios_snapshot, valorar  # Valor de la cartera con un solo snapshot de precios
+from interfaz_tk import ColaInterfaz, PanelSaldos, Trabajador  # Red en segundo plano, widgets solo desde Tk
+from datos_mercado import MotorDatosMercado  # Precios por WebSocket para el gráfico en vivo
+from grafico_precios import GraficoPrecios  # Historial en anillo y dibujo reducido con LTTB
 
 # ==========================
 # CONFIGURACIÓN INICIAL
@@ -20,10 +25,17 @@ from config import get_settings, get_binance_client, get_telegram_config
 settings = get_settings()                       # Carga la configuración general (API keys, etc.)
 client = get_binance_client(settings)           # Crea el cliente Binance
 TELEGRAM_TOKEN, CHAT_ID = get_telegram_config(settings)  # Token y chat ID de Telegram
-bot_telegram = Bot(token=TELEGRAM_TOKEN)        # Inicializa el bot de Telegram
+notificaciones = despachador_telegram()         # Cola de mensajes a Telegram (se vacía al salir)
+puente = puente_telegram(TELEGRAM_TOKEN)        # Bot de Telegram en su propio hilo con event loop
+diario = diario_compartido()                    # Operaciones y eventos consultables (logs/operaciones.db)
+valorador = MotorValoracion(client)             # Valora todos los saldos en USDT sin colocar órdenes
 
 # Lista de activos que se mostrarán incluso con saldo 0
 ACTIVOS_RELEVANTES = ["DOGE", "WIF", "PEPE", "FLOKI", "SHIB", "USDT", "BNB"]
+INTERVALO_PANEL = 2.0   # segundos entre lecturas de saldos y precios para el panel en vivo
+SIMBOLO_ESTRATEGIA = "BTCUSDT"  # Par que compra ejecutar_estrategia
+# Símbolos del gráfico: el de la estrategia y los activos relevantes contra USDT
+SIMBOLOS_GRAFICO = [SIMBOLO_ESTRATEGIA] + [f"{activo}USDT" for activo in ACTIVOS_RELEVANTES if activo != "USDT"]
 
 # Función para validar la conexión a Binance antes de iniciar
 def validar_conexion_binance():
@@ -57,32 +69,32 @@ label.pack()
 conexion_label = tk.Label(root, text="Conexión con Binance: Desconectado", font=("Arial", 16))
 conexion_label.pack()
 
+# Cola de actualizaciones: los hilos de fondo nunca tocan un widget directamente
+interfaz = ColaInterfaz(root).iniciar()
+trabajador = Trabajador(interfaz)                          # Verificación y estrategia, en orden
+trabajador_panel = Trabajador(interfaz, "panel-saldos")    # Lecturas periódicas del panel en vivo
+
+# Panel en vivo de saldos y precios de ACTIVOS_RELEVANTES (redibujado con tope de FPS)
+panel = PanelSaldos(root, ACTIVOS_RELEVANTES)
+panel.pack(padx=10, pady=10)
+
+# Gráfico en vivo de los símbolos operados, con las compras y ventas de la sesión
+grafico = GraficoPrecios(root, SIMBOLOS_GRAFICO)
+grafico.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
+
+# Cada miniTicker del stream va al historial del gráfico (hilo propio, sin tocar widgets)
+mercado = MotorDatosMercado(SIMBOLOS_GRAFICO, url=get_stream_url(settings), al_precio=grafico.agregar).iniciar()
+
+def mostrar_estado(texto):
+    """Cambia el estado de conexión desde cualquier hilo (lo aplica el hilo de Tk)."""
+    interfaz.llamar(conexion_label.config, text=texto)
+
 # ==========================
 # FUNCIONES DE TELEGRAM
 # ==========================
 def enviar_reporte_telegram(mensaje):
-    """Envía un mensaje a Telegram manejando correctamente el loop asyncio."""
-    async def enviar():
-        try:
-            await bot_telegram.send_message(
-                chat_id=CHAT_ID,
-                text=mensaje,
-                parse_mode="Markdown"
-            )
-        except Exception as e:
-            print(f"❌ Error al enviar mensaje a Telegram: {e}")
-
-    try:
-        loop = asyncio.get_event_loop()
-        if loop.is_running():
-            # Si ya hay un loop (por ejemplo, Tkinter o threading), usamos este
-            asyncio.run_coroutine_threadsafe(enviar(), loop)
-        else:
-            # Si no hay loop activo, lo ejecutamos normalmente
-            loop.run_until_complete(enviar())
-    except RuntimeError:
-        # Si el loop está cerrado, creamos uno nuevo (previene el error "Event loop is closed")
-        asyncio.run(enviar())
+    """Encola el mensaje para Telegram; lo envía el hilo del despachador sin bloquear la interfaz."""
+    notificaciones.enviar(mensaje, parse_mode="Markdown")
 
 # ==========================
 # FUNCIÓN: VERIFICAR API
@@ -90,7 +102,7 @@ def enviar_reporte_telegram(mensaje):
 def verificar_api_y_enviar_info():
     """Verifica conexión con Binance y envía balances relevantes a Telegram."""
     try:
-        cuenta = client.get_account()  # Llama a la API para obtener info de cuenta
+        cuenta = client.saldos.cuenta()  # Una sola llamada a la API llena el libro de saldos
 
         mensaje = [
             "✅ *API conectada correctamente.*",
@@ -99,31 +111,32 @@ def verificar_api_y_enviar_info():
             "\n📦 *Saldos relevantes:*"
         ]
 
-        # Recorre los activos definidos y obtiene su balance
+        # Recorre los activos definidos y lee su balance desde el libro (sin más llamadas)
         for activo in ACTIVOS_RELEVANTES:
-            saldo = client.get_asset_balance(asset=activo)
-            mensaje.append(f"   - {activo}: {saldo['free']}")
+            saldo = client.saldos.libre(activo)
+            mensaje.append(f"   - {activo}: {saldo:.8f}")
+
+        # Valor de toda la cartera: una petición de precios, rutas por pares intermedios si hace falta
+        mensaje.append("\n" + valorador.valorar("USDT").texto())
 
         # Une el mensaje en un solo texto
         mensaje_final = "\n".join(mensaje)
 
         print(mensaje_final)                              # Muestra en consola
         enviar_reporte_telegram(mensaje_final)            # Envía por Telegram
-        conexion_label.config(text="✅ Conexión y verificación completadas")  # Actualiza GUI
+        mostrar_estado("✅ Conexión y verificación completadas")  # Actualiza GUI desde el hilo de Tk
 
-        # Registra el resultado en un log
-        with open("log.txt", "a", encoding="utf-8") as log:
-            log.write(f"{datetime.now()} - Verificación API:\n{mensaje_final}\n\n")
+        # Registra el resultado en el diario (no bloquea la interfaz)
+        diario.evento(f"Verificación API:\n{mensaje_final}")
 
     except Exception as e:
         mensaje_error = f"❌ Error al verificar la API: {e}"
         print(mensaje_error)
         enviar_reporte_telegram(mensaje_error)
-        conexion_label.config(text="❌ Error en verificación API")
+        mostrar_estado("❌ Error en verificación API")
 
         # Log del error
-        with open("log.txt", "a", encoding="utf-8") as log:
-            log.write(f"{datetime.now()} - Error verificación API: {e}\n")
+        diario.evento(f"Error verificación API: {e}")
 
 # ==========================
 # FUNCIÓN: ESTRATEGIA DE TRADING
@@ -133,66 +146,114 @@ def ejecutar_estrategia():
     print("💰 Ejecutando estrategia de trading...")
 
     try:
-        balance = client.get_asset_balance(asset="USDT")     # Obtiene saldo USDT
-        disponible = float(balance["free"])
+        disponible = client.saldos.libre("USDT")              # Obtiene saldo USDT
         print(f"💸 Saldo disponible: {disponible} USDT")
 
         if disponible < 15:                                  # Monto mínimo
             raise Exception("Saldo insuficiente para realizar la compra mínima.")
 
         # ⚠️ Aquí se ejecuta una orden REAL si las API keys son live
-        orden = client.order_market_buy(symbol="BTCUSDT", quantity=0.001)
+        orden = client.order_market_buy(symbol=SIMBOLO_ESTRATEGIA, quantity=0.001)
+        client.saldos.invalidar()                            # Los saldos cambiaron tras la orden
+        ejecucion = EstadoOrden.desde_respuesta(orden)
+        grafico.marcar(SIMBOLO_ESTRATEGIA, "BUY", ejecucion.precio_medio)  # Marcador en el gráfico
 
         mensaje = f"✅ *Orden ejecutada correctamente*\n{orden}\n🕒 {datetime.now()}"
         enviar_reporte_telegram(mensaje)
 
-        # Guarda registro de la orden
-        with open("log.txt", "a", encoding="utf-8") as log:
-            log.write(f"{datetime.now()} - Orden ejecutada: {orden}\n")
+        # Guarda registro de la orden: la operación queda consultable por símbolo y fecha
+        diario.registrar_ejecucion(ejecucion)
 
     # Error específico de Binance
     except BinanceAPIException as e:
         mensaje = f"❌ *Error en orden de compra (Binance)*:\n{e}\n🕒 {datetime.now()}"
         print(mensaje)
         enviar_reporte_telegram(mensaje)
-        with open("log.txt", "a", encoding="utf-8") as log:
-            log.write(f"{datetime.now()} - Error Binance: {e}\n")
+        diario.evento(f"Error Binance: {e}")
 
     # Cualquier otro error general
     except Exception as e:
         mensaje = f"⚠️ *Error general en la estrategia*:\n{e}\n🕒 {datetime.now()}"
         print(mensaje)
         enviar_reporte_telegram(mensaje)
-        with open("log.txt", "a", encoding="utf-8") as log:
-            log.write(f"{datetime.now()} - Error general: {e}\n")
+        diario.evento(f"Error general: {e}")
 
 # ==========================
 # FUNCIÓN: TEST TELEGRAM
 # ==========================
 def test_telegram():
-    """Envía un mensaje de prueba para comprobar la conexión con Telegram."""
+    """Envía un mensaje de prueba y muestra en la interfaz si Telegram lo confirmó."""
     mensaje = f"🚀 *Prueba de Telegram completada correctamente.*\n🕒 {datetime.now()}"
-    enviar_reporte_telegram(mensaje)
-    print("📨 Mensaje de prueba enviado a Telegram.")
+    futuro = puente.enviar(CHAT_ID, mensaje, parse_mode="Markdown")  # No bloquea la interfaz
+    conexion_label.config(text="📨 Enviando prueba a Telegram...")
+    root.after(100, comprobar_prueba_telegram, futuro, time.perf_counter())
+
+def comprobar_prueba_telegram(futuro, inicio):
+    """Consulta desde el hilo de Tkinter si el envío de prueba terminó."""
+    if not futuro.done():
+        root.after(100, comprobar_prueba_telegram, futuro, inicio)
+        return
+    if futuro.exception() is not None:
+        print(f"❌ Error al enviar mensaje a Telegram: {futuro.exception()}")
+        conexion_label.config(text="❌ Error en la prueba de Telegram")
+    else:
+        latencia = (time.perf_counter() - inicio) * 1000
+        print(f"📨 Mensaje de prueba entregado a Telegram ({latencia:.0f} ms).")
+        conexion_label.config(text="✅ Telegram respondió correctamente")
+
+# ==========================
+# FUNCIÓN: PANEL EN VIVO
+# ==========================
+def leer_panel():
+    """Lee saldos y precios en el hilo del panel y publica el snapshot (sin tocar widgets)."""
+    saldos = client.saldos.saldos()                                # get_account solo si el libro está viejo
+    precios = precios_snapshot(client.get_all_tickers())          # Una petición para todos los precios
+    grafo = valorador.grafo()
+    # Precio en USDT de una unidad de cada activo, aunque su saldo sea 0
+    unidades = valorar(grafo, {activo: 1.0 for activo in ACTIVOS_RELEVANTES}, precios)
+    precio = {p.activo: p.precio for p in unidades.posiciones}
+    datos = {activo: (saldos.get(activo, (0.0, 0.0))[0], precio.get(activo)) for activo in ACTIVOS_RELEVANTES}
+    total = valorar(grafo, saldos, precios).total
+    # Sin stream de mercado (red sin WebSocket, exchange simulado) el gráfico se llena con este snapshot
+    if not mercado.mensajes:
+        for symbol in SIMBOLOS_GRAFICO:
+            if symbol in precios:
+                grafico.agregar(symbol, float(precios[symbol]))
+    panel.publicar(datos, f"💼 Total estimado: {total:,.2f} USDT · {datetime.now():%H:%M:%S}")
 
 # ==========================
 # FUNCIÓN: INICIAR BOT
 # ==========================
-def iniciar_bot():
-    """Lanza la verificación y luego ejecuta la estrategia en otro hilo."""
-    # Validar conexión a Binance antes de iniciar
+def preparar_y_ejecutar():
+    """Todo lo que usa la red, en el hilo de fondo: validar, verificar y ejecutar la estrategia."""
     conexion_ok, mensaje = validar_conexion_binance()
     if not conexion_ok:
-        messagebox.showerror("Error de conexión", mensaje)
-        conexion_label.config(text="❌ Error de conexión con Binance")
-        return
-        
+        return mensaje
+
     verificar_api_y_enviar_info()              # Verifica API primero
-    label.config(text="Ejecutando estrategia...")  # Actualiza texto en GUI
+    interfaz.llamar(label.config, text="Ejecutando estrategia...")  # Actualiza texto en GUI
+    ejecutar_estrategia()
+    return None
 
-    # Crea hilo para ejecutar la estrategia sin bloquear interfaz
-    nuevo_hilo = threading.Thread(target=ejecutar_estrategia)
-    nuevo_hilo.start()
+def bot_terminado(error):
+    """Vuelve al hilo de Tk con el resultado de preparar_y_ejecutar."""
+    boton_iniciar.config(state=tk.NORMAL)
+    if error is not None:
+        messagebox.showerror("Error de conexión", error)
+        conexion_label.config(text="❌ Error de conexión con Binance")
+        label.config(text="Tiempo restante: 00:00:00")
+    else:
+        label.config(text="Estrategia completada")
+
+def bot_fallido(error):
+    boton_iniciar.config(state=tk.NORMAL)
+    conexion_label.config(text=f"❌ Error inesperado: {error}")
+
+def iniciar_bot():
+    """Lanza la verificación y la estrategia en el trabajador; la ventana sigue respondiendo."""
+    boton_iniciar.config(state=tk.DISABLED)    # Evita lanzar dos veces mientras se ejecuta
+    conexion_label.config(text="🔄 Verificando conexión con Binance...")
+    trabajador.enviar(preparar_y_ejecutar, al_terminar=bot_terminado, al_fallar=bot_fallido)
 
 # ==========================
 # BOTONES PRINCIPALES
@@ -203,6 +264,16 @@ boton_iniciar.pack(pady=10)
 boton_test = tk.Button(root, text="Probar Telegram 📡", command=test_telegram)
 boton_test.pack(pady=5)
 
+def cerrar():
+    """Detiene los hilos de fondo y cierra la ventana."""
+    trabajador.detener(timeout=0.5)          # Sin esperar a que termine una petición lenta
+    trabajador_panel.detener(timeout=0.5)
+    mercado.al_precio = None                 # El hilo del stream es daemon: termina con el proceso
+    root.destroy()
+
+root.protocol("WM_DELETE_WINDOW", cerrar)
+trabajador_panel.cada(INTERVALO_PANEL, leer_panel)  # Primera lectura inmediata, luego cada 2 s
+
 # ==========================
 # LOOP PRINCIPAL DE LA INTERFAZ
 # ==========================
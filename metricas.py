@@ -0,0 +1,342 @@
+"""
+Métricas del proceso en formato de texto de Prometheus, servidas en /metrics.
+
+Contadores e histogramas se reparten por hilo: cada hilo escribe solo en su
+propio dict (threading.local), así que incrementar no toma ningún lock y se
+puede dejar en cada petición a Binance. El scrape copia los dicts de todos los
+hilos y los suma; el lock solo se toma la primera vez que un hilo escribe y
+cuando el hilo muere, para sumar su dict a una base común y soltarlo (los
+hilos de corta vida no dejan fragmentos acumulándose).
+Los medidores (gauges) guardan el último valor o se calculan al hacer el
+scrape con una función (tamaño de una cola, sesiones activas, hilos vivos).
+"""
+import logging
+import math
+import operator
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+logger = logging.getLogger(__name__)
+
+PUERTO = 9108
+TIPO_CONTENIDO = "text/plain; version=0.0.4; charset=utf-8"
+# Segundos: de una petición REST en la misma región (~5 ms) a un reintento tras 429
+LATENCIAS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Testigo:
+    """Objeto guardado en el threading.local de cada hilo: se libera cuando el hilo muere"""
+    __slots__ = ("__weakref__",)
+
+
+class _PorHilo:
+    """
+    Un dict por hilo; solo su hilo lo modifica y el scrape lee copias de todos.
+    Al morir un hilo su dict se suma a la base con sumar(acumulado, valor), que
+    devuelve un valor nuevo sin modificar los que recibe
+    """
+
+    def __init__(self, sumar=operator.add):
+        self._sumar = sumar
+        self._local = threading.local()
+        self._fragmentos = {}          # id del dict -> dict de un hilo vivo
+        self._base = {}                # suma de los hilos que ya terminaron
+        self._lock = threading.Lock()
+
+    def propio(self):
+        try:
+            return self._local.valores
+        except AttributeError:
+            valores = self._local.valores = {}
+            self._local.testigo = testigo = _Testigo()
+            with self._lock:
+                self._fragmentos[id(valores)] = valores
+            weakref.finalize(testigo, self._retirar, valores)
+            return valores
+
+    def _retirar(self, valores):
+        with self._lock:
+            self._fragmentos.pop(id(valores), None)
+            for clave, valor in valores.items():
+                acumulado = self._base.get(clave)
+                self._base[clave] = valor if acumulado is None else self._sumar(acumulado, valor)
+
+    def copias(self):
+        with self._lock:
+            fragmentos = [self._base.copy()] + list(self._fragmentos.values())
+        # dict.copy() es atómico bajo el GIL: no ve un dict a medio redimensionar
+        return [fragmentos[0]] + [fragmento.copy() for fragmento in fragmentos[1:]]
+
+
+class _Metrica:
+    """Base de las métricas; cada subclase define muestras() -> [(sufijo, etiquetas renderizadas, valor)]"""
+    tipo = "untyped"
+
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+
+    def _etiquetas(self, valores, extra=()):
+        pares = list(zip(self.etiquetas, valores)) + list(extra)
+        if not pares:
+            return ""
+        return "{" + ",".join(f'{k}="{_escapar(v)}"' for k, v in pares) + "}"
+
+    def exposicion(self):
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}"]
+        lineas += [f"{self.nombre}{sufijo}{etiquetas} {_numero(valor)}" for sufijo, etiquetas, valor in self.muestras()]
+        return "\n".join(lineas)
+
+
+class Contador(_Metrica):
+    """Valor que solo crece (peticiones, peso consumido, errores)"""
+    tipo = "counter"
+
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        super().__init__(nombre, ayuda, etiquetas)
+        self._hilos = _PorHilo()
+
+    def inc(self, *etiquetas, valor=1):
+        valores = self._hilos.propio()
+        valores[etiquetas] = valores.get(etiquetas, 0) + valor
+
+    def valor(self, *etiquetas):
+        return sum(copia.get(etiquetas, 0) for copia in self._hilos.copias())
+
+    def muestras(self):
+        totales = {}
+        for copia in self._hilos.copias():
+            for clave, valor in copia.items():
+                totales[clave] = totales.get(clave, 0) + valor
+        return [("_total", self._etiquetas(clave), valor) for clave, valor in sorted(totales.items())]
+
+
+class Histograma(_Metrica):
+    """Distribución en cubetas fijas (latencias); observar es un bisect y dos sumas"""
+    tipo = "histogram"
+
+    def __init__(self, nombre, ayuda, etiquetas=(), limites=LATENCIAS):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.limites = tuple(sorted(limites))
+        self._hilos = _PorHilo(lambda a, b: [x + y for x, y in zip(a, b)])
+
+    def observar(self, valor, *etiquetas):
+        valores = self._hilos.propio()
+        cubetas = valores.get(etiquetas)
+        if cubetas is None:
+            # Una cubeta por límite, la de +Inf y la suma al final
+            cubetas = valores[etiquetas] = [0] * (len(self.limites) + 1) + [0.0]
+        cubetas[bisect_left(self.limites, valor)] += 1
+        cubetas[-1] += valor
+
+    def cronometro(self, *etiquetas):
+        """Context manager que observa lo que tarda el bloque"""
+        return _Cronometro(self, etiquetas)
+
+    def _sumadas(self):
+        totales = {}
+        for copia in self._hilos.copias():
+            for clave, cubetas in copia.items():
+                cubetas = list(cubetas)
+                acumulado = totales.get(clave)
+                totales[clave] = cubetas if acumulado is None else [a + b for a, b in zip(acumulado, cubetas)]
+        return totales
+
+    def resumen(self, *etiquetas):
+        """(observaciones, suma) de una combinación de etiquetas"""
+        cubetas = self._sumadas().get(etiquetas)
+        return (sum(cubetas[:-1]), cubetas[-1]) if cubetas else (0, 0.0)
+
+    def muestras(self):
+        muestras = []
+        for clave, cubetas in sorted(self._sumadas().items()):
+            acumulado = 0
+            for limite, cuenta in zip(self.limites + (math.inf,), cubetas):
+                acumulado += cuenta
+                muestras.append(("_bucket", self._etiquetas(clave, [("le", _numero(limite))]), acumulado))
+            muestras.append(("_sum", self._etiquetas(clave), cubetas[-1]))
+            muestras.append(("_count", self._etiquetas(clave), acumulado))
+        return muestras
+
+
+class _Cronometro:
+    __slots__ = ("histograma", "etiquetas", "inicio")
+
+    def __init__(self, histograma, etiquetas):
+        self.histograma = histograma
+        self.etiquetas = etiquetas
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histograma.observar(time.perf_counter() - self.inicio, *self.etiquetas)
+
+
+class Medidor(_Metrica):
+    """
+    Valor que sube y baja. Con `funcion` se calcula en cada scrape: debe
+    devolver un número o un dict {tupla de etiquetas: número}.
+    """
+    tipo = "gauge"
+
+    def __init__(self, nombre, ayuda, etiquetas=(), funcion=None):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.funcion = funcion
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def fijar(self, valor, *etiquetas):
+        self._valores[etiquetas] = valor
+
+    def sumar(self, valor, *etiquetas):
+        with self._lock:
+            self._valores[etiquetas] = self._valores.get(etiquetas, 0) + valor
+
+    def muestras(self):
+        valores = self._valores.copy()
+        if self.funcion is not None:
+            try:
+                calculado = self.funcion()
+            except Exception as e:
+                logger.debug("Medidor %s sin valor: %s", self.nombre, e)
+                calculado = None
+            if isinstance(calculado, dict):
+                valores.update(calculado)
+            elif calculado is not None:
+                valores[()] = calculado
+        return [("", self._etiquetas(clave), valor) for clave, valor in sorted(valores.items())]
+
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _numero(valor):
+    if isinstance(valor, float):
+        if math.isinf(valor):
+            return "+Inf" if valor > 0 else "-Inf"
+        if math.isnan(valor):
+            return "NaN"
+        return str(int(valor)) if valor.is_integer() else repr(valor)
+    return str(valor)
+
+
+class Registro:
+    """Métricas del proceso; declarar dos veces el mismo nombre devuelve la misma métrica"""
+
+    def __init__(self):
+        self._metricas = {}
+        self._lock = threading.Lock()
+
+    def _declarar(self, clase, nombre, *args, **kwargs):
+        with self._lock:
+            metrica = self._metricas.get(nombre)
+            if metrica is None:
+                metrica = self._metricas[nombre] = clase(nombre, *args, **kwargs)
+            elif not isinstance(metrica, clase):
+                raise ValueError(f"La métrica {nombre} ya existe como {metrica.tipo}")
+            return metrica
+
+    def contador(self, nombre, ayuda, etiquetas=()):
+        return self._declarar(Contador, nombre, ayuda, etiquetas)
+
+    def histograma(self, nombre, ayuda, etiquetas=(), limites=LATENCIAS):
+        return self._declarar(Histograma, nombre, ayuda, etiquetas, limites)
+
+    def medidor(self, nombre, ayuda, etiquetas=(), funcion=None):
+        medidor = self._declarar(Medidor, nombre, ayuda, etiquetas)
+        if funcion is not None:
+            medidor.funcion = funcion
+        return medidor
+
+    def get(self, nombre):
+        return self._metricas.get(nombre)
+
+    def exposicion(self):
+        """Texto completo para /metrics"""
+        with self._lock:
+            metricas = sorted(self._metricas.values(), key=lambda m: m.nombre)
+        return "\n".join(m.exposicion() for m in metricas) + "\n"
+
+
+class ServidorMetricas:
+    """
+    Servidor HTTP en un hilo daemon que responde GET /metrics con la exposición
+    del registro. `rutas` añade otras rutas: ruta -> función(parámetros de la
+    query) que devuelve (código, tipo de contenido, texto), p. ej. /health.
+    """
+
+    def __init__(self, registro, puerto=PUERTO, host="0.0.0.0", rutas=None):
+        self.registro = registro
+        self.rutas = {"/metrics": lambda parametros: (200, TIPO_CONTENIDO, registro.exposicion())}
+        self.rutas.update(rutas or {})
+        servidor = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlsplit(self.path)
+                ruta = servidor.rutas.get(url.path)
+                if ruta is None:
+                    self.send_error(404)
+                    return
+                codigo, tipo, texto = ruta(dict(parse_qsl(url.query)))
+                cuerpo = texto.encode("utf-8")
+                self.send_response(codigo)
+                self.send_header("Content-Type", tipo)
+                self.send_header("Content-Length", str(len(cuerpo)))
+                self.end_headers()
+                self.wfile.write(cuerpo)
+
+            def log_message(self, *args):
+                pass   # un scrape cada 15 s no debe llenar el log
+
+        self._servidor = ThreadingHTTPServer((host, puerto), Manejador)
+        self._servidor.daemon_threads = True
+        self.puerto = self._servidor.server_address[1]
+        self._hilo = threading.Thread(target=self._servidor.serve_forever, name="metricas", daemon=True)
+
+    def iniciar(self):
+        self._hilo.start()
+        return self
+
+    def cerrar(self):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+
+# --- Métricas comunes del proceso ---
+
+def _hilos():
+    return threading.active_count()
+
+
+_registro = Registro()
+_registro.medidor("proceso_hilos", "Hilos vivos del proceso", funcion=_hilos)
+_servidor = None
+_lock_servidor = threading.Lock()
+
+
+def metricas_compartidas():
+    """Registro único del proceso; los módulos declaran en él sus métricas al importarse"""
+    return _registro
+
+
+def iniciar_servidor_metricas(puerto=PUERTO, host="0.0.0.0", rutas=None):
+    """Arranca (una sola vez) el endpoint /metrics y las `rutas` extra; con puerto 0 o None no hace nada"""
+    global _servidor
+    if not puerto:
+        return None
+    with _lock_servidor:
+        if _servidor is None:
+            _servidor = ServidorMetricas(_registro, int(puerto), host, rutas).iniciar()
+            logger.info("📈 Métricas en http://%s:%s/metrics", host, _servidor.puerto)
+        else:
+            _servidor.rutas.update(rutas or {})
+        return _servidor
@@ -0,0 +1,654 @@
+"""
+Exchange local de pruebas: servidor HTTP que imita los endpoints REST de Binance
+que usa el proyecto, con datos sintéticos y contador de peticiones, y un
+servidor WebSocket que imita los streams combinados de mercado y el
+user-data stream. También imita sendMessage de la Bot API de Telegram.
+Sirve para benchmarks y pruebas sin red ni claves reales.
+"""
+import asyncio
+import json
+import math
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from binance.client import Client
+from websockets.asyncio.server import serve
+
+from limitador import peso_peticion
+
+INTERVALOS_MS = {"1m": 60_000, "5m": 300_000, "15m": 900_000, "1h": 3_600_000, "4h": 14_400_000, "1d": 86_400_000}
+
+ACTIVOS_COTIZACION = ["USDT", "BTC", "BNB"]
+SALDOS_LOCALES = {"USDT": 10000.0, "BTC": 1.0, "BNB": 10.0}
+PASO_CANTIDAD = Decimal("0.001")      # LOT_SIZE (stepSize y minQty) de todos los símbolos
+TICK_PRECIO = Decimal("0.00000001")
+MINIMO_NOMINAL = 5.0
+
+
+class RechazoFiltro(Exception):
+    """Orden que no pasa los filtros de exchangeInfo: 400 con -1013 como Binance"""
+
+
+class _ServidorHTTP(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clientes que cortan la conexión al cancelar (p. ej. cierre de sesiones): no es un error
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def generar_mercado(n_simbolos=1500, semilla=42):
+    """Genera símbolos, precios y estadísticas 24h sintéticas"""
+    rnd = random.Random(semilla)
+    simbolos = []
+    for i in range(n_simbolos):
+        base = f"TK{i:04d}"
+        quote = ACTIVOS_COTIZACION[i % len(ACTIVOS_COTIZACION)]
+        precio = 10 ** rnd.uniform(-8, 4)
+        spread = precio * rnd.uniform(0.0001, 0.01)
+        simbolos.append({
+            "symbol": base + quote,
+            "status": "TRADING" if rnd.random() > 0.1 else "BREAK",
+            "baseAsset": base,
+            "quoteAsset": quote,
+            "price": precio,
+            "bid": precio - spread / 2,
+            "ask": precio + spread / 2,
+            "quoteVolume": 10 ** rnd.uniform(3, 8),
+        })
+    return simbolos
+
+
+class ExchangeLocal:
+    """Servidor HTTP en un hilo de fondo con la API REST mínima de Binance"""
+
+    def __init__(self, n_simbolos=1500, latencia=0.0, host="127.0.0.1", puerto=0,
+                 stream=None, latencia_ejecucion=0.0, limite_peso=None, ventana_peso=60, filtros=False):
+        self.simbolos = generar_mercado(n_simbolos)
+        self.por_simbolo = {s["symbol"]: s for s in self.simbolos}
+        self.latencia = latencia
+        # Con un StreamLocal, las órdenes responden NEW y el fill llega como evento
+        self.stream = stream
+        self.latencia_ejecucion = latencia_ejecucion
+        self._siguiente_orden = 1
+        self._ordenes = {}   # orderId -> estado final, para GET order
+        self.peticiones = Counter()
+        # Peso por ventana fija, como X-MBX-USED-WEIGHT-1M; con limite_peso responde 429 al superarlo
+        self.limite_peso = limite_peso
+        self.ventana_peso = ventana_peso
+        self._inicio_ventana = time.monotonic()
+        self._peso_usado = 0
+        self.rechazos_429 = 0
+        # Con filtros, las órdenes que no cumplen LOT_SIZE/PRICE_FILTER/NOTIONAL se rechazan con -1013
+        self.filtros = filtros
+        self.rechazos_filtro = 0
+        self._lock = threading.Lock()
+        self._servidor = _ServidorHTTP((host, puerto), self._crear_handler())
+        self._hilo = None
+
+    @property
+    def url(self):
+        host, puerto = self._servidor.server_address[:2]
+        return f"http://{host}:{puerto}/api"
+
+    def iniciar(self):
+        self._hilo = threading.Thread(target=self._servidor.serve_forever, daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.detener()
+
+    def total_peticiones(self):
+        with self._lock:
+            return sum(self.peticiones.values())
+
+    def reiniciar_contadores(self):
+        with self._lock:
+            self.peticiones.clear()
+            self.rechazos_429 = 0
+            self.rechazos_filtro = 0
+
+    def _contabilizar(self, metodo, ruta, params):
+        """Suma la petición a los contadores; devuelve (peso usado en la ventana, Retry-After o None)"""
+        peso, _ = peso_peticion(metodo, ruta, params)
+        with self._lock:
+            self.peticiones[ruta] += 1
+            ahora = time.monotonic()
+            if ahora - self._inicio_ventana >= self.ventana_peso:
+                self._inicio_ventana = ahora
+                self._peso_usado = 0
+            if self.limite_peso is not None and self._peso_usado + peso > self.limite_peso:
+                self.rechazos_429 += 1
+                restante = self.ventana_peso - (ahora - self._inicio_ventana)
+                return self._peso_usado, max(1, round(restante))
+            self._peso_usado += peso
+            return self._peso_usado, None
+
+    def cliente(self):
+        """Cliente python-binance apuntando a este exchange local"""
+        client = Client("local", "local", ping=False)
+        client.API_URL = self.url
+        return client
+
+    # --- Endpoints ---
+
+    def _exchange_info(self, params):
+        return {
+            "timezone": "UTC",
+            "serverTime": int(time.time() * 1000),
+            "symbols": [
+                {
+                    "symbol": s["symbol"],
+                    "status": s["status"],
+                    "baseAsset": s["baseAsset"],
+                    "quoteAsset": s["quoteAsset"],
+                    "ocoAllowed": True,
+                    "filters": [
+                        {"filterType": "PRICE_FILTER", "minPrice": "0.00000001",
+                         "maxPrice": "1000000.00000000", "tickSize": "0.00000001"},
+                        {"filterType": "LOT_SIZE", "minQty": f"{PASO_CANTIDAD:.8f}",
+                         "maxQty": "90000000000.00000000", "stepSize": f"{PASO_CANTIDAD:.8f}"},
+                        {"filterType": "NOTIONAL", "minNotional": f"{MINIMO_NOMINAL:.8f}",
+                         "applyMinToMarket": True, "maxNotional": "9000000.00000000",
+                         "applyMaxToMarket": False, "avgPriceMins": 5},
+                    ],
+                }
+                for s in self.simbolos
+            ],
+        }
+
+    def _ticker_price(self, params):
+        if "symbol" in params:
+            s = self.por_simbolo[params["symbol"]]
+            return {"symbol": s["symbol"], "price": f"{s['price']:.8f}"}
+        return [{"symbol": s["symbol"], "price": f"{s['price']:.8f}"} for s in self.simbolos]
+
+    def _ticker_24h(self, params):
+        def fila(s):
+            return {
+                "symbol": s["symbol"],
+                "lastPrice": f"{s['price']:.8f}",
+                "bidPrice": f"{s['bid']:.8f}",
+                "askPrice": f"{s['ask']:.8f}",
+                "quoteVolume": f"{s['quoteVolume']:.8f}",
+            }
+        if "symbol" in params:
+            return fila(self.por_simbolo[params["symbol"]])
+        return [fila(s) for s in self.simbolos]
+
+    def _ping(self, params):
+        return {}
+
+    def _listen_key(self, params):
+        # Un listenKey por API key, como en Binance (una cuenta = un stream)
+        return {"listenKey": f"local-{params.get('_api_key', '')}"}
+
+    def _cuenta(self, params):
+        return {
+            "accountType": "SPOT",
+            "makerCommission": 10,
+            "takerCommission": 10,
+            "canTrade": True,
+            "balances": [{"asset": a, "free": f"{libre:.8f}", "locked": "0.00000000"}
+                         for a, libre in SALDOS_LOCALES.items()],
+        }
+
+    def _orden(self, params):
+        with self._lock:
+            order_id = self._siguiente_orden
+            self._siguiente_orden += 1
+        s = self.por_simbolo[params["symbol"]]
+        if self.filtros:
+            self._comprobar_filtros(s, params)
+        cantidad = float(params["quantity"])
+        precio = s["ask"] if params["side"] == "BUY" else s["bid"]
+        orden = {
+            "symbol": s["symbol"],
+            "orderId": order_id,
+            "clientOrderId": params.get("newClientOrderId", f"local-{order_id}"),
+            "transactTime": int(time.time() * 1000),
+            "origQty": f"{cantidad:.8f}",
+            "type": params["type"],
+            "side": params["side"],
+        }
+        if params["type"] != "MARKET":
+            # Las órdenes limit y stop quedan en reposo: el exchange local no las cruza
+            orden.update({"status": "NEW", "price": params.get("price", "0"), "executedQty": "0",
+                          "cummulativeQuoteQty": "0", "fills": []})
+            with self._lock:
+                self._ordenes[order_id] = orden
+            return orden
+        ejecutada = dict(orden, **{
+            "status": "FILLED",
+            "executedQty": f"{cantidad:.8f}",
+            "cummulativeQuoteQty": f"{cantidad * precio:.8f}",
+            "fills": [{"price": f"{precio:.8f}", "qty": f"{cantidad:.8f}",
+                       "commission": "0", "commissionAsset": s["quoteAsset"]}],
+        })
+        with self._lock:
+            self._ordenes[order_id] = ejecutada
+        if self.stream is None:
+            return ejecutada
+
+        orden.update({"status": "NEW", "executedQty": "0", "cummulativeQuoteQty": "0", "fills": []})
+        evento = {
+            "e": "executionReport", "E": int(time.time() * 1000), "s": s["symbol"],
+            "c": orden["clientOrderId"], "S": params["side"], "o": params["type"],
+            "q": orden["origQty"], "p": "0", "x": "TRADE", "X": "FILLED", "i": order_id,
+            "l": orden["origQty"], "z": orden["origQty"], "L": f"{precio:.8f}",
+            "n": "0", "N": s["quoteAsset"], "Z": f"{cantidad * precio:.8f}",
+        }
+        posicion = {
+            "e": "outboundAccountPosition", "E": int(time.time() * 1000), "u": int(time.time() * 1000),
+            "B": [{"a": a, "f": f"{SALDOS_LOCALES.get(a, 0.0):.8f}", "l": "0"}
+                  for a in (s["baseAsset"], s["quoteAsset"])],
+        }
+        self.stream.programar_usuario([evento, posicion], f"local-{params.get('_api_key', '')}",
+                                      self.latencia_ejecucion)
+        return orden
+
+    def _comprobar_filtros(self, s, params):
+        cantidad = Decimal(params["quantity"])
+        if cantidad < PASO_CANTIDAD or cantidad % PASO_CANTIDAD:
+            self._rechazar("LOT_SIZE")
+        precio = params.get("price")
+        if precio is not None and Decimal(precio) % TICK_PRECIO:
+            self._rechazar("PRICE_FILTER")
+        referencia = float(precio) if precio is not None else s["price"]
+        if float(cantidad) * referencia < MINIMO_NOMINAL:
+            self._rechazar("NOTIONAL")
+
+    def _rechazar(self, filtro):
+        with self._lock:
+            self.rechazos_filtro += 1
+        raise RechazoFiltro(filtro)
+
+    def _oco(self, params):
+        tramos = [self._orden({"symbol": params["symbol"], "side": params["side"], "quantity": params["quantity"],
+                               "type": params[f"{posicion}Type"],
+                               "price": params.get(f"{posicion}Price", params.get(f"{posicion}StopPrice"))})
+                  for posicion in ("above", "below")]
+        with self._lock:
+            lista = self._siguiente_orden
+            self._siguiente_orden += 1
+        for tramo in tramos:
+            tramo["orderListId"] = lista
+        return {
+            "orderListId": lista, "contingencyType": "OCO", "listStatusType": "EXEC_STARTED",
+            "listOrderStatus": "EXECUTING", "listClientOrderId": f"local-lista-{lista}",
+            "transactionTime": int(time.time() * 1000), "symbol": params["symbol"],
+            "orders": [{"symbol": t["symbol"], "orderId": t["orderId"], "clientOrderId": t["clientOrderId"]}
+                       for t in tramos],
+            "orderReports": tramos,
+        }
+
+    def _klines(self, params):
+        # Velas deterministas por tiempo: la misma vela siempre tiene los mismos valores
+        s = self.por_simbolo[params["symbol"]]
+        paso = INTERVALOS_MS[params["interval"]]
+        ahora = int(time.time() * 1000)
+        limite = min(int(params.get("limit", 500)), 1000)
+        inicio = int(params.get("startTime", ahora - limite * paso))
+        inicio = -(-inicio // paso) * paso
+        fin = min(int(params.get("endTime", ahora)), ahora)
+        filas = []
+        for t in range(inicio, fin + 1, paso)[:limite]:
+            rnd = random.Random(hash((s["symbol"], t)))
+            apertura = s["price"] * (1 + 0.05 * math.sin(t / 3.6e6))
+            cierre = apertura * (1 + rnd.gauss(0, 0.001))
+            filas.append([
+                t, f"{apertura:.8f}", f"{max(apertura, cierre) * 1.0005:.8f}",
+                f"{min(apertura, cierre) * 0.9995:.8f}", f"{cierre:.8f}", f"{rnd.uniform(1, 100):.8f}",
+                t + paso - 1, "0", rnd.randint(1, 500), "0", "0", "0",
+            ])
+        return filas
+
+    def _consultar_orden(self, params):
+        return self._ordenes[int(params["orderId"])]
+
+    def _rutas(self):
+        return {
+            "order": self._consultar_orden,
+            "exchangeInfo": self._exchange_info,
+            "ticker/price": self._ticker_price,
+            "ticker/24hr": self._ticker_24h,
+            "ping": self._ping,
+            "account": self._cuenta,
+            "klines": self._klines,
+        }
+
+    def _rutas_escritura(self):
+        return {
+            "userDataStream": self._listen_key,
+            "order": self._orden,
+            "orderList/oco": self._oco,
+        }
+
+    def _crear_handler(self):
+        exchange = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+            _peso = 0
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                # /api/v3/<ruta> -> <ruta>
+                ruta = url.path.split("/", 3)[-1]
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                params["_api_key"] = self.headers.get("X-MBX-APIKEY", "")
+                handler = exchange._rutas().get(ruta)
+                if exchange.latencia:
+                    time.sleep(exchange.latencia)
+                if not self._admitir("GET", ruta, params):
+                    return
+                if handler is None:
+                    self._responder(404, {"code": -1, "msg": f"Ruta no soportada: {ruta}"})
+                    return
+                try:
+                    self._responder(200, handler(params))
+                except KeyError:
+                    self._responder(400, {"code": -1121, "msg": "Invalid symbol."})
+
+            def do_POST(self):
+                url = urlparse(self.path)
+                ruta = url.path.split("/", 3)[-1]
+                longitud = int(self.headers.get("Content-Length") or 0)
+                cuerpo = self.rfile.read(longitud).decode() if longitud else ""
+                params = {k: v[0] for k, v in parse_qs(url.query or cuerpo).items()}
+                params["_api_key"] = self.headers.get("X-MBX-APIKEY", "")
+                handler = exchange._rutas_escritura().get(ruta)
+                if exchange.latencia:
+                    time.sleep(exchange.latencia)
+                if not self._admitir(self.command, ruta, params):
+                    return
+                if handler is None:
+                    self._responder(404, {"code": -1, "msg": f"Ruta no soportada: {ruta}"})
+                    return
+                try:
+                    self._responder(200, handler(params))
+                except KeyError:
+                    self._responder(400, {"code": -1121, "msg": "Invalid symbol."})
+                except RechazoFiltro as e:
+                    self._responder(400, {"code": -1013, "msg": f"Filter failure: {e}"})
+
+            do_PUT = do_POST
+
+            def _admitir(self, metodo, ruta, params):
+                self._peso, retry_after = exchange._contabilizar(metodo, ruta, params)
+                if retry_after is None:
+                    return True
+                self._responder(429, {"code": -1003, "msg": "Too many requests."},
+                                {"Retry-After": str(retry_after)})
+                return False
+
+            def _responder(self, estado, cuerpo, cabeceras=None):
+                datos = json.dumps(cuerpo).encode()
+                self.send_response(estado)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(datos)))
+                self.send_header("X-MBX-USED-WEIGHT-1M", str(self._peso))
+                for nombre, valor in (cabeceras or {}).items():
+                    self.send_header(nombre, valor)
+                self.end_headers()
+                self.wfile.write(datos)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+class StreamLocal:
+    """Servidor WebSocket local con el protocolo de streams combinados de Binance"""
+
+    def __init__(self, host="127.0.0.1", puerto=0):
+        self._host = host
+        self._puerto = puerto
+        self._loop = asyncio.new_event_loop()
+        self._servidor = None
+        self._clientes = {}         # conexión -> streams suscritos
+        self._usuarios = {}         # conexión del user-data stream -> listenKey
+        self._suscrito = threading.Condition()
+        self._hilo = None
+
+    @property
+    def url(self):
+        return f"ws://{self._host}:{self._puerto}/stream"
+
+    @property
+    def url_usuario(self):
+        return f"ws://{self._host}:{self._puerto}/ws"
+
+    def iniciar(self):
+        listo = threading.Event()
+
+        async def abrir():
+            return await serve(self._atender, self._host, self._puerto)
+
+        def ejecutar():
+            asyncio.set_event_loop(self._loop)
+            self._servidor = self._loop.run_until_complete(abrir())
+            self._puerto = self._servidor.sockets[0].getsockname()[1]
+            listo.set()
+            self._loop.run_forever()
+
+        self._hilo = threading.Thread(target=ejecutar, daemon=True)
+        self._hilo.start()
+        listo.wait()
+        return self
+
+    def detener(self):
+        async def cerrar():
+            self._servidor.close()
+            await self._servidor.wait_closed()
+        asyncio.run_coroutine_threadsafe(cerrar(), self._loop).result(timeout=5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._hilo.join(timeout=5)
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.detener()
+
+    def esperar_suscripciones(self, n_streams, timeout=10):
+        """Espera a que algún cliente esté suscrito a al menos n_streams"""
+        with self._suscrito:
+            return self._suscrito.wait_for(
+                lambda: any(len(s) >= n_streams for s in self._clientes.values()), timeout
+            )
+
+    def publicar(self, stream, datos):
+        """Envía un evento a los clientes suscritos al stream (desde cualquier hilo)"""
+        mensaje = json.dumps({"stream": stream, "data": datos})
+        asyncio.run_coroutine_threadsafe(self._difundir([(stream, mensaje)]), self._loop).result()
+
+    def emitir_sintetico(self, simbolos, total):
+        """
+        Envía `total` mensajes miniTicker/bookTicker alternados sobre los símbolos.
+        Devuelve el último (bid, ask, precio) enviado por símbolo para verificar.
+        """
+        ultimos = {}
+        mensajes = []
+        for n in range(total):
+            symbol = simbolos[n % len(simbolos)]
+            precio = 1.0 + n * 1e-6
+            bid, ask, ultimo = ultimos.get(symbol, (None, None, None))
+            if (n // len(simbolos)) % 2 == 0:
+                stream = f"{symbol.lower()}@bookTicker"
+                bid, ask = precio - 1e-7, precio + 1e-7
+                datos = {"u": n, "s": symbol, "b": f"{bid:.8f}", "B": "1.0", "a": f"{ask:.8f}", "A": "1.0"}
+            else:
+                stream = f"{symbol.lower()}@miniTicker"
+                ultimo = precio
+                datos = {"e": "24hrMiniTicker", "E": n, "s": symbol, "c": f"{ultimo:.8f}",
+                         "o": "1.0", "h": "2.0", "l": "0.5", "v": "100", "q": "100"}
+            ultimos[symbol] = (bid, ask, ultimo)
+            mensajes.append((stream, json.dumps({"stream": stream, "data": datos})))
+        asyncio.run_coroutine_threadsafe(self._difundir(mensajes), self._loop).result()
+        return {s: tuple(None if v is None else float(f"{v:.8f}") for v in t) for s, t in ultimos.items()}
+
+    def publicar_usuario(self, eventos, listen_key=None):
+        """Envía eventos del user-data stream a las conexiones /ws/<listenKey> (todas si no se indica)"""
+        asyncio.run_coroutine_threadsafe(self._enviar_usuario(eventos, listen_key), self._loop).result(timeout=5)
+
+    def programar_usuario(self, eventos, listen_key, retraso):
+        """Como publicar_usuario, pero sin bloquear y tras `retraso` segundos"""
+        def programar():
+            self._loop.call_later(retraso, lambda: asyncio.ensure_future(self._enviar_usuario(eventos, listen_key)))
+        self._loop.call_soon_threadsafe(programar)
+
+    async def _enviar_usuario(self, eventos, listen_key):
+        mensajes = [json.dumps(e) for e in eventos]
+        for ws, clave in list(self._usuarios.items()):
+            if listen_key is None or clave == listen_key:
+                for mensaje in mensajes:
+                    await ws.send(mensaje)
+
+    def cortar_conexiones(self):
+        """Cierra todas las conexiones abiertas (para probar la reconexión)"""
+        async def cortar():
+            for ws in list(self._clientes) + list(self._usuarios):
+                await ws.close()
+        asyncio.run_coroutine_threadsafe(cortar(), self._loop).result(timeout=5)
+
+    async def _difundir(self, mensajes):
+        for stream, mensaje in mensajes:
+            for ws, streams in list(self._clientes.items()):
+                if stream in streams:
+                    await ws.send(mensaje)
+
+    async def _atender(self, ws):
+        if ws.request.path.startswith("/ws/"):
+            # User-data stream: solo recibe eventos publicados con publicar_usuario
+            self._usuarios[ws] = ws.request.path[len("/ws/"):]
+            try:
+                await ws.wait_closed()
+            finally:
+                self._usuarios.pop(ws, None)
+            return
+
+        self._clientes[ws] = set()
+        try:
+            async for mensaje in ws:
+                peticion = json.loads(mensaje)
+                if peticion.get("method") == "SUBSCRIBE":
+                    with self._suscrito:
+                        self._clientes[ws].update(peticion["params"])
+                        self._suscrito.notify_all()
+                await ws.send(json.dumps({"result": None, "id": peticion.get("id")}))
+        except Exception:
+            pass
+        finally:
+            self._clientes.pop(ws, None)
+
+
+class TelegramLocal:
+    """Servidor HTTP que imita sendMessage/getMe de la Bot API, con el límite por chat de Telegram"""
+
+    def __init__(self, intervalo_chat=1.0, retry_after=1, host="127.0.0.1", puerto=0):
+        self.intervalo_chat = intervalo_chat
+        self.retry_after = retry_after
+        self.mensajes = {}          # chat_id -> textos recibidos
+        self.peticiones = 0
+        self.rechazos_429 = 0
+        self._ultimo = {}           # chat_id -> monotonic del último mensaje aceptado
+        self._siguiente = 1
+        self._lock = threading.Lock()
+        self._servidor = _ServidorHTTP((host, puerto), self._crear_handler())
+        self._hilo = None
+
+    @property
+    def url(self):
+        host, puerto = self._servidor.server_address[:2]
+        return f"http://{host}:{puerto}"
+
+    def iniciar(self):
+        self._hilo = threading.Thread(target=self._servidor.serve_forever, daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.detener()
+
+    def _send_message(self, params):
+        chat_id = str(params["chat_id"])
+        with self._lock:
+            self.peticiones += 1
+            ahora = time.monotonic()
+            if ahora - self._ultimo.get(chat_id, -1e9) < self.intervalo_chat:
+                self.rechazos_429 += 1
+                return 429, {"ok": False, "error_code": 429,
+                             "description": f"Too Many Requests: retry after {self.retry_after}",
+                             "parameters": {"retry_after": self.retry_after}}
+            self._ultimo[chat_id] = ahora
+            self.mensajes.setdefault(chat_id, []).append(params["text"])
+            message_id = self._siguiente
+            self._siguiente += 1
+        return 200, {"ok": True, "result": {
+            "message_id": message_id, "date": int(time.time()), "text": params["text"],
+            "chat": {"id": int(chat_id), "type": "private"},
+        }}
+
+    def _get_me(self, params):
+        return 200, {"ok": True, "result": {
+            "id": 1, "is_bot": True, "first_name": "Local", "username": "local_bot",
+        }}
+
+    def _crear_handler(self):
+        telegram = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                metodo = self.path.rsplit("/", 1)[-1]
+                longitud = int(self.headers.get("Content-Length") or 0)
+                cuerpo = self.rfile.read(longitud).decode() if longitud else ""
+                if self.headers.get("Content-Type", "").startswith("application/json"):
+                    params = json.loads(cuerpo or "{}")
+                else:
+                    params = {k: v[0] for k, v in parse_qs(cuerpo).items()}
+                handler = {"sendMessage": telegram._send_message, "getMe": telegram._get_me}.get(metodo)
+                if handler is None:
+                    self._responder(404, {"ok": False, "error_code": 404, "description": "Not Found"})
+                    return
+                self._responder(*handler(params))
+
+            def _responder(self, estado, cuerpo):
+                datos = json.dumps(cuerpo).encode()
+                self.send_response(estado)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(datos)))
+                self.end_headers()
+                self.wfile.write(datos)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
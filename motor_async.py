@@ -0,0 +1,77 @@
+"""
+Motor de trading asíncrono para el bot multiusuario.
+Cada sesión de usuario corre como una tarea asyncio dentro de un único event
+loop (el de la aplicación de Telegram), con concurrencia acotada hacia el
+exchange, cancelación cooperativa para detenerla y cierre ordenado.
+"""
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SesionActiva(Exception):
+    """Ya hay una sesión en curso para esa clave"""
+
+
+class MotorTrading:
+    def __init__(self, max_concurrencia=100):
+        # Peticiones simultáneas máximas hacia el exchange, sumando todas las sesiones
+        self.max_concurrencia = max_concurrencia
+        self._semaforo = None
+        self._sesiones = {}
+
+    @property
+    def semaforo(self):
+        # Se crea dentro del loop que lo usa
+        if self._semaforo is None:
+            self._semaforo = asyncio.Semaphore(self.max_concurrencia)
+        return self._semaforo
+
+    async def llamar(self, funcion, *args, **kwargs):
+        """Ejecuta una llamada asíncrona al exchange respetando el límite de concurrencia"""
+        async with self.semaforo:
+            return await funcion(*args, **kwargs)
+
+    # --- Sesiones ---
+
+    def activa(self, clave):
+        tarea = self._sesiones.get(clave)
+        return tarea is not None and not tarea.done()
+
+    def sesiones_activas(self):
+        # Copia de una vez: el scrape de métricas lo llama desde otro hilo
+        return sum(1 for t in list(self._sesiones.values()) if not t.done())
+
+    def iniciar_sesion(self, clave, corrutina, *args):
+        """Lanza corrutina(*args) como tarea de la sesión `clave`"""
+        if self.activa(clave):
+            raise SesionActiva(clave)
+        tarea = asyncio.create_task(corrutina(*args), name=f"sesion-{clave}")
+        tarea.add_done_callback(lambda t: self._al_terminar(clave, t))
+        self._sesiones[clave] = tarea
+        return tarea
+
+    async def detener_sesion(self, clave, timeout=10):
+        """Cancela la sesión y espera a que libere sus recursos; False si no había sesión"""
+        tarea = self._sesiones.get(clave)
+        if tarea is None or tarea.done():
+            return False
+        tarea.cancel()
+        await asyncio.wait([tarea], timeout=timeout)
+        return True
+
+    async def cerrar(self, timeout=10):
+        """Cancela todas las sesiones y espera a que terminen"""
+        tareas = [t for t in self._sesiones.values() if not t.done()]
+        for tarea in tareas:
+            tarea.cancel()
+        if tareas:
+            await asyncio.wait(tareas, timeout=timeout)
+        self._sesiones.clear()
+
+    def _al_terminar(self, clave, tarea):
+        if self._sesiones.get(clave) is tarea:
+            del self._sesiones[clave]
+        if not tarea.cancelled() and tarea.exception() is not None:
+            logger.error("Sesión %s terminó con error: %s", clave, tarea.exception())
@@ -0,0 +1,231 @@
+"""
+Motor de estrategias para todo el universo de símbolos a la vez.
+
+El estado vivo es una matriz símbolos × rasgos (precio, bid, ask y los
+indicadores que pide la estrategia), guardada por columnas para que cada rasgo
+sea un vector contiguo. En cada tick se actualizan los indicadores incrementales
+de indicadores.py para todos los símbolos, la estrategia calcula sus señales con
+una sola llamada vectorizada (+1 comprar, -1 vender, 0 nada) y el motor solo
+convierte en IntencionOrden los símbolos cuya señal cambia la posición. Así
+decidir sobre cientos de pares cuesta microsegundos en lugar de un bucle Python
+por par con sleeps.
+
+Las estrategias son clases con indicadores(simbolos) -> {nombre: indicador
+incremental alimentado con el precio} y senales(rasgos) -> array (S,). Los
+precios salen del AlmacenTickers del stream de mercado (ejecutar) o de
+cualquier array alineado con los símbolos (tick).
+
+Un símbolo sin precio todavía (suspendido, sin operaciones) no frena al resto:
+los símbolos que reciben su primer precio en el mismo tick forman una cohorte
+con sus propios indicadores, que empiezan su calentamiento ese tick, y las
+filas sin precio quedan fuera de las señales.
+"""
+import logging
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from datos_mercado import ASK, BID, ULTIMO
+from indicadores import EMA, RSI
+
+logger = logging.getLogger(__name__)
+
+COMPRAR, NADA, VENDER = 1, 0, -1
+COLUMNAS_MERCADO = ("precio", "bid", "ask")
+INTERVALO_TICK = 1.0      # segundos entre ticks leyendo el almacén (el miniTicker llega cada ~1 s)
+
+
+@dataclass(frozen=True, slots=True)
+class IntencionOrden:
+    symbol: str
+    lado: str            # "BUY" / "SELL"
+    cantidad: float
+    precio: float        # precio del tick que la generó, de referencia
+
+
+class Rasgos:
+    """Columnas de la matriz por nombre: rasgos.precio, rasgos["ema_rapida"] (vistas, sin copiar)"""
+
+    def __init__(self, matriz, columnas):
+        self._matriz = matriz
+        self._indice = {nombre: j for j, nombre in enumerate(columnas)}
+
+    def __getitem__(self, nombre):
+        return self._matriz[:, self._indice[nombre]]
+
+    def __getattr__(self, nombre):
+        try:
+            return self[nombre]
+        except KeyError:
+            raise AttributeError(nombre) from None
+
+
+# --- Estrategias ---
+
+class CruceEMA:
+    """Largo mientras la EMA rápida está por encima de la lenta: compra al cruzar hacia arriba, vende al cruzar hacia abajo"""
+
+    def __init__(self, rapida=9, lenta=21):
+        self.rapida = rapida
+        self.lenta = lenta
+
+    def indicadores(self, simbolos):
+        return {"ema_rapida": EMA(self.rapida, simbolos), "ema_lenta": EMA(self.lenta, simbolos)}
+
+    def senales(self, r):
+        arriba = r.ema_rapida > r.ema_lenta
+        abajo = r.ema_rapida < r.ema_lenta
+        return arriba.astype(np.int8) - abajo.astype(np.int8)
+
+
+class RSIExtremos:
+    """Compra en sobreventa y vende en sobrecompra"""
+
+    def __init__(self, periodo=14, sobreventa=30, sobrecompra=70):
+        self.periodo = periodo
+        self.sobreventa = sobreventa
+        self.sobrecompra = sobrecompra
+
+    def indicadores(self, simbolos):
+        return {"rsi": RSI(self.periodo, simbolos)}
+
+    def senales(self, r):
+        return (r.rsi < self.sobreventa).astype(np.int8) - (r.rsi > self.sobrecompra).astype(np.int8)
+
+
+# --- Motor ---
+
+class MotorEstrategias:
+    """
+    Matriz símbolos × rasgos, una estrategia y la posición por símbolo (solo
+    largos, como spot). Cada compra es de `nominal` unidades de la moneda de
+    cotización; la venta cierra lo comprado.
+    """
+
+    def __init__(self, simbolos, estrategia, nominal=10.0):
+        self.simbolos = [s.upper() for s in simbolos]
+        self.estrategia = estrategia
+        self.nominal = nominal
+        n = len(self.simbolos)
+        self._nombres = tuple(estrategia.indicadores(1))
+        self._cohortes = []              # [(filas: slice o índices, {nombre: indicador})]
+        self.columnas = (*COLUMNAS_MERCADO, *self._nombres)
+        self._columna = {nombre: j for j, nombre in enumerate(self.columnas)}
+        self.matriz = np.full((n, len(self.columnas)), np.nan, order="F")
+        self.rasgos = Rasgos(self.matriz, self.columnas)
+        self.posicion = np.zeros(n, dtype=np.int8)
+        self.cantidades = np.zeros(n)
+        self.ticks = 0
+        self.intenciones = 0
+        self.ultimo_coste = 0.0          # segundos de la última decisión
+        self._precio = self.rasgos.precio
+        self._con_precio = np.zeros(n, dtype=bool)
+
+    @property
+    def listo(self):
+        """True cuando todos los símbolos tienen precio y sus indicadores pasaron el calentamiento"""
+        return bool(self._con_precio.all()) and all(
+            indicador.listo() for _, indicadores in self._cohortes for indicador in indicadores.values())
+
+    def _nueva_cohorte(self, filas):
+        """Indicadores propios para las filas que acaban de recibir su primer precio"""
+        if len(filas) == len(self.simbolos):
+            filas = slice(None)          # todo el universo: vistas en lugar de copias por índice
+        n = len(self.simbolos) if isinstance(filas, slice) else len(filas)
+        cohorte = (filas, self.estrategia.indicadores(n))
+        self._cohortes.append(cohorte)
+        return cohorte
+
+    def cargar(self, cierres):
+        """
+        Calienta los indicadores con un historial de cierres (S, T), p. ej. del
+        almacén de velas; los símbolos con huecos en el historial esperan a su
+        primer precio en vivo
+        """
+        cierres = np.asarray(cierres, dtype=np.float64)
+        filas = np.flatnonzero(~np.isnan(cierres).any(axis=1))
+        if filas.size:
+            filas, indicadores = self._nueva_cohorte(filas)
+            for nombre, indicador in indicadores.items():
+                self.matriz[filas, self._columna[nombre]] = indicador.cargar(cierres[filas])
+            self._precio[filas] = cierres[filas, -1]
+            self._con_precio[filas] = True
+        return self
+
+    def tick(self, precios, bid=None, ask=None):
+        """
+        Un paso con los precios de todos los símbolos (arrays alineados con
+        self.simbolos). Un símbolo sin dato en este tick conserva su último
+        precio; los que aún no tienen ninguno no avanzan indicadores ni generan
+        señales. Devuelve las intenciones de orden nuevas
+        """
+        inicio = time.perf_counter()
+        nuevos = ~np.isnan(precios)
+        primeros = np.flatnonzero(nuevos & ~self._con_precio)
+        np.copyto(self._precio, precios, where=nuevos)
+        self._con_precio |= nuevos
+        if bid is not None:
+            np.copyto(self.rasgos.bid, bid, where=~np.isnan(bid))
+        if ask is not None:
+            np.copyto(self.rasgos.ask, ask, where=~np.isnan(ask))
+        if primeros.size:
+            self._nueva_cohorte(primeros)
+        if not self._cohortes:
+            return []
+
+        self.ticks += 1
+        for filas, indicadores in self._cohortes:
+            precio = self._precio[filas]
+            for nombre, indicador in indicadores.items():
+                self.matriz[filas, self._columna[nombre]] = indicador.actualizar(precio)
+        senal = np.asarray(self.estrategia.senales(self.rasgos))
+
+        activos = self._con_precio
+        compras = np.flatnonzero((senal == COMPRAR) & (self.posicion == 0) & activos)
+        ventas = np.flatnonzero((senal == VENDER) & (self.posicion == 1) & activos)
+        intenciones = []
+        if compras.size:
+            cantidades = self.nominal / self._precio[compras]
+            self.cantidades[compras] = cantidades
+            self.posicion[compras] = 1
+            intenciones += [IntencionOrden(self.simbolos[i], "BUY", float(c), float(self._precio[i]))
+                            for i, c in zip(compras.tolist(), cantidades.tolist())]
+        if ventas.size:
+            self.posicion[ventas] = 0
+            intenciones += [IntencionOrden(self.simbolos[i], "SELL", float(self.cantidades[i]), float(self._precio[i]))
+                            for i in ventas.tolist()]
+            self.cantidades[ventas] = 0.0
+        self.intenciones += len(intenciones)
+        self.ultimo_coste = time.perf_counter() - inicio
+        return intenciones
+
+    def tick_almacen(self, almacen):
+        """Tick con el AlmacenTickers del stream de mercado (mismos símbolos y orden)"""
+        datos = almacen.datos
+        return self.tick(datos[:, ULTIMO], datos[:, BID], datos[:, ASK])
+
+    def corregir(self, symbol, posicion, cantidad=0.0):
+        """Ajusta la posición de un símbolo si su orden no se ejecutó como se esperaba"""
+        i = self.simbolos.index(symbol)
+        self.posicion[i] = posicion
+        self.cantidades[i] = cantidad
+
+    def ejecutar(self, almacen, al_emitir, callback_detener=None, intervalo=INTERVALO_TICK):
+        """
+        Bucle en vivo: un tick cada `intervalo` segundos leyendo el almacén y
+        al_emitir(intenciones) cuando hay alguna. Bloquea hasta callback_detener()
+        """
+        while callback_detener is None or not callback_detener():
+            time.sleep(intervalo)
+            intenciones = self.tick_almacen(almacen)
+            if intenciones:
+                try:
+                    al_emitir(intenciones)
+                except Exception:
+                    logger.exception("Error al ejecutar %d intenciones de orden", len(intenciones))
+
+    def resumen(self):
+        return (f"🧮 {len(self.simbolos)} símbolos × {len(self.columnas)} rasgos: {self.ticks} ticks, "
+                f"{self.intenciones} intenciones, {int(self.posicion.sum())} posiciones abiertas, "
+                f"última decisión en {self.ultimo_coste * 1e6:.0f} µs")
@@ -0,0 +1,222 @@
+"""
+Compra a mercado protegida con stop-loss y take-profit.
+
+Los niveles se calculan sobre el precio medio real del fill (no sobre un
+ticker previo) y la protección sale en una sola petición tras la compra:
+un OCO (take-profit LIMIT_MAKER + STOP_LOSS_LIMIT) si el símbolo lo admite.
+Si no, las dos órdenes se envían a la vez. En spot cada orden bloquea su
+cantidad, así que, si la cuenta no cubre ambas y el take-profit gana la
+carrera, se cancela y se coloca el stop-loss: la protección a la baja tiene
+prioridad. Se mide la latencia de cada tramo y el tiempo hasta quedar protegida.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from decimal import ROUND_DOWN, ROUND_HALF_UP, Decimal
+
+from binance.exceptions import BinanceAPIException, BinanceRequestException
+from requests.exceptions import RequestException
+
+from flujo_usuario import EstadoOrden
+
+HOLGURA_STOP = 0.01     # el límite del STOP_LOSS_LIMIT queda un 1 % por debajo del stop para asegurar el fill
+SALDO_INSUFICIENTE = -2010
+# Lo que puede fallar al enviar una orden: rechazo de Binance, respuesta ilegible o error de red
+ERRORES_ENVIO = (BinanceAPIException, BinanceRequestException, RequestException)
+
+_ejecutor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="protecciones")
+
+
+class ProteccionFallida(Exception):
+    """La compra se ejecutó pero el stop-loss no quedó colocado; `resultado` es la CompraProtegida"""
+
+    def __init__(self, resultado):
+        super().__init__(f"Compra sin stop-loss: {resultado.resumen()} ({resultado.errores})")
+        self.resultado = resultado
+
+
+@dataclass
+class CompraProtegida:
+    compra: dict
+    precio_entrada: float
+    cantidad: str                    # cantidad protegida, ajustada al stepSize
+    stop_loss: str
+    take_profit: str | None
+    modo: str = ""                   # "oco", "paralelo" o "stop"
+    protecciones: list = field(default_factory=list)     # respuestas de las órdenes de protección
+    latencias: dict = field(default_factory=dict)        # tramo -> segundos
+    errores: list = field(default_factory=list)
+
+    @property
+    def protegida(self):
+        return self.modo != "" and not any(tramo == "stop_loss" for tramo, _ in self.errores)
+
+    @property
+    def tiempo_hasta_protegida(self):
+        """Segundos desde el fill de la compra hasta que la protección quedó aceptada"""
+        return self.latencias.get("proteccion")
+
+    def resumen(self):
+        tramos = ", ".join(f"{tramo} {segundos * 1000:.0f} ms" for tramo, segundos in self.latencias.items())
+        estado = f"protegida ({self.modo})" if self.protegida else "SIN PROTECCIÓN"
+        return (f"{self.compra['symbol']}: {self.cantidad} @ {self.precio_entrada:.8g}, "
+                f"SL {self.stop_loss}, TP {self.take_profit or '-'}; {estado}; {tramos}")
+
+
+def _ajustar(valor, paso, redondeo=ROUND_DOWN):
+    """valor como texto múltiplo de `paso` (tickSize/stepSize de exchangeInfo)"""
+    paso = Decimal(paso)
+    if paso <= 0:
+        return format(Decimal(str(valor)), "f")
+    ajustado = (Decimal(str(valor)) / paso).to_integral_value(redondeo) * paso
+    return format(ajustado.normalize(), "f")
+
+
+def _info(client, par):
+    """(tickSize, stepSize, ocoAllowed, activo base); sin caché de símbolos, la precisión máxima de Binance"""
+    info = getattr(client, "simbolos", None) and client.simbolos.get(par)
+    if info is None:
+        return "0.00000001", "0.00000001", True, None
+    return ((info.filtro("PRICE_FILTER") or {}).get("tickSize", "0.00000001"),
+            (info.filtro("LOT_SIZE") or {}).get("stepSize", "0.00000001"),
+            info.oco_allowed, info.base_asset)
+
+
+def _cantidad_recibida(compra, estado, par, base):
+    """Lo ejecutado menos la comisión cobrada en el activo base"""
+    # Sin caché de símbolos, el activo base es el prefijo del símbolo
+    en_base = (lambda asset: asset == base) if base else (lambda asset: par.startswith(asset))
+    if not compra.get("fills"):
+        return estado.ejecutada - sum(c for asset, c in estado.comisiones.items() if asset and en_base(asset))
+    comision = sum(float(f["commission"]) for f in compra["fills"] if en_base(f.get("commissionAsset") or "-"))
+    return estado.ejecutada - comision
+
+
+def _mensaje(error):
+    return getattr(error, "message", None) or str(error)
+
+
+def _estado_final(client, compra, esperar):
+    """
+    EstadoOrden de la compra. Si la espera del fill vence (esperar devuelve None),
+    se usa la respuesta REST y, si no es final, se consulta la orden
+    """
+    estado = esperar(compra)
+    if estado is None:
+        estado = EstadoOrden.desde_respuesta(compra)
+    if not estado.final:
+        try:
+            estado = EstadoOrden.desde_respuesta(client.get_order(symbol=compra["symbol"], orderId=compra["orderId"]))
+        except ERRORES_ENVIO:
+            pass
+    return estado
+
+
+def _enviar(client, latencias, tramo, llamada, params):
+    """Envía una orden midiendo su latencia; devuelve (respuesta, None) o (None, error de ERRORES_ENVIO)"""
+    inicio = time.perf_counter()
+    try:
+        return llamada(**params), None
+    except ERRORES_ENVIO as e:
+        return None, e
+    finally:
+        latencias[tramo] = time.perf_counter() - inicio
+
+
+def comprar_protegido(client, par, cantidad, stop_loss_porcentaje, take_profit_porcentaje=None,
+                      esperar=EstadoOrden.desde_respuesta, usar_oco=None):
+    """
+    Compra `cantidad` de `par` a mercado y la protege en cuanto se conoce el fill.
+    `esperar` convierte la respuesta de la compra en su EstadoOrden final (p. ej.
+    binance_api.esperar_ejecucion con el user-data stream). `usar_oco=None` usa
+    el ocoAllowed del símbolo. Devuelve una CompraProtegida; los errores de la
+    compra se propagan, los de la protección quedan en `errores`.
+    """
+    latencias = {}
+    inicio = time.perf_counter()
+    compra = client.order_market_buy(symbol=par, quantity=cantidad)
+    latencias["compra"] = time.perf_counter() - inicio
+    estado = _estado_final(client, compra, esperar)
+    fill = time.perf_counter()
+
+    tick, paso, oco_permitido, base = _info(client, par)
+    entrada = estado.precio_medio
+    stop = entrada * (1 - stop_loss_porcentaje / 100)
+    resultado = CompraProtegida(
+        compra=compra,
+        precio_entrada=entrada,
+        cantidad=_ajustar(_cantidad_recibida(compra, estado, par, base), paso),
+        stop_loss=_ajustar(stop, tick, ROUND_HALF_UP),
+        take_profit=(_ajustar(entrada * (1 + take_profit_porcentaje / 100), tick, ROUND_HALF_UP)
+                     if take_profit_porcentaje else None),
+        latencias=latencias,
+    )
+    if not estado.ejecutada or Decimal(resultado.cantidad) <= 0:
+        resultado.errores.append(("compra", f"compra no ejecutada ({estado.status})"))
+        return resultado
+
+    orden_stop = dict(symbol=par, side="SELL", type="STOP_LOSS_LIMIT", timeInForce="GTC",
+                      quantity=resultado.cantidad, stopPrice=resultado.stop_loss,
+                      price=_ajustar(stop * (1 - HOLGURA_STOP), tick))
+    if resultado.take_profit is None:
+        resultado.modo = "stop"
+        _anotar(resultado, "stop_loss", *_enviar(client, latencias, "stop_loss", client.create_order, orden_stop))
+    elif usar_oco if usar_oco is not None else oco_permitido:
+        oco, error = _enviar(client, latencias, "oco", client.create_oco_order, dict(
+            symbol=par, side="SELL", quantity=resultado.cantidad,
+            aboveType="LIMIT_MAKER", abovePrice=resultado.take_profit,
+            belowType="STOP_LOSS_LIMIT", belowStopPrice=resultado.stop_loss,
+            belowPrice=orden_stop["price"], belowTimeInForce="GTC",
+        ))
+        if error is None:
+            resultado.modo = "oco"
+            resultado.protecciones.append(oco)
+        else:
+            resultado.errores.append(("oco", _mensaje(error)))
+            _en_paralelo(client, resultado, orden_stop)
+    else:
+        _en_paralelo(client, resultado, orden_stop)
+
+    latencias["proteccion"] = time.perf_counter() - fill
+    return resultado
+
+
+def retirar_protecciones(client, resultado):
+    """
+    Cancela las órdenes de protección que quedaron abiertas (el take-profit de
+    una compra sin stop-loss), para que la cantidad no siga bloqueada
+    """
+    for orden in list(resultado.protecciones):
+        try:
+            client.cancel_order(symbol=orden["symbol"], orderId=orden["orderId"])
+            resultado.protecciones.remove(orden)
+        except ERRORES_ENVIO as e:
+            resultado.errores.append(("cancelar_take_profit", _mensaje(e)))
+
+
+def _anotar(resultado, tramo, respuesta, error):
+    if respuesta is not None:
+        resultado.protecciones.append(respuesta)
+    if error is not None:
+        resultado.errores.append((tramo, error if isinstance(error, str) else _mensaje(error)))
+
+
+def _en_paralelo(client, resultado, orden_stop):
+    resultado.modo = "paralelo"
+    orden_tp = dict(symbol=orden_stop["symbol"], side="SELL", type="LIMIT_MAKER",
+                    quantity=resultado.cantidad, price=resultado.take_profit)
+    latencias = resultado.latencias
+    futuro_tp = _ejecutor.submit(_enviar, client, latencias, "take_profit", client.create_order, orden_tp)
+    stop, error_stop = _enviar(client, latencias, "stop_loss", client.create_order, orden_stop)
+    tp, error_tp = futuro_tp.result()
+    if tp is not None and error_stop is not None and getattr(error_stop, "code", None) == SALDO_INSUFICIENTE:
+        # El take-profit bloqueó la cantidad antes: se retira para colocar el stop-loss
+        try:
+            client.cancel_order(symbol=orden_stop["symbol"], orderId=tp["orderId"])
+            tp, error_tp = None, "cancelado: la cuenta no cubre los dos tramos y el stop-loss tiene prioridad"
+        except ERRORES_ENVIO as e:
+            # La cancelación pudo llegar igualmente: se reintenta el stop-loss de todos modos
+            resultado.errores.append(("cancelar_take_profit", _mensaje(e)))
+        stop, error_stop = _enviar(client, latencias, "stop_loss", client.create_order, orden_stop)
+    _anotar(resultado, "stop_loss", stop, error_stop)
+    _anotar(resultado, "take_profit", tp, error_tp)
@@ -0,0 +1,171 @@
+"""
+Planificador de pares de bot.py: cada par corre en su propio hilo.
+
+Cada trabajador repite el ciclo de su par (leer saldos, comprar, esperar el
+fill, vender...) sin esperar a los demás, así el tiempo de ciclo de un par es
+el de sus propias idas y vueltas y no crece con la lista de pares. Lo que
+comparten ya es seguro entre hilos (libro de saldos, gobernador de peso,
+diario, informe); el USDT se reparte con ReservaSaldo para que dos pares no
+gasten a la vez el mismo saldo. Detener es un Event: el hilo que llama a
+ejecutar() consulta el callback de parada y los trabajadores lo ven en el
+siguiente ciclo o durante su espera. Como todos los hilos usan la misma sesión
+HTTP del cliente, ampliar_conexiones() agranda su pool a un hueco por par.
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass
+
+from requests.adapters import DEFAULT_POOLSIZE, HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+ESPERA_INACTIVO = 1.0      # segundos de pausa de un par que no pudo operar (sin saldo, error)
+MAX_FALLOS_SEGUIDOS = 5    # ciclos fallidos seguidos tras los que un par deja de operar
+INTERVALO_CONTROL = 0.5    # cada cuánto se consulta el callback de parada
+
+
+def ampliar_conexiones(client, hilos):
+    """
+    requests guarda 10 conexiones por host: con más hilos, las que no caben se
+    abren y se cierran en cada petición. Sin efecto en clientes sin sesión HTTP
+    """
+    sesion = getattr(client, "session", None)
+    if sesion is None or hilos <= DEFAULT_POOLSIZE:
+        return
+    adaptador = HTTPAdapter(pool_maxsize=hilos)
+    sesion.mount("https://", adaptador)
+    sesion.mount("http://", adaptador)
+
+
+class SaldoInsuficiente(Exception):
+    """No queda saldo libre sin reservar para la orden"""
+
+
+class ReservaSaldo:
+    """Saldo de un activo comprometido por órdenes en curso de varios hilos"""
+
+    def __init__(self, disponible):
+        self._disponible = disponible      # función que devuelve el saldo libre actual
+        self._reservado = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def reservado(self):
+        return self._reservado
+
+    def reservar(self, cantidad):
+        """Compromete `cantidad` si cabe en el saldo libre menos lo ya reservado"""
+        # La lectura puede ir a la API: fuera del lock, lo que está en vuelo ya cuenta como reservado
+        disponible = self._disponible()
+        with self._lock:
+            libre = disponible - self._reservado
+            if libre < cantidad:
+                raise SaldoInsuficiente(f"libre {libre:.2f}, necesario {cantidad:.2f}")
+            self._reservado += cantidad
+
+    def liberar(self, cantidad):
+        with self._lock:
+            self._reservado = max(0.0, self._reservado - cantidad)
+
+
+@dataclass
+class EstadoPar:
+    par: str
+    ciclos: int = 0
+    errores: int = 0
+    ultimo_ciclo: float = 0.0      # segundos del último ciclo completo
+    total_ciclos: float = 0.0
+    fallos_seguidos: int = 0
+    retirado: bool = False         # dejó de operar por MAX_FALLOS_SEGUIDOS
+
+    @property
+    def ciclo_medio(self):
+        return self.total_ciclos / self.ciclos if self.ciclos else 0.0
+
+
+class PlanificadorPares:
+    """
+    Un hilo por par ejecutando trabajo(par) en bucle hasta la parada o el
+    límite de duración. trabajo devuelve False si no pudo operar, y entonces
+    el par espera ESPERA_INACTIVO antes de reintentar; tras `max_fallos`
+    fallos seguidos el par se retira (p. ej. una venta que nunca cabe en el saldo)
+    """
+
+    def __init__(self, pares, trabajo, duracion=300, espera_inactivo=ESPERA_INACTIVO,
+                 max_fallos=MAX_FALLOS_SEGUIDOS):
+        self.pares = list(dict.fromkeys(pares))
+        self.trabajo = trabajo
+        self.duracion = duracion
+        self.espera_inactivo = espera_inactivo
+        self.max_fallos = max_fallos
+        self.estados = {par: EstadoPar(par) for par in self.pares}
+        self._parada = threading.Event()
+        self._hilos = []
+
+    @property
+    def detenido(self):
+        return self._parada.is_set()
+
+    def detener(self):
+        self._parada.set()
+
+    def iniciar(self):
+        self._fin = time.monotonic() + self.duracion
+        for par in self.pares:
+            hilo = threading.Thread(target=self._trabajar, args=(par,), name=f"par-{par}", daemon=True)
+            hilo.start()
+            self._hilos.append(hilo)
+        return self
+
+    def ejecutar(self, callback_detener=None, al_controlar=None):
+        """
+        Lanza los trabajadores y bloquea hasta que terminan. Cada INTERVALO_CONTROL
+        consulta callback_detener y llama a al_controlar() (p. ej. informes parciales)
+        """
+        self.iniciar()
+        while not self._parada.wait(INTERVALO_CONTROL):
+            if time.monotonic() >= self._fin or (callback_detener is not None and callback_detener()):
+                self.detener()
+                break
+            if al_controlar is not None:
+                al_controlar()
+        self.esperar()
+        return self
+
+    def esperar(self, timeout=None):
+        for hilo in self._hilos:
+            hilo.join(timeout)
+
+    def _trabajar(self, par):
+        estado = self.estados[par]
+        while not self._parada.is_set() and time.monotonic() < self._fin:
+            inicio = time.perf_counter()
+            try:
+                completo = self.trabajo(par) is not False
+            except Exception:
+                logger.exception("Error en el ciclo de %s", par)
+                estado.errores += 1
+                completo = False
+            if completo:
+                estado.ultimo_ciclo = time.perf_counter() - inicio
+                estado.total_ciclos += estado.ultimo_ciclo
+                estado.ciclos += 1
+                estado.fallos_seguidos = 0
+                continue
+            estado.fallos_seguidos += 1
+            if estado.fallos_seguidos >= self.max_fallos:
+                logger.warning("%s falló %d ciclos seguidos: deja de operar", par, estado.fallos_seguidos)
+                estado.retirado = True
+                return
+            self._parada.wait(self.espera_inactivo)
+
+    def resumen(self):
+        ciclos = sum(e.ciclos for e in self.estados.values())
+        medios = [e.ciclo_medio for e in self.estados.values() if e.ciclos]
+        medio = sum(medios) / len(medios) if medios else 0.0
+        texto = f"🧵 {len(self.pares)} pares en paralelo: {ciclos} ciclos, {medio * 1000:.0f} ms de ciclo medio por par"
+        retirados = [e.par for e in self.estados.values() if e.retirado]
+        if retirados:
+            texto += f"; retirados por fallos seguidos: {', '.join(retirados)}"
+        return texto
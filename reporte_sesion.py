@@ -0,0 +1,143 @@
+"""
+Informe de una sesión de bot.py construido a partir de registros por par.
+
+Durante la sesión solo se guardan datos (saldos, precios, errores); el texto
+Markdown se genera al pedirlo, de una pasada, y sale ya troceado al límite de
+Telegram sin partir el bloque de un par entre dos mensajes. parcial() devuelve
+solo los pares añadidos desde el parcial anterior, para ir enviando el informe
+mientras la sesión sigue en marcha. Los pares de bot.py corren en hilos
+distintos, así que añadir registros, sumar totales y leerlos va con un lock.
+"""
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from telegram_report import MAX_CARACTERES, partir_mensaje
+
+TITULO = "*📊 INFORME DETALLADO DE OPERACIONES*"
+
+
+@dataclass
+class RegistroPar:
+    par: str
+    base: str
+    saldo_base: float
+    saldo_usdt: float
+    precio_compra: float | None = None
+    precio_venta: float | None = None
+    error: str | None = None             # "Saldo insuficiente para comprar", "Error al comprar: ..."
+    saldo_base_final: float | None = None
+    saldo_usdt_final: float | None = None
+    ts: float = field(default_factory=time.time)
+
+    def lineas(self):
+        yield f"*🔁 {self.par}*"
+        yield f"- Saldo inicial {self.base}: `{self.saldo_base:.6f}`"
+        yield f"- Saldo inicial USDT: `{self.saldo_usdt:.2f}`"
+        if self.precio_compra is not None:
+            yield f"✅ Compra realizada a: `${self.precio_compra:.4f}`"
+        if self.precio_venta is not None:
+            yield f"✅ Venta realizada a: `${self.precio_venta:.4f}`"
+        if self.error:
+            yield f"❌ _{self.error}_"
+        if self.saldo_base_final is not None:
+            yield f"- Saldo final {self.base}: `{self.saldo_base_final:.6f}`"
+            yield f"- Saldo final USDT: `{self.saldo_usdt_final:.2f}`"
+
+
+def trocear(bloques, limite=MAX_CARACTERES):
+    """Une bloques de texto en mensajes de como mucho `limite` caracteres sin partir ninguno"""
+    mensajes, actual = [], ""
+    for bloque in bloques:
+        candidato = f"{actual}\n\n{bloque}" if actual else bloque
+        if len(candidato) <= limite:
+            actual = candidato
+            continue
+        if actual:
+            mensajes.append(actual)
+        if len(bloque) <= limite:
+            actual = bloque
+        else:
+            # Un bloque que no cabe solo se corta por líneas
+            *completos, actual = partir_mensaje(bloque, limite)
+            mensajes.extend(completos)
+    if actual:
+        mensajes.append(actual)
+    return mensajes
+
+
+class ReporteSesion:
+    """Registros por par de una sesión, con totales y render troceado bajo demanda"""
+
+    def __init__(self, titulo=TITULO, limite=MAX_CARACTERES):
+        self.titulo = titulo
+        self.limite = limite
+        self.registros = []
+        self.total_compras = 0.0
+        self.total_ventas = 0.0
+        self.total_estimado = None
+        self._enviados = 0                   # registros ya incluidos en un parcial
+        self._lock = threading.Lock()
+
+    # --- Registro (sin formatear nada) ---
+
+    def par(self, par, base, saldo_base, saldo_usdt):
+        registro = RegistroPar(par, base, saldo_base, saldo_usdt)
+        with self._lock:
+            self.registros.append(registro)
+        return registro
+
+    def compra(self, registro, precio, cantidad):
+        with self._lock:
+            registro.precio_compra = precio
+            self.total_compras += precio * cantidad
+
+    def venta(self, registro, precio, cantidad):
+        with self._lock:
+            registro.precio_venta = precio
+            self.total_ventas += precio * cantidad
+
+    @property
+    def ganancia(self):
+        return self.total_ventas - self.total_compras
+
+    # --- Render ---
+
+    def _bloques(self, registros):
+        for registro in registros:
+            yield "\n".join(registro.lineas())
+
+    def _pie(self):
+        lineas = [
+            "-------------------------",
+            f"*💸 Total Comprado:* `${self.total_compras:.2f}`",
+            f"*💰 Total Vendido:* `${self.total_ventas:.2f}`",
+            f"*📈 Ganancia:* `${self.ganancia:.2f}`",
+            f"_🕒 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}_",
+        ]
+        if self.total_estimado is not None:
+            lineas.append(f"\n💼 *Total estimado final:* `${self.total_estimado:.2f}`")
+        return "\n".join(lineas)
+
+    def mensajes(self):
+        """Informe completo en mensajes listos para Telegram"""
+        with self._lock:
+            registros = list(self.registros)
+        return trocear([self.titulo, *self._bloques(registros), self._pie()], self.limite)
+
+    def parcial(self):
+        """Mensajes con los pares nuevos desde el último parcial y los totales hasta ahora ([] si no hay nada nuevo)"""
+        with self._lock:
+            nuevos = self.registros[self._enviados:]
+            self._enviados = len(self.registros)
+        if not nuevos:
+            return []
+        cabecera = f"*⏱ Parcial: {self._enviados} pares, ganancia `${self.ganancia:.2f}`*"
+        return trocear([cabecera, *self._bloques(nuevos)], self.limite)
+
+    def texto(self):
+        """Informe completo en un solo texto (consola y diario)"""
+        with self._lock:
+            registros = list(self.registros)
+        return "\n\n".join([self.titulo, *self._bloques(registros), self._pie()])
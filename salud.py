@@ -0,0 +1,114 @@
+"""
+Salud del proceso a partir de latidos de sus propios bucles.
+
+Cada parte que debe dar señales de vida (el event loop, el polling de
+Telegram, las peticiones a Binance, cada sesión de trading) tiene un Latido
+que marca al hacer su trabajo; marcar es guardar un time.monotonic(). /health
+solo compara la antigüedad de cada latido con su máximo, sin llamar a nada
+externo, y responde 200 o 503 con el detalle en JSON. Un latido con `activo`
+solo se vigila mientras esa función devuelve True (p. ej. Binance solo cuando
+hay sesiones en marcha). Los healthchecks de Docker se reducen a sondear(...)
+contra el puerto local.
+"""
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+TIPO_JSON = "application/json; charset=utf-8"
+
+
+class Latido:
+    """Última señal de vida de una parte del proceso y cuánto silencio se le tolera"""
+    __slots__ = ("nombre", "max_silencio", "activo", "ultimo", "marcas")
+
+    def __init__(self, nombre, max_silencio, activo=None):
+        self.nombre = nombre
+        self.max_silencio = max_silencio
+        self.activo = activo
+        self.ultimo = time.monotonic()      # al registrarse cuenta como latido: periodo de gracia
+        self.marcas = 0
+
+    def marcar(self):
+        self.ultimo = time.monotonic()
+        self.marcas += 1
+
+    def estado(self, ahora):
+        silencio = ahora - self.ultimo
+        vigilado = self.activo is None or bool(self.activo())
+        return {
+            "ok": not vigilado or silencio <= self.max_silencio,
+            "silencio": round(silencio, 1),
+            "max_silencio": self.max_silencio,
+            "vigilado": vigilado,
+            "marcas": self.marcas,
+        }
+
+
+class MonitorSalud:
+    """Latidos del proceso por nombre; los de trabajadores efímeros se retiran al terminar"""
+
+    def __init__(self):
+        self._latidos = {}
+        self._lock = threading.Lock()
+        self.inicio = time.monotonic()
+
+    def latido(self, nombre, max_silencio, activo=None):
+        """Devuelve el latido `nombre`, creándolo la primera vez"""
+        with self._lock:
+            latido = self._latidos.get(nombre)
+            if latido is None:
+                latido = self._latidos[nombre] = Latido(nombre, max_silencio, activo)
+            return latido
+
+    def retirar(self, nombre, latido=None):
+        """Quita el latido `nombre`; con `latido`, solo si sigue siendo ese mismo objeto"""
+        with self._lock:
+            if latido is None or self._latidos.get(nombre) is latido:
+                self._latidos.pop(nombre, None)
+
+    def estado(self, prefijo=None):
+        """(sano, {nombre: estado}) de los latidos cuyo nombre empieza por `prefijo` (todos si None)"""
+        ahora = time.monotonic()
+        with self._lock:
+            latidos = [l for l in self._latidos.values() if prefijo is None or l.nombre.startswith(prefijo)]
+        componentes = {}
+        for latido in latidos:
+            try:
+                componentes[latido.nombre] = latido.estado(ahora)
+            except Exception as e:
+                componentes[latido.nombre] = {"ok": False, "error": str(e)}
+        return all(c["ok"] for c in componentes.values()), componentes
+
+    def atascados(self):
+        return [nombre for nombre, estado in self.estado()[1].items() if not estado["ok"]]
+
+    def respuesta(self, parametros):
+        """Ruta /health para ServidorMetricas; ?componente=binance filtra por prefijo"""
+        sano, componentes = self.estado(parametros.get("componente"))
+        cuerpo = {
+            "sano": sano,
+            "activo_desde": round(time.monotonic() - self.inicio, 1),
+            "componentes": componentes,
+        }
+        return (200 if sano else 503), TIPO_JSON, json.dumps(cuerpo, ensure_ascii=False)
+
+
+def sondear(url, timeout=5):
+    """(True/False, texto) de un GET a /health local; lo usan los healthchecks de Docker"""
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as respuesta:
+            return True, respuesta.read().decode("utf-8")
+    except urllib.error.HTTPError as e:
+        return False, e.read().decode("utf-8", "replace")
+    except Exception as e:
+        return False, str(e)
+
+
+_monitor = MonitorSalud()
+
+
+def salud_compartida():
+    """Monitor único del proceso"""
+    return _monitor
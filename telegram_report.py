@@ -1,12 +1,220 @@
+"""
+Envío de reportes a Telegram sin bloquear el bucle de trading.
+Los mensajes se encolan y un hilo de fondo los envía por una única sesión HTTP
+keep-alive: agrupa los de cada chat que llegan dentro de una ventana corta,
+respeta el retry_after de los 429, parte los textos de más de 4096 caracteres
+y vacía la cola al salir del proceso.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import deque
+
 import requests
+from requests.adapters import HTTPAdapter
+
 from config import get_telegram_config
+from metricas import metricas_compartidas
+
+logger = logging.getLogger(__name__)
+
+URL_API = "https://api.telegram.org"
+MAX_CARACTERES = 4096
+VENTANA_AGRUPACION = 1.0      # segundos que se esperan mensajes del mismo chat antes de enviar
+INTERVALO_POR_CHAT = 1.0      # Telegram admite ~1 mensaje/s por chat
+MAX_COLA = 1000
+MAX_REINTENTOS = 5
+SEPARADOR = "\n\n"
+
+_metricas = metricas_compartidas()
+LATENCIA = _metricas.histograma("telegram_peticion_segundos", "Duración de las llamadas a la API de Telegram",
+                                ("metodo",))
+
+
+def partir_mensaje(texto, limite=MAX_CARACTERES):
+    """Divide el texto en trozos de como mucho `limite` caracteres, cortando por líneas si es posible"""
+    trozos = []
+    actual = ""
+    for linea in texto.split("\n"):
+        while len(linea) > limite:
+            if actual:
+                trozos.append(actual)
+                actual = ""
+            trozos.append(linea[:limite])
+            linea = linea[limite:]
+        candidato = f"{actual}\n{linea}" if actual else linea
+        if len(candidato) > limite:
+            trozos.append(actual)
+            candidato = linea
+        actual = candidato
+    if actual or not trozos:
+        trozos.append(actual)
+    return trozos
+
+
+class DespachadorTelegram:
+    """Cola acotada de mensajes con un hilo de envío y sesión HTTP persistente"""
+
+    def __init__(self, token, chat_id=None, url_base=URL_API, ventana=VENTANA_AGRUPACION,
+                 intervalo_chat=INTERVALO_POR_CHAT, max_cola=MAX_COLA, timeout=10):
+        self.chat_id = chat_id
+        self.ventana = ventana
+        self.intervalo_chat = intervalo_chat
+        self.timeout = timeout
+        self._url = f"{url_base}/bot{token}/sendMessage"
+        self._sesion = requests.Session()
+        self._sesion.mount(url_base, HTTPAdapter(pool_connections=1, pool_maxsize=1))
+        self._cola = deque(maxlen=max_cola)    # (chat_id, parse_mode, texto, encolado)
+        self._cambio = threading.Condition()
+        self._ocupado = False
+        self._ultimo_envio = {}                # chat_id -> monotonic del último envío
+        self._cerrado = False
+        # Monitorización
+        self.encolados = 0
+        self.procesados = 0
+        self.peticiones = 0
+        self.descartados = 0
+        self.reintentos_429 = 0
+        self._hilo = threading.Thread(target=self._ejecutar, name="despachador-telegram", daemon=True)
+        self._hilo.start()
+
+    # --- API pública ---
+
+    def enviar(self, mensaje, chat_id=None, parse_mode=None):
+        """Encola el mensaje y vuelve enseguida; si la cola está llena se descarta el más antiguo"""
+        chat_id = chat_id or self.chat_id
+        with self._cambio:
+            if self._cerrado:
+                logger.warning("Despachador de Telegram cerrado; mensaje descartado")
+                return
+            if len(self._cola) == self._cola.maxlen:
+                self.descartados += 1
+            self._cola.append((chat_id, parse_mode, str(mensaje), time.monotonic()))
+            self.encolados += 1
+            self._cambio.notify_all()
+
+    def pendientes(self):
+        with self._cambio:
+            return len(self._cola) + (1 if self._ocupado else 0)
+
+    def vaciar(self, timeout=30):
+        """Espera a que se envíe todo lo encolado; False si vence el timeout"""
+        with self._cambio:
+            return self._cambio.wait_for(lambda: not self._cola and not self._ocupado, timeout)
+
+    def cerrar(self, timeout=30):
+        """Envía lo pendiente y detiene el hilo"""
+        self.vaciar(timeout)
+        with self._cambio:
+            self._cerrado = True
+            self._cambio.notify_all()
+        self._hilo.join(timeout=5)
+        self._sesion.close()
+
+    # --- Hilo de envío ---
+
+    def _ejecutar(self):
+        while True:
+            with self._cambio:
+                self._cambio.wait_for(lambda: self._cola or self._cerrado)
+                if not self._cola:
+                    return
+                # Deja que lleguen más mensajes del mismo lote, salvo si estamos cerrando
+                limite = self._cola[0][3] + self.ventana
+                while not self._cerrado and (espera := limite - time.monotonic()) > 0:
+                    self._cambio.wait(espera)
+                lote = list(self._cola)
+                self._cola.clear()
+                self._ocupado = True
+            try:
+                for (chat_id, parse_mode), texto in self._agrupar(lote):
+                    for trozo in partir_mensaje(texto):
+                        self._enviar_trozo(chat_id, parse_mode, trozo)
+            finally:
+                with self._cambio:
+                    self._ocupado = False
+                    self._cambio.notify_all()
+
+    def _agrupar(self, lote):
+        # Los mensajes de cada chat y modo de formato se juntan, conservando el orden de llegada,
+        # sin pasar de MAX_CARACTERES: un mensaje ya troceado por quien lo envía no se vuelve a partir
+        grupos = {}
+        for chat_id, parse_mode, texto, _ in lote:
+            grupos.setdefault((chat_id, parse_mode), []).append(texto)
+            self.procesados += 1
+        agrupados = []
+        for clave, textos in grupos.items():
+            actual = textos[0]
+            for texto in textos[1:]:
+                if len(actual) + len(SEPARADOR) + len(texto) <= MAX_CARACTERES:
+                    actual += SEPARADOR + texto
+                else:
+                    agrupados.append((clave, actual))
+                    actual = texto
+            agrupados.append((clave, actual))
+        return agrupados
+
+    def _enviar_trozo(self, chat_id, parse_mode, texto):
+        for intento in range(MAX_REINTENTOS):
+            self._respetar_intervalo(chat_id)
+            payload = {"chat_id": chat_id, "text": texto}
+            if parse_mode:
+                payload["parse_mode"] = parse_mode
+            try:
+                inicio = time.perf_counter()
+                try:
+                    respuesta = self._sesion.post(self._url, data=payload, timeout=self.timeout)
+                finally:
+                    LATENCIA.observar(time.perf_counter() - inicio, "sendMessage")
+                self.peticiones += 1
+                self._ultimo_envio[chat_id] = time.monotonic()
+                datos = respuesta.json()
+            except Exception as e:
+                logger.warning("Error enviando a Telegram (intento %s): %s", intento + 1, e)
+                time.sleep(min(2 ** intento, 30))
+                continue
+
+            if datos.get("ok"):
+                return
+            if respuesta.status_code == 429:
+                retry_after = datos.get("parameters", {}).get("retry_after", 1)
+                self.reintentos_429 += 1
+                time.sleep(retry_after)
+                continue
+            if parse_mode and respuesta.status_code == 400:
+                # Markdown mal formado (p. ej. un error con '_'): se reenvía como texto plano
+                parse_mode = None
+                continue
+            print(f"❌ Error enviando mensaje a Telegram: {datos.get('description')}")
+            return
+        print(f"❌ Mensaje a Telegram descartado tras {MAX_REINTENTOS} intentos")
+
+    def _respetar_intervalo(self, chat_id):
+        ultimo = self._ultimo_envio.get(chat_id)
+        if ultimo is not None:
+            espera = ultimo + self.intervalo_chat - time.monotonic()
+            if espera > 0:
+                time.sleep(espera)
+
+
+_despachador = None
+_lock_despachador = threading.Lock()
+
+
+def despachador():
+    """Despachador único del proceso, creado con la configuración de Telegram del .env"""
+    global _despachador
+    with _lock_despachador:
+        if _despachador is None:
+            token, chat_id = get_telegram_config()
+            _despachador = DespachadorTelegram(token, chat_id)
+            atexit.register(_despachador.cerrar)
+            _metricas.medidor("telegram_despachador_pendientes", "Mensajes en la cola del despachador de Telegram",
+                              funcion=_despachador.pendientes)
+        return _despachador
 
-BOT_TOKEN, CHAT_ID = get_telegram_config()
 
-def enviar_reporte_telegram(mensaje):
-    url = f"https://api.telegram.org/bot{BOT_TOKEN}/sendMessage"
-    payload = {"chat_id": CHAT_ID, "text": mensaje}
-    try:
-        requests.post(url, data=payload)
-    except Exception as e:
-        print(f"❌ Error enviando mensaje a Telegram: {e}")
+def enviar_reporte_telegram(mensaje, parse_mode=None):
+    """Encola un mensaje para el chat configurado; no bloquea"""
+    despachador().enviar(mensaje, parse_mode=parse_mode)
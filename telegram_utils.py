@@ -1,20 +1,174 @@
 # telegram_utils.py
+"""
+Puente para enviar mensajes de Telegram desde código síncrono (Tkinter, hilos
+de trading) con un único event loop en un hilo de fondo y un único
+telegram.Bot con su pool HTTP, en lugar de crear y destruir un loop por envío.
+"""
 import asyncio
+import atexit
+import logging
+import threading
+import time
+from collections import deque
+
 from telegram import Bot
-from telegram.error import TelegramError
+from telegram.error import RetryAfter
+from telegram.request import HTTPXRequest
+
+from metricas import metricas_compartidas
+
+logger = logging.getLogger(__name__)
+
+CONEXIONES = 8               # envíos simultáneos (tamaño del pool HTTP del Bot)
+MUESTRAS_LATENCIA = 1000
+
+_metricas = metricas_compartidas()
+LATENCIA = _metricas.histograma("telegram_peticion_segundos", "Duración de las llamadas a la API de Telegram",
+                                ("metodo",))
+EN_CURSO = _metricas.medidor("telegram_peticiones_en_curso", "Llamadas a la API de Telegram sin respuesta todavía")
+
+
+class PeticionMedida(HTTPXRequest):
+    """
+    HTTPXRequest que mide cada llamada a la API (sendMessage, getUpdates...) por
+    método; con `latido` (salud.Latido) lo marca en cada respuesta 200
+    """
+
+    def __init__(self, *args, latido=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latido = latido
+
+    async def do_request(self, url, method, request_data=None, **kwargs):
+        inicio = time.perf_counter()
+        EN_CURSO.sumar(1)
+        try:
+            codigo, cuerpo = await super().do_request(url, method, request_data, **kwargs)
+            if codigo == 200 and self.latido is not None:
+                self.latido.marcar()
+            return codigo, cuerpo
+        finally:
+            EN_CURSO.sumar(-1)
+            LATENCIA.observar(time.perf_counter() - inicio, url.rsplit("/", 1)[-1])
+
+
+class PuenteTelegram:
+    """Event loop propio en un hilo daemon con un Bot compartido por todos los envíos"""
+
+    def __init__(self, token, base_url=None, conexiones=CONEXIONES):
+        self._loop = asyncio.new_event_loop()
+        argumentos = {"base_url": base_url} if base_url else {}
+        self._bot = Bot(token, request=PeticionMedida(connection_pool_size=conexiones), **argumentos)
+        self._semaforo = asyncio.Semaphore(conexiones)
+        self._lock = threading.Lock()
+        self._pendientes = 0
+        self._latencias = deque(maxlen=MUESTRAS_LATENCIA)
+        # Monitorización
+        self.enviados = 0
+        self.errores = 0
+        self._hilo = threading.Thread(target=self._loop.run_forever, name="puente-telegram", daemon=True)
+        self._hilo.start()
+
+    # --- API síncrona ---
+
+    def enviar(self, chat_id, texto, parse_mode=None):
+        """Programa el envío y devuelve un concurrent.futures.Future con el Message enviado"""
+        with self._lock:
+            self._pendientes += 1
+        return asyncio.run_coroutine_threadsafe(
+            self._enviar(chat_id, texto, parse_mode, time.perf_counter()), self._loop
+        )
+
+    def notificar(self, chat_id, texto, parse_mode=None):
+        """Envío sin esperar respuesta; los errores solo se registran en el log"""
+        futuro = self.enviar(chat_id, texto, parse_mode)
+        futuro.add_done_callback(_registrar_error)
+        return futuro
+
+    def enviar_y_esperar(self, chat_id, texto, parse_mode=None, timeout=15):
+        """Bloquea hasta que Telegram confirma el mensaje; propaga el error si falla"""
+        return self.enviar(chat_id, texto, parse_mode).result(timeout)
+
+    def pendientes(self):
+        """Envíos programados que aún no han terminado (profundidad de la cola)"""
+        with self._lock:
+            return self._pendientes
+
+    def estadisticas(self):
+        with self._lock:
+            latencias = sorted(self._latencias)
+            pendientes = self._pendientes
+        def percentil(p):
+            return round(latencias[min(len(latencias) - 1, int(len(latencias) * p))] * 1000, 1) if latencias else 0.0
+        return {
+            "pendientes": pendientes,
+            "enviados": self.enviados,
+            "errores": self.errores,
+            "latencia_p50_ms": percentil(0.50),
+            "latencia_p95_ms": percentil(0.95),
+            "latencia_max_ms": round(latencias[-1] * 1000, 1) if latencias else 0.0,
+        }
+
+    def cerrar(self, timeout=10):
+        """Espera los envíos pendientes, cierra la sesión HTTP del Bot y detiene el loop"""
+        if not self._loop.is_running():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._cerrar(), self._loop).result(timeout)
+        except Exception as e:
+            logger.warning("Cierre del puente de Telegram incompleto: %s", e)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._hilo.join(timeout=5)
+
+    # --- Dentro del loop ---
+
+    async def _enviar(self, chat_id, texto, parse_mode, inicio):
+        try:
+            async with self._semaforo:
+                # La primera vez abre el pool HTTP y valida el token (getMe); después no hace nada
+                await self._bot.initialize()
+                try:
+                    mensaje = await self._bot.send_message(chat_id=chat_id, text=texto, parse_mode=parse_mode)
+                except RetryAfter as e:
+                    await asyncio.sleep(e.retry_after)
+                    mensaje = await self._bot.send_message(chat_id=chat_id, text=texto, parse_mode=parse_mode)
+            self.enviados += 1
+            return mensaje
+        except Exception:
+            self.errores += 1
+            raise
+        finally:
+            with self._lock:
+                self._pendientes -= 1
+                self._latencias.append(time.perf_counter() - inicio)
+
+    async def _cerrar(self):
+        tareas = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        if tareas:
+            await asyncio.gather(*tareas, return_exceptions=True)
+        await self._bot.shutdown()
+
+
+def _registrar_error(futuro):
+    if not futuro.cancelled() and futuro.exception() is not None:
+        logger.error("❌ Error de Telegram: %s", futuro.exception())
+
+
+_puentes = {}
+_lock_puentes = threading.Lock()
+
+
+def puente_telegram(token, base_url=None):
+    """Puente único por token en todo el proceso; se cierra al salir"""
+    with _lock_puentes:
+        clave = (token, base_url)
+        if clave not in _puentes:
+            _puentes[clave] = PuenteTelegram(token, base_url)
+            atexit.register(_puentes[clave].cerrar)
+            _metricas.medidor("telegram_puente_pendientes", "Envíos programados en el puente de Telegram sin terminar",
+                              funcion=_puentes[clave].pendientes)
+        return _puentes[clave]
 
-async def _send_async(bot, chat_id, msg):
-    await bot.send_message(chat_id=chat_id, text=msg, parse_mode="Markdown")
 
 def send_telegram_message(bot, chat_id, msg):
-    try:
-        loop = asyncio.get_event_loop()
-        if loop.is_running():
-            asyncio.run_coroutine_threadsafe(_send_async(bot, chat_id, msg), loop)
-        else:
-            loop.run_until_complete(_send_async(bot, chat_id, msg))
-    except RuntimeError:
-        # Si no hay loop o ya está cerrado, creamos uno nuevo
-        asyncio.run(_send_async(bot, chat_id, msg))
-    except TelegramError as e:
-        print(f"❌ Error de Telegram: {e}")
+    """Envía msg (Markdown) con el puente del token de `bot`; devuelve un Future, sin bloquear"""
+    return puente_telegram(bot.token).notificar(chat_id, msg, parse_mode="Markdown")
@@ -0,0 +1,368 @@
+"""
+Validación y normalización local de órdenes con los filtros de exchangeInfo.
+
+Por símbolo se precalculan una vez, en Decimal, los pasos y límites de
+PRICE_FILTER, LOT_SIZE, MARKET_LOT_SIZE, NOTIONAL/MIN_NOTIONAL y
+PERCENT_PRICE(_BY_SIDE) a partir de la caché de símbolos. Antes de enviar una
+orden se ajusta la cantidad al stepSize (hacia abajo) y los precios al tickSize,
+y lo que Binance rechazaría igualmente (por debajo de minQty, nominal
+insuficiente, precio fuera de la banda) se rechaza aquí con OrdenInvalida, que
+es una BinanceAPIException -1013 como la del servidor: quien ya maneja el
+rechazo de Binance no cambia, pero no se gasta la ida y vuelta ni el cupo de
+órdenes. aplicar(client) envuelve create_order y create_oco_order, así que
+pasan por aquí order_market_buy, order_limit_sell, etc.
+
+Para el nominal de las órdenes a mercado y la banda de PERCENT_PRICE hace falta
+un precio de referencia: `precio_referencia(symbol)` si se da (p. ej. el stream
+de mercado) y si no, el último precio ejecutado que el validador ha visto en
+las respuestas de las órdenes. Sin ninguno, esas dos comprobaciones se omiten.
+"""
+import asyncio
+import inspect
+import json
+import threading
+from dataclasses import dataclass
+from decimal import ROUND_DOWN, ROUND_HALF_UP, Decimal
+
+from binance.exceptions import BinanceAPIException
+
+from metricas import metricas_compartidas
+
+FILTRO_RECHAZADO = -1013
+_PRECIOS = ("price", "stopPrice")
+_PRECIOS_OCO = ("abovePrice", "aboveStopPrice", "belowPrice", "belowStopPrice",
+                "price", "stopPrice", "stopLimitPrice")
+_CON_PRECIO = ("LIMIT", "LIMIT_MAKER", "STOP_LOSS_LIMIT", "TAKE_PROFIT_LIMIT")
+
+_metricas = metricas_compartidas()
+RECHAZADAS = _metricas.contador("ordenes_rechazadas_localmente",
+                                "Órdenes que Binance habría rechazado, paradas antes de enviarlas", ("filtro",))
+AJUSTADAS = _metricas.contador("ordenes_ajustadas", "Cantidades y precios ajustados al stepSize/tickSize",
+                               ("campo",))
+
+
+class OrdenInvalida(BinanceAPIException):
+    """Rechazo local con el mismo código (-1013) y mensaje que daría Binance"""
+
+    def __init__(self, symbol, filtro, detalle):
+        super().__init__(None, 400, json.dumps({"code": FILTRO_RECHAZADO, "msg": f"Filter failure: {filtro}"}))
+        self.symbol = symbol
+        self.filtro = filtro
+        self.detalle = detalle
+
+    def __str__(self):
+        return f"Orden inválida en {self.symbol} ({self.filtro}): {self.detalle}"
+
+
+def _decimal(parametros, clave):
+    """Decimal del filtro o None si falta o es 0 (en Binance, 0 desactiva el límite)"""
+    valor = (parametros or {}).get(clave)
+    if valor in (None, ""):
+        return None
+    valor = Decimal(str(valor))
+    return valor if valor > 0 else None
+
+
+def _ajustar(valor, paso, redondeo):
+    if paso is None:
+        return valor
+    return (valor / paso).to_integral_value(redondeo) * paso
+
+
+def _texto(valor):
+    return format(valor.normalize(), "f")
+
+
+@dataclass(frozen=True, slots=True)
+class ReglasSimbolo:
+    symbol: str
+    operable: bool
+    tick: Decimal | None = None
+    precio_min: Decimal | None = None
+    precio_max: Decimal | None = None
+    paso: Decimal | None = None
+    cantidad_min: Decimal | None = None
+    cantidad_max: Decimal | None = None
+    paso_mercado: Decimal | None = None
+    cantidad_min_mercado: Decimal | None = None
+    cantidad_max_mercado: Decimal | None = None
+    nominal_min: Decimal | None = None
+    nominal_max: Decimal | None = None
+    nominal_min_mercado: bool = True
+    nominal_max_mercado: bool = False
+    banda: tuple | None = None          # (abajo, arriba) de PERCENT_PRICE
+    banda_compra: tuple | None = None   # PERCENT_PRICE_BY_SIDE
+    banda_venta: tuple | None = None
+
+    @classmethod
+    def desde_info(cls, info):
+        precio = info.filtro("PRICE_FILTER")
+        lote = info.filtro("LOT_SIZE")
+        lote_mercado = info.filtro("MARKET_LOT_SIZE")
+        nominal = info.filtro("NOTIONAL")
+        minimo_antiguo = info.filtro("MIN_NOTIONAL")
+        porcentaje = info.filtro("PERCENT_PRICE")
+        por_lado = info.filtro("PERCENT_PRICE_BY_SIDE")
+        if nominal:
+            nominal_min, nominal_max = _decimal(nominal, "minNotional"), _decimal(nominal, "maxNotional")
+            al_mercado = (bool(nominal.get("applyMinToMarket", True)), bool(nominal.get("applyMaxToMarket", False)))
+        else:
+            nominal_min, nominal_max = _decimal(minimo_antiguo, "minNotional"), None
+            al_mercado = (bool((minimo_antiguo or {}).get("applyToMarket", True)), False)
+        return cls(
+            symbol=info.symbol,
+            operable=info.status == "TRADING",
+            tick=_decimal(precio, "tickSize"),
+            precio_min=_decimal(precio, "minPrice"),
+            precio_max=_decimal(precio, "maxPrice"),
+            paso=_decimal(lote, "stepSize"),
+            cantidad_min=_decimal(lote, "minQty"),
+            cantidad_max=_decimal(lote, "maxQty"),
+            paso_mercado=_decimal(lote_mercado, "stepSize"),
+            cantidad_min_mercado=_decimal(lote_mercado, "minQty"),
+            cantidad_max_mercado=_decimal(lote_mercado, "maxQty"),
+            nominal_min=nominal_min,
+            nominal_max=nominal_max,
+            nominal_min_mercado=al_mercado[0],
+            nominal_max_mercado=al_mercado[1],
+            banda=((_decimal(porcentaje, "multiplierDown"), _decimal(porcentaje, "multiplierUp"))
+                   if porcentaje else None),
+            banda_compra=((_decimal(por_lado, "bidMultiplierDown"), _decimal(por_lado, "bidMultiplierUp"))
+                          if por_lado else None),
+            banda_venta=((_decimal(por_lado, "askMultiplierDown"), _decimal(por_lado, "askMultiplierUp"))
+                         if por_lado else None),
+        )
+
+    # --- Comprobaciones ---
+
+    def cantidad(self, valor, mercado=False):
+        """Cantidad ajustada hacia abajo al paso; OrdenInvalida si queda fuera de LOT_SIZE"""
+        ajustada = _ajustar(valor, self.paso, ROUND_DOWN)
+        filtros = [("LOT_SIZE", self.cantidad_min, self.cantidad_max)]
+        if mercado:
+            ajustada = _ajustar(ajustada, self.paso_mercado, ROUND_DOWN)
+            filtros.append(("MARKET_LOT_SIZE", self.cantidad_min_mercado, self.cantidad_max_mercado))
+        if ajustada <= 0:
+            if self.paso is None:
+                raise OrdenInvalida(self.symbol, "LOT_SIZE", f"cantidad {_texto(valor)} <= 0")
+            raise OrdenInvalida(self.symbol, "LOT_SIZE", f"{_texto(valor)} queda en 0 con stepSize {_texto(self.paso)}")
+        for filtro, minimo, maximo in filtros:
+            if minimo is not None and ajustada < minimo:
+                raise OrdenInvalida(self.symbol, filtro, f"cantidad {_texto(ajustada)} < minQty {_texto(minimo)}")
+            if maximo is not None and ajustada > maximo:
+                raise OrdenInvalida(self.symbol, filtro, f"cantidad {_texto(ajustada)} > maxQty {_texto(maximo)}")
+        return ajustada
+
+    def precio(self, valor):
+        """Precio al tick más cercano; OrdenInvalida si queda fuera de PRICE_FILTER"""
+        ajustado = _ajustar(valor, self.tick, ROUND_HALF_UP)
+        if ajustado <= 0 or (self.precio_min is not None and ajustado < self.precio_min):
+            raise OrdenInvalida(self.symbol, "PRICE_FILTER", f"precio {_texto(ajustado)} < minPrice {self.precio_min or 0}")
+        if self.precio_max is not None and ajustado > self.precio_max:
+            raise OrdenInvalida(self.symbol, "PRICE_FILTER", f"precio {_texto(ajustado)} > maxPrice {_texto(self.precio_max)}")
+        return ajustado
+
+    def nominal(self, valor, mercado=False):
+        minimo = self.nominal_min if not mercado or self.nominal_min_mercado else None
+        maximo = self.nominal_max if not mercado or self.nominal_max_mercado else None
+        if minimo is not None and valor < minimo:
+            raise OrdenInvalida(self.symbol, "NOTIONAL", f"nominal {valor:.8f} < minNotional {_texto(minimo)}")
+        if maximo is not None and valor > maximo:
+            raise OrdenInvalida(self.symbol, "NOTIONAL", f"nominal {valor:.8f} > maxNotional {_texto(maximo)}")
+
+    def banda_precio(self, precio, lado, referencia):
+        for filtro, banda in (("PERCENT_PRICE", self.banda),
+                              ("PERCENT_PRICE_BY_SIDE", self.banda_compra if lado == "BUY" else self.banda_venta)):
+            if banda is None:
+                continue
+            abajo, arriba = banda
+            if abajo is not None and precio < referencia * abajo:
+                raise OrdenInvalida(self.symbol, filtro, f"precio {_texto(precio)} < {_texto(referencia * abajo)}")
+            if arriba is not None and precio > referencia * arriba:
+                raise OrdenInvalida(self.symbol, filtro, f"precio {_texto(precio)} > {_texto(referencia * arriba)}")
+
+
+class ValidadorOrdenes:
+    """Normaliza y valida órdenes con la caché de símbolos (cualquier objeto con get(symbol) -> InfoSimbolo)"""
+
+    def __init__(self, simbolos, precio_referencia=None):
+        self.simbolos = simbolos
+        self.precio_referencia = precio_referencia
+        self._reglas = {}                 # symbol -> (InfoSimbolo, ReglasSimbolo)
+        self._ultimo_precio = {}          # symbol -> Decimal del último fill visto
+        self._lock = threading.Lock()
+        # Monitorización
+        self.validadas = 0
+        self.ajustadas = 0
+        self.rechazadas = {}              # filtro -> órdenes
+
+    # --- Reglas por símbolo ---
+
+    def reglas(self, symbol):
+        """ReglasSimbolo precalculadas; se recalculan si la caché trae otro InfoSimbolo (refresco)"""
+        info = self.simbolos.get(symbol)
+        if info is None:
+            raise OrdenInvalida(symbol, "SYMBOL", "símbolo desconocido")
+        guardado = self._reglas.get(symbol)
+        if guardado is None or guardado[0] is not info:
+            guardado = self._reglas[symbol] = (info, ReglasSimbolo.desde_info(info))
+        return guardado[1]
+
+    def _referencia(self, symbol):
+        if self.precio_referencia is not None:
+            precio = self.precio_referencia(symbol)
+            if precio:
+                return Decimal(str(precio))
+        return self._ultimo_precio.get(symbol)
+
+    # --- Validación ---
+
+    def normalizar(self, params):
+        """Parámetros de create_order con cantidad y precios legales (texto); OrdenInvalida si no los hay"""
+        try:
+            return self._normalizar(dict(params))
+        except OrdenInvalida as e:
+            self._rechazada(e.filtro)
+            raise
+
+    def _normalizar(self, params):
+        symbol = params["symbol"]
+        reglas = self.reglas(symbol)
+        if not reglas.operable:
+            raise OrdenInvalida(symbol, "STATUS", "el símbolo no está en TRADING")
+        tipo = str(params.get("type", "")).upper()
+        lado = str(params.get("side", "")).upper()
+        mercado = tipo == "MARKET"
+        ajustes = []
+
+        for clave in _PRECIOS:
+            if params.get(clave) is not None:
+                original = Decimal(str(params[clave]))
+                params[clave] = self._campo(reglas.precio(original), original, clave, ajustes)
+        cantidad = None
+        if params.get("quantity") is not None:
+            original = Decimal(str(params["quantity"]))
+            cantidad = reglas.cantidad(original, mercado)
+            params["quantity"] = self._campo(cantidad, original, "quantity", ajustes)
+
+        referencia = self._referencia(symbol)
+        if params.get("quoteOrderQty") is not None:
+            reglas.nominal(Decimal(str(params["quoteOrderQty"])), mercado=True)
+        elif cantidad is not None:
+            precio = Decimal(params["price"]) if tipo in _CON_PRECIO and params.get("price") else referencia
+            if precio is not None:
+                reglas.nominal(cantidad * precio, mercado)
+        if tipo in _CON_PRECIO and params.get("price") and referencia is not None:
+            reglas.banda_precio(Decimal(params["price"]), lado, referencia)
+        self._validada(ajustes)
+        return params
+
+    def normalizar_oco(self, params):
+        """Igual que normalizar para create_order_oco: cantidad común y precio de cada tramo"""
+        try:
+            params = dict(params)
+            reglas = self.reglas(params["symbol"])
+            if not reglas.operable:
+                raise OrdenInvalida(params["symbol"], "STATUS", "el símbolo no está en TRADING")
+            ajustes = []
+            for clave in _PRECIOS_OCO:
+                if params.get(clave) is not None:
+                    original = Decimal(str(params[clave]))
+                    params[clave] = self._campo(reglas.precio(original), original, clave, ajustes)
+            original = Decimal(str(params["quantity"]))
+            cantidad = reglas.cantidad(original)
+            params["quantity"] = self._campo(cantidad, original, "quantity", ajustes)
+            # Cada tramo cuenta como una orden: su nominal con su precio límite
+            for clave in ("abovePrice", "belowPrice", "price", "stopLimitPrice"):
+                if params.get(clave) is not None:
+                    reglas.nominal(cantidad * Decimal(params[clave]))
+        except OrdenInvalida as e:
+            self._rechazada(e.filtro)
+            raise
+        self._validada(ajustes)
+        return params
+
+    def _campo(self, ajustado, original, clave, ajustes):
+        if ajustado != original:
+            ajustes.append(clave)
+        return _texto(ajustado)
+
+    def _validada(self, ajustes):
+        with self._lock:
+            self.validadas += 1
+            if ajustes:
+                self.ajustadas += 1
+        for clave in ajustes:
+            AJUSTADAS.inc(clave)
+
+    def _rechazada(self, filtro):
+        with self._lock:
+            self.rechazadas[filtro] = self.rechazadas.get(filtro, 0) + 1
+        RECHAZADAS.inc(filtro)
+
+    def observar_respuesta(self, respuesta):
+        """Aprende el precio de referencia del símbolo con los fills de una orden"""
+        if not isinstance(respuesta, dict):
+            return
+        fills = respuesta.get("fills") or ()
+        precio = fills[-1].get("price") if fills else None
+        if precio is None and float(respuesta.get("executedQty") or 0) > 0:
+            precio = float(respuesta.get("cummulativeQuoteQty") or 0) / float(respuesta["executedQty"])
+        if precio:
+            self._ultimo_precio[respuesta.get("symbol")] = Decimal(str(precio))
+
+    # --- Envoltura de clientes ---
+
+    async def _precargar(self, symbol):
+        # La primera orden del símbolo puede tener que descargar exchangeInfo: fuera del event loop
+        if symbol not in self._reglas:
+            try:
+                await asyncio.to_thread(self.reglas, symbol)
+            except OrdenInvalida:
+                pass     # normalizar lo rechaza y lo cuenta
+
+    def aplicar(self, client):
+        """Hace que create_order y create_oco_order de `client` (síncrono o asíncrono) pasen por el validador"""
+        if getattr(client, "validador", None) is self:
+            return client
+        crear, crear_oco = client.create_order, client.create_oco_order
+
+        if inspect.iscoroutinefunction(crear):
+            async def create_order(**params):
+                await self._precargar(params.get("symbol"))
+                respuesta = await crear(**self.normalizar(params))
+                self.observar_respuesta(respuesta)
+                return respuesta
+
+            async def create_oco_order(**params):
+                await self._precargar(params.get("symbol"))
+                return await crear_oco(**self.normalizar_oco(params))
+        else:
+            def create_order(**params):
+                respuesta = crear(**self.normalizar(params))
+                self.observar_respuesta(respuesta)
+                return respuesta
+
+            def create_oco_order(**params):
+                return crear_oco(**self.normalizar_oco(params))
+
+        client.create_order = create_order
+        client.create_oco_order = create_oco_order
+        client.validador = self
+        return client
+
+    # --- Monitorización ---
+
+    def ahorradas(self):
+        """Idas y vueltas que Binance habría rechazado: las rechazadas aquí y las que se enviaron ya ajustadas"""
+        with self._lock:
+            return sum(self.rechazadas.values()) + self.ajustadas
+
+    def resumen(self):
+        with self._lock:
+            rechazadas = sum(self.rechazadas.values())
+            detalle = ", ".join(f"{filtro} {n}" for filtro, n in sorted(self.rechazadas.items()))
+            texto = (f"🛡 Validador: {self.validadas} órdenes válidas ({self.ajustadas} ajustadas), "
+                     f"{rechazadas} rechazadas antes de enviarlas")
+        texto += f" ({detalle})" if detalle else ""
+        return texto + f"; {self.ahorradas()} rechazos de Binance evitados"
@@ -0,0 +1,177 @@
+"""
+Valoración de la cartera en USDT (o en cualquier otro activo) sin colocar órdenes.
+
+Con exchangeInfo se construye una vez el grafo de conversión: cada símbolo
+TRADING une su activo base con su activo de cotización. Para cada activo de
+destino se precalcula por BFS la ruta más corta desde todos los demás,
+prefiriendo como puentes los activos más líquidos (USDT, BTC, ETH, BNB...).
+Valorar la cartera cuesta entonces una sola petición, get_all_tickers
+(precio de todos los símbolos), y recorrer la ruta de cada saldo no nulo.
+"""
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+PUENTES = ("USDT", "BTC", "ETH", "BNB", "FDUSD", "USDC")   # intermedios preferidos, por orden
+TTL_GRAFO = 3600          # segundos antes de reconstruir el grafo desde exchangeInfo
+
+
+class GrafoConversion:
+    """Activos unidos por los símbolos que los negocian, con rutas precalculadas por destino"""
+
+    def __init__(self, simbolos):
+        # activo -> [(vecino, símbolo, True si el activo es la base del símbolo)]
+        self._vecinos = {}
+        for symbol, base, quote in simbolos:
+            self._vecinos.setdefault(base, []).append((quote, symbol, True))
+            self._vecinos.setdefault(quote, []).append((base, symbol, False))
+        prioridad = {activo: i for i, activo in enumerate(PUENTES)}
+        for aristas in self._vecinos.values():
+            aristas.sort(key=lambda arista: (prioridad.get(arista[0], len(PUENTES)), arista[0]))
+        self._rutas = {}          # destino -> {activo: ((símbolo, es_base), ...)}
+        self.creado = time.monotonic()
+
+    @classmethod
+    def desde_exchange_info(cls, info):
+        return cls((s["symbol"], s["baseAsset"], s["quoteAsset"])
+                   for s in info["symbols"] if s.get("status", "TRADING") == "TRADING")
+
+    @classmethod
+    def desde_cache(cls, cache):
+        return cls((i.symbol, i.base_asset, i.quote_asset) for i in cache.simbolos(estados={"TRADING"}))
+
+    def rutas(self, destino):
+        """Ruta de cada activo alcanzable hasta `destino` (BFS desde el destino, calculado una vez)"""
+        rutas = self._rutas.get(destino)
+        if rutas is None:
+            rutas = {destino: ()}
+            pendientes = deque([destino])
+            while pendientes:
+                activo = pendientes.popleft()
+                for vecino, symbol, activo_es_base in self._vecinos.get(activo, ()):
+                    if vecino not in rutas:
+                        # Del vecino se llega al activo por este símbolo y luego por la ruta del activo
+                        rutas[vecino] = ((symbol, not activo_es_base),) + rutas[activo]
+                        pendientes.append(vecino)
+            self._rutas[destino] = rutas
+        return rutas
+
+    def ruta(self, activo, destino):
+        return self.rutas(destino).get(activo)
+
+
+@dataclass
+class Posicion:
+    activo: str
+    cantidad: float
+    precio: float          # en el activo de destino
+    valor: float
+    ruta: tuple            # símbolos recorridos, vacío si el activo es el destino
+
+
+@dataclass
+class Valoracion:
+    destino: str
+    total: float
+    posiciones: list
+    sin_precio: list = field(default_factory=list)    # activos sin ruta o sin precio en el snapshot
+    ts: float = field(default_factory=time.time)
+
+    def texto(self, fraccion_minima=0.001):
+        """Resumen Markdown por valor descendente; las posiciones de menos de esa fracción del total se agrupan"""
+        lineas = [f"💼 *Valor total estimado:* `{_formato(self.total)} {self.destino}`"]
+        minimo = self.total * fraccion_minima
+        pequenas = 0.0
+        for p in self.posiciones:
+            if p.valor < minimo:
+                pequenas += p.valor
+                continue
+            via = f" vía {' → '.join(p.ruta)}" if len(p.ruta) > 1 else ""
+            lineas.append(f"   - {p.activo}: {p.cantidad:.8g} ≈ `{_formato(p.valor)} {self.destino}`{via}")
+        if pequenas:
+            lineas.append(f"   - Otros: `{_formato(pequenas)} {self.destino}`")
+        if self.sin_precio:
+            lineas.append(f"   ⚠️ Sin precio: {', '.join(self.sin_precio)}")
+        return "\n".join(lineas)
+
+
+def _formato(valor):
+    # Dos decimales para importes grandes, cifras significativas para BTC, ETH...
+    return f"{valor:,.2f}" if abs(valor) >= 1 else f"{valor:.8g}"
+
+
+def _cantidad(saldo):
+    # LibroSaldos.saldos() da (libre, bloqueado); también se admite un número
+    return sum(saldo) if isinstance(saldo, (tuple, list)) else float(saldo)
+
+
+def valorar(grafo, saldos, precios, destino="USDT"):
+    """
+    Valora `saldos` (activo -> cantidad o (libre, bloqueado)) en `destino` con
+    `precios` (símbolo -> último precio, número o texto de get_all_tickers)
+    """
+    rutas = grafo.rutas(destino)
+    posiciones, sin_precio = [], []
+    for activo, saldo in saldos.items():
+        cantidad = _cantidad(saldo)
+        if cantidad <= 0:
+            continue
+        ruta = rutas.get(activo)
+        precio = None if ruta is None else 1.0
+        for symbol, es_base in ruta or ():
+            ultimo = float(precios.get(symbol) or 0)
+            if ultimo <= 0:
+                precio = None
+                break
+            precio = precio * ultimo if es_base else precio / ultimo
+        if precio is None:
+            sin_precio.append(activo)
+            continue
+        posiciones.append(Posicion(activo, cantidad, precio, cantidad * precio, tuple(s for s, _ in ruta)))
+    posiciones.sort(key=lambda p: p.valor, reverse=True)
+    return Valoracion(destino, sum(p.valor for p in posiciones), posiciones, sorted(sin_precio))
+
+
+def precios_snapshot(tickers):
+    """get_all_tickers -> {símbolo: precio en texto}; el float se hace solo para los símbolos de las rutas"""
+    return {t["symbol"]: t["price"] for t in tickers}
+
+
+class MotorValoracion:
+    """
+    Valoración de las cuentas de un cliente (Client, ClienteSimulado o AsyncClient).
+    El grafo sale de la caché de símbolos del cliente si la tiene o de un
+    get_exchange_info, y se reutiliza TTL_GRAFO segundos.
+    """
+
+    def __init__(self, client, grafo=None):
+        self.client = client
+        self.grafo_conversion = grafo
+
+    def _vigente(self):
+        return self.grafo_conversion is not None and time.monotonic() - self.grafo_conversion.creado < TTL_GRAFO
+
+    def grafo(self):
+        if not self._vigente():
+            cache = getattr(self.client, "simbolos", None)
+            self.grafo_conversion = (GrafoConversion.desde_cache(cache) if cache is not None
+                                     else GrafoConversion.desde_exchange_info(self.client.get_exchange_info()))
+        return self.grafo_conversion
+
+    def valorar(self, destino="USDT", saldos=None):
+        """Una petición de precios (más la de la cuenta si el libro de saldos no está vigente)"""
+        grafo = self.grafo()
+        if saldos is None:
+            saldos = self.client.saldos.saldos()
+        return valorar(grafo, saldos, precios_snapshot(self.client.get_all_tickers()), destino)
+
+    async def valorar_async(self, destino="USDT", saldos=None, llamar=None):
+        """Variante para AsyncClient; `llamar` envuelve cada petición (p. ej. MotorTrading.llamar)"""
+        llamar = llamar or (lambda funcion, *args, **kwargs: funcion(*args, **kwargs))
+        if not self._vigente():
+            self.grafo_conversion = GrafoConversion.desde_exchange_info(await llamar(self.client.get_exchange_info))
+        if saldos is None:
+            # Nunca saldos(): si una orden invalida el libro, refrescaría con el AsyncClient desde código síncrono
+            saldos = await llamar(self.client.saldos.saldos_async)
+        precios = precios_snapshot(await llamar(self.client.get_all_tickers))
+        return valorar(self.grafo_conversion, saldos, precios, destino)